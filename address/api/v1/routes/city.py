@@ -10,6 +10,7 @@ from address.api.v1.swagger import get_cities_schema
 from common.exceptions import ErrorException
 from common.cores.validators import validate_id
 from common.utils.api_responses import SuccessAPIResponse
+from common.utils.conditional import conditional_get, list_validators
 
 
 class CityListView(APIView):
@@ -28,15 +29,20 @@ class CityListView(APIView):
             )
         validate_id(state_id, 'state')
         cities = City.objects.filter(state__id=state_id)
-        if not cities.exists():
+        etag, last_modified, count = list_validators(cities)
+        if not count:
             raise ErrorException(
                 detail="No cities found for the provided state ID.",
                 code='not_found',
                 status_code=status.HTTP_404_NOT_FOUND
             )
-        serializers = CitySerializer(cities, many=True)
-        return Response(SuccessAPIResponse(
-            messages="Cities retrieved successfully.",
-            data=serializers.data
-        ).to_dict(), status=status.HTTP_200_OK)
+
+        def respond():
+            serializers = CitySerializer(cities, many=True)
+            return Response(SuccessAPIResponse(
+                messages="Cities retrieved successfully.",
+                data=serializers.data
+            ).to_dict(), status=status.HTTP_200_OK)
+
+        return conditional_get(request, respond, etag, last_modified)
     
\ No newline at end of file
@@ -8,6 +8,7 @@ from address.models import Country
 from address.api.v1.serializers import CountrySerializer
 from address.api.v1.swagger import get_countries_schema
 from common.utils.api_responses import SuccessAPIResponse
+from common.utils.conditional import conditional_get, list_validators
 
 
 class CountryListView(APIView):
@@ -19,8 +20,13 @@ class CountryListView(APIView):
         Get a liat of all supported countries.
         """
         countries = Country.objects.all()
-        serializers = CountrySerializer(countries, many=True)
-        return Response(SuccessAPIResponse(
-            message="Countries retrieved successfully.",
-            data=serializers.data
-        ).to_dict(), status=status.HTTP_200_OK)
+        etag, last_modified, _ = list_validators(countries)
+
+        def respond():
+            serializers = CountrySerializer(countries, many=True)
+            return Response(SuccessAPIResponse(
+                message="Countries retrieved successfully.",
+                data=serializers.data
+            ).to_dict(), status=status.HTTP_200_OK)
+
+        return conditional_get(request, respond, etag, last_modified)
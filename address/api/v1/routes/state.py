@@ -9,6 +9,7 @@ from address.api.v1.serializers import StateSerializer
 from address.api.v1.swagger import get_states_schema
 from common.exceptions import ErrorException
 from common.utils.api_responses import SuccessAPIResponse
+from common.utils.conditional import conditional_get, list_validators
 
 
 class StateListView(APIView):
@@ -26,14 +27,19 @@ class StateListView(APIView):
                 code='missing_country',
             )
         states = State.objects.filter(country__code=country_code)
-        if not states.exists():
+        etag, last_modified, count = list_validators(states)
+        if not count:
             raise ErrorException(
                 detail=f"No states found for country code: {country_code}",
                 code='no_states_found',
                 status_code=status.HTTP_404_NOT_FOUND
             )
-        serializers = StateSerializer(states, many=True)
-        return Response(SuccessAPIResponse(
-            message="States retrieved successfully.",
-            data=serializers.data
-        ).to_dict(), status=status.HTTP_200_OK)
+
+        def respond():
+            serializers = StateSerializer(states, many=True)
+            return Response(SuccessAPIResponse(
+                message="States retrieved successfully.",
+                data=serializers.data
+            ).to_dict(), status=status.HTTP_200_OK)
+
+        return conditional_get(request, respond, etag, last_modified)
@@ -14,6 +14,7 @@ class Country(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, null=False)
     name = models.CharField(max_length=30, null=False)
     code = models.CharField(max_length=2, unique=True, null=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = 'Countries'
@@ -48,6 +49,7 @@ class State(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, null=False)
     name = models.CharField(max_length=32, null=False)
     country = models.ForeignKey(Country, on_delete=models.CASCADE, related_name='states')
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['name']
@@ -63,6 +65,7 @@ class City(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, null=False)
     name = models.CharField(max_length=52, null=False)
     state = models.ForeignKey(State, on_delete=models.CASCADE, related_name='cities')
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = 'Cities'
@@ -62,4 +62,22 @@ def test_get_states_by_unauthenticated_user(client, load_locations_to_db):
     res = client.get(url)
     assert res.status_code == status.HTTP_401_UNAUTHORIZED
     assert res.data['message'] == "Token is invalid or expired"
-    
\ No newline at end of file
+    
+
+
+def test_get_states_not_modified(client, load_locations_to_db, customer, state_factory):
+    """
+    Test revalidating the states of a country.
+    """
+    client.force_authenticate(user=customer)
+    url = f"{reverse('states')}?country=NG"
+    res = client.get(url)
+    assert res['ETag']
+
+    res2 = client.get(url, HTTP_IF_NONE_MATCH=res['ETag'])
+    assert res2.status_code == status.HTTP_304_NOT_MODIFIED
+
+    state_factory(name='New State', country=State.objects.first().country)
+    res3 = client.get(url, HTTP_IF_NONE_MATCH=res['ETag'])
+    assert res3.status_code == status.HTTP_200_OK
+    assert len(res3.data['data']) == len(res.data['data']) + 1
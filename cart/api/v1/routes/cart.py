@@ -40,7 +40,7 @@ class CartDetailView(APIView):
             
         product_id = request.data.get('product_id')
         validate_id(product_id, "product")
-        product = Product.objects.select_related('inventory').filter(
+        product = Product.objects.filter(
             id=product_id,
             is_active=True
         ).first()
@@ -86,7 +86,7 @@ class CartDetailView(APIView):
                 code='not_found',
                 status_code=status.HTTP_404_NOT_FOUND
             )
-        cart_items = cart.items.select_related("product__inventory")
+        cart_items = cart.items.select_related("product")
         validated = validate_cart(cart_items)
         return Response(SuccessAPIResponse(
             message='Cart retrieved successfully.',
@@ -138,7 +138,7 @@ class CartItemDetailView(APIView):
                 status_code=status.HTTP_404_NOT_FOUND
             )
         validate_id(cart_item_id, "cart item")
-        item = cart.items.select_related('product__inventory').filter(id=cart_item_id).first()
+        item = cart.items.select_related('product').filter(id=cart_item_id).first()
         if not item:
             raise ErrorException(
                 detail="No item matching given ID found in cart.",
@@ -1,6 +1,7 @@
 from rest_framework import status
 
 from product.api.v1.serializers import ProductSerializer
+from product.utils.stock_cache import get_stocks
 
 
 def validate_cart(cart_items, inventory_map=None):
@@ -8,13 +9,17 @@ def validate_cart(cart_items, inventory_map=None):
     Unified cart validator.
 
     Modes:
-    - Pre-check: inventory_map=None → uses product.stock
-    - Post-lock: inventory_map=locked inventories → uses DB truth
+    - Pre-check: inventory_map=None → uses the stock cache
+    - Post-lock: inventory_map={product id: inventory} → uses DB truth
     """
     response = {
         "is_valid": True,
         "items": []
     }
+    stocks = None
+    if inventory_map is None:
+        # one cache lookup for the whole cart
+        stocks = get_stocks(item.product_id for item in cart_items if item.product_id)
     
     for item in cart_items:
         product = item.product
@@ -38,10 +43,10 @@ def validate_cart(cart_items, inventory_map=None):
         # Determine stock source
         if inventory_map is None:
             # PRE-CHECK MODE (UX only)
-            stock = product.stock
+            stock = stocks.get(product.id, 0)
         else:
             # POST-LOCK MODE (authoritative truth)
-            inv = inventory_map.get(product.inventory_id)
+            inv = inventory_map.get(product.id)
             if not inv:
                 _item["status"] = "inventory_missing"
                 _item["issue"] = "Inventory missing"
@@ -49,7 +54,7 @@ def validate_cart(cart_items, inventory_map=None):
                 response["items"].append(_item)
                 continue
              
-            stock = inv._stock
+            stock = inv.available
 
         _item["stock"] = stock
         _item["product"] = ProductSerializer(
@@ -0,0 +1,170 @@
+from collections import Counter
+from datetime import datetime, timezone
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.db.models import Count
+
+import os
+import time
+
+from common.models import MAX_SWEEP_ATTEMPTS, MediaBlob, MediaTombstone, file_names
+
+
+class Command(BaseCommand):
+    help = (
+        "Fix the reference counts of media blobs and remove the files "
+        "under MEDIA_ROOT that no row refers to."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Report what would be fixed without changing anything."
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=3600,
+            help="Only remove files and blobs older than this many seconds, "
+                 "so uploads being saved or processed are left alone."
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Number of rows loaded per query."
+        )
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.batch_size = options['batch_size']
+
+        cutoff = time.time() - options['min_age']
+        fixed, unused = self.recount_blobs(datetime.fromtimestamp(cutoff, tz=timezone.utc))
+        referenced = self.referenced_names()
+        removed = self.remove_orphans(referenced, cutoff)
+        if not self.dry_run:
+            # their files were just removed, or are referenced again
+            MediaTombstone.objects.filter(attempts__gte=MAX_SWEEP_ATTEMPTS).delete()
+
+        prefix = "Would fix" if self.dry_run else "Fixed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {fixed} blob reference counts, {unused} unused blobs "
+            f"and {removed} orphaned files."
+        ))
+
+    @staticmethod
+    def count_references(blob_ids):
+        """
+        Return the number of rows pointing to each of the given blobs.
+        """
+        refs = Counter()
+        for field in MediaBlob._meta.get_fields(include_hidden=True):
+            if not (field.one_to_many and field.auto_created):
+                continue
+            column = field.field.attname
+            counts = (
+                field.related_model.objects
+                    .filter(**{f"{column}__in": blob_ids})
+                    .order_by()
+                    .values_list(column)
+                    .annotate(count=Count('pk'))
+            )
+            for blob_id, count in counts:
+                refs[blob_id] += count
+        return refs
+
+    def recount_blobs(self, created_before):
+        """
+        Set the reference count of every blob created before the given
+        time to the number of rows pointing to it, and delete those no
+        row points to. Newer blobs may be registered by an image being
+        processed and not attached to it yet.
+        Each batch of blobs is locked while its references are counted
+        and its counts written, so concurrent acquires and releases of
+        those blobs wait instead of being overwritten.
+        """
+        fixed = 0
+        unused = 0
+        blobs = MediaBlob.objects.filter(created_at__lt=created_before).order_by('id')
+        while True:
+            with transaction.atomic():
+                batch = list(blobs.select_for_update()[:self.batch_size])
+                refs = self.count_references([blob.id for blob in batch])
+                changed = []
+                released = []
+                for blob in batch:
+                    if not refs[blob.id]:
+                        released.append(blob.id)
+                    elif blob.ref_count != refs[blob.id]:
+                        blob.ref_count = refs[blob.id]
+                        changed.append(blob)
+
+                if not self.dry_run:
+                    MediaBlob.objects.bulk_update(changed, ['ref_count'])
+                    if released:
+                        # released down to zero and deleted with their files
+                        MediaBlob.objects.filter(id__in=released).update(ref_count=1)
+                        MediaBlob.release(released)
+            fixed += len(changed)
+            unused += len(released)
+            if len(batch) < self.batch_size:
+                return fixed, unused
+            blobs = blobs.filter(id__gt=batch[-1].id)
+
+    def referenced_names(self):
+        """
+        Return the storage names of every file a row refers to: file
+        fields, stored blobs and {format: {size: name}} renditions.
+        """
+        names = set()
+        for model in apps.get_models():
+            fields = [
+                f.attname for f in model._meta.concrete_fields
+                if isinstance(f, models.FileField)
+            ]
+            renditions = [
+                f.attname for f in model._meta.concrete_fields
+                if isinstance(f, models.JSONField) and f.name == 'renditions'
+            ]
+            if model is MediaBlob:
+                fields.append('name')
+            if not fields and not renditions:
+                continue
+            rows = model.objects.order_by().values_list(*fields, *renditions)
+            for row in rows.iterator(chunk_size=self.batch_size):
+                names.update(value for value in row[:len(fields)] if value)
+                for value in row[len(fields):]:
+                    names.update(file_names(None, value))
+        return names
+
+    def remove_orphans(self, referenced, cutoff):
+        """
+        Remove the files under MEDIA_ROOT modified before cutoff that are
+        not referenced, then the directories left empty.
+        """
+        root = str(settings.MEDIA_ROOT)
+        removed = 0
+        # directories emptied here, whose modification time is now recent
+        emptied = set()
+        for dirpath, _, filenames in os.walk(root, topdown=False):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                if name in referenced or os.path.getmtime(path) > cutoff:
+                    continue
+                removed += 1
+                if self.dry_run:
+                    self.stdout.write(f"Orphaned: {name}")
+                else:
+                    os.remove(path)
+                    emptied.add(dirpath)
+            if self.dry_run or dirpath == root or os.listdir(dirpath):
+                continue
+            if dirpath in emptied or os.path.getmtime(dirpath) <= cutoff:
+                os.rmdir(dirpath)
+                emptied.add(os.path.dirname(dirpath))
+        return removed
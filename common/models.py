@@ -0,0 +1,206 @@
+from collections import Counter
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+
+import hashlib
+import os
+
+
+# attempts to delete a queued file before leaving it to reconcile_media
+MAX_SWEEP_ATTEMPTS = 5
+
+
+class MediaBlob(models.Model):
+    """
+    Media file stored once per content.
+    Files are named after the SHA-256 digest of the uploaded bytes and
+    shared by every row uploading the same bytes. The blob and its files
+    are deleted when the last reference is released.
+    """
+    # what the uploaded bytes are stored as, e.g. a processed product image
+    kind = models.CharField(max_length=20)
+    digest = models.CharField(max_length=64)
+    # storage name of the stored file
+    name = models.CharField(max_length=255)
+    # {format: {size: storage name}} of the resized copies of the file
+    renditions = models.JSONField(default=dict, blank=True)
+    size = models.PositiveIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'digest'], name='unique_media_blob_per_kind')
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the MediaBlob object.
+        """
+        return f"<MediaBlob: {self.digest[:12]}> {self.name} ({self.ref_count})"
+
+    @staticmethod
+    def content_digest(file):
+        """
+        Return the SHA-256 hex digest of a file, leaving it at its start.
+        """
+        h = hashlib.sha256()
+        for chunk in file.chunks():
+            h.update(chunk)
+        file.seek(0)
+        return h.hexdigest()
+
+    @staticmethod
+    def blob_name(kind, digest, filename):
+        """
+        Return the storage name of content, keeping the file extension.
+        e.g. blobs/product-image/ab/cd/abcd...ef.jpg
+        """
+        _, ext = os.path.splitext(filename)
+        return f"blobs/{kind}/{digest[:2]}/{digest[2:4]}/{digest}{ext.lower()}"
+
+    @classmethod
+    def acquire(cls, kind, digest):
+        """
+        Take a reference to the blob of the given digest.
+        Returns None if the content is not stored.
+        """
+        with transaction.atomic():
+            blob = cls.objects.select_for_update().filter(kind=kind, digest=digest).first()
+            if blob:
+                cls.objects.filter(id=blob.id).update(ref_count=F('ref_count') + 1)
+                blob.ref_count += 1
+            return blob
+
+    @classmethod
+    def register(cls, kind, digest, name, renditions=None, size=0):
+        """
+        Register stored files as the blob of the given digest, with one
+        reference. If the same content was registered concurrently, the
+        given files are deleted and that blob is referenced instead.
+        """
+        try:
+            with transaction.atomic():
+                return cls.objects.create(
+                    kind=kind,
+                    digest=digest,
+                    name=name,
+                    renditions=renditions or {},
+                    size=size,
+                    ref_count=1
+                )
+        except IntegrityError:
+            cls.delete_files(name, renditions)
+            blob = cls.acquire(kind, digest)
+            if blob is None:
+                # released in between, store it again
+                return cls.register(kind, digest, name, renditions, size)
+            return blob
+
+    @classmethod
+    def release(cls, blob_ids):
+        """
+        Drop one reference per given blob id.
+        Blobs no longer referenced are deleted with their files.
+        """
+        counts = Counter(i for i in blob_ids if i is not None)
+        if not counts:
+            return
+        with transaction.atomic():
+            blobs = list(cls.objects.select_for_update().filter(id__in=counts))
+            unused = [b for b in blobs if b.ref_count <= counts[b.id]]
+            for blob in blobs:
+                blob.ref_count = max(blob.ref_count - counts[blob.id], 0)
+            cls.objects.bulk_update([b for b in blobs if b.ref_count], ['ref_count'])
+            if unused:
+                cls.objects.filter(id__in=[b.id for b in unused]).delete()
+                MediaTombstone.enqueue(
+                    name for blob in unused for name in file_names(blob.name, blob.renditions))
+
+    @staticmethod
+    def delete_files(name, renditions=None):
+        """
+        Delete a stored file and its renditions.
+        """
+        for path in file_names(name, renditions):
+            default_storage.delete(path)
+
+
+class MediaTombstone(models.Model):
+    """
+    Media file waiting to be deleted.
+    Deletes only queue the storage names of files, which are swept in
+    batches in the background (see common.tasks.sweep_media_tombstones).
+    """
+    # storage name of a file, or of a directory to remove once empty
+    path = models.CharField(max_length=255)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        """
+        Returns a string representation of the MediaTombstone object.
+        """
+        return f"<MediaTombstone: {self.id}> {self.path}"
+
+    @classmethod
+    def enqueue(cls, paths):
+        """
+        Queue storage names for deletion, in the given order.
+        """
+        cls.objects.bulk_create([cls(path=str(path)) for path in paths if path])
+
+    @classmethod
+    def sweep(cls, batch_size=500):
+        """
+        Delete queued files, oldest first, a batch at a time.
+        Files still used by a blob are skipped, files that cannot be
+        deleted are retried up to MAX_SWEEP_ATTEMPTS times.
+        Returns the number of tombstones cleared.
+        """
+        swept = 0
+        last_id = 0
+        while True:
+            # each tombstone is tried once per sweep
+            batch = list(
+                cls.objects
+                    .filter(id__gt=last_id, attempts__lt=MAX_SWEEP_ATTEMPTS)
+                    .order_by('id')[:batch_size]
+            )
+            if not batch:
+                break
+            # content stored again since it was queued
+            in_use = set(
+                MediaBlob.objects
+                    .filter(name__in=[t.path for t in batch])
+                    .values_list('name', flat=True)
+            )
+            done = []
+            failed = []
+            for tombstone in batch:
+                try:
+                    if tombstone.path not in in_use:
+                        # directories are removed only once empty
+                        default_storage.delete(tombstone.path)
+                    done.append(tombstone.id)
+                except OSError:
+                    failed.append(tombstone.id)
+            cls.objects.filter(id__in=done).delete()
+            cls.objects.filter(id__in=failed).update(attempts=F('attempts') + 1)
+            swept += len(done)
+            last_id = batch[-1].id
+            if len(batch) < batch_size:
+                break
+        return swept
+
+
+def file_names(name, renditions=None):
+    """
+    Return the storage names of a file and its renditions, renditions
+    first so that the name stays taken until they are all deleted.
+    """
+    names = [path for sizes in (renditions or {}).values() for path in sizes.values()]
+    if name:
+        names.append(name)
+    return names
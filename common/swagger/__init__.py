@@ -9,6 +9,7 @@ from .error import (
     make_not_found_error_schema_response, # 404
     build_invalid_id_error
 )
+from .pagination import pagination_parameters
 from .success import make_success_schema_response
 
 __all__ = [
@@ -21,5 +22,6 @@ __all__ = [
     'make_not_found_error_schema_response',
     'make_error_schema_response',
     'make_error_schema_response_with_errors_field',
-    'build_invalid_id_error'
+    'build_invalid_id_error',
+    'pagination_parameters'
 ]
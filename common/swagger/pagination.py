@@ -0,0 +1,37 @@
+from drf_spectacular.utils import OpenApiParameter, OpenApiTypes
+
+
+# QUERY PARAMETERS SHARED BY PAGINATED LIST ENDPOINTS
+pagination_parameters = [
+    OpenApiParameter(
+        name='page',
+        type=OpenApiTypes.INT,
+        description="Page number. Used with the default page number pagination.",
+        location=OpenApiParameter.QUERY,
+        required=False
+    ),
+    OpenApiParameter(
+        name='pagination',
+        type=OpenApiTypes.STR,
+        description="Pass 'cursor' to use cursor pagination. The response then \
+            has no 'count' and 'next'/'previous' hold opaque cursor links. \
+            Any 'ordering' parameter is ignored in this mode.",
+        location=OpenApiParameter.QUERY,
+        required=False
+    ),
+    OpenApiParameter(
+        name='cursor',
+        type=OpenApiTypes.STR,
+        description="Opaque cursor taken from the 'next' or 'previous' link.",
+        location=OpenApiParameter.QUERY,
+        required=False
+    ),
+    OpenApiParameter(
+        name='include_total',
+        type=OpenApiTypes.BOOL,
+        description="Cursor pagination only. Include an approximate 'total' \
+            (capped at 1000) and a 'total_is_exact' flag in the response.",
+        location=OpenApiParameter.QUERY,
+        required=False
+    ),
+]
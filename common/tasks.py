@@ -0,0 +1,11 @@
+from celery import shared_task
+
+from common.models import MediaTombstone
+
+
+@shared_task
+def sweep_media_tombstones(batch_size=500):
+    """
+    Delete the media files queued for deletion.
+    """
+    return MediaTombstone.sweep(batch_size=batch_size)
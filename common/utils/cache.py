@@ -0,0 +1,236 @@
+"""
+Versioned cache for serialized catalog payloads.
+
+Every cached payload key embeds the current version of the objects it
+was built from (a product, a shop catalog, the categories). Writes bump
+those versions instead of deleting keys, so stale payloads are simply
+never looked up again and expire on their own.
+
+Versions are only bumped in the cache of the process handling the write.
+Without a shared cache (CACHE_SHARED) the other workers keep their old
+versions, so payloads are kept for a few seconds only.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from datetime import datetime, timezone
+import hashlib
+import time
+
+
+PAYLOAD_TIMEOUT = 60 * 60  # 1 hour
+# payloads of a process-local cache, which writes in other workers cannot invalidate
+LOCAL_PAYLOAD_TIMEOUT = 10  # seconds
+
+CATEGORIES_VERSION_KEY = 'catalog:version:categories'
+PRODUCTS_VERSION_KEY = 'catalog:version:products'
+HITS_KEY = 'catalog:stats:hits'
+MISSES_KEY = 'catalog:stats:misses'
+
+
+def product_version_key(product_id):
+    return f"catalog:version:product:{product_id}"
+
+
+def shop_version_key(shop_id):
+    return f"catalog:version:shop:{shop_id}"
+
+
+def product_dependencies(product_id, shop_id):
+    """
+    Version keys of a product payload, which nests its shop and categories.
+    """
+    return [
+        product_version_key(product_id),
+        shop_version_key(shop_id),
+        CATEGORIES_VERSION_KEY
+    ]
+
+
+def shop_catalog_dependencies(shop_id):
+    """
+    Version keys of a shop catalog payload.
+    """
+    return [shop_version_key(shop_id), CATEGORIES_VERSION_KEY]
+
+
+def _new_version():
+    """
+    Versions are the time of the last change, in nanoseconds, so that
+    a version lost to eviction never restarts at a value an old payload
+    was built with, and so they double as modification times.
+    """
+    return time.time_ns()
+
+
+def versions_last_modified(versions):
+    """
+    Return the time of the latest of the given versions.
+    """
+    return datetime.fromtimestamp(max(versions) / 1e9, tz=timezone.utc)
+
+
+def get_versions(keys):
+    """
+    Return the current versions for the given version keys.
+    """
+    versions = cache.get_many(keys)
+    missing = {k: _new_version() for k in keys if k not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[k] for k in keys]
+
+
+def _bump(keys):
+    cache.set_many({key: _new_version() for key in keys}, timeout=None)
+
+
+def bump_versions(keys):
+    """
+    Bump the given versions now and once more when the current
+    transaction commits, so a payload cached from data read before
+    the commit is never served.
+    """
+    _bump(keys)
+    transaction.on_commit(lambda: _bump(keys))
+
+
+def invalidate_product(product_id, shop_id):
+    """
+    Invalidate the payloads of a product and of its shop catalog.
+    """
+    bump_versions([
+        product_version_key(product_id),
+        shop_version_key(shop_id),
+        PRODUCTS_VERSION_KEY
+    ])
+
+
+def invalidate_products(products):
+    """
+    Invalidate the payloads of several products and their shop catalogs.
+    Args:
+        products - iterable of (product_id, shop_id) pairs.
+    """
+    keys = {PRODUCTS_VERSION_KEY}
+    for product_id, shop_id in products:
+        keys.add(product_version_key(product_id))
+        keys.add(shop_version_key(shop_id))
+    if len(keys) > 1:
+        bump_versions(list(keys))
+
+
+def invalidate_shop(shop_id):
+    """
+    Invalidate the payloads of a shop catalog.
+    """
+    bump_versions([shop_version_key(shop_id), PRODUCTS_VERSION_KEY])
+
+
+def invalidate_categories():
+    """
+    Invalidate every payload that nests categories.
+    """
+    bump_versions([CATEGORIES_VERSION_KEY])
+
+
+def _record(key):
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+
+
+def get_stats():
+    """
+    Return the hit and miss counters of the catalog cache.
+    """
+    stats = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits = stats.get(HITS_KEY, 0)
+    misses = stats.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else 0.0
+    }
+
+
+def is_cacheable(request):
+    """
+    Super users see extra shop fields, their payloads are not cached.
+    """
+    return not request.user.is_superuser
+
+
+def payload_variant(request):
+    """
+    Part of the key for everything the payload depends on
+    besides the data: the host used for absolute media URLs, and the
+    viewer since shop members see their shop code.
+    """
+    user = request.user
+    viewer = f"staff:{user.id}" if user.is_staff else 'public'
+    return f"{request.scheme}://{request.get_host()}|{viewer}"
+
+
+def _digest(name, versions, request, params):
+    raw = repr((name, versions, payload_variant(request), sorted((params or {}).items())))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def get_validators(request, name, version_keys, params=None, state=None):
+    """
+    Return the (etag, last_modified) validators of a payload, or
+    (None, None) for payloads that are not cacheable.
+    With a shared cache they are built from the versions of the payload.
+    Without one, other workers would answer 304 with their own versions
+    long after a change, so only an ETag is built, from state().
+    Args:
+        state - callable returning the values of the payload read from
+        the database, see product.utils.conditional.
+        Others are the same as for get_or_build.
+    """
+    if not is_cacheable(request):
+        return None, None
+    if not settings.CACHE_SHARED:
+        if state is None:
+            return None, None
+        return f'"{_digest(name, state(), request, params)}"', None
+    versions = get_versions(list(version_keys))
+    etag = f'"{_digest(name, versions, request, params)}"'
+    return etag, versions_last_modified(versions)
+
+
+def payload_timeout():
+    return PAYLOAD_TIMEOUT if settings.CACHE_SHARED else LOCAL_PAYLOAD_TIMEOUT
+
+
+def get_or_build(request, name, version_keys, build, params=None):
+    """
+    Return the cached payload for the current versions of version_keys,
+    building and caching it on a miss.
+    Args:
+        name - name of the payload, e.g. 'product:<id>'.
+        version_keys - version keys the payload depends on.
+        build - callable returning the payload.
+        params - extra parameters the payload depends on (e.g. the page).
+    """
+    if not is_cacheable(request):
+        return build()
+
+    versions = get_versions(list(version_keys))
+    key = f"catalog:payload:{_digest(name, versions, request, params)}"
+
+    payload = cache.get(key)
+    if payload is not None:
+        _record(HITS_KEY)
+        return payload
+
+    _record(MISSES_KEY)
+    payload = build()
+    cache.set(key, payload, payload_timeout())
+    return payload
@@ -0,0 +1,61 @@
+from django.db.models import Count, Max
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers
+)
+from django.utils.http import http_date
+
+import hashlib
+
+
+def make_etag(*parts):
+    """
+    Build a quoted ETag from the values a response depends on.
+    """
+    return f'"{hashlib.md5(repr(parts).encode()).hexdigest()}"'
+
+
+def list_validators(queryset, *parts):
+    """
+    Return the (etag, last_modified, count) of a list built from
+    queryset, computed from its size and latest updated_at in one query.
+    The size catches deletions, which leave no updated_at behind.
+    """
+    stats = queryset.aggregate(count=Count('pk'), last_modified=Max('updated_at'))
+    etag = make_etag(stats['count'], stats['last_modified'], *parts)
+    return etag, stats['last_modified'], stats['count']
+
+
+def conditional_get(request, respond, etag=None, last_modified=None):
+    """
+    Answer a conditional GET.
+    Returns a 304 Not Modified response when the client copy still
+    matches the validators, otherwise the response built by respond(),
+    with the validators set so the client can revalidate next time.
+    Args:
+        respond - callable returning the full response.
+        etag - quoted ETag of the current representation.
+        last_modified - aware datetime of the last change.
+    """
+    if etag is None and last_modified is None:
+        return respond()
+
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=timestamp
+    )
+    if response is None:
+        response = respond()
+
+    if response.status_code in (200, 304):
+        if etag:
+            response.headers['ETag'] = etag
+        if timestamp is not None:
+            response.headers['Last-Modified'] = http_date(timestamp)
+        # clients may keep the response but must revalidate it
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Authorization', 'Cookie'])
+    return response
@@ -0,0 +1,16 @@
+from django.db import connections, router
+
+
+def upsert_options(model, unique_fields, update_fields):
+    """
+    Return the bulk_create arguments updating the rows that conflict
+    with the given unique fields.
+    MySQL cannot name the conflict target, its ON DUPLICATE KEY UPDATE
+    applies to every unique key of the table, so unique_fields is only
+    passed to the backends that take it.
+    """
+    options = {'update_conflicts': True, 'update_fields': update_fields}
+    connection = connections[router.db_for_write(model)]
+    if connection.features.supports_update_conflicts_with_target:
+        options['unique_fields'] = unique_fields
+    return options
@@ -1,9 +1,83 @@
-from rest_framework.pagination import PageNumberPagination as PNP
+from rest_framework.pagination import (
+    CursorPagination as CP,
+    PageNumberPagination as PNP
+)
+from rest_framework.response import Response
 from django.conf import settings
 
+from common.utils.bools import parse_bool
+
 
 class Pagination(PNP):
 
     @property
     def page_size(self):
         return settings.REST_FRAMEWORK["PAGE_SIZE"]
+
+
+class CursorPagination(CP):
+    """
+    Keyset pagination. Pages are located with an opaque cursor built from
+    the ordering fields instead of an OFFSET, and no COUNT(*) is run, so
+    deep pages cost the same as the first one.
+    """
+    ordering = ('-created_at', '-id')
+    total_query_param = 'include_total'
+
+    # upper bound for the number of rows counted for the approximate total
+    max_total_count = 1000
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = ordering
+
+    def get_page_size(self, request):
+        return int(settings.REST_FRAMEWORK["PAGE_SIZE"])
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Always use the ordering the paginator was created with.
+        The cursor is only stable on the ordering it was encoded with,
+        so client supplied ordering (e.g. from an OrderingFilter) is ignored.
+        """
+        return self.ordering
+
+    def get_approximate_total(self, queryset):
+        """
+        Count at most `max_total_count` rows of the queryset.
+        Returns the total and whether it is exact.
+        """
+        total = queryset.order_by()[:self.max_total_count + 1].count()
+        if total > self.max_total_count:
+            return self.max_total_count, False
+        return total, True
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.total = None
+        if parse_bool(request.query_params.get(self.total_query_param)):
+            self.total = self.get_approximate_total(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+        if self.total is not None:
+            response['total'], response['total_is_exact'] = self.total
+        response['results'] = data
+        return Response(response)
+
+
+def get_paginator(request, ordering=None):
+    """
+    Return the paginator requested by the client.
+    `?pagination=cursor` opts into keyset pagination, otherwise
+    the default page number pagination is used.
+    Args:
+        ordering - ordering used by the cursor paginator. Must end with
+            a unique field to act as a tie breaker.
+    """
+    if request.query_params.get('pagination', '').lower() == 'cursor':
+        return CursorPagination(ordering=ordering)
+    return Pagination()
@@ -1,10 +1,12 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 
 from rest_framework.test import APIClient
 import pytest
 
 from cart.models import Cart
+from product.utils.stock_cache import clear_stocks
 from shop.models import Shop
 from user.models import UserProfile
 
@@ -36,6 +38,19 @@ def test_root_dir(tmp_path_factory):
         delattr(settings, 'TEST_ROOT_DIR')
 
 
+# CACHE
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Start every test with an empty cache.
+    """
+    cache.clear()
+    clear_stocks()
+    yield
+    cache.clear()
+    clear_stocks()
+
+
 # CLIENT
 @pytest.fixture
 def client():
@@ -215,6 +215,32 @@ SPECTACULAR_SETTINGS = {
     },
 }
 
+# Cache settings
+# Redis is used when configured so that every worker shares the catalog
+# cache, otherwise each process keeps its own in-memory cache.
+CACHE_SHARED = bool(os.getenv('CACHE_REDIS_URL'))
+if CACHE_SHARED:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('CACHE_REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Stock read cache
+# Each process keeps the available stock of recently read products for
+# a few seconds. With Redis (CACHE_SHARED), the stock is also shared by
+# every worker.
+STOCK_CACHE_SIZE = 10000
+STOCK_CACHE_LOCAL_TIMEOUT = 5  # seconds
+STOCK_CACHE_SHARED_TIMEOUT = 60  # seconds
+
 # Celery Broker settings
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
@@ -231,6 +257,30 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'order.tasks.cancel_unpaid_orders_older_than_4_hours',
         'schedule': timedelta(hours=4)
     },
+    'sweep_media_tombstones': {
+        'task': 'common.tasks.sweep_media_tombstones',
+        'schedule': timedelta(minutes=10)
+    },
+    'refresh_recommendations': {
+        'task': 'product.tasks.refresh_recommendations',
+        'schedule': timedelta(hours=1)
+    },
+    'rollup_product_sales': {
+        'task': 'product.tasks.rollup_product_sales',
+        'schedule': timedelta(minutes=15)
+    },
+    'compact_inventory_movements': {
+        'task': 'product.tasks.compact_inventory_movements',
+        'schedule': timedelta(days=1)
+    },
+    'release_expired_stock_reservations': {
+        'task': 'product.tasks.release_expired_stock_reservations',
+        'schedule': timedelta(minutes=1)
+    },
+    'send_low_stock_digests': {
+        'task': 'product.tasks.send_low_stock_digests',
+        'schedule': timedelta(hours=1)
+    },
 }
 
 
@@ -261,6 +311,9 @@ PHONENUMBER_DEFAULT_FORMAT = "INTERNATIONAL"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Served for product images until they are processed
+PRODUCT_IMAGE_PLACEHOLDER = 'product/images/placeholder.png'
+
 BASE_URL = "http://127.0.0.1:8000"
 
 # Paystack keys
@@ -11,8 +11,9 @@ from common.exceptions import ErrorException
 from common.permissions import IsCustomer
 from common.utils.api_responses import SuccessAPIResponse
 from order.api.v1.swagger import cancel_customer_order_group_schema
-from order.models import OrderGroup, Order
+from order.models import ACTIVE_ORDER_STATUSES, OrderGroup, Order
 from order.tasks import restock_inventory_with_cancelled_order
+from order.utils.orders import update_active_order_counts
 
 
 class CancelCustomerOrderGroupView(APIView):
@@ -54,10 +55,12 @@ class CancelCustomerOrderGroupView(APIView):
             o_group.save()
             
             orders = list(o_group.orders.all())
+            active_order_ids = [order.id for order in orders if order.status in ACTIVE_ORDER_STATUSES]
             for order in orders:
                 order.status = 'CANCELLED'
                 order.cancelled_at = n
             Order.objects.bulk_update(orders, ['status', 'cancelled_at'])
+            update_active_order_counts(active_order_ids, -1)
     
             if o_group.payment_method == 'DIGITAL' and hasattr(o_group, 'payment') and o_group.payment.verified:
                 o_group.payment.refund_requested = True
@@ -11,7 +11,7 @@ from common.exceptions import ErrorException
 from common.permissions import IsStaff
 from common.utils.api_responses import SuccessAPIResponse
 from common.utils.bools import parse_bool
-from common.utils.pagination import Pagination
+from common.utils.pagination import get_paginator
 from order.api.v1.swagger import (
     get_shop_orders_schema,
     get_shop_order_schema,
@@ -57,7 +57,7 @@ class ShopOrderView(APIView):
             queryset = backend().filter_queryset(request, queryset, self)
 
         # paginate
-        paginator = Pagination()
+        paginator = get_paginator(request)
         paginated_queryset = paginator.paginate_queryset(queryset, request, view=self)
 
         serializers = OrderSerializerForShop(paginated_queryset, many=True)
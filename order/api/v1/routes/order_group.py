@@ -7,7 +7,7 @@ from common.cores.validators import validate_id
 from common.exceptions import ErrorException
 from common.permissions import IsCustomer
 from common.utils.api_responses import SuccessAPIResponse
-from common.utils.pagination import Pagination
+from common.utils.pagination import get_paginator
 from order.models import OrderGroup
 from order.api.v1.serializers import (
     OrderGroupSerializer,
@@ -33,7 +33,7 @@ class CustomerOrderGroupListView(APIView):
         """
         Get a list of user's order groups 
         """
-        paginator = Pagination()
+        paginator = get_paginator(request, ordering=('created_at', 'id'))
         queryset = self.get_queryset()
         paginated_queryset = paginator.paginate_queryset(queryset, request)
         serializers = OrderGroupListSerializer(paginated_queryset, many=True)
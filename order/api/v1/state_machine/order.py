@@ -2,8 +2,9 @@ from django.db import transaction
 from django.utils.timezone import now 
 
 from common.exceptions import ErrorException
-from order.models import Order, OrderGroup, OrderGroupStatus, OrderStatus
+from order.models import ACTIVE_ORDER_STATUSES, Order, OrderGroup, OrderGroupStatus, OrderStatus
 from order.tasks import restock_inventory_with_cancelled_order, update_group_status_for_orders
+from order.utils.orders import update_active_order_counts
 from order.utils.validators import validate_delivery_date
 
 class OrderStateMachine:
@@ -227,7 +228,7 @@ class OrderStateMachine:
             self._payment_check(new_status, rules)
             self._fulfillment_check(new_status, rules)
         
-            # old_status = self.order.status
+            old_status = self.order.status
             self.order.status = new_status
             update_fields = ['status']
             
@@ -251,6 +252,9 @@ class OrderStateMachine:
             update_fields = list(dict.fromkeys(update_fields))  # dedupe duplicate fields
             self.order.save(update_fields=update_fields)
             
+            if old_status in ACTIVE_ORDER_STATUSES and new_status not in ACTIVE_ORDER_STATUSES:
+                update_active_order_counts([self.order.id], -1)
+
             group_update_fields = self._update_group_status(new_status)
             if group_update_fields:
                 self.group.save(update_fields=list(group_update_fields))
@@ -294,6 +298,7 @@ class OrderStateMachine:
                 OrderGroup.objects.bulk_update(updated_grps, ['status'])
             if updated_orders:
                 Order.objects.bulk_update(updated_orders, ['status'])
+                update_active_order_counts([o.id for o in updated_orders], -1)
         return True
     
 
@@ -315,6 +320,7 @@ class OrderStateMachine:
                 
             if pending_orders:
                 Order.objects.bulk_update(pending_orders, ['status'])
+                update_active_order_counts([o.id for o in pending_orders], -1)
 
             pending_orders_id = [o.id for o in pending_orders]
             
@@ -7,7 +7,8 @@ from common.swagger import (
     make_success_schema_response,
     make_unauthorized_error_schema_response,
     make_not_found_error_schema_response,
-    make_error_schema_response
+    make_error_schema_response,
+    pagination_parameters
 )
 from order.api.v1.serializers import OrderSerializerForShop
  
@@ -55,7 +56,8 @@ get_shop_orders_schema = {
                 Prefix with '-' to sort in descending order.",
             location=OpenApiParameter.QUERY,
             required=False
-        )
+        ),
+        *pagination_parameters
     ],
     'request': None,
     'responses': {
@@ -4,7 +4,8 @@ from common.swagger import (
     make_error_schema_response,
     make_success_schema_response,
     make_unauthorized_error_schema_response,
-    make_not_found_error_schema_response
+    make_not_found_error_schema_response,
+    pagination_parameters
 )
 
 from order.api.v1.serializers import OrderGroupSerializer, OrderGroupListSerializer
@@ -17,6 +18,7 @@ get_order_groups_schema = {
     'description': "Returns a paginated list of all user's order groups.",
     'tags': ['Order'],
     'operation_id': 'get_order_groups',
+    'parameters': pagination_parameters,
     'request': None,
     'responses': {
         200: make_success_schema_response(
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0011_alter_ordergroup_options_alter_ordergroup_status'),
+        ('product', '0020_catalog_entry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['created_at', 'id'], name='order_item_created_idx'),
+        ),
+    ]
@@ -28,6 +28,14 @@ class OrderStatus(models.TextChoices):
     CANCELLED = 'CANCELLED', 'Cancelled'
 
 
+# orders counted in Product.active_order_count
+ACTIVE_ORDER_STATUSES = (
+    OrderStatus.PENDING,
+    OrderStatus.PROCESSING,
+    OrderStatus.SHIPPED
+)
+
+
 class PaymentMethod(models.TextChoices):
     DIGITAL = 'DIGITAL', 'Digital Payment'
     CASH = 'CASH', 'Cash Payment'
@@ -204,6 +212,10 @@ class OrderItem(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        # read in order by the incremental sales rollup
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='order_item_created_idx'),
+        ]
     
     def __str__(self):
         return f"<OrderItem: {self.id}> - {self.product.name} * {self.quantity}"
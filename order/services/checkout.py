@@ -5,10 +5,12 @@ from django.db.models import F
 
 
 from cart.utils.validators import validate_cart
+from common.utils.cache import invalidate_products
 from order.models import OrderGroup, Order, OrderItem
 from order.domain.exceptions import EmptyCartError, InvalidCartError
 from order.utils.delivery import calculate_delivery_fee
-from product.models import Inventory
+from product.models import Inventory, Product
+from product.services import StockReservationService
 
 
 
@@ -16,6 +18,13 @@ class CheckoutService:
     """
     Service to handle checking. Creates the order group, the orders for each shop
     and the items generally.
+
+    The stock is reserved for the orders before they are written, in a
+    short transaction of its own, instead of locking the inventories for
+    the whole checkout. Cash orders take the stock out at once, digital
+    orders when their payment is verified; unpaid holds expire.
+    The active order counts of the products are added once the orders
+    commit, so concurrent checkouts of a product never wait on its row.
     """
     
     def __init__(self, user, cart, cart_items, shipping_address, payment_method, fulfillment_method):
@@ -26,8 +35,6 @@ class CheckoutService:
         self.payment_method = payment_method
         self.fulfillment_method = fulfillment_method
         
-        self.inventory_map = {}
-        self.inventory_to_update = set()
         self.order_group = None
         self.orders_by_shop = {}
         self.group_total = Decimal()
@@ -41,21 +48,9 @@ class CheckoutService:
         if not self.cart_items:
             raise EmptyCartError()        
     
-    def _lock_inventory(self):
-        """
-        Lock all rows from the inventory table needed for the transaction.
-        """
-        inv_ids = {
-            item.product.inventory.id
-            for item in self.cart_items
-        }
-        
-        inventories = Inventory.objects.select_for_update().filter(id__in=inv_ids)
-        self.inventory_map = {inv.id: inv for inv in inventories}
-        
     def _validate_and_prepare(self):
         """
-        Validate cart items with the locked inventory data.
+        Validate cart items.
         validate that the products are still valid and available and 
         the stock is sufficient.
         """
@@ -68,9 +63,9 @@ class CheckoutService:
 
     def _create_order_group(self):
         """
-        Create the order group.
+        Create the order group, saved with the orders.
         """
-        self.order_group = OrderGroup.objects.create(
+        self.order_group = OrderGroup(
             user=self.user,
             payment_method=self.payment_method, 
             shipping_address=self.shipping_address,
@@ -93,12 +88,6 @@ class CheckoutService:
             qty = item.quantity
             price = product.price
             
-            inv = self.inventory_map[product.inventory.id]
-
-            # deduct stock from db using F
-            inv._stock -= qty
-            self.inventory_to_update.add(inv)
-            
             # create order for each shop
             shop_id = shop.id
             
@@ -124,10 +113,28 @@ class CheckoutService:
                 price=price
             ))
             
+    def _hold_stock(self):
+        """
+        Reserve the stock of the items for their orders.
+        """
+        failed = StockReservationService.hold(
+            (item.product.inventory.id, self.orders_by_shop[item.product.shop.id].id, item.quantity)
+            for item in self.cart_items
+        )
+        if failed:
+            # the stock of the whole cart, as the hold saw it, not the cache
+            inventories = Inventory.objects.filter(product_id__in=[item.product_id for item in self.cart_items])
+            validated = validate_cart(self.cart_items, {inv.product_id: inv for inv in inventories})
+            raise InvalidCartError(
+                errors=[item for item in validated["items"]
+                        if item["status"] != "available"])
+
     def _finalize(self):
         """
         Hit DB with the new orders and items.
         """
+        self.order_group.total_amount += self.group_total
+        self.order_group.save()
         orders = Order.objects.bulk_create(list(self.orders_by_shop.values()))
         order_map = {
             order.shop_id: order
@@ -138,25 +145,35 @@ class CheckoutService:
             item.order  = order_map[item.order.shop_id]
             
         OrderItem.objects.bulk_create(self.order_items)
-        Inventory.objects.bulk_update(self.inventory_to_update, fields=["_stock"])
-        
-        self.order_group.total_amount += self.group_total
-        self.order_group.save(update_fields=["total_amount", "delivery_fee"])
-        
+        # a product is in one order of the group, see unique_cart_product
+        product_ids = [item.product.id for item in self.order_items]
+        transaction.on_commit(
+            lambda: Product.objects.filter(id__in=product_ids).add_active_orders(1))
+        invalidate_products(
+            (item.product.id, item.product.shop_id) for item in self.order_items)
         
         self.cart_items.delete()
+        
+        # cash orders are paid on delivery, their stock is taken now
+        if self.payment_method == "CASH":
+            StockReservationService.convert([order.id for order in orders])
 
     def execute(self):
         """
         Implement checkout in an atomic transaction to handle race conditions.
         """
         self._validate_cart_not_empty()
+        self._validate_and_prepare()
+        self._create_order_group()
+        self._create_orders_and_items()
+        self._hold_stock()
         
-        with transaction.atomic():
-            self._lock_inventory()
-            self._validate_and_prepare()
-            self._create_order_group()
-            self._create_orders_and_items()
-            self._finalize()
+        try:
+            with transaction.atomic():
+                self._finalize()
+        except Exception:
+            StockReservationService.release_orders(
+                [order.id for order in self.orders_by_shop.values()])
+            raise
             
         return self.order_group
\ No newline at end of file
@@ -3,8 +3,10 @@ from django.db import transaction
 from django.utils.timezone import now
 from datetime import timedelta
 
-from order.models import Order, OrderGroup, OrderStatus
-from product.models import Inventory
+from order.models import ACTIVE_ORDER_STATUSES, Order, OrderGroup, OrderStatus
+from order.utils.orders import update_active_order_counts
+from product.models import Inventory, MovementReason
+from product.services import StockReservationService
 
 @shared_task
 def restock_inventory_with_cancelled_order(id, order_group=False):
@@ -14,23 +16,34 @@ def restock_inventory_with_cancelled_order(id, order_group=False):
         o_group = OrderGroup.objects.prefetch_related('orders__items__product__inventory').filter(id=id).first()
         if not o_group:
             return
+        # stock still reserved, or released on expiry, was never taken
+        untaken = StockReservationService.release_orders([order.id for order in o_group.orders.all()])
         for order in o_group.orders.all():
             for item in order.items.all():
+                if item.product and (order.id, item.product.inventory.id) in untaken:
+                    continue
                 with transaction.atomic():
                     inventory = Inventory.objects.select_for_update().filter(product=item.product).first()
                     if inventory:
-                        inventory.add(item.quantity, 'sys_cancelled_order')
+                        inventory.add(
+                            item.quantity, 'sys_cancelled_order',
+                            reason=MovementReason.ORDER_CANCELLED, order_id=order.id)
         return f"Inventory restocked from order group {o_group.id} with {o_group.orders.count()} orders."
     
     
     order = Order.objects.prefetch_related('items__product__inventory').filter(id=id).first()
     if not order:
         return
+    untaken = StockReservationService.release_orders([order.id])
     for item in order.items.all():
+        if item.product and (order.id, item.product.inventory.id) in untaken:
+            continue
         with transaction.atomic():
             inventory = Inventory.objects.select_for_update().filter(product=item.product).first()
             if inventory:
-                inventory.add(item.quantity, 'sys_cancelled_order')
+                inventory.add(
+                    item.quantity, 'sys_cancelled_order',
+                    reason=MovementReason.ORDER_CANCELLED, order_id=order.id)
     return f"Inventory restocked from order {order.id} with {order.items.count()} items."
 
 
@@ -60,13 +73,17 @@ def cancel_unpaid_orders_older_than_4_hours():
             group.cancelled_at = now()
             group.save(update_fields=['status', 'cancelled_at'])
             orders = group.orders.all()
+            active_order_ids = []
             for order in orders:
+                if order.status in ACTIVE_ORDER_STATUSES:
+                    active_order_ids.append(order.id)
                 total_item_count += order.items.count()
                 order.status = 'CANCELLED'
                 order.save(update_fields=['status'])
                 cancelled_orders += 1
                 transaction.on_commit(
                     lambda order_id=order.id: restock_inventory_with_cancelled_order.delay(order_id))
+            update_active_order_counts(active_order_ids, -1)
 
     return f"TOTAL ORDER GROUPS: {total_group_count}.\n \
         Cancelled {cancelled_orders} unpaid orders (with {total_item_count} items) older than 4 hours."
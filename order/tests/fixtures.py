@@ -2,8 +2,9 @@ from decimal import Decimal
 
 import pytest
 
-from order.models import OrderGroup, Order, OrderItem
+from order.models import ACTIVE_ORDER_STATUSES, OrderGroup, Order, OrderItem
 from order.utils.delivery import calculate_delivery_fee
+from product.models import Product
 
 
 @pytest.fixture
@@ -49,6 +50,9 @@ def order_item_factory():
     Factory to create order item for an order.
     """
     def create_order_item(order, product, quantity=1):
+        # checkout counts each product once per active order
+        if order.status in ACTIVE_ORDER_STATUSES and not order.items.filter(product=product).exists():
+            Product.objects.filter(id=product.id).add_active_orders(1)
         return OrderItem.objects.create(
             order=order,
             product=product,
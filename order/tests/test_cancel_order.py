@@ -41,6 +41,34 @@ def test_cancel_order_group_cash_payment(
                for order in group.orders.all())
 
 
+def test_cancel_order_group_releases_active_order_counts(
+    client,
+    customer,
+    populated_order_group_factory
+):
+    """
+    Test that cancelling an order group removes its orders from the
+    active order counts of the products.
+    """
+    group = populated_order_group_factory(
+        user=customer,
+        orders_per_group=2,
+        items_per_order=2
+    )
+    products = [item.product for order in group.orders.all() for item in order.items.all()]
+    assert all(product.active_order_count == 1 for product in products)
+
+    url = reverse("cancel-order-group", args=[group.id])
+    client.force_authenticate(user=customer)
+    res = client.post(url)
+
+    assert res.status_code == status.HTTP_200_OK
+    for product in products:
+        product.refresh_from_db()
+        assert product.active_order_count == 0
+        assert not product.has_active_orders()
+
+
 def test_cancel_order_group_digital_payment_made(
     client,
     customer,
@@ -5,7 +5,11 @@ from rest_framework import status
 import uuid
 import pytest
 
+from order.models import OrderItem
 from order.services.checkout import CheckoutService
+from product.models import Inventory, InventoryMovement, MovementReason
+from product.services import InventoryLedgerService
+from product.utils.stock_cache import get_stocks
 
 
 def assert_dict_matches(actual, expected):
@@ -281,6 +285,79 @@ def test_inventory_is_updated_after_checkout(client,
         assert product.stock == expected_stock
 
 
+def test_inventory_movements_are_recorded_after_checkout(client,
+                                                        customer,
+                                                        shipping_address_factory,
+                                                        shopowner_factory,
+                                                        create_cart_items):
+    """
+    Test that checkout records a movement per ordered product,
+    referencing its order, and that the ledger matches the stock.
+    """
+    cart = customer.cart
+    shops = [shopowner_factory().owned_shop for _ in range(2)]
+    _, products = create_cart_items(cart, shops=shops, num_items=3, quantity=4)
+
+    address = shipping_address_factory(user=customer)
+    payload = {
+        'shipping_address': address.id,
+        'fulfillment_method': 'DELIVERY',
+        'payment_method': 'CASH'
+    }
+    client.force_authenticate(user=customer)
+
+    res = client.post(CHECKOUT_URL, payload, format='json')
+
+    assert res.status_code == status.HTTP_201_CREATED
+    movements = InventoryMovement.objects.filter(reason=MovementReason.CHECKOUT)
+    assert movements.count() == 3
+    for product in products:
+        movement = movements.get(inventory__product=product)
+        assert movement.quantity == -4
+        assert movement.order_id == OrderItem.objects.get(product=product).order_id
+    assert not InventoryLedgerService.reconcile().exists()
+
+
+def test_active_order_counts_are_updated_after_checkout(client,
+                                                       customer,
+                                                       shipping_address_factory,
+                                                       shopowner_factory,
+                                                       create_cart_items,
+                                                       django_capture_on_commit_callbacks):
+    """
+    Test that each ordered product counts one more active order once
+    the checkout commits.
+    """
+    cart = customer.cart
+    shops = [shopowner_factory().owned_shop for _ in range(2)]
+    _, products = create_cart_items(cart, shops=shops, num_items=4, quantity=1)
+    assert all(product.active_order_count == 0 for product in products)
+
+    address = shipping_address_factory(user=customer)
+    payload = {
+        'shipping_address': address.id,
+        'fulfillment_method': 'DELIVERY',
+        'payment_method': 'CASH'
+    }
+    client.force_authenticate(user=customer)
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        res = client.post(CHECKOUT_URL, payload, format='json')
+
+    assert res.status_code == status.HTTP_201_CREATED
+    # the product rows are not written by the checkout transaction
+    for product in products:
+        product.refresh_from_db()
+        assert product.active_order_count == 0
+
+    for callback in callbacks:
+        callback()
+    for product in products:
+        product.refresh_from_db()
+        assert product.active_order_count == 1
+        assert product.has_active_orders()
+
+
 def test_checkout_atomic_rolls_back_on_failure(client,
                                                mocker,
                                                create_cart_items,
@@ -315,7 +392,7 @@ def test_checkout_atomic_rolls_back_on_failure(client,
     client.force_authenticate(user=customer)
 
     mocker.patch(
-        'order.services.checkout.Inventory.objects.bulk_update',
+        'order.services.checkout.OrderItem.objects.bulk_create',
         side_effect=Exception('DB failure')
     )
 
@@ -330,10 +407,11 @@ def test_checkout_atomic_rolls_back_on_failure(client,
     # cart is not cleared
     assert cart.items.count() == initial_cart_count
 
-    # inventory does not change
+    # inventory does not change and the stock held is released
     for product in products:
         product.refresh_from_db()
         assert product.stock == initial_inventories_count[product.id]
+        assert Inventory.objects.get(product=product).reserved == 0
 
 
 def test_checkout_fails_with_invalid_cart_product_unavailable(
@@ -487,6 +565,44 @@ def test_checkout_fails_with_invalid_cart_product_insufficient_stock(
     assert all(err_product[f] is not None for f in fields)
 
 
+def test_checkout_fails_when_stock_is_gone_at_hold(client,
+                                                  customer,
+                                                  create_cart_items,
+                                                  shopowner,
+                                                  shipping_address_factory):
+    """
+    Test that checkout fails with the cart errors when the stock is
+    gone by the time it is held, after the cached pre-check passed.
+    """
+    cart = customer.cart
+    _, products = create_cart_items(
+        cart, shops=[shopowner.owned_shop], num_items=2, quantity=4)
+    get_stocks(p.id for p in products)
+
+    # a change the stock cache has not seen
+    Inventory.objects.filter(product=products[0]).update(_stock=2)
+
+    address = shipping_address_factory(user=customer)
+    payload = {
+        'shipping_address': address.id,
+        'fulfillment_method': 'DELIVERY',
+        'payment_method': 'CASH'
+    }
+
+    client.force_authenticate(user=customer)
+    res = client.post(CHECKOUT_URL, data=payload, format='json')
+
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    assert res.data['message'] == "Cart contains invalid items."
+    assert len(res.data['errors']) == 1
+    error = res.data['errors'][0]
+    assert error['status'] == 'insufficient_stock'
+    assert error['issue'] == "Only 2 left in stock"
+    assert error['product']['id'] == str(products[0].id)
+    assert not OrderItem.objects.exists()
+    assert Inventory.objects.get(product=products[1]).reserved == 0
+
+
 def test_checkout_fails_with_invalid_cart(client,
                                           customer,
                                           create_cart_items,
@@ -188,6 +188,44 @@ def test_update_shop_order_to_cancelled(
     assert order.cancelled_at is not None
 
 
+@pytest.mark.parametrize("new_status, expected_count", [
+    ("PROCESSING", 1),
+    ("CANCELLED", 0),
+])
+def test_update_shop_order_status_updates_active_order_counts(
+    client,
+    shopowner,
+    order_group_factory,
+    order_factory,
+    order_item_factory,
+    product_factory,
+    new_status,
+    expected_count
+):
+    """
+    Test that an order leaving the active statuses is no longer counted
+    on its products.
+    """
+    group = order_group_factory(payment_method="CASH")
+    order = order_factory(group=group, shop=shopowner.owned_shop)
+    product = product_factory(shop=shopowner.owned_shop)
+    order_item_factory(order=order, product=product)
+    product.refresh_from_db()
+    assert product.active_order_count == 1
+
+    payload = {
+        **PAYLOAD,
+        "status": new_status
+    }
+    url = reverse("update-shop-order-status", args=[order.id])
+    client.force_authenticate(user=shopowner)
+    res = client.post(url, data=payload, format="json")
+
+    assert res.status_code == status.HTTP_200_OK
+    product.refresh_from_db()
+    assert product.active_order_count == expected_count
+
+
 @pytest.mark.django_db(transaction=True)
 def test_update_shop_order_to_cancelled_calls_restocks_inventory_task(
     client,
@@ -1,10 +1,12 @@
+from collections import defaultdict
 from decimal import Decimal
 from django.db import transaction
+from django.db.models import Count
 
 from common.exceptions import ErrorException
-from order.models import OrderGroup, Order, OrderItem
+from order.models import ACTIVE_ORDER_STATUSES, OrderGroup, Order, OrderItem
 from order.utils.delivery import calculate_delivery_fee
-from product.models import Inventory
+from product.models import Inventory, MovementReason, Product
 
 
 def create_orders_from_cart(user, shipping_address, fulfillment_method, payment_method, cart_items):
@@ -54,7 +56,7 @@ def create_orders_from_cart(user, shipping_address, fulfillment_method, payment_
                 )
                 
                 
-            inv.subtract(qty=qty)
+            inv.subtract(qty=qty, reason=MovementReason.CHECKOUT)
             
             shop_id = product.shop.id
             if shop_id not in order_by_shops:
@@ -80,6 +82,7 @@ def create_orders_from_cart(user, shipping_address, fulfillment_method, payment_
         
         OrderItem.objects.bulk_create(order_items_to_create)
         Order.objects.bulk_update(order_by_shops.values(), ['total_amount'])
+        update_active_order_counts([o.id for o in order_by_shops.values()], 1)
         order_group.total_amount = group_total_amount
         order_group.save(update_fields=fields_to_update)
         cart_items.delete()
@@ -87,4 +90,46 @@ def create_orders_from_cart(user, shipping_address, fulfillment_method, payment_
     return order_group
         
         
-        
\ No newline at end of file
+        
+
+def update_active_order_counts(order_ids, delta):
+    """
+    Add delta to the active order count of the products of the given orders,
+    once per order. Called when orders become active (delta=1) or leave the
+    active statuses (delta=-1), in the transaction changing their status.
+    """
+    if not order_ids:
+        return
+    rows = (
+        OrderItem.objects
+            .filter(order_id__in=order_ids, product__isnull=False)
+            .values('product_id')
+            .annotate(n=Count('order_id', distinct=True))
+            .order_by()
+    )
+    # one update per distinct number of orders
+    by_count = defaultdict(list)
+    for row in rows:
+        by_count[row['n']].append(row['product_id'])
+    for n, product_ids in by_count.items():
+        Product.objects.filter(id__in=product_ids).add_active_orders(n * delta)
+
+
+@transaction.atomic
+def rebuild_active_order_counts():
+    """
+    Recompute the active order count of every product from the orders.
+    """
+    rows = (
+        OrderItem.objects
+            .filter(order__status__in=ACTIVE_ORDER_STATUSES, product__isnull=False)
+            .values('product_id')
+            .annotate(n=Count('order_id', distinct=True))
+            .order_by()
+    )
+    Product.objects.filter(active_order_count__gt=0).update(active_order_count=0)
+    Product.objects.bulk_update(
+        [Product(id=row['product_id'], active_order_count=row['n']) for row in rows],
+        ['active_order_count'],
+        batch_size=500
+    )
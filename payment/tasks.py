@@ -8,6 +8,7 @@ import requests
 from e_core import logger
 from order.models import Order
 from payment.models import Payment
+from product.services import StockReservationService
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
 def verify_paystack_payment(self, data):
@@ -48,6 +49,7 @@ def verify_paystack_payment(self, data):
                     order.is_paid = True
                     order.paid_at = _now
                 Order.objects.bulk_update(orders, ['is_paid', 'paid_at'])
+                StockReservationService.convert([order.id for order in orders])
                 payment.save(update_fields=['paid_at', 'verified'])
 
             logger.info(f"Payment with reference {reference} verified successfully.")
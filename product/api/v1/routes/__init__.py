@@ -1,5 +1,6 @@
+from .catalog_cache import CatalogCacheStatsView
 from .category import CategoryDetailView, CategoryListCreateView
-from .inventory import InventoryUpdateView
+from .inventory import InventoryUpdateView, ShopInventoryBatchView
 from .product import (
     ProductListView,
     ProductDetailView,
@@ -7,6 +8,10 @@ from .product import (
     ProductCategoryUpdateView
 )
 from .product_image import ProductImageListCreateView, ProductImageDetailView
+from .product_export import ShopProductExportView
+from .product_bestsellers import ProductBestsellersView, ShopProductBestsellersView
+from .product_feed import ProductFeedView
+from .product_import import ShopProductImportView
 
 
 __all__ = [
@@ -14,6 +19,11 @@ __all__ = [
     'ProductListView',
     'ProductDetailView',
     'ShopProductListCreateView',
+    'ShopProductImportView',
+    'ShopProductExportView',
+    'ProductFeedView',
+    'ProductBestsellersView',
+    'ShopProductBestsellersView',
 
     # product image views
     'ProductImageListCreateView',
@@ -26,4 +36,8 @@ __all__ = [
     
     # inventory views
     'InventoryUpdateView',
+    'ShopInventoryBatchView',
+
+    # catalog cache views
+    'CatalogCacheStatsView',
 ]
\ No newline at end of file
@@ -0,0 +1,23 @@
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from common.permissions import IsSuperUser
+from common.utils.api_responses import SuccessAPIResponse
+from common.utils.cache import get_stats
+from product.api.v1.swagger import get_catalog_cache_stats_schema
+
+
+class CatalogCacheStatsView(APIView):
+    permission_classes = [IsSuperUser]
+
+    @extend_schema(**get_catalog_cache_stats_schema)
+    def get(self, request):
+        """
+        Get the hit and miss counters of the catalog cache.
+        """
+        return Response(SuccessAPIResponse(
+            message="Catalog cache stats retrieved successfully.",
+            data=get_stats()
+        ).to_dict(), status=status.HTTP_200_OK)
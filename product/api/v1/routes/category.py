@@ -8,10 +8,18 @@ from rest_framework import status
 from common.cores.validators import validate_id
 from common.exceptions import ErrorException
 from common.permissions import IsSuperUser
+from common.utils.cache import (
+    CATEGORIES_VERSION_KEY,
+    PRODUCTS_VERSION_KEY,
+    get_validators,
+    shop_version_key
+)
+from common.utils.conditional import conditional_get
 from common.utils.pagination import Pagination
 from common.utils.api_responses import SuccessAPIResponse
 from product.models import Category
 from product.api.v1.serializers import CategorySerializer
+from product.utils.conditional import categories_state
 from product.api.v1.swagger import (
     create_category_schema,
     delete_category_schema,
@@ -19,6 +27,7 @@ from product.api.v1.swagger import (
     get_category_schema,
     update_category_schema
 )
+from shop.models import Shop
 
 
 class CategoryListCreateView(APIView):
@@ -32,19 +41,49 @@ class CategoryListCreateView(APIView):
     def get(self, request):
         """
         Gets all categories.
+        If a shop id is passed in the `shop` query string, only the
+        categories with active products in that shop are returned.
         """
         paginator = Pagination()
-        queryset = Category.objects.all()
-        paginated_queryset = paginator.paginate_queryset(queryset, request)
-        serializers = CategorySerializer(paginated_queryset, many=True)
-        data = paginator.get_paginated_response(serializers.data).data
-        return Response(
-            SuccessAPIResponse(
-                message="Categories retrieved successfully.",
-                data=data
-            ).to_dict(), status=status.HTTP_200_OK
+        shop_id = request.query_params.get('shop')
+        if shop_id:
+            validate_id(shop_id, 'shop')
+            shop = Shop.objects.filter(id=shop_id).first()
+            if not shop:
+                raise ErrorException(
+                    detail="No shop matching the given ID found.",
+                    code='not_found',
+                    status_code=status.HTTP_404_NOT_FOUND
+                )
+            queryset = Category.objects.with_facet_counts(shop)
+            # shop counts only change with the products of the shop
+            dependencies = [CATEGORIES_VERSION_KEY, shop_version_key(shop.id)]
+            count_field = 'shop_product_count'
+        else:
+            queryset = Category.objects.all()
+            dependencies = [CATEGORIES_VERSION_KEY, PRODUCTS_VERSION_KEY]
+            count_field = 'product_count'
+        etag, last_modified = get_validators(
+            request,
+            'categories',
+            dependencies,
+            params=dict(request.query_params.lists()),
+            state=lambda: categories_state(queryset, count_field)
         )
 
+        def respond():
+            paginated_queryset = paginator.paginate_queryset(queryset, request)
+            serializers = CategorySerializer(paginated_queryset, many=True)
+            data = paginator.get_paginated_response(serializers.data).data
+            return Response(
+                SuccessAPIResponse(
+                    message="Categories retrieved successfully.",
+                    data=data
+                ).to_dict(), status=status.HTTP_200_OK
+            )
+
+        return conditional_get(request, respond, etag, last_modified)
+
     @extend_schema(**create_category_schema)
     def post(self, request):
         """
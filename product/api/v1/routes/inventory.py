@@ -9,16 +9,21 @@ from common.exceptions import ErrorException
 from common.permissions import IsStaff
 from common.utils.api_responses import SuccessAPIResponse
 from product.models import Product
-from product.api.v1.serializers import InventorySerializer
-from product.api.v1.swagger import update_inventory_schema
+from product.api.v1.serializers import InventoryBatchSerializer, InventorySerializer, ReorderThresholdSerializer
+from product.api.v1.swagger import (
+    batch_update_inventory_schema,
+    update_inventory_schema,
+    update_reorder_threshold_schema
+)
+from product.services import InventoryBatchService
+from shop.models import Shop
 
 class InventoryUpdateView(APIView):
     permission_classes = [IsStaff]
 
-    @extend_schema(**update_inventory_schema)
-    def post(self, request, product_id):
+    def get_product(self, request, product_id):
         """
-        Updates the quantity of a product in the inventory
+        Returns the product with its inventory if the staff can manage it.
         """
         validate_id(product_id, 'product')
 
@@ -31,6 +36,14 @@ class InventoryUpdateView(APIView):
             
         if not request.user.can_manage_product(product):
             raise PermissionDenied()
+        return product
+
+    @extend_schema(**update_inventory_schema)
+    def post(self, request, product_id):
+        """
+        Updates the quantity of a product in the inventory
+        """
+        product = self.get_product(request, product_id)
         
         action = request.data.get('action')
         qty = request.data.get('quantity')
@@ -66,3 +79,74 @@ class InventoryUpdateView(APIView):
             message=f"Inventory updated successfully.",
             data=InventorySerializer(inventory).data
         ).to_dict(), status=status.HTTP_200_OK)
+
+    @extend_schema(**update_reorder_threshold_schema)
+    def patch(self, request, product_id):
+        """
+        Sets the stock level at which the shop is alerted that the product runs low
+        """
+        product = self.get_product(request, product_id)
+
+        serializer = ReorderThresholdSerializer(data=request.data)
+        if not serializer.is_valid():
+            raise ErrorException(
+                detail="Inventory update failed.",
+                code='validation_error',
+                errors=serializer.errors
+            )
+        inventory = product.inventory.set_reorder_threshold(serializer.validated_data['reorder_threshold'])
+
+        return Response(SuccessAPIResponse(
+            message="Reorder threshold updated successfully.",
+            data=InventorySerializer(inventory).data
+        ).to_dict(), status=status.HTTP_200_OK)
+
+
+class ShopInventoryBatchView(APIView):
+    permission_classes = [IsStaff]
+
+    @extend_schema(**batch_update_inventory_schema)
+    def post(self, request, shop_id):
+        """
+        Adds to and/or subtracts from the stock of many products of a shop.
+        """
+        validate_id(shop_id, 'shop')
+        shop = Shop.objects.filter(id=shop_id).first()
+        if not shop:
+            raise ErrorException(
+                detail="No shop matching the given ID found.",
+                code='not_found',
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+
+        if not request.user.can_manage_shop(shop):
+            raise PermissionDenied()
+
+        serializer = InventoryBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            raise ErrorException(
+                detail="Inventory update failed.",
+                code='validation_error',
+                errors=serializer.errors
+            )
+
+        service = InventoryBatchService(shop, updated_by=request.user.staff_handle)
+        report = service.apply(
+            serializer.validated_data['items'],
+            atomic=serializer.validated_data['mode'] == 'atomic'
+        )
+        if report['failed']:
+            raise ErrorException(
+                detail="Some items could not be processed.",
+                code='unprocessed_items',
+                status_code=(
+                    status.HTTP_207_MULTI_STATUS
+                    if report['updated']
+                    else status.HTTP_400_BAD_REQUEST
+                ),
+                errors=report
+            )
+        return Response(SuccessAPIResponse(
+            message="Inventory updated successfully.",
+            data=report
+        ).to_dict(), status=status.HTTP_200_OK)
@@ -9,11 +9,25 @@ from common.cores.validators import validate_id
 from common.exceptions import ErrorException
 from common.permissions import IsStaff
 from common.utils.api_responses import SuccessAPIResponse
-from common.utils.pagination import Pagination
-from product.models import Product
+from common.utils.bools import parse_bool
+from common.utils.cache import (
+    CATEGORIES_VERSION_KEY,
+    PRODUCTS_VERSION_KEY,
+    get_or_build,
+    get_validators,
+    product_dependencies,
+    shop_catalog_dependencies
+)
+from common.utils.conditional import conditional_get
+from common.utils.pagination import get_paginator, Pagination
+from product.models import CatalogEntry, Category, Product
+from product.utils.conditional import product_state
+from product.utils.filters import CATALOG_ORDERINGS, CatalogEntryFilter, get_catalog_ordering
 from product.api.v1.serializers import (
+    CatalogEntrySerializer,
+    CategorySerializer,
     ProductSerializer
-) 
+)
 from product.api.v1.swagger import (
     create_shop_product_schema,
     delete_product_schema,
@@ -26,6 +40,38 @@ from product.api.v1.swagger import (
 from shop.models import Shop
 
 
+def filter_catalog(request, queryset):
+    """
+    Apply the catalog filters of the query string to a catalog entry
+    queryset. Returns the queryset and the fields to order it by.
+    """
+    ordering = get_catalog_ordering(request.query_params.get('ordering'))
+    if ordering is None:
+        raise ErrorException(
+            detail=f"Enter a valid ordering: {', '.join(map(repr, CATALOG_ORDERINGS))}.",
+            code='invalid_ordering'
+        )
+    filterset = CatalogEntryFilter(request.query_params, queryset=queryset)
+    if not filterset.is_valid():
+        raise ErrorException(
+            detail="Invalid filters.",
+            code='invalid_filters',
+            errors=filterset.errors
+        )
+    return filterset.qs, ordering
+
+
+def get_category_facets(request, shop=None):
+    """
+    Return the precomputed category facet counts if requested
+    with the `facets` query string.
+    """
+    if not parse_bool(request.query_params.get('facets')):
+        return None
+    queryset = Category.objects.with_facet_counts(shop)
+    return CategorySerializer(queryset, many=True).data
+
+
 class ShopProductListCreateView(APIView):
     
     def get_permissions(self):
@@ -46,15 +92,30 @@ class ShopProductListCreateView(APIView):
                 code='not_found',
                 status_code=status.HTTP_404_NOT_FOUND
             )
-        paginator = Pagination()
-        queryset = shop.products.filter(is_active=True).all()
-        paginated_queryset  = paginator.paginate_queryset(queryset, request)
-        serializers = ProductSerializer(
-            paginated_queryset,
-            many=True,
-            context={'request': request}
+
+        def build():
+            queryset, ordering = filter_catalog(request, CatalogEntry.objects.filter(shop=shop))
+            paginator = get_paginator(request, ordering=ordering)
+            queryset = queryset.order_by(*ordering)
+            paginated_queryset  = paginator.paginate_queryset(queryset, request)
+            serializers = CatalogEntrySerializer(
+                paginated_queryset,
+                many=True,
+                context={'request': request}
+            )
+            data = paginator.get_paginated_response(serializers.data).data
+            facets = get_category_facets(request, shop)
+            if facets is not None:
+                data['facets'] = facets
+            return data
+
+        data = get_or_build(
+            request,
+            f"shop-products:{shop.id}",
+            shop_catalog_dependencies(shop.id),
+            build,
+            params=dict(request.query_params.lists())
         )
-        data = paginator.get_paginated_response(serializers.data).data
         return Response(SuccessAPIResponse(
             message="Shop products retrieved successfully.",
             data=data
@@ -90,7 +151,15 @@ class ShopProductListCreateView(APIView):
                 code='validation_error',
                 errors=serializer.errors
             )
-        serializer.save()
+        try:
+            serializer.save()
+        except ValidationError as e:
+            # name taken by a concurrent request
+            raise ErrorException(
+                detail="Product creation failed.",
+                code='validation_error',
+                errors=e.detail
+            )
         return Response(SuccessAPIResponse(
             message="Product created successfully.",
             data=serializer.data
@@ -103,23 +172,46 @@ class ProductListView(APIView):
     @extend_schema(**get_products_schema)
     def get(self, request):
         """
-        Gets all products.
+        Gets all products, filtered and sorted by the query string.
+        Products matching the `search` query string are returned
+        best match first.
         """
-        # update to take filters
-        # categories and names
-        paginator = Pagination()
-        queryset = Product.objects.filter(is_active=True).all()
-        paginated_queryset  = paginator.paginate_queryset(queryset, request)
-        serializers = ProductSerializer(
-            paginated_queryset,
-            many=True,
-            context={'request': request}
+        # no state: validating a whole filtered range against the database
+        # costs as much as reading the page, so without a shared cache the
+        # list is sent without validators
+        etag, last_modified = get_validators(
+            request,
+            'products',
+            [PRODUCTS_VERSION_KEY, CATEGORIES_VERSION_KEY],
+            params=dict(request.query_params.lists())
         )
-        data = paginator.get_paginated_response(serializers.data).data
-        return Response(SuccessAPIResponse(
-            message="Products retrieved successfully.",
-            data=data
-        ).to_dict(), status=status.HTTP_200_OK)
+
+        def respond():
+            queryset, ordering = filter_catalog(request, CatalogEntry.objects.all())
+            search = request.query_params.get('search', '').strip()
+            if search:
+                # search results are ranked, cursor pagination does not apply
+                paginator = Pagination()
+                queryset = queryset.search(search)
+            else:
+                paginator = get_paginator(request, ordering=ordering)
+                queryset = queryset.order_by(*ordering)
+            paginated_queryset  = paginator.paginate_queryset(queryset, request)
+            serializers = CatalogEntrySerializer(
+                paginated_queryset,
+                many=True,
+                context={'request': request}
+            )
+            data = paginator.get_paginated_response(serializers.data).data
+            facets = get_category_facets(request)
+            if facets is not None:
+                data['facets'] = facets
+            return Response(SuccessAPIResponse(
+                message="Products retrieved successfully.",
+                data=data
+            ).to_dict(), status=status.HTTP_200_OK)
+
+        return conditional_get(request, respond, etag, last_modified)
  
 
 class ProductDetailView(APIView):
@@ -145,13 +237,29 @@ class ProductDetailView(APIView):
                 code='not_found',
                 status_code=status.HTTP_404_NOT_FOUND
             )
-        serializer = ProductSerializer(product, context={'request': request})
-        return Response(
-            SuccessAPIResponse(
-                message="Product retrieved successfully.",
-                data=serializer.data
-            ).to_dict(), status=status.HTTP_200_OK
-        )
+        name = f"product:{product.id}"
+        dependencies = product_dependencies(product.id, product.shop_id)
+        etag, last_modified = get_validators(
+            request, name, dependencies, state=lambda: product_state(product.id))
+
+        def respond():
+            data = get_or_build(
+                request,
+                name,
+                dependencies,
+                lambda: ProductSerializer(
+                    Product.objects.for_catalog().get(id=product.id),
+                    context={'request': request}
+                ).data
+            )
+            return Response(
+                SuccessAPIResponse(
+                    message="Product retrieved successfully.",
+                    data=data
+                ).to_dict(), status=status.HTTP_200_OK
+            )
+
+        return conditional_get(request, respond, etag, last_modified)
         
 
     @extend_schema(**update_product_schema)
@@ -182,7 +290,14 @@ class ProductDetailView(APIView):
                 detail="Product update failed.",
                 code='validation_errror',
                 errors=serializer.errors)
-        serializer.save()
+        try:
+            serializer.save()
+        except ValidationError as e:
+            # name taken by a concurrent request
+            raise ErrorException(
+                detail="Product update failed.",
+                code='validation_errror',
+                errors=e.detail)
         return Response(
             SuccessAPIResponse(
                 message="Product updated successfully.",
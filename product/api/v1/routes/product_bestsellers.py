@@ -0,0 +1,89 @@
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from common.cores.validators import validate_id
+from common.exceptions import ErrorException
+from common.utils.api_responses import SuccessAPIResponse
+from common.utils.pagination import Pagination
+from product.api.v1.serializers import CatalogEntrySerializer
+from product.api.v1.swagger import get_product_bestsellers_schema, get_shop_product_bestsellers_schema
+from product.models import CatalogEntry
+from product.services import SalesRollupService
+from product.services.sales_rollup import RANKING_WINDOWS
+from shop.models import Shop
+
+
+RANKINGS = ('bestsellers', 'trending')
+
+
+def rank_products(request, shop=None):
+    """
+    Return a paginated response of the products of the ranking and
+    window requested with the `ranking` and `days` query strings.
+    """
+    ranking = request.query_params.get('ranking', RANKINGS[0]).strip().lower()
+    if ranking not in RANKINGS:
+        raise ErrorException(
+            detail=f"Enter a valid ranking: {', '.join(map(repr, RANKINGS))}.",
+            code='invalid_ranking'
+        )
+    days = request.query_params.get('days', str(RANKING_WINDOWS[0])).strip()
+    if days not in map(str, RANKING_WINDOWS):
+        raise ErrorException(
+            detail=f"Enter a valid number of days: {', '.join(map(str, RANKING_WINDOWS))}.",
+            code='invalid_days'
+        )
+    rank = getattr(SalesRollupService, ranking)
+    product_ids = rank(days=int(days), shop=shop)
+
+    paginator = Pagination()
+    page = paginator.paginate_queryset(product_ids, request)
+    entries = {
+        entry.product_id: entry
+        for entry in CatalogEntry.objects.filter(product_id__in=page)
+    }
+    serializers = CatalogEntrySerializer(
+        [entries[i] for i in page if i in entries],
+        many=True,
+        context={'request': request}
+    )
+    return paginator.get_paginated_response(serializers.data).data
+
+
+class ProductBestsellersView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(**get_product_bestsellers_schema)
+    def get(self, request):
+        """
+        Get the best selling or trending products of the catalog.
+        """
+        return Response(SuccessAPIResponse(
+            message="Best selling products retrieved successfully.",
+            data=rank_products(request)
+        ).to_dict(), status=status.HTTP_200_OK)
+
+
+class ShopProductBestsellersView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(**get_shop_product_bestsellers_schema)
+    def get(self, request, shop_id):
+        """
+        Get the best selling or trending products of a shop.
+        """
+        validate_id(shop_id, 'shop')
+        shop = Shop.objects.filter(id=shop_id).first()
+        if not shop:
+            raise ErrorException(
+                detail="No shop matching the given ID found.",
+                code='not_found',
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        return Response(SuccessAPIResponse(
+            message="Best selling shop products retrieved successfully.",
+            data=rank_products(request, shop)
+        ).to_dict(), status=status.HTTP_200_OK)
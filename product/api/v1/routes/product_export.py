@@ -0,0 +1,47 @@
+from django.http import StreamingHttpResponse
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.views import APIView
+
+from common.cores.validators import validate_id
+from common.exceptions import ErrorException
+from common.permissions import IsStaff
+from product.api.v1.swagger import export_shop_products_schema
+from product.services import ProductExportService
+from product.services.product_export import EXPORT_FORMATS
+from shop.models import Shop
+
+
+class ShopProductExportView(APIView):
+    permission_classes = [IsStaff]
+
+    @extend_schema(**export_shop_products_schema)
+    def get(self, request, shop_id):
+        """
+        Stream the products of a shop as a CSV or JSONL file.
+        """
+        validate_id(shop_id, 'shop')
+        shop = Shop.objects.filter(id=shop_id).first()
+        if not shop:
+            raise ErrorException(
+                detail="No shop matching the given ID found.",
+                code='not_found',
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+
+        if not request.user.can_manage_shop(shop):
+            raise PermissionDenied()
+
+        # `format` is reserved by DRF for content negotiation
+        fmt = request.query_params.get('type', 'csv').lower()
+        if fmt not in EXPORT_FORMATS:
+            raise ErrorException(
+                detail="Enter a valid type: 'csv' or 'jsonl'.",
+                code='invalid_type'
+            )
+
+        service = ProductExportService(shop, fmt, request=request)
+        response = StreamingHttpResponse(service.lines(), content_type=service.content_type)
+        response['Content-Disposition'] = f'attachment; filename="{service.filename}"'
+        return response
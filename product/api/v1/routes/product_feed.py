@@ -0,0 +1,40 @@
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from common.utils.api_responses import SuccessAPIResponse
+from common.utils.pagination import Pagination
+from product.api.v1.serializers import CatalogEntrySerializer
+from product.api.v1.swagger import get_product_feed_schema
+from product.models import CatalogEntry
+from product.services import RecommendationService
+
+
+class ProductFeedView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(**get_product_feed_schema)
+    def get(self, request):
+        """
+        Get the products recommended to the user, best first.
+        Only the products of the requested page are loaded.
+        """
+        paginator = Pagination()
+        product_ids = paginator.paginate_queryset(
+            RecommendationService.get_feed(request.user), request)
+        entries = {
+            entry.product_id.hex: entry
+            for entry in CatalogEntry.objects.filter(product_id__in=product_ids)
+        }
+        serializers = CatalogEntrySerializer(
+            # products deactivated or deleted since the feed was built are left out
+            [entries[i] for i in product_ids if i in entries],
+            many=True,
+            context={'request': request}
+        )
+        return Response(SuccessAPIResponse(
+            message="Recommended products retrieved successfully.",
+            data=paginator.get_paginated_response(serializers.data).data
+        ).to_dict(), status=status.HTTP_200_OK)
@@ -0,0 +1,74 @@
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from common.cores.validators import validate_id
+from common.exceptions import ErrorException
+from common.permissions import IsStaff
+from common.utils.api_responses import SuccessAPIResponse
+from product.api.v1.swagger import import_shop_products_schema
+from product.services import ImportFileError, ProductImportService
+from shop.models import Shop
+
+
+class ShopProductImportView(APIView):
+    permission_classes = [IsStaff]
+    parser_classes = [MultiPartParser]
+
+    @extend_schema(**import_shop_products_schema)
+    def post(self, request, shop_id):
+        """
+        Import products into a shop from a CSV or JSONL file.
+        """
+        validate_id(shop_id, 'shop')
+        shop = Shop.objects.filter(id=shop_id).first()
+        if not shop:
+            raise ErrorException(
+                detail="No shop matching the given ID found.",
+                code='not_found',
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+
+        if not request.user.can_manage_shop(shop):
+            raise PermissionDenied()
+
+        file = request.FILES.get('file')
+        if not file:
+            raise ErrorException(
+                detail="Please provide a CSV or JSONL file in the 'file' field.",
+                code='missing_field'
+            )
+        fmt = ProductImportService.get_format(file.name, request.data.get('format'))
+        if not fmt:
+            raise ErrorException(
+                detail="Enter a valid format: 'csv' or 'jsonl'.",
+                code='invalid_format'
+            )
+
+        service = ProductImportService(shop, updated_by=request.user.staff_handle or 'import')
+        try:
+            report = service.import_file(file, fmt)
+        except ImportFileError as e:
+            raise ErrorException(
+                detail=str(e),
+                code='invalid_file',
+                errors=service.get_report()
+            )
+        if report['failed']:
+            raise ErrorException(
+                detail="Some rows could not be imported.",
+                code='unprocessed_rows',
+                status_code=(
+                    status.HTTP_207_MULTI_STATUS
+                    if report['created']
+                    else status.HTTP_400_BAD_REQUEST
+                ),
+                errors=report
+            )
+        return Response(SuccessAPIResponse(
+            message="Products imported successfully.",
+            data=report
+        ).to_dict(), status=status.HTTP_201_CREATED)
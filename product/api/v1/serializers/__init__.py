@@ -1,12 +1,17 @@
-from .category import CategorySerializer
-from .inventory import InventorySerializer
+from .catalog_entry import CatalogEntrySerializer
+from .category import CategorySerializer, ProductCategorySerializer
+from .inventory import InventoryBatchSerializer, InventorySerializer, ReorderThresholdSerializer
 from .product import ProductSerializer
 from .product_image import ProductImageSerializer, UploadProductImageSeriallizer
 
 
 __all__ = [
+    'CatalogEntrySerializer',
     'CategorySerializer',
+    'ProductCategorySerializer',
+    'InventoryBatchSerializer',
     'InventorySerializer',
+    'ReorderThresholdSerializer',
     'ProductSerializer',
     'ProductImageSerializer',
     'UploadProductImageSeriallizer'
@@ -0,0 +1,67 @@
+from drf_spectacular.utils import extend_schema_field
+from rest_framework import serializers
+
+from product.models import CatalogEntry
+
+
+class CatalogEntrySerializer(serializers.ModelSerializer):
+    """
+    Serializer for the CatalogEntry model.
+    Lists a product in the shape of ProductSerializer, with only its
+    primary image and the id and name of its shop, without any query.
+    """
+    id = serializers.UUIDField(source='product_id', read_only=True)
+    images = serializers.SerializerMethodField()
+    categories = serializers.SerializerMethodField()
+    shop = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CatalogEntry
+        fields = [
+            'id', 'name', 'description', 'price', 'stock', 'images',
+            'categories', 'shop', 'created_at', 'updated_at'
+        ]
+
+    @extend_schema_field({
+        'type': 'array',
+        'items': {
+            'type': 'object',
+            'properties': {
+                'id': {'type': 'string', 'format': 'uuid'},
+                'url': {'type': 'string', 'format': 'uri'}
+            }
+        }
+    })
+    def get_images(self, obj):
+        """
+        Primary image of the product, if it has images.
+        """
+        if not obj.image_url:
+            return []
+        request = self.context.get('request')
+        url = request.build_absolute_uri(obj.image_url) if request else obj.image_url
+        return [{'id': str(obj.image_id), 'url': url}]
+
+    @extend_schema_field({
+        'type': 'array',
+        'items': {
+            'type': 'object',
+            'properties': {
+                'id': {'type': 'string', 'format': 'uuid'},
+                'name': {'type': 'string'},
+                'slug': {'type': 'string'}
+            }
+        }
+    })
+    def get_categories(self, obj):
+        return obj.categories
+
+    @extend_schema_field({
+        'type': 'object',
+        'properties': {
+            'id': {'type': 'string', 'format': 'uuid'},
+            'name': {'type': 'string'}
+        }
+    })
+    def get_shop(self, obj):
+        return {'id': str(obj.shop_id), 'name': obj.shop_name}
@@ -1,17 +1,28 @@
 from django.apps import apps
 from django.utils.text import slugify
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from product.models import Category
  
 
 class CategorySerializer(serializers.ModelSerializer):
+    product_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Category
-        fields = ['id', 'name', 'slug']
+        fields = ['id', 'name', 'slug', 'product_count']
         read_only_fields = ['id', 'slug']
 
+    @extend_schema_field(OpenApiTypes.INT)
+    def get_product_count(self, obj):
+        """
+        Number of active products in the category. Scoped to a shop
+        when the category was loaded with shop facet counts.
+        """
+        return getattr(obj, 'shop_product_count', obj.product_count)
+
     def validate_name(self, value):
         """
         Validate that the category name does not already exist.
@@ -27,3 +38,14 @@ class CategorySerializer(serializers.ModelSerializer):
         elif exists:
             raise serializers.ValidationError("Category with this name already exists.")
         return value
+
+
+class ProductCategorySerializer(serializers.ModelSerializer):
+    """
+    Categories nested in a product.
+    Product counts are left out so cached product payloads do not
+    go stale every time a category count changes.
+    """
+    class Meta:
+        model = Category
+        fields = ['id', 'name', 'slug']
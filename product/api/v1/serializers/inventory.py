@@ -5,7 +5,48 @@ from product.models import Inventory
 
 class InventorySerializer(serializers.ModelSerializer):
     product = serializers.CharField(source='product.name', read_only=True)
+    reserved = serializers.IntegerField(source='total_reserved', read_only=True)
     
     class Meta:
         model = Inventory
-        fields = ['product', 'stock']
+        fields = ['product', 'stock', 'reserved', 'reorder_threshold']
+
+
+class ReorderThresholdSerializer(serializers.Serializer):
+    """
+    Serializer for the reorder threshold of an inventory.
+    """
+    reorder_threshold = serializers.IntegerField(min_value=0, allow_null=True)
+
+
+MAX_BATCH_ITEMS = 1000
+
+
+class InventoryAdjustmentSerializer(serializers.Serializer):
+    """
+    Stock adjustment of a product in an inventory batch.
+    """
+    product_id = serializers.UUIDField()
+    action = serializers.ChoiceField(choices=['add', 'subtract'])
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class InventoryBatchSerializer(serializers.Serializer):
+    """
+    Serializer for a batch of stock adjustments.
+    """
+    mode = serializers.ChoiceField(choices=['atomic', 'best_effort'], default='atomic')
+    items = serializers.ListField(
+        child=InventoryAdjustmentSerializer(),
+        allow_empty=False,
+        max_length=MAX_BATCH_ITEMS
+    )
+
+    def validate_items(self, value):
+        """
+        Validate that each product is adjusted once.
+        """
+        product_ids = [item['product_id'] for item in value]
+        if len(set(product_ids)) != len(product_ids):
+            raise serializers.ValidationError("Each product can only be adjusted once per batch.")
+        return value
@@ -1,25 +1,28 @@
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 
-from .category import CategorySerializer
+from .category import ProductCategorySerializer
 from .product_image import ProductImageSerializer
 from common.exceptions import ErrorException
 from product.models import Product
 from shop.api.v1.serializers import ShopSerializer
 
 
+DUPLICATE_NAME_ERROR = "A product with this name already exists in the shop."
+
+
 class ProductSerializer(serializers.ModelSerializer):
     """
     Serializer for Product model.
     """
     images = ProductImageSerializer(read_only=True, many=True, required=False)
-    categories = CategorySerializer(read_only=True, many=True, required=False)
-    stock = serializers.IntegerField(source='inventory.stock', read_only=True)
+    categories = ProductCategorySerializer(read_only=True, many=True, required=False)
+    stock = serializers.IntegerField(read_only=True)
     shop = ShopSerializer(read_only=True)
 
     class Meta:
         model = Product
-        exclude = ['is_active']
+        exclude = ['is_active', 'normalized_name', 'active_order_count']
         read_only_fields = ['id', 'deactivated_at']
 
     def __init__(self, *args, **kwargs):
@@ -48,12 +51,28 @@ class ProductSerializer(serializers.ModelSerializer):
             raise AssertionError(
                 "ProductSerializer requires shop in the context when creating new product."
             )
-        if shop.products.filter(name__iexact=value).exists():
-            raise serializers.ValidationError(
-                "A product with this name already exists in the shop."
-            )
+        # index probe on (shop, normalized_name)
+        products = shop.products.filter(normalized_name=Product.normalize_name(value))
+        if self.instance:
+            products = products.exclude(id=self.instance.id)
+        if products.exists():
+            raise serializers.ValidationError(DUPLICATE_NAME_ERROR)
         return value
 
+    @staticmethod
+    def _save(product, **kwargs):
+        """
+        Save a product, reporting a name taken by a concurrent
+        request as a validation error.
+        """
+        try:
+            with transaction.atomic():
+                product.save(**kwargs)
+        except IntegrityError as e:
+            if not Product.is_duplicate_name(e):
+                raise
+            raise serializers.ValidationError({'name': [DUPLICATE_NAME_ERROR]})
+
     def validate(self, attrs):
         """
         Check that the self._shop exists before a product is created.
@@ -77,8 +96,8 @@ class ProductSerializer(serializers.ModelSerializer):
         
         categories = [categories] if not isinstance(categories, list) else categories
         
-        product = Product.objects.create(
-            **validated_data, shop=self._shop)
+        product = Product(**validated_data, shop=self._shop)
+        self._save(product, force_insert=True)
 
         if categories:
             try:
@@ -107,5 +126,5 @@ class ProductSerializer(serializers.ModelSerializer):
             setattr(instance, k, v)
         # if categories:
         #     instance.add_categories(categories)
-        instance.save()
+        self._save(instance)
         return instance
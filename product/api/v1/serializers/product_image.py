@@ -1,16 +1,63 @@
+from django.conf import settings
+from django.db import transaction
+from django.templatetags.static import static
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
-from product.models import ProductImage
+from product.models import IMAGE_BLOB_KIND, CatalogEntry, ImageStatus, ProductImage
 from common.exceptions import ErrorException
+from common.models import MediaBlob
+from common.utils.cache import invalidate_product
 
 class ProductImageSerializer(serializers.ModelSerializer):
     """
     Serializer for ProductImage model.
     """
-    url = serializers.ImageField(source='image')
+    url = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = ProductImage
-        fields = ['id', 'url']
+        fields = ['id', 'url', 'status', 'srcset']
+
+    def _absolute(self, url):
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    @extend_schema_field(OpenApiTypes.URI)
+    def get_url(self, obj):
+        """
+        URL of the image, or of a placeholder until it is processed.
+        """
+        if obj.status == ImageStatus.READY:
+            url = obj.image.url
+        else:
+            url = static(settings.PRODUCT_IMAGE_PLACEHOLDER)
+        return self._absolute(url)
+
+    @extend_schema_field({
+        'type': 'object',
+        'additionalProperties': {'type': 'string'},
+        'example': {
+            'jpeg': 'https://example.com/a_160.jpg 160w, https://example.com/a_400.jpg 400w',
+            'webp': 'https://example.com/a_160.webp 160w, https://example.com/a_400.webp 400w'
+        }
+    })
+    def get_srcset(self, obj):
+        """
+        srcset attribute value of the image renditions, per format.
+        """
+        if obj.status != ImageStatus.READY:
+            return {}
+        storage = obj.image.storage
+        return {
+            fmt: ", ".join(
+                f"{self._absolute(storage.url(name))} {size}w"
+                for size, name in sorted(sizes.items(), key=lambda s: int(s[0]))
+            )
+            for fmt, sizes in obj.renditions.items()
+        }
 
 
 class UploadProductImageSeriallizer(serializers.Serializer):
@@ -46,14 +93,32 @@ class UploadProductImageSeriallizer(serializers.Serializer):
             self._raise("Ensure that all images are less than 2MB", "image_too_large")
         return images
     
+    @transaction.atomic
     def create(self, validated_data):
         """
         Add images to the associated product.
+        Uploads already stored are ready at once, others are processed
+        in the background.
         """
         images = validated_data.pop('images')
-        img_objs = [ProductImage(
-            product=self._product,
-            image=img
-        ) for img in images]
+        img_objs = []
+        for img in images:
+            blob = MediaBlob.acquire(IMAGE_BLOB_KIND, MediaBlob.content_digest(img))
+            if blob:
+                img_objs.append(ProductImage(
+                    product=self._product,
+                    image=blob.name,
+                    blob=blob,
+                    status=ImageStatus.READY,
+                    renditions=blob.renditions
+                ))
+            else:
+                img_objs.append(ProductImage(product=self._product, image=img))
         ProductImage.objects.bulk_create(img_objs)
+        # bulk_create skips ProductImage.save
+        CatalogEntry.sync([self._product.id])
+        for img_obj in img_objs:
+            if img_obj.status == ImageStatus.PENDING:
+                img_obj.schedule_processing()
+        invalidate_product(self._product.id, self._product.shop_id)
         return self._product.images.all()
\ No newline at end of file
@@ -1,3 +1,4 @@
+from .catalog_cache import get_catalog_cache_stats_schema
 from .category import (
     create_category_schema,
     delete_category_schema,
@@ -5,7 +6,11 @@ from .category import (
     get_categories_schema,
     update_category_schema
 )
-from .inventory import update_inventory_schema
+from .inventory import (
+    batch_update_inventory_schema,
+    update_inventory_schema,
+    update_reorder_threshold_schema
+)
 from .product import (
     create_shop_product_schema,
     delete_product_schema,
@@ -15,6 +20,10 @@ from .product import (
     update_product_schema,
     product_category_add_or_remove_schema
 )
+from .product_bestsellers import get_product_bestsellers_schema, get_shop_product_bestsellers_schema
+from .product_export import export_shop_products_schema
+from .product_feed import get_product_feed_schema
+from .product_import import import_shop_products_schema
 from .product_image import (
     create_product_image_schema,
     delete_product_image_schema,
@@ -30,6 +39,11 @@ __all__ = [
     'get_products_schema',
     'get_shop_products_schema',
     'update_product_schema',
+    'import_shop_products_schema',
+    'export_shop_products_schema',
+    'get_product_feed_schema',
+    'get_product_bestsellers_schema',
+    'get_shop_product_bestsellers_schema',
 
     # product image schemas
     'create_product_image_schema',
@@ -49,5 +63,10 @@ __all__ = [
 
     # inventory schema
     'update_inventory_schema',
+    'update_reorder_threshold_schema',
+    'batch_update_inventory_schema',
+
+    # catalog cache schema
+    'get_catalog_cache_stats_schema',
 
 ]
\ No newline at end of file
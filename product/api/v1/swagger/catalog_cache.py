@@ -0,0 +1,34 @@
+from rest_framework import serializers
+
+from common.swagger import (
+    ForbiddenSerializer,
+    make_success_schema_response,
+    make_unauthorized_error_schema_response
+)
+
+
+class CatalogCacheStats(serializers.Serializer):
+    """
+    Serializer for the catalog cache counters.
+    """
+    hits = serializers.IntegerField()
+    misses = serializers.IntegerField()
+    hit_rate = serializers.FloatField()
+
+
+get_catalog_cache_stats_schema = {
+    'summary': 'Get catalog cache stats',
+    'description': 'Returns the hit and miss counters of the cache serving \
+        product and shop catalog payloads. Accessible to only super users.',
+    'tags': ['Product'],
+    'operation_id': 'get_catalog_cache_stats',
+    'request': None,
+    'responses': {
+        200: make_success_schema_response(
+            "Catalog cache stats retrieved successfully.",
+            CatalogCacheStats
+        ),
+        401: make_unauthorized_error_schema_response(),
+        403: ForbiddenSerializer
+    }
+}
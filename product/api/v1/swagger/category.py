@@ -1,4 +1,4 @@
-from drf_spectacular.utils import OpenApiResponse
+from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, OpenApiTypes
 
 from common.swagger import (
     build_invalid_id_error,
@@ -34,9 +34,20 @@ category_errors = {
 
 get_categories_schema = {
     'summary': 'Get all categories',
-    'description': 'Returns a paginated list of all product categories.',
+    'description': 'Returns a paginated list of all product categories \
+        with the number of active products in each.',
     'tags': ['Category'],
     'operation_id': 'get_categories',
+    'parameters': [
+        OpenApiParameter(
+            name='shop',
+            type=OpenApiTypes.UUID,
+            description="Only return categories with active products in this shop. \
+                'product_count' is then the number of products of the shop.",
+            location=OpenApiParameter.QUERY,
+            required=False
+        )
+    ],
     'request': None,
     'responses': {
         200: make_success_schema_response(
@@ -45,7 +56,9 @@ get_categories_schema = {
             many=True, 
             paginated=True    
         ),
-        401: make_unauthorized_error_schema_response()
+        400: make_error_schema_response(errors=build_invalid_id_error('shop')),
+        401: make_unauthorized_error_schema_response(),
+        404: make_not_found_error_schema_response(['shop'])
     }
 }
 
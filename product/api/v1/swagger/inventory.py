@@ -1,13 +1,20 @@
 from rest_framework import serializers
 
+from drf_spectacular.utils import OpenApiResponse
+
 from common.swagger import (
     ForbiddenSerializer,
+    build_error_schema_examples,
+    build_error_schema_examples_with_errors_field,
+    build_invalid_id_error,
     make_error_schema_response,
+    make_error_schema_response_with_errors_field,
     make_success_schema_response,
     make_not_found_error_schema_response,
-    make_unauthorized_error_schema_response
+    make_unauthorized_error_schema_response,
+    polymorphic_response
 )
-from product.api.v1.serializers import InventorySerializer
+from product.api.v1.serializers import InventoryBatchSerializer, InventorySerializer, ReorderThresholdSerializer
 
 # UPDATE INVENTORY SCHEMA
 
@@ -43,3 +50,121 @@ update_inventory_schema = {
         404: make_not_found_error_schema_response(['product'])
     }
 }
+
+
+# UPDATE REORDER THRESHOLD SCHEMA
+
+update_reorder_threshold_schema = {
+    'summary': 'Set the reorder threshold of a product',
+    'description': 'Sets the available stock at which the shop is alerted that \
+        a product runs low, or stops the alerts when null. The shop receives \
+        its new alerts in a periodic digest.',
+    'tags': ['Inventory'],
+    'request': ReorderThresholdSerializer,
+    'responses': {
+        200: make_success_schema_response(
+            "Reorder threshold updated successfully.",
+            InventorySerializer
+        ),
+        400: make_error_schema_response_with_errors_field(
+            message="Inventory update failed.",
+            errors={
+                'validation_error': {
+                    'reorder_threshold': ['Ensure this value is greater than or equal to 0.']
+                }
+            }
+        ),
+        401: make_unauthorized_error_schema_response(),
+        403: ForbiddenSerializer,
+        404: make_not_found_error_schema_response(['product'])
+    }
+}
+
+
+# BATCH UPDATE INVENTORY SCHEMA
+
+class InventoryBatchItemResult(serializers.Serializer):
+    """
+    Result of a stock adjustment of an inventory batch.
+    """
+    product_id = serializers.UUIDField()
+    action = serializers.CharField(default='subtract')
+    quantity = serializers.IntegerField(default=2)
+    status = serializers.ChoiceField(
+        choices=['updated', 'not_found', 'insufficient_stock', 'skipped'],
+        default='updated'
+    )
+    stock = serializers.IntegerField(allow_null=True, default=34)
+
+
+class InventoryBatchReport(serializers.Serializer):
+    """
+    Report of an inventory batch.
+    """
+    updated = serializers.IntegerField(default=1)
+    failed = serializers.IntegerField(default=0)
+    items = InventoryBatchItemResult(many=True)
+
+
+batch_update_inventory_errors = {
+    **build_invalid_id_error('shop'),
+    'validation_error': 'Inventory update failed.'
+}
+
+unprocessed_items_error = {
+    'unprocessed_items': {
+        'updated': 1,
+        'failed': 1,
+        'items': [
+            {
+                'product_id': 'd4f1b0f2-6a6e-4c8f-9f0e-2b7e1c5a9b3d',
+                'action': 'add',
+                'quantity': 5,
+                'status': 'updated',
+                'stock': 41
+            },
+            {
+                'product_id': '8c2a7e35-1f4b-4d2e-a6c9-3e5f0b7d1a24',
+                'action': 'subtract',
+                'quantity': 50,
+                'status': 'insufficient_stock',
+                'stock': 12
+            }
+        ]
+    }
+}
+
+batch_update_inventory_schema = {
+    'summary': 'Update the inventory of many products of a shop',
+    'description': 'Adds to and/or subtracts from the stock of up to 1000 products \
+        of a shop in one request, each product at most once. In \'atomic\' mode, \
+        the default, nothing is applied unless every adjustment is valid. In \
+        \'best_effort\' mode the valid adjustments are applied and the others \
+        reported. Accessible to only staff of the shop.',
+    'tags': ['Inventory'],
+    'operation_id': 'batch_update_shop_inventory',
+    'request': InventoryBatchSerializer,
+    'responses': {
+        200: make_success_schema_response(
+            "Inventory updated successfully.",
+            InventoryBatchReport
+        ),
+        207: make_error_schema_response_with_errors_field(
+            message="Some items could not be processed.",
+            errors=unprocessed_items_error
+        ),
+        400: OpenApiResponse(
+            response=polymorphic_response,
+            examples=[
+                *build_error_schema_examples(errors=batch_update_inventory_errors),
+                *build_error_schema_examples_with_errors_field(
+                    message="Some items could not be processed.",
+                    errors=unprocessed_items_error
+                )
+            ]
+        ),
+        401: make_unauthorized_error_schema_response(),
+        403: ForbiddenSerializer,
+        404: make_not_found_error_schema_response(['shop'])
+    }
+}
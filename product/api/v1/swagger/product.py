@@ -1,4 +1,4 @@
-from drf_spectacular.utils import OpenApiResponse
+from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, OpenApiTypes
 from decimal import Decimal
 from rest_framework import serializers
 
@@ -12,11 +12,13 @@ from common.swagger import (
     make_success_schema_response,
     make_not_found_error_schema_response,
     make_unauthorized_error_schema_response,
-    polymorphic_response
+    polymorphic_response,
+    pagination_parameters
 )
 
 
-from product.api.v1.serializers import ProductSerializer
+from product.api.v1.serializers import CatalogEntrySerializer, ProductSerializer
+from product.utils.filters import CATALOG_ORDERINGS, DEFAULT_CATALOG_ORDERING
 
 
 # PRODUCT SCHEMAS
@@ -37,9 +39,75 @@ class ProductCategoryRequestData(serializers.Serializer):
     categories = serializers.ListField(child=serializers.CharField(default="category"))
 
     
+facets_parameter = OpenApiParameter(
+    name='facets',
+    type=OpenApiTypes.BOOL,
+    description="Include the number of active products per category \
+        in a 'facets' field.",
+    location=OpenApiParameter.QUERY,
+    required=False
+)
+
+
+# CATALOG FILTERS AND SORT MODES
+catalog_parameters = [
+    OpenApiParameter(
+        name='min_price',
+        type=OpenApiTypes.DECIMAL,
+        description="Only products priced at least this amount.",
+        location=OpenApiParameter.QUERY,
+        required=False
+    ),
+    OpenApiParameter(
+        name='max_price',
+        type=OpenApiTypes.DECIMAL,
+        description="Only products priced at most this amount.",
+        location=OpenApiParameter.QUERY,
+        required=False
+    ),
+    OpenApiParameter(
+        name='category',
+        type=OpenApiTypes.STR,
+        description="Only products of the category with this slug or name.",
+        location=OpenApiParameter.QUERY,
+        required=False
+    ),
+    OpenApiParameter(
+        name='in_stock',
+        type=OpenApiTypes.BOOL,
+        description="Only products in stock (true) or out of stock (false).",
+        location=OpenApiParameter.QUERY,
+        required=False
+    ),
+    OpenApiParameter(
+        name='ordering',
+        type=OpenApiTypes.STR,
+        enum=list(CATALOG_ORDERINGS),
+        default=DEFAULT_CATALOG_ORDERING,
+        description="Sort mode. Also used by cursor pagination. \
+            Ignored when searching, results are then ordered by relevance.",
+        location=OpenApiParameter.QUERY,
+        required=False
+    ),
+]
+
+shop_filter_parameter = OpenApiParameter(
+    name='shop',
+    type=OpenApiTypes.UUID,
+    description="Only products of the shop with this id.",
+    location=OpenApiParameter.QUERY,
+    required=False
+)
+
+    
 # ERRORS 
 invalid_shop_id_err = build_invalid_id_error('shop')
 
+catalog_filter_errors = {
+    'invalid_ordering': f"Enter a valid ordering: {', '.join(map(repr, CATALOG_ORDERINGS))}.",
+    'invalid_filters': "Invalid filters."
+}
+
 invalid_product_id_err = build_invalid_id_error('product')
 
 shop_product_errors = {
@@ -80,15 +148,16 @@ get_shop_products_schema = {
         specific shop.',
     'tags': ['Product'],
     'operation_id': 'get_shop_products',
+    'parameters': [*catalog_parameters, facets_parameter, *pagination_parameters],
     'request': None,
     'responses': {
         200: make_success_schema_response(
             "Shop products retrieved successfully.",
-            ProductSerializer,
+            CatalogEntrySerializer,
             many=True,
             paginated=True
         ),
-        400: make_error_schema_response(errors=invalid_shop_id_err),
+        400: make_error_schema_response(errors={**invalid_shop_id_err, **catalog_filter_errors}),
         401: make_unauthorized_error_schema_response(),
         404: make_not_found_error_schema_response(['shop'])
     }
@@ -127,14 +196,29 @@ get_products_schema = {
     'description': 'Returns a paginated list of products.',
     'tags': ['Product'],
     'operation_id': 'get_products',
+    'parameters': [
+        OpenApiParameter(
+            name='search',
+            type=OpenApiTypes.STR,
+            description="Search products by name, description and categories. \
+                Results are ordered by relevance.",
+            location=OpenApiParameter.QUERY,
+            required=False
+        ),
+        shop_filter_parameter,
+        *catalog_parameters,
+        facets_parameter,
+        *pagination_parameters
+    ],
     'request': None,
     'responses': {
         200: make_success_schema_response(
             "Products retrieved successfully.",
-            ProductSerializer,
+            CatalogEntrySerializer,
             many=True,
             paginated=True    
         ),
+        400: make_error_schema_response(errors=catalog_filter_errors),
         401: make_unauthorized_error_schema_response(),
     }
 }
@@ -0,0 +1,90 @@
+from drf_spectacular.utils import OpenApiParameter, OpenApiTypes
+
+from common.swagger import (
+    build_invalid_id_error,
+    make_error_schema_response,
+    make_not_found_error_schema_response,
+    make_success_schema_response,
+    make_unauthorized_error_schema_response
+)
+from product.api.v1.serializers import CatalogEntrySerializer
+from product.services.sales_rollup import RANKING_WINDOWS
+
+
+ranking_parameters = [
+    OpenApiParameter(
+        name='ranking',
+        type=OpenApiTypes.STR,
+        enum=['bestsellers', 'trending'],
+        default='bestsellers',
+        description="'bestsellers' ranks products by units ordered in the \
+            window, 'trending' by how much faster they sold in the last \
+            days than in the rest of the window.",
+        location=OpenApiParameter.QUERY,
+        required=False
+    ),
+    OpenApiParameter(
+        name='days',
+        type=OpenApiTypes.INT,
+        enum=list(RANKING_WINDOWS),
+        default=RANKING_WINDOWS[0],
+        description="Number of days of sales ranked, today included.",
+        location=OpenApiParameter.QUERY,
+        required=False
+    ),
+    OpenApiParameter(
+        name='page',
+        type=OpenApiTypes.INT,
+        description="Page number.",
+        location=OpenApiParameter.QUERY,
+        required=False
+    ),
+]
+
+ranking_errors = {
+    'invalid_ranking': "Enter a valid ranking: 'bestsellers', 'trending'.",
+    'invalid_days': f"Enter a valid number of days: {', '.join(map(str, RANKING_WINDOWS))}."
+}
+
+
+get_product_bestsellers_schema = {
+    'summary': 'Get the best selling products',
+    'description': 'Returns a paginated list of the best selling or trending \
+        products, best first. Rankings are computed from daily sales totals \
+        rolled up periodically from the orders.',
+    'tags': ['Product'],
+    'operation_id': 'get_product_bestsellers',
+    'parameters': ranking_parameters,
+    'request': None,
+    'responses': {
+        200: make_success_schema_response(
+            "Best selling products retrieved successfully.",
+            CatalogEntrySerializer,
+            many=True,
+            paginated=True
+        ),
+        400: make_error_schema_response(errors=ranking_errors),
+        401: make_unauthorized_error_schema_response(),
+    }
+}
+
+get_shop_product_bestsellers_schema = {
+    'summary': 'Get the best selling products of a shop',
+    'description': 'Returns a paginated list of the best selling or trending \
+        products of a shop, best first.',
+    'tags': ['Product'],
+    'operation_id': 'get_shop_product_bestsellers',
+    'parameters': ranking_parameters,
+    'request': None,
+    'responses': {
+        200: make_success_schema_response(
+            "Best selling shop products retrieved successfully.",
+            CatalogEntrySerializer,
+            many=True,
+            paginated=True
+        ),
+        400: make_error_schema_response(errors={**build_invalid_id_error('shop'), **ranking_errors}),
+        401: make_unauthorized_error_schema_response(),
+        404: make_not_found_error_schema_response(['shop'])
+    }
+}
@@ -0,0 +1,51 @@
+from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, OpenApiTypes
+
+from common.swagger import (
+    build_invalid_id_error,
+    ForbiddenSerializer,
+    make_error_schema_response,
+    make_not_found_error_schema_response,
+    make_unauthorized_error_schema_response
+)
+
+
+export_errors = {
+    **build_invalid_id_error('shop'),
+    'invalid_type': "Enter a valid type: 'csv' or 'jsonl'.",
+}
+
+
+export_shop_products_schema = {
+    'summary': 'Export the products of a shop',
+    'description': 'Streams every product of a shop with its stock, price, \
+        categories and image URLs as a CSV or JSONL file. In CSV, categories \
+        and image URLs are separated by \'|\'. Accessible to only staff of the shop.',
+    'tags': ['Product'],
+    'operation_id': 'export_shop_products',
+    'parameters': [
+        OpenApiParameter(
+            name='type',
+            type=OpenApiTypes.STR,
+            enum=['csv', 'jsonl'],
+            default='csv',
+            description="Type of the exported file.",
+            location=OpenApiParameter.QUERY,
+            required=False
+        )
+    ],
+    'request': None,
+    'responses': {
+        (200, 'text/csv'): OpenApiResponse(
+            response=OpenApiTypes.STR,
+            description="CSV file, one product per line after the header."
+        ),
+        (200, 'application/x-ndjson'): OpenApiResponse(
+            response=OpenApiTypes.STR,
+            description="JSONL file, one product per line."
+        ),
+        400: make_error_schema_response(errors=export_errors),
+        401: make_unauthorized_error_schema_response(),
+        403: ForbiddenSerializer,
+        404: make_not_found_error_schema_response(['shop'])
+    }
+}
@@ -0,0 +1,37 @@
+from drf_spectacular.utils import OpenApiParameter, OpenApiTypes
+
+from common.swagger import (
+    make_success_schema_response,
+    make_unauthorized_error_schema_response
+)
+from product.api.v1.serializers import CatalogEntrySerializer
+
+
+get_product_feed_schema = {
+    'summary': 'Get the products recommended to the user',
+    'description': 'Returns a paginated list of products, best match first. \
+        Recommendations are precomputed from the best sellers of the user\'s \
+        preferred categories and of the categories they ordered from. Users \
+        without recommendations get the best sellers of every category.',
+    'tags': ['Product'],
+    'operation_id': 'get_product_feed',
+    'parameters': [
+        OpenApiParameter(
+            name='page',
+            type=OpenApiTypes.INT,
+            description="Page number.",
+            location=OpenApiParameter.QUERY,
+            required=False
+        )
+    ],
+    'request': None,
+    'responses': {
+        200: make_success_schema_response(
+            "Recommended products retrieved successfully.",
+            CatalogEntrySerializer,
+            many=True,
+            paginated=True
+        ),
+        401: make_unauthorized_error_schema_response(),
+    }
+}
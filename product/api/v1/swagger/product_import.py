@@ -0,0 +1,96 @@
+from drf_spectacular.utils import OpenApiResponse
+from rest_framework import serializers
+
+from common.swagger import (
+    build_error_schema_examples,
+    build_error_schema_examples_with_errors_field,
+    build_invalid_id_error,
+    ForbiddenSerializer,
+    make_error_schema_response_with_errors_field,
+    make_success_schema_response,
+    make_not_found_error_schema_response,
+    make_unauthorized_error_schema_response,
+    polymorphic_response
+)
+
+
+class ProductImportRequest(serializers.Serializer):
+    """
+    Serializer for the request data to import products.
+    """
+    file = serializers.FileField(help_text="CSV or JSONL file. CSV columns: \
+        name, description, price, stock, categories (names separated by '|').")
+    format = serializers.ChoiceField(
+        choices=['csv', 'jsonl'],
+        required=False,
+        help_text="Format of the file. Guessed from the file name if not given."
+    )
+
+
+class ProductImportReport(serializers.Serializer):
+    """
+    Serializer for the report of a product import.
+    """
+    created = serializers.IntegerField()
+    failed = serializers.IntegerField()
+    errors = serializers.ListField(child=serializers.DictField())
+
+
+import_errors = {
+    **build_invalid_id_error('shop'),
+    'missing_field': "Please provide a CSV or JSONL file in the 'file' field.",
+    'invalid_format': "Enter a valid format: 'csv' or 'jsonl'.",
+}
+
+unprocessed_rows_error = {
+    'unprocessed_rows': {
+        'created': 0,
+        'failed': 1,
+        'errors': [{
+            'row': 2,
+            'errors': {'name': ['A product with this name already exists in the shop.']}
+        }]
+    }
+}
+
+invalid_file_error = {
+    'invalid_file': {'created': 0, 'failed': 0, 'errors': []}
+}
+
+
+import_shop_products_schema = {
+    'summary': 'Import products into a shop',
+    'description': 'Creates products from an uploaded CSV or JSONL file. \
+        Rows that fail validation are skipped and reported with their row number, \
+        the others are imported. Accessible to only staff of the shop.',
+    'tags': ['Product'],
+    'operation_id': 'import_shop_products',
+    'request': {'multipart/form-data': ProductImportRequest},
+    'responses': {
+        201: make_success_schema_response(
+            "Products imported successfully.",
+            ProductImportReport
+        ),
+        207: make_error_schema_response_with_errors_field(
+            message="Some rows could not be imported.",
+            errors=unprocessed_rows_error
+        ),
+        400: OpenApiResponse(
+            response=polymorphic_response,
+            examples=[
+                *build_error_schema_examples(errors=import_errors),
+                *build_error_schema_examples_with_errors_field(
+                    message="Some rows could not be imported.",
+                    errors=unprocessed_rows_error
+                ),
+                *build_error_schema_examples_with_errors_field(
+                    message="The file is not UTF-8 encoded, after row 0.",
+                    errors=invalid_file_error
+                )
+            ]
+        ),
+        401: make_unauthorized_error_schema_response(),
+        403: ForbiddenSerializer,
+        404: make_not_found_error_schema_response(['shop'])
+    }
+}
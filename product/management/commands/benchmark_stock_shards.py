@@ -0,0 +1,148 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from queue import Queue
+import time
+import uuid
+
+from cart.models import Cart, CartItem
+from order.domain.exceptions import InvalidCartError
+from order.models import FulFillmentMethod, Order, OrderGroup, PaymentMethod
+from order.services import CheckoutService
+from order.utils.orders import update_active_order_counts
+from product.models import Inventory, Product, StockReservation
+from product.services import StockReservationService
+from user.models import UserProfile
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the checkouts per second of a product for several shard "
+        "counts, each checkout run through the checkout service by a "
+        "customer of its own. Needs a database with row-level locks, such as "
+        "MySQL with InnoDB, to show any difference: SQLite serializes every write."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('product_id', help="ID of the product checked out.")
+        parser.add_argument(
+            '--shards',
+            type=int,
+            nargs='+',
+            default=[0, 4, 16],
+            help="Shard counts to compare, 0 for the unsharded inventory."
+        )
+        parser.add_argument('--threads', type=int, default=8, help="Number of concurrent checkouts.")
+        parser.add_argument('--checkouts', type=int, default=500, help="Number of checkouts per shard count.")
+
+    def _create_customers(self, count):
+        """
+        Create a customer with a cart for each thread, deleted at the end.
+        """
+        customers = []
+        for _ in range(count):
+            customer = User.objects.create_user(
+                email=f"benchmark-{uuid.uuid4().hex}@example.com",
+                password=None
+            )
+            UserProfile.objects.create(
+                user=customer,
+                first_name='Benchmark',
+                last_name='Customer',
+                telephone='08112221111'
+            )
+            Cart.objects.create(user=customer)
+            customers.append(customer)
+        return customers
+
+    def _checkout(self, product, customers):
+        """
+        Check out one item of the product with a free customer.
+        Returns the order group id if the checkout went through.
+        """
+        customer = customers.get()
+        try:
+            CartItem.objects.create(cart=customer.cart, product=product, product_name=product.name, quantity=1)
+            cart_items = customer.cart.items.select_related("product__inventory", "product__shop")
+            service = CheckoutService(
+                user=customer,
+                cart=customer.cart,
+                cart_items=cart_items,
+                shipping_address=None,
+                payment_method=PaymentMethod.DIGITAL,
+                fulfillment_method=FulFillmentMethod.PICKUP
+            )
+            try:
+                return service.execute().id
+            except InvalidCartError:
+                cart_items.delete()
+                return None
+        finally:
+            customers.put(customer)
+
+    def _checkout_in_worker(self, product, customers):
+        """
+        Check out from a pool thread, which opens its own connection.
+        """
+        try:
+            return self._checkout(product, customers)
+        finally:
+            close_old_connections()
+
+    def _run(self, product, customers, checkouts, threads):
+        if threads == 1:
+            group_ids = [self._checkout(product, customers) for _ in range(checkouts)]
+        else:
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                group_ids = list(pool.map(
+                    lambda _: self._checkout_in_worker(product, customers), range(checkouts)))
+        return [group_id for group_id in group_ids if group_id]
+
+    def _clean_up(self, group_ids):
+        """
+        Give the stock back and delete the test orders.
+        """
+        order_ids = list(Order.objects.filter(group_id__in=group_ids).values_list('id', flat=True))
+        update_active_order_counts(order_ids, -1)
+        StockReservationService.release_orders(order_ids)
+        StockReservation.objects.filter(order_id__in=order_ids).delete()
+        OrderGroup.objects.filter(id__in=group_ids).delete()
+
+    def handle(self, *args, **options):
+        if options['threads'] < 1 or options['checkouts'] < 1:
+            raise CommandError("The number of threads and checkouts must be at least 1.")
+        try:
+            inventory = Inventory.objects.filter(product_id=options['product_id']).first()
+        except ValidationError:
+            inventory = None
+        if not inventory:
+            raise CommandError("No product matching the given ID found.")
+        product = Product.objects.get(id=inventory.product_id)
+
+        customers = Queue()
+        created = self._create_customers(options['threads'])
+        for customer in created:
+            customers.put(customer)
+
+        original = inventory.shard_count
+        try:
+            for count in options['shards']:
+                inventory.set_shards(count)
+                started = time.perf_counter()
+                group_ids = self._run(product, customers, options['checkouts'], options['threads'])
+                elapsed = time.perf_counter() - started
+                self._clean_up(group_ids)
+                self.stdout.write(
+                    f"{count} shards: {len(group_ids)}/{options['checkouts']} checked out in {elapsed:.2f}s, "
+                    f"{options['checkouts'] / elapsed:.0f} checkouts/s"
+                )
+        finally:
+            inventory.set_shards(original)
+            User.objects.filter(id__in=[customer.id for customer in created]).delete()
+        self.stdout.write(self.style.SUCCESS("Benchmark finished."))
@@ -0,0 +1,92 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+import itertools
+import re
+import uuid
+
+from product.models import CatalogEntry
+from product.utils.filters import CATALOG_ORDERINGS
+
+
+# filters of the catalog endpoints, applied to a sample queryset
+FILTERS = {
+    'price': lambda qs: qs.filter(price__gte=10, price__lte=100),
+    'category': lambda qs: qs.in_category(uuid.UUID(int=0)),
+    'in_stock': lambda qs: qs.filter(stock__gt=0),
+}
+
+
+def catalog_queries():
+    """
+    Yield (label, queryset) for every filter and sort combination
+    of the catalog and shop catalog endpoints.
+    """
+    scopes = {
+        'catalog': CatalogEntry.objects.all(),
+        'shop': CatalogEntry.objects.filter(shop_id=uuid.UUID(int=0)),
+    }
+    for scope, base in scopes.items():
+        for n in range(len(FILTERS) + 1):
+            for names in itertools.combinations(FILTERS, n):
+                queryset = base
+                for name in names:
+                    queryset = FILTERS[name](queryset)
+                for ordering, fields in CATALOG_ORDERINGS.items():
+                    label = f"{scope} [{', '.join(names) or 'no filter'}] ordering={ordering}"
+                    yield label, queryset.order_by(*fields)[:20]
+
+
+def find_full_scans(plan, table, vendor):
+    """
+    Return the lines of a query plan that read every row of the table.
+    A walk of a whole index is accepted when the index yields the rows in
+    the requested order, since the LIMIT of the page then stops it early.
+    """
+    if vendor == 'sqlite':
+        # e.g. "SCAN product_catalogentry", or "SCAN ... USING INDEX" with
+        # the rows sorted apart; indexed reads are "SEARCH ..."
+        if 'USE TEMP B-TREE FOR ORDER BY' in plan:
+            pattern = re.compile(rf"\bSCAN {table}\b")
+        else:
+            pattern = re.compile(rf"\bSCAN {table}\b(?!.*USING (COVERING )?INDEX)")
+    elif vendor == 'mysql':
+        # access type ALL in the traditional EXPLAIN table, or a full
+        # index scan (type index) whose rows are sorted apart
+        pattern = re.compile(rf"\b{table} \S+ (ALL\b|index\b.*Using filesort)")
+    elif vendor == 'postgresql':
+        pattern = re.compile(rf"Seq Scan on {table}\b")
+    else:
+        raise CommandError(f"Query plans of {vendor} are not supported.")
+    return [line for line in plan.splitlines() if pattern.search(line)]
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN every filter and sort combination of the catalog endpoints \
+        and report the ones scanning the whole catalog table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help="Print the plan of every query."
+        )
+
+    def handle(self, *args, **options):
+        table = CatalogEntry._meta.db_table
+        full_scans = []
+        count = 0
+        for label, queryset in catalog_queries():
+            count += 1
+            # MySQL 8 defaults to the tree format, without the access types
+            plan = queryset.explain(format='TRADITIONAL') if connection.vendor == 'mysql' else queryset.explain()
+            if options['verbose_plans']:
+                self.stdout.write(f"{label}\n{plan}\n")
+            if find_full_scans(plan, table, connection.vendor):
+                full_scans.append(label)
+
+        for label in full_scans:
+            self.stdout.write(self.style.WARNING(f"Full scan: {label}"))
+        if full_scans:
+            raise CommandError(f"{len(full_scans)} of {count} catalog queries scan the whole catalog table.")
+        self.stdout.write(self.style.SUCCESS(f"{count} catalog queries use indexes."))
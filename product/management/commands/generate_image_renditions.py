@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from product.models import ImageStatus, ProductImage
+
+
+class Command(BaseCommand):
+    help = "Generate the renditions of processed product images that have none."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help="Regenerate the renditions of every processed image."
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help="Number of images loaded per query."
+        )
+
+    def handle(self, *args, **options):
+        images = (
+            ProductImage.objects
+                .filter(status=ImageStatus.READY)
+                .select_related('product')
+        )
+        if not options['all']:
+            images = images.exclude(renditions__has_key='jpeg')
+
+        count = 0
+        failed = 0
+        for image in images.iterator(chunk_size=options['batch_size']):
+            try:
+                image.generate_renditions()
+                count += 1
+            except OSError as e:
+                failed += 1
+                self.stderr.write(f"Could not generate renditions of image {image.id}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"Generated renditions for {count} images."))
+        if failed:
+            self.stdout.write(self.style.WARNING(f"{failed} images failed."))
@@ -0,0 +1,52 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+import json
+
+from product.services import ImportFileError, ProductImportService
+from shop.models import Shop
+
+
+class Command(BaseCommand):
+    help = "Import products into a shop from a CSV or JSONL file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('shop_id', help="ID of the shop the products are added to.")
+        parser.add_argument('path', help="Path to the CSV or JSONL file.")
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'jsonl'],
+            help="Format of the file. Guessed from the file name if not given."
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Number of products inserted per transaction."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            shop = Shop.objects.filter(id=options['shop_id']).first()
+        except ValidationError:
+            shop = None
+        if not shop:
+            raise CommandError("No shop matching the given ID found.")
+        fmt = ProductImportService.get_format(options['path'], options['format'])
+        if not fmt:
+            raise CommandError("Enter a valid format: 'csv' or 'jsonl'.")
+
+        service = ProductImportService(shop, batch_size=options['batch_size'])
+        try:
+            with open(options['path'], 'rb') as f:
+                report = service.import_file(f, fmt)
+        except FileNotFoundError:
+            raise CommandError(f"File {options['path']} does not exist.")
+        except ImportFileError as e:
+            raise CommandError(f"{e} Imported {service.created} products.")
+
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(f"Imported {report['created']} products."))
+        if report['failed']:
+            self.stdout.write(self.style.WARNING(f"{report['failed']} rows failed."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from order.utils.orders import rebuild_active_order_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute the active order count of every product from the orders."
+
+    def handle(self, *args, **options):
+        rebuild_active_order_counts()
+        self.stdout.write(self.style.SUCCESS("Active order counts rebuilt."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from product.models import CatalogEntry
+
+
+class Command(BaseCommand):
+    help = "Regenerate the catalog entries of all active products."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Number of products rebuilt per transaction."
+        )
+
+    def handle(self, *args, **options):
+        count = CatalogEntry.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Catalog rebuilt with {count} entries."))
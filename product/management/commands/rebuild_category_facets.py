@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from product.models import CategoryFacetCount
+
+
+class Command(BaseCommand):
+    help = "Recompute the category facet counts from the product categories."
+
+    def handle(self, *args, **options):
+        CategoryFacetCount.rebuild()
+        self.stdout.write(self.style.SUCCESS("Category facet counts rebuilt."))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from product.models import Product, ProductSearchTerm
+from product.utils.search import build_term_weights
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product search index from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Number of index entries written per query."
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        products = (
+            Product.objects.prefetch_related('categories')
+                .only('id', 'name', 'description')
+                .iterator(chunk_size=batch_size)
+        )
+        count = 0
+        with transaction.atomic():
+            ProductSearchTerm.objects.all().delete()
+            batch = []
+            for product in products:
+                slugs = [c.slug for c in product.categories.all()]
+                weights = build_term_weights(product.name, product.description, slugs)
+                batch.extend(
+                    ProductSearchTerm(product=product, term=term, weight=weight)
+                    for term, weight in weights.items()
+                )
+                if len(batch) >= batch_size:
+                    ProductSearchTerm.objects.bulk_create(batch)
+                    batch = []
+                count += 1
+            ProductSearchTerm.objects.bulk_create(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} products."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from product.services import InventoryLedgerService
+
+
+class Command(BaseCommand):
+    help = "Report the inventories whose stock differs from their movement ledger."
+
+    def handle(self, *args, **options):
+        mismatches = InventoryLedgerService.reconcile().select_related('product')
+        count = 0
+        for inventory in mismatches:
+            count += 1
+            self.stdout.write(
+                f"{inventory.product_id} {inventory.product.name}: "
+                f"stock {inventory.current_stock}, ledger {inventory.ledger_stock}"
+            )
+        if count:
+            self.stdout.write(self.style.WARNING(f"{count} inventories differ from their ledger."))
+        else:
+            self.stdout.write(self.style.SUCCESS("All inventories match their ledger."))
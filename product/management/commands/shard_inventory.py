@@ -0,0 +1,34 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from product.models import Inventory
+
+
+class Command(BaseCommand):
+    help = "Spread the stock of a product over shards, or gather it back with --shards 0."
+
+    def add_arguments(self, parser):
+        parser.add_argument('product_id', help="ID of the product whose stock is sharded.")
+        parser.add_argument(
+            '--shards',
+            type=int,
+            required=True,
+            help="Number of shards, 0 to stop sharding the stock."
+        )
+
+    def handle(self, *args, **options):
+        if not 0 <= options['shards'] <= 64:
+            raise CommandError("The number of shards must be between 0 and 64.")
+        try:
+            inventory = Inventory.objects.select_related('product').filter(product_id=options['product_id']).first()
+        except ValidationError:
+            inventory = None
+        if not inventory:
+            raise CommandError("No product matching the given ID found.")
+
+        inventory.set_shards(options['shards'])
+        if inventory.shard_count:
+            self.stdout.write(self.style.SUCCESS(
+                f"Stock of {inventory.product.name} spread over {inventory.shard_count} shards."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Stock of {inventory.product.name} is no longer sharded."))
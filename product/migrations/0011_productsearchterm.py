@@ -0,0 +1,47 @@
+# Generated by Django 5.1.5 on 2026-10-18 03:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from product.utils.search import build_term_weights
+
+
+def build_search_index(apps, schema_editor):
+    Product = apps.get_model('product', 'Product')
+    ProductSearchTerm = apps.get_model('product', 'ProductSearchTerm')
+    products = Product.objects.prefetch_related('categories').iterator(chunk_size=500)
+    batch = []
+    for product in products:
+        slugs = [c.slug for c in product.categories.all()]
+        weights = build_term_weights(product.name, product.description, slugs)
+        batch.extend(
+            ProductSearchTerm(product=product, term=term, weight=weight)
+            for term, weight in weights.items()
+        )
+        if len(batch) >= 1000:
+            ProductSearchTerm.objects.bulk_create(batch)
+            batch = []
+    ProductSearchTerm.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0010_alter_inventory__stock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=50)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='product.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('term', 'product'), name='unique_search_term_per_product')],
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.1.5 on 2026-10-18 03:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def build_facet_counts(apps, schema_editor):
+    Product = apps.get_model('product', 'Product')
+    Category = apps.get_model('product', 'Category')
+    CategoryFacetCount = apps.get_model('product', 'CategoryFacetCount')
+    rows = (
+        Product.categories.through.objects
+            .filter(product__is_active=True)
+            .values('category_id', 'product__shop_id')
+            .annotate(n=Count('product_id'))
+            .order_by()
+    )
+    totals = {}
+    facets = []
+    for row in rows:
+        totals[row['category_id']] = totals.get(row['category_id'], 0) + row['n']
+        facets.append(CategoryFacetCount(
+            category_id=row['category_id'],
+            shop_id=row['product__shop_id'],
+            product_count=row['n']
+        ))
+    CategoryFacetCount.objects.bulk_create(facets, batch_size=1000)
+    for c_id, n in totals.items():
+        Category.objects.filter(id=c_id).update(product_count=n)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0011_productsearchterm'),
+        ('shop', '0004_alter_shop_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='product_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='CategoryFacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facet_counts', to='product.category')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_facet_counts', to='shop.shop')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('category', 'shop'), name='unique_category_facet_per_shop')],
+            },
+        ),
+        migrations.RunPython(build_facet_counts, migrations.RunPython.noop),
+    ]
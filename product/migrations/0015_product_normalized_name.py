@@ -0,0 +1,59 @@
+# Generated by Django 5.1.5 on 2026-10-18 04:25
+
+from django.db import migrations, models
+
+
+def backfill_normalized_names(apps, schema_editor):
+    Product = apps.get_model('product', 'Product')
+    products = Product.objects.only('id', 'name').order_by('id').iterator(chunk_size=500)
+    batch = []
+    for product in products:
+        product.normalized_name = product.name.strip().casefold()
+        batch.append(product)
+        if len(batch) >= 500:
+            Product.objects.bulk_update(batch, ['normalized_name'])
+            batch = []
+    Product.objects.bulk_update(batch, ['normalized_name'])
+
+    # duplicates are found by the database, whose collation the index
+    # compares with: 'café' and 'cafe' are the same name to MySQL
+    duplicates = (
+        Product.objects
+            .values('shop_id', 'normalized_name')
+            .annotate(n=models.Count('id'))
+            .filter(n__gt=1)
+            .order_by()
+    )
+    for duplicate in duplicates:
+        products = list(
+            Product.objects
+                .filter(shop_id=duplicate['shop_id'], normalized_name=duplicate['normalized_name'])
+                .only('id', 'normalized_name')
+                .order_by('created_at', 'id')
+        )
+        # names duplicated before the constraint existed keep their
+        # name, the later ones get a normalized name of their own
+        for product in products[1:]:
+            product.normalized_name = f"{product.normalized_name}#{product.id}"
+        Product.objects.bulk_update(products[1:], ['normalized_name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0014_productimage_renditions'),
+        ('shop', '0004_alter_shop_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='normalized_name',
+            field=models.CharField(default='', editable=False, max_length=200),
+        ),
+        migrations.RunPython(backfill_normalized_names, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='product',
+            constraint=models.UniqueConstraint(fields=('shop', 'normalized_name'), name='unique_product_name_per_shop'),
+        ),
+    ]
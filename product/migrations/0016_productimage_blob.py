@@ -0,0 +1,20 @@
+# Generated by Django 5.1.5 on 2026-10-18 04:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_initial'),
+        ('product', '0015_product_normalized_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='common.mediablob'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.5 on 2026-10-18 05:06
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_active_orders(apps, schema_editor):
+    Product = apps.get_model('product', 'Product')
+    OrderItem = apps.get_model('order', 'OrderItem')
+    rows = (
+        OrderItem.objects
+            .filter(order__status__in=['PENDING', 'PROCESSING', 'SHIPPED'], product__isnull=False)
+            .values('product_id')
+            .annotate(n=Count('order_id', distinct=True))
+            .order_by()
+    )
+    Product.objects.bulk_update(
+        [Product(id=row['product_id'], active_order_count=row['n']) for row in rows],
+        ['active_order_count'],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0016_productimage_blob'),
+        ('order', '0011_alter_ordergroup_options_alter_ordergroup_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='active_order_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_active_orders, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.5 on 2026-10-18 05:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0018_recommendations'),
+        ('shop', '0005_shop_logo_blob'),
+    ]
+
+    operations = [
+        # the catalog sort indexes are on CatalogEntry (0020), the
+        # products keep the one the shop export reads its batches with
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['shop', 'created_at', 'id'], name='product_shop_created_idx'),
+        ),
+    ]
@@ -0,0 +1,125 @@
+# Generated by Django 5.1.5 on 2026-10-18 05:52
+
+import django.db.models.deletion
+from collections import defaultdict
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+from django.templatetags.static import static
+
+
+BATCH_SIZE = 500
+
+
+def fill_catalog(apps, schema_editor):
+    """
+    Same entries as CatalogEntry.rebuild, with the historical models:
+    a batch of products at a time.
+    """
+    Product = apps.get_model('product', 'Product')
+    ProductImage = apps.get_model('product', 'ProductImage')
+    CatalogEntry = apps.get_model('product', 'CatalogEntry')
+    Through = Product.categories.through
+
+    products = Product.objects.filter(is_active=True).order_by('id')
+    last_id = None
+    while True:
+        batch = products if last_id is None else products.filter(id__gt=last_id)
+        batch = list(batch.select_related('shop', 'inventory')[:BATCH_SIZE])
+        if not batch:
+            break
+        product_ids = [product.id for product in batch]
+        last_id = product_ids[-1]
+
+        images = {}
+        for image in ProductImage.objects.filter(product_id__in=product_ids).order_by('id'):
+            current = images.get(image.product_id)
+            if current is None or (current.status != 'READY' and image.status == 'READY'):
+                images[image.product_id] = image
+        categories = defaultdict(list)
+        rows = (
+            Through.objects
+                .filter(product_id__in=product_ids)
+                .values_list('product_id', 'category_id', 'category__name', 'category__slug')
+                .order_by('category__name')
+        )
+        for product_id, category_id, name, slug in rows:
+            categories[product_id].append({'id': str(category_id), 'name': name, 'slug': slug})
+
+        entries = []
+        for product in batch:
+            image = images.get(product.id)
+            if image is None:
+                image_url = ''
+            elif image.status == 'READY':
+                image_url = default_storage.url(image.image.name)
+            else:
+                image_url = static(settings.PRODUCT_IMAGE_PLACEHOLDER)
+            entries.append(CatalogEntry(
+                product_id=product.id,
+                shop_id=product.shop_id,
+                shop_name=product.shop.name,
+                name=product.name,
+                description=product.description,
+                price=product.price,
+                stock=product.inventory._stock,
+                image_id=image.id if image else None,
+                image_url=image_url,
+                categories=categories[product.id],
+                created_at=product.created_at,
+                updated_at=product.updated_at
+            ))
+        CatalogEntry.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0019_catalog_indexes'),
+        ('shop', '0005_shop_logo_blob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogEntry',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='catalog_entry', serialize=False, to='product.product')),
+                ('shop_name', models.CharField(max_length=40)),
+                ('name', models.CharField(max_length=50)),
+                ('description', models.TextField(default='')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('stock', models.PositiveIntegerField(default=0)),
+                ('image_id', models.UUIDField(blank=True, null=True)),
+                ('image_url', models.CharField(blank=True, default='', max_length=255)),
+                ('categories', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'Catalog entries',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='catalogentry',
+            name='shop',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='catalog_entries', to='shop.shop'),
+        ),
+        migrations.AddIndex(
+            model_name='catalogentry',
+            index=models.Index(fields=['created_at', 'product'], name='catalog_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='catalogentry',
+            index=models.Index(fields=['price', 'product'], name='catalog_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='catalogentry',
+            index=models.Index(fields=['shop', 'created_at', 'product'], name='catalog_shop_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='catalogentry',
+            index=models.Index(fields=['shop', 'price', 'product'], name='catalog_shop_price_idx'),
+        ),
+        migrations.RunPython(fill_catalog, migrations.RunPython.noop),
+    ]
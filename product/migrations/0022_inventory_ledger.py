@@ -0,0 +1,60 @@
+# Generated by Django 5.1.5 on 2026-10-18 06:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def snapshot_current_stock(apps, schema_editor):
+    """
+    Start the ledger of every stocked inventory from its current stock.
+    """
+    Inventory = apps.get_model('product', 'Inventory')
+    InventorySnapshot = apps.get_model('product', 'InventorySnapshot')
+    taken_at = django.utils.timezone.now()
+    InventorySnapshot.objects.bulk_create(
+        [
+            InventorySnapshot(inventory_id=inventory_id, stock=stock, movement_id=0, taken_at=taken_at)
+            for inventory_id, stock in Inventory.objects.filter(_stock__gt=0).values_list('id', '_stock')
+        ],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0021_product_sales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField()),
+                ('reason', models.CharField(choices=[('ADJUSTMENT', 'Adjustment'), ('IMPORT', 'Import'), ('CHECKOUT', 'Checkout'), ('ORDER_CANCELLED', 'Order cancelled')], max_length=20)),
+                ('order_id', models.UUIDField(blank=True, null=True)),
+                ('handle', models.CharField(blank=True, max_length=20, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='product.inventory')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['inventory', 'id'], name='movement_inventory_idx'), models.Index(fields=['created_at'], name='movement_created_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock', models.PositiveIntegerField()),
+                ('movement_id', models.BigIntegerField()),
+                ('taken_at', models.DateTimeField()),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='product.inventory')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['inventory', 'movement_id'], name='snapshot_inventory_idx')],
+            },
+        ),
+        migrations.RunPython(snapshot_current_stock, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.5 on 2026-10-18 06:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0023_stock_reservation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventory',
+            name='shard_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='InventoryShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveSmallIntegerField()),
+                ('stock', models.PositiveIntegerField(default=0)),
+                ('reserved', models.PositiveIntegerField(default=0)),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='product.inventory')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='stockreservation',
+            name='shard',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reservations', to='product.inventoryshard'),
+        ),
+        migrations.AddConstraint(
+            model_name='inventoryshard',
+            constraint=models.UniqueConstraint(fields=('inventory', 'index'), name='unique_inventory_shard'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.5 on 2026-10-18 06:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0024_inventory_shards'),
+        ('shop', '0005_shop_logo_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventory',
+            name='reorder_threshold',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='LowStockAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock', models.IntegerField()),
+                ('threshold', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('notified_at', models.DateTimeField(blank=True, null=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_alerts', to='product.inventory')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_alerts', to='shop.shop')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['notified_at', 'shop'], name='low_stock_pending_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('resolved_at__isnull', True)), fields=('inventory',), name='unique_open_low_stock_alert')],
+            },
+        ),
+    ]
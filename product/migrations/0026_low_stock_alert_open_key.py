@@ -0,0 +1,49 @@
+# Generated by Django 5.1.5 on 2026-10-18 07:32
+
+from django.db import migrations, models
+from django.utils.timezone import now
+
+
+def fill_open_keys(apps, schema_editor):
+    """
+    Key the open alerts by inventory. MySQL never created the partial
+    constraint, so only the first open alert of an inventory is kept open.
+    """
+    LowStockAlert = apps.get_model('product', 'LowStockAlert')
+    seen = set()
+    duplicates = []
+    for alert_id, inventory_id in (LowStockAlert.objects
+            .filter(resolved_at__isnull=True)
+            .order_by('created_at', 'id')
+            .values_list('id', 'inventory_id')):
+        if inventory_id in seen:
+            duplicates.append(alert_id)
+        else:
+            seen.add(inventory_id)
+            LowStockAlert.objects.filter(id=alert_id).update(open_key=inventory_id)
+    LowStockAlert.objects.filter(id__in=duplicates).update(resolved_at=now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0025_low_stock_alerts'),
+        ('shop', '0005_shop_logo_blob'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='lowstockalert',
+            name='unique_open_low_stock_alert',
+        ),
+        migrations.AddField(
+            model_name='lowstockalert',
+            name='open_key',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_open_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='lowstockalert',
+            constraint=models.UniqueConstraint(fields=('open_key',), name='unique_open_low_stock_alert'),
+        ),
+    ]
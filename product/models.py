@@ -1,12 +1,16 @@
+from collections import defaultdict
 from django.db import transaction
-from django.db.models import F
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.utils.text import slugify
 from decimal import Decimal
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.apps import apps
+from django.conf import settings
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
+from django.templatetags.static import static
 from django.utils.text import slugify
 from django.utils.timezone import now
 from rest_framework import status
@@ -14,33 +18,156 @@ from rest_framework.exceptions import ValidationError
 from io import BytesIO
 from PIL import Image
 
-import os
+import random
 import uuid
 
+from .utils.categories import category_registry
+from .utils.renditions import generate_renditions
+from .utils.search import build_term_weights, parse_query
+from .utils.stock_cache import get_stock, refresh_stocks
 from .utils.uploads import product_upload_image_path
 from common.exceptions import ErrorException, InventoryDeletionError
+from common.models import MediaBlob, MediaTombstone, file_names
+from common.utils.cache import invalidate_categories, invalidate_product, invalidate_products
+from common.utils.db import upsert_options
 from shop.models import Shop
 
 
 IMAGE_SIZE = (800, 800)
+IMAGE_BLOB_KIND = 'product-image'
 MAX_PRODUCT_CATEGORIES = 5
+UNIQUE_NAME_CONSTRAINT = 'unique_product_name_per_shop'
+
+
+class ProductQuerySet(models.QuerySet):
+    """
+    QuerySet for the Product model.
+    """
+
+    def for_catalog(self):
+        """
+        Load everything ProductSerializer reads in a fixed number of queries,
+        regardless of the number of products in the queryset.
+        """
+        return self.select_related(
+            'inventory',
+            'shop__owner__profile'
+        ).prefetch_related(
+            'images',
+            'categories'
+        )
+
+    def search(self, query):
+        """
+        Return the products matching the search query, best match first.
+        Each query term is looked up as a prefix in the search index and
+        products are ranked by the summed weight of the matched terms.
+        """
+        terms = parse_query(query)
+        if not terms:
+            return self.none()
+        match = Q()
+        for term in terms:
+            match |= Q(search_terms__term__startswith=term)
+        return (
+            self.filter(match)
+                .annotate(search_rank=Sum('search_terms__weight'))
+                .order_by('-search_rank', '-created_at')
+        )
+
+    def add_active_orders(self, delta):
+        """
+        Add delta to the active order count of the products.
+        """
+        if delta > 0:
+            new_count = F('active_order_count') + delta
+        else:
+            # counts are unsigned, never let them go below 0
+            new_count = Case(
+                When(active_order_count__gte=-delta, then=F('active_order_count') + delta),
+                default=Value(0)
+            )
+        return self.update(active_order_count=new_count)
+
+    @transaction.atomic
+    def deactivate(self):
+        """
+        Deactivate the products in one update, removing them from the
+        category facet counts. Returns the number of products deactivated.
+        """
+        products = list(
+            self.select_for_update()
+                .filter(is_active=True)
+                .values_list('id', 'shop_id')
+        )
+        if not products:
+            return 0
+        product_ids = [product_id for product_id, _ in products]
+        Product.objects.filter(id__in=product_ids).update(is_active=False, deactivated_at=now())
+
+        rows = (
+            Product.categories.through.objects
+                .filter(product_id__in=product_ids)
+                .values('category_id', 'product__shop_id')
+                .annotate(n=Count('product_id'))
+                .order_by()
+        )
+        by_delta = defaultdict(list)
+        for row in rows:
+            by_delta[(row['product__shop_id'], row['n'])].append(row['category_id'])
+        for (shop_id, n), category_ids in by_delta.items():
+            CategoryFacetCount.apply(category_ids, shop_id, -n)
+
+        CatalogEntry.sync(product_ids)
+        invalidate_products(products)
+        return len(products)
+
+    def safe_delete(self):
+        """
+        Delete the products, deactivating those with active orders instead.
+        Returns (number deleted, number deactivated).
+        """
+        deactivated = self.filter(active_order_count__gt=0).deactivate()
+        products = list(
+            self.filter(active_order_count=0).values_list('id', 'shop_id')
+        )
+        if products:
+            # images, files and facet counts are cleaned up by the delete signals
+            Product.objects.filter(id__in=[product_id for product_id, _ in products]).delete()
+            invalidate_products(products)
+        return len(products), deactivated
 
 
 class Product(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, null=False)
     name = models.CharField(max_length=50, null=False, blank=False)
+    # case-insensitive form of the name, unique in the shop
+    normalized_name = models.CharField(max_length=200, editable=False, default='')
     description = models.TextField(null=False, blank=False, default='')
     price = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal(0.00), blank=False)
     is_active = models.BooleanField(default=True, null=False)
+    # number of pending, processing or shipped orders of the product
+    active_order_count = models.PositiveIntegerField(default=0, editable=False)
     deactivated_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     shop = models.ForeignKey(Shop, on_delete=models.CASCADE, null=False, related_name='products')
     categories = models.ManyToManyField('product.Category', related_name='products')
-    
+
+    objects = ProductQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['shop', 'normalized_name'],
+                name=UNIQUE_NAME_CONSTRAINT
+            )
+        ]
+        indexes = [
+            # batches of the shop export (see ProductExportService)
+            models.Index(fields=['shop', 'created_at', 'id'], name='product_shop_created_idx'),
+        ]
 
     def __str__(self):
         """
@@ -50,7 +177,30 @@ class Product(models.Model):
     
     @property
     def stock(self):
-        return self.inventory._stock
+        """
+        Available stock, from the inventory if it was loaded with the
+        product, otherwise from the stock cache.
+        """
+        if Product.inventory.is_cached(self) and not self.inventory.shard_count:
+            return self.inventory.available
+        return get_stock(self.id)
+
+    @staticmethod
+    def normalize_name(name):
+        """
+        Return the form of a product name compared for uniqueness.
+        """
+        return name.strip().casefold()
+
+    @staticmethod
+    def is_duplicate_name(error):
+        """
+        Return whether an IntegrityError was raised by the unique name
+        index of the products of a shop. MySQL and PostgreSQL name the
+        constraint, SQLite its columns.
+        """
+        message = str(error)
+        return UNIQUE_NAME_CONSTRAINT in message or 'product_product.normalized_name' in message
 
 
     def add_categories(self, categories):
@@ -60,20 +210,26 @@ class Product(models.Model):
             categories - List of names of categories.
         """
         slugs = [slugify(c) for c in categories]
-        found_categories =  Category.objects.filter(slug__in=slugs)
+        found = category_registry.get_ids(slugs)
 
         # missing categories
-        found_slugs = {c.slug for c in found_categories}
-        missing_slugs = set(slugs) - found_slugs
+        missing_slugs = set(slugs) - set(found)
         
-        existing_ids = self.categories.values_list('id', flat=True)
+        existing_ids = set(
+            Product.categories.through.objects
+                .filter(product_id=self.id)
+                .values_list('category_id', flat=True)
+        )
         if len(existing_ids) == MAX_PRODUCT_CATEGORIES:
             raise ErrorException(
                 f"Product belongs to {MAX_PRODUCT_CATEGORIES} categories. More categories cannot be added.",
                 code='category_limit_reached'
             )
         remaining_slot = MAX_PRODUCT_CATEGORIES - len(existing_ids)
-        new_categories = [c for c in found_categories if c.id not in existing_ids]
+        new_categories = {
+            slug: category_id for slug, category_id in found.items()
+            if category_id not in existing_ids
+        }
 
         if len(new_categories) > remaining_slot:
             raise ErrorException(
@@ -81,10 +237,20 @@ class Product(models.Model):
                 code='too_many_categories'
             )
 
-        if remaining_slot > 0:
-            self.categories.add(*new_categories)
-        
-        # new_categories_slugs = [c.slug for c in new_categories]
+        if remaining_slot > 0 and new_categories:
+            # a concurrent request may have added the same categories
+            Product.categories.through.objects.bulk_create([
+                Product.categories.through(product_id=self.id, category_id=category_id)
+                for category_id in new_categories.values()
+            ], ignore_conflicts=True)
+            self._clear_categories_cache()
+            self.update_search_index(
+                category_registry.get_slugs(existing_ids) + list(new_categories))
+            invalidate_product(self.id, self.shop_id)
+            CatalogEntry.sync([self.id])
+            if self.is_active:
+                CategoryFacetCount.apply(
+                    list(new_categories.values()), self.shop_id, 1)
         
         if missing_slugs:
             raise ErrorException(
@@ -93,7 +259,7 @@ class Product(models.Model):
                 status_code=status.HTTP_207_MULTI_STATUS,
                 code='unprocessed_categories',
                 errors={
-                    'processed': [c.slug for c in new_categories],
+                    'processed': list(new_categories),
                     'failed': missing_slugs
                 }
             )
@@ -104,18 +270,56 @@ class Product(models.Model):
         Args:
             categories - List of names of categories.
         """
-        slugs = [slugify(c) for c in categories]
-        found_categories = Category.objects.filter(slug__in=slugs)
-        self.categories.remove(*found_categories)
+        found_ids = category_registry.get_ids(categories).values()
+        links = Product.categories.through.objects.filter(
+            product_id=self.id, category_id__in=found_ids)
+        removed_ids = list(links.values_list('category_id', flat=True))
+        if not removed_ids:
+            return
+        links.delete()
+        self._clear_categories_cache()
+        self.update_search_index()
+        invalidate_product(self.id, self.shop_id)
+        CatalogEntry.sync([self.id])
+        if self.is_active:
+            CategoryFacetCount.apply(removed_ids, self.shop_id, -1)
+
+    def _clear_categories_cache(self):
+        """
+        Drop the prefetched categories, which M2M writes through
+        the intermediate model do not refresh.
+        """
+        getattr(self, '_prefetched_objects_cache', {}).pop('categories', None)
+
+    def update_search_index(self, slugs=None):
+        """
+        Rebuild the search index entries of the product from its name,
+        description and category slugs.
+        Args:
+            slugs - slugs of the categories of the product, if known.
+        """
+        if slugs is None:
+            slugs = self.categories.values_list('slug', flat=True)
+        weights = build_term_weights(self.name, self.description, slugs)
+        with transaction.atomic():
+            ProductSearchTerm.objects.filter(product=self).delete()
+            ProductSearchTerm.objects.bulk_create([
+                ProductSearchTerm(product=self, term=term, weight=weight)
+                for term, weight in weights.items()
+            ])
         
+    def get_image_dir_name(self):
+        """
+        Return the storage name of the upload directory of product images.
+        """
+        return f"shp_{self.shop_id}/products/pdt_{self.id}"
+
     def get_image_dir(self):
         """
         Return the upload path for product image.
         """
         from django.conf import settings
-        shp_id = self.shop.id
-        product_image_dir = f"shp_{shp_id}/products/pdt_{self.id}"
-        return settings.MEDIA_ROOT / product_image_dir
+        return settings.MEDIA_ROOT / self.get_image_dir_name()
 
     def add_images(self, images):
         """
@@ -140,46 +344,55 @@ class Product(models.Model):
 
     def delete_all_image_files(self):
         """
-        Delete all associated image files.
+        Queue the image directory of the product for deletion.
+        It is removed by the media sweeper once its files are.
         """
-        import shutil
-
-        _dir = self.get_image_dir()
-        if os.path.isdir(_dir):
-            shutil.rmtree(_dir)
+        MediaTombstone.enqueue([self.get_image_dir_name()])
 
     def delete_images(self):
         """
         Deletes all images from db and associated files.
+        Files are released by the post_delete receiver of ProductImage.
         """
         self.images.all().delete()
-        self.delete_all_image_files()
+        invalidate_product(self.id, self.shop_id)
+        CatalogEntry.sync([self.id])
 
     def update_images(self, images):
         """
         Updates the product images.
+        Images whose content is unchanged are kept as they are,
+        so they are not stored and processed again.
         """
-        self.delete_images()
-        self.add_images(images)
+        uploads = {MediaBlob.content_digest(img): img for img in images}
+        kept = set(
+            self.images
+                .filter(blob__kind=IMAGE_BLOB_KIND, blob__digest__in=uploads)
+                .values_list('blob__digest', flat=True)
+        )
+        if not kept:
+            self.delete_images()
+        else:
+            for image in self.images.exclude(blob__digest__in=kept):
+                image.delete()
+        new_images = [img for digest, img in uploads.items() if digest not in kept]
+        if new_images:
+            self.add_images(new_images)
         
     def has_active_orders(self):
         """
         Return True if product has active orders.
         """
-        from order.models import OrderStatus
-        ACTIVE_ORDER_STATES = {
-            OrderStatus.PENDING,
-            OrderStatus.PROCESSING,
-            OrderStatus.SHIPPED
-        }
-        return self.orderitem_set.filter(
-            order__status__in=ACTIVE_ORDER_STATES
-        ).exists()
+        return Product.objects.filter(id=self.id, active_order_count__gt=0).exists()
 
     def deactivate(self):
+        was_active = self.is_active
         self.is_active = False
         self.deactivated_at = now()
         self.save(update_fields=['is_active', 'deactivated_at'])
+        if was_active:
+            CategoryFacetCount.apply(
+                list(self.categories.values_list('id', flat=True)), self.shop_id, -1)
 
     def safe_delete(self):
         """
@@ -196,20 +409,50 @@ class Product(models.Model):
         """
         self.delete_images()
         super().delete(*args, **kwargs)
+        invalidate_product(self.id, self.shop_id)
 
     def save(self, *args, **kwargs):
         """
         Save a Product instance.
+        The search index is rebuilt only when the name or the description
+        changed; the categories reindex it as they are added or removed.
         """
         if self.price < 0:
             self.price = Decimal(0.00)
+        self.normalized_name = Product.normalize_name(self.name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'normalized_name'}
+
+        adding, old_text = self._state.adding, None
+        indexed = update_fields is None or bool({'name', 'description'} & set(update_fields))
+        if indexed and not adding:
+            old_text = Product.objects.filter(id=self.id).values_list('name', 'description').first()
         super().save(*args, **kwargs)
+        invalidate_product(self.id, self.shop_id)
+
+        if indexed and (adding or old_text != (self.name, self.description)):
+            self.update_search_index()
+        CatalogEntry.sync([self.id])
+
+
+class ImageStatus(models.TextChoices):
+    PENDING = 'PENDING', 'Pending'
+    PROCESSING = 'PROCESSING', 'Processing'
+    READY = 'READY', 'Ready'
+    FAILED = 'FAILED', 'Failed'
 
 
 class ProductImage(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, null=False)
     image = models.ImageField(upload_to=product_upload_image_path, null=False, max_length=255)
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
+    status = models.CharField(max_length=10, choices=ImageStatus.choices, default=ImageStatus.PENDING)
+    # {format: {size: storage name}} of the resized copies of the image
+    renditions = models.JSONField(default=dict, blank=True)
+    # stored content the processed image and renditions are shared from
+    blob = models.ForeignKey(
+        MediaBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
 
     def __str__(self):
         """
@@ -217,16 +460,23 @@ class ProductImage(models.Model):
         """
         return f"<ProductImage: {self.id}> {self.image}"
     
-    def process_image(self, image):
+    def make_canvas(self, image):
+        """
+        Fit image on a white 800 x 800 canvas.
+        """
+        img = Image.open(image)
+        img.thumbnail(IMAGE_SIZE, Image.LANCZOS)
+        bg = Image.new("RGB", IMAGE_SIZE, (255, 255, 255))
+        offset = ((IMAGE_SIZE[0] - img.width) // 2, (IMAGE_SIZE[1] - img.height) // 2)
+        bg.paste(img, offset)
+        return bg
+
+    def process_image(self, image, canvas=None):
         """
         Resize image to 800 x 800.
         """
         if image:
-            img = Image.open(image)
-            img.thumbnail(IMAGE_SIZE, Image.LANCZOS)
-            bg = Image.new("RGB", IMAGE_SIZE, (255, 255, 255))
-            offset = ((IMAGE_SIZE[0] - img.width) // 2, (IMAGE_SIZE[1] - img.height) // 2)
-            bg.paste(img, offset)
+            bg = canvas or self.make_canvas(image)
             buffer = BytesIO()
             bg.save(buffer, format='JPEG', quality=95)
             buffer.seek(0)
@@ -240,46 +490,189 @@ class ProductImage(models.Model):
                 charset=getattr(image, 'charset', None)
             )
     
+    def process(self):
+        """
+        Replace the uploaded file with the resized image, write its
+        renditions and mark the image ready.
+        Uploads already processed for another image share its files.
+        """
+        storage = self.image.storage
+        original = self.image.name
+        previous = self.blob_id
+        with self.image.open('rb'):
+            digest = MediaBlob.content_digest(self.image)
+            blob = MediaBlob.acquire(IMAGE_BLOB_KIND, digest)
+            if blob is None:
+                canvas = self.make_canvas(self.image)
+                processed = self.process_image(self.image, canvas)
+                name = storage.save(
+                    MediaBlob.blob_name(IMAGE_BLOB_KIND, digest, processed.name),
+                    processed
+                )
+                renditions = generate_renditions(storage, name, canvas)
+                blob = MediaBlob.register(
+                    IMAGE_BLOB_KIND, digest, name, renditions, storage.size(name))
+        updated = (ProductImage.objects
+            .filter(id=self.id)
+            .update(
+                image=blob.name,
+                blob=blob,
+                status=ImageStatus.READY,
+                renditions=blob.renditions
+            ))
+        if not updated:
+            # the image was deleted while it was being processed
+            MediaBlob.release([blob.id])
+            return
+        self.image.name = blob.name
+        self.blob = blob
+        self.status = ImageStatus.READY
+        self.renditions = blob.renditions
+        if previous:
+            MediaBlob.release([previous])
+        elif original != blob.name:
+            storage.delete(original)
+        invalidate_product(self.product_id, self.product.shop_id)
+        CatalogEntry.sync([self.product_id])
+
+    def generate_renditions(self):
+        """
+        Write the renditions of an image that was processed before
+        renditions existed.
+        """
+        with self.image.open('rb'):
+            canvas = self.make_canvas(self.image)
+        self.renditions = generate_renditions(self.image.storage, self.image.name, canvas)
+        ProductImage.objects.filter(id=self.id).update(renditions=self.renditions)
+        invalidate_product(self.product_id, self.product.shop_id)
+
+    def mark(self, status):
+        """
+        Set the processing status of the image.
+        """
+        ProductImage.objects.filter(id=self.id).update(status=status)
+        self.status = status
+        invalidate_product(self.product_id, self.product.shop_id)
+        CatalogEntry.sync([self.product_id])
+
+    def schedule_processing(self):
+        """
+        Process the image in the background once it is committed.
+        """
+        from .tasks import process_product_image
+
+        image_id = str(self.id)
+        transaction.on_commit(lambda: process_product_image.delay(image_id))
+
     def save(self, *args, **kwargs):
         """
         Save the ProductImage instance.
+        The upload is stored as is, new images are processed
+        in the background.
         """
-        if self.image:
-            self.image = self.process_image(self.image)
+        adding = self._state.adding
         super().save(*args, **kwargs)
+        invalidate_product(self.product_id, self.product.shop_id)
+        CatalogEntry.sync([self.product_id])
+        if adding and self.status == ImageStatus.PENDING:
+            self.schedule_processing()
 
     def delete(self, *args, **kwargs):
         """
         Delete the ProductImage instance.
+        Files are released by the post_delete receiver.
         """
-        if self.image and os.path.isfile(self.image.path):
-            os.remove(self.image.path)
         super().delete(*args, **kwargs)
+        invalidate_product(self.product_id, self.product.shop_id)
+        CatalogEntry.sync([self.product_id])
+
+
+class MovementReason(models.TextChoices):
+    ADJUSTMENT = 'ADJUSTMENT', 'Adjustment'
+    IMPORT = 'IMPORT', 'Import'
+    CHECKOUT = 'CHECKOUT', 'Checkout'
+    ORDER_CANCELLED = 'ORDER_CANCELLED', 'Order cancelled'
 
 
 class Inventory(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, null=False)
     _stock = models.PositiveIntegerField(db_column='stock', default=0)
+    # part of the stock held by unexpired checkout reservations
+    reserved = models.PositiveIntegerField(default=0)
+    # when above 0, the stock and reserved stock are spread over that
+    # many InventoryShard rows and both fields above stay at 0
+    shard_count = models.PositiveSmallIntegerField(default=0)
+    # the shop is alerted when the available stock falls to this level
+    reorder_threshold = models.PositiveIntegerField(null=True, blank=True)
     last_updated_by = models.CharField(max_length=20)
     product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='inventory')
     updated_at = models.DateTimeField(auto_now=True)
 
+    def totals(self):
+        """
+        Return the (stock, reserved stock) of the inventory,
+        summed over its shards if it has any.
+        """
+        if not self.shard_count:
+            return self._stock, self.reserved
+        totals = self.shards.aggregate(stock=Sum('stock'), reserved=Sum('reserved'))
+        return self._stock + (totals['stock'] or 0), self.reserved + (totals['reserved'] or 0)
+
+    @staticmethod
+    def available_expression():
+        """
+        Expression of the available stock of an inventory in queries,
+        shards included.
+        """
+        return F('_stock') - F('reserved') + Coalesce(
+            Subquery(
+                InventoryShard.objects
+                    .filter(inventory=OuterRef('pk'))
+                    .values('inventory')
+                    .annotate(available=Sum(F('stock') - F('reserved')))
+                    .values('available'),
+                output_field=models.IntegerField()
+            ),
+            Value(0)
+        )
+
     @property
     def stock(self):
-        return self._stock
+        return self.totals()[0]
     
     @stock.setter
     def stock(self, value):
         raise AttributeError("Direct assignment to stock is not allowed. Use add() or subtract() methods.")
 
+    @property
+    def total_reserved(self):
+        return self.totals()[1]
+
+    @property
+    def available(self):
+        """
+        Stock that is not reserved and can still be ordered.
+        """
+        stock, reserved = self.totals()
+        return stock - reserved
+
     def __str__(self):
         """
         Returns a string representation of the Inventory object.
         """
         return f"<Inventory: {self.id}> {self.product.name} - {self.stock} items"
 
+    def _record(self, quantity, handle, reason, order_id):
+        InventoryMovement.objects.create(
+            inventory=self,
+            quantity=quantity,
+            reason=reason,
+            order_id=order_id,
+            handle=handle
+        )
+
     @transaction.atomic
-    def add(self, qty, handle=None):
+    def add(self, qty, handle=None, reason=MovementReason.ADJUSTMENT, order_id=None):
         """
         Add to the stock.
         """
@@ -288,6 +681,9 @@ class Inventory(models.Model):
         update_kwargs = {
             '_stock': F('_stock') + qty
         }
+        if self.shard_count:
+            InventoryShard.add(self.id, qty)
+            update_kwargs = {'updated_at': now()}
         if handle:
             update_kwargs['last_updated_by'] = handle
             
@@ -295,12 +691,19 @@ class Inventory(models.Model):
             .filter(id=self.id)
             .update(**update_kwargs))
         
-        self.refresh_from_db(fields=['_stock', 'last_updated_by', 'updated_at'])
+        self.refresh_from_db(
+            fields=['_stock', 'reserved', 'shard_count', 'reorder_threshold', 'last_updated_by', 'updated_at'])
+        self._record(qty, handle, reason, order_id)
+        invalidate_product(self.product_id, self.product.shop_id)
+        CatalogEntry.sync_stock([self.product_id])
+        refresh_stocks([self.product_id])
+        if self.reorder_threshold is not None:
+            LowStockAlert.detect([self.id])
         return self    
 
 
     @transaction.atomic
-    def subtract(self, qty, handle=None):
+    def subtract(self, qty, handle=None, reason=MovementReason.ADJUSTMENT, order_id=None):
         """
         Subtract from the stock.
         """
@@ -311,19 +714,89 @@ class Inventory(models.Model):
         }
         if handle:
             update_kwargs['last_updated_by'] = handle
-        updated = (
-            Inventory.objects
-                .filter(id=self.id, _stock__gte=qty)
-                .update(**update_kwargs)
-        )
-        self.refresh_from_db(fields=['_stock', 'last_updated_by', 'updated_at'])
-        if updated == 0:
+        if self.shard_count:
+            # taken out of the shards, reserved stock excluded
+            update_kwargs.pop('_stock')
+            updated = InventoryShard.allocate(self.id, qty, take=True) is not None
+            if updated:
+                Inventory.objects.filter(id=self.id).update(updated_at=now(), **update_kwargs)
+        else:
+            # reserved stock cannot be taken out
+            updated = (
+                Inventory.objects
+                    .filter(id=self.id, _stock__gte=F('reserved') + qty)
+                    .update(**update_kwargs)
+            )
+        self.refresh_from_db(
+            fields=['_stock', 'reserved', 'shard_count', 'reorder_threshold', 'last_updated_by', 'updated_at'])
+        if not updated:
             raise ErrorException(
-                detail=f"Insufficient stock to complete this operation. Only {self._stock} left.",
+                detail=f"Insufficient stock to complete this operation. Only {self.available} left.",
                 code='insufficient_stock'
             )
+        self._record(-qty, handle, reason, order_id)
+        invalidate_product(self.product_id, self.product.shop_id)
+        CatalogEntry.sync_stock([self.product_id])
+        refresh_stocks([self.product_id])
+        if self.reorder_threshold is not None:
+            LowStockAlert.detect([self.id])
         return self
     
+    def set_reorder_threshold(self, threshold):
+        """
+        Set the available stock at which the shop is alerted, or stop
+        alerting it if None.
+        """
+        Inventory.objects.filter(id=self.id).update(reorder_threshold=threshold)
+        self.reorder_threshold = threshold
+        if threshold is None:
+            LowStockAlert.resolve([self.id])
+        else:
+            LowStockAlert.detect([self.id])
+        return self
+
+    @transaction.atomic
+    def set_shards(self, count):
+        """
+        Spread the stock over `count` shards, for products ordered by many
+        customers at once, or gather it back on the inventory if 0.
+        The held reservations follow their stock to a shard.
+        """
+        inventory = Inventory.objects.select_for_update().get(id=self.id)
+        shards = list(InventoryShard.objects.select_for_update().filter(inventory=self))
+        stock = inventory._stock + sum(shard.stock for shard in shards)
+        held = list(
+            StockReservation.objects
+                .select_for_update()
+                .filter(inventory=self, status=ReservationStatus.HELD)
+                .order_by('id')
+        )
+        InventoryShard.objects.filter(inventory=self).delete()
+
+        if count:
+            new_shards = [InventoryShard(inventory=self, index=i) for i in range(count)]
+            for reservation in held:
+                shard = min(new_shards, key=lambda shard: shard.reserved)
+                shard.stock += reservation.quantity
+                shard.reserved += reservation.quantity
+                reservation.shard = shard
+            free, extra = divmod(stock - sum(r.quantity for r in held), count)
+            for shard in new_shards:
+                shard.stock += free + (1 if shard.index < extra else 0)
+            InventoryShard.objects.bulk_create(new_shards)
+            fields = {'_stock': 0, 'reserved': 0}
+        else:
+            for reservation in held:
+                reservation.shard = None
+            fields = {'_stock': stock, 'reserved': sum(r.quantity for r in held)}
+        StockReservation.objects.bulk_update(held, ['shard'])
+        Inventory.objects.filter(id=self.id).update(shard_count=count, updated_at=now(), **fields)
+        self.refresh_from_db(fields=['_stock', 'reserved', 'shard_count', 'updated_at'])
+        invalidate_product(self.product_id, self.product.shop_id)
+        CatalogEntry.sync_stock([self.product_id])
+        refresh_stocks([self.product_id])
+        return self
+
     def delete(self, *args, **kwargs):
         """
         Prevent deletion of the Inventory instance.
@@ -338,10 +811,334 @@ def create_inventory(sender, instance, created, **kwargs):
         Inventory.objects.create(product=instance)
 
 
+@receiver(sender=Inventory, signal=post_save)
+def refresh_cached_stock(sender, instance, created, **kwargs):
+    if not created:
+        refresh_stocks([instance.product_id])
+
+
+class InventoryShard(models.Model):
+    """
+    Part of the stock of an inventory ordered by many customers at once.
+    Checkouts of the product update a random shard instead of all
+    queueing on the same inventory row.
+    """
+    inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name='shards')
+    index = models.PositiveSmallIntegerField()
+    stock = models.PositiveIntegerField(default=0)
+    reserved = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['inventory', 'index'], name='unique_inventory_shard')
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the InventoryShard object.
+        """
+        return f"<InventoryShard: {self.inventory_id} #{self.index}> {self.stock} items, {self.reserved} reserved"
+
+    @staticmethod
+    def add(inventory_id, quantity):
+        """
+        Add to the stock of the least stocked shard of an inventory.
+        """
+        shard_id = (
+            InventoryShard.objects
+                .filter(inventory_id=inventory_id)
+                .order_by('stock', 'index')
+                .values_list('id', flat=True)
+                .first()
+        )
+        InventoryShard.objects.filter(id=shard_id).update(stock=F('stock') + quantity)
+
+    @staticmethod
+    def allocate(inventory_id, quantity, take=False):
+        """
+        Reserve some of the available stock of the shards of an inventory,
+        or take it out of their stock if `take`. A random shard is tried
+        first, then the others, and the quantity is split over several
+        shards when none has enough on its own.
+        Returns the (shard id, quantity) parts, or None without changing
+        anything if the shards do not have enough available stock.
+        """
+        def apply(shard_id, part):
+            change = {'stock': F('stock') - part} if take else {'reserved': F('reserved') + part}
+            return (InventoryShard.objects
+                .filter(id=shard_id, stock__gte=F('reserved') + part)
+                .update(**change))
+
+        shard_ids = list(InventoryShard.objects.filter(inventory_id=inventory_id).values_list('id', flat=True))
+        random.shuffle(shard_ids)
+        for shard_id in shard_ids:
+            if apply(shard_id, quantity):
+                return [(shard_id, quantity)]
+
+        with transaction.atomic():
+            parts = []
+            remaining = quantity
+            shards = (
+                InventoryShard.objects
+                    .filter(inventory_id=inventory_id)
+                    .annotate(available=F('stock') - F('reserved'))
+                    .filter(available__gt=0)
+                    .order_by('-available')
+                    .values_list('id', 'available')
+            )
+            for shard_id, available in shards:
+                part = min(available, remaining)
+                if apply(shard_id, part):
+                    parts.append((shard_id, part))
+                    remaining -= part
+                if not remaining:
+                    return parts
+            transaction.set_rollback(True)
+        return None
+
+
+class InventoryMovement(models.Model):
+    """
+    Append-only record of a change to the stock of an inventory.
+    Movements older than the retention are folded into an
+    InventorySnapshot and deleted by InventoryLedgerService.
+    """
+    inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name='movements')
+    # signed, negative when stock is taken out
+    quantity = models.IntegerField()
+    reason = models.CharField(max_length=20, choices=MovementReason.choices)
+    # the order for checkouts and cancellations, kept as a plain
+    # reference so movements outlive the order
+    order_id = models.UUIDField(null=True, blank=True)
+    handle = models.CharField(max_length=20, null=True, blank=True)
+    created_at = models.DateTimeField(default=now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['inventory', 'id'], name='movement_inventory_idx'),
+            models.Index(fields=['created_at'], name='movement_created_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the InventoryMovement object.
+        """
+        return f"<InventoryMovement: {self.id}> {self.inventory_id} {self.quantity:+d} ({self.reason})"
+
+    @staticmethod
+    def record(entries):
+        """
+        Write the movements of many stock changes at once, given as
+        (inventory id, quantity, reason, order id, handle) tuples.
+        """
+        InventoryMovement.objects.bulk_create([
+            InventoryMovement(
+                inventory_id=inventory_id,
+                quantity=quantity,
+                reason=reason,
+                order_id=order_id,
+                handle=handle
+            )
+            for inventory_id, quantity, reason, order_id, handle in entries
+            if quantity
+        ])
+
+
+class ReservationStatus(models.TextChoices):
+    HELD = 'HELD', 'Held'
+    CONVERTED = 'CONVERTED', 'Converted'
+    RELEASED = 'RELEASED', 'Released'
+
+
+class StockReservation(models.Model):
+    """
+    Hold on part of the stock of an inventory for an order, until the
+    order is paid or the hold expires. Managed by StockReservationService.
+    """
+    inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name='reservations')
+    # the shard holding the stock, if the inventory is sharded
+    shard = models.ForeignKey(
+        InventoryShard, on_delete=models.SET_NULL, null=True, blank=True, related_name='reservations')
+    # kept as a plain reference, like the movements
+    order_id = models.UUIDField()
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=ReservationStatus.choices, default=ReservationStatus.HELD)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'expires_at'], name='reservation_expiry_idx'),
+            models.Index(fields=['order_id'], name='reservation_order_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the StockReservation object.
+        """
+        return f"<StockReservation: {self.id}> {self.inventory_id} x{self.quantity} ({self.status})"
+
+
+class LowStockAlert(models.Model):
+    """
+    Fall of the available stock of an inventory to its reorder threshold.
+    An alert stays open until the stock rises above the threshold again,
+    so each crossing is reported once, in the next digest of its shop.
+    """
+    inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name='low_stock_alerts')
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='low_stock_alerts')
+    # available stock and threshold when the alert was raised
+    stock = models.IntegerField()
+    threshold = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    notified_at = models.DateTimeField(null=True, blank=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    # the inventory id while the alert is open, NULL once resolved: a plain
+    # unique index then allows one open alert per inventory, where MySQL
+    # has no partial indexes (NULLs do not conflict)
+    open_key = models.UUIDField(null=True, blank=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['open_key'], name='unique_open_low_stock_alert')
+        ]
+        indexes = [
+            models.Index(fields=['notified_at', 'shop'], name='low_stock_pending_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the LowStockAlert object.
+        """
+        return f"<LowStockAlert: {self.id}> {self.inventory_id} {self.stock}/{self.threshold}"
+
+    @staticmethod
+    def detect(inventory_ids):
+        """
+        Raise alerts for the given inventories whose available stock is at
+        or below their threshold, and resolve the open alerts of those back
+        above it. Only called with the inventories whose stock just changed.
+        """
+        inventory_ids = list(inventory_ids)
+        if not inventory_ids:
+            return
+        rows = list(
+            Inventory.objects
+                .filter(id__in=inventory_ids, reorder_threshold__isnull=False)
+                .annotate(available=Inventory.available_expression())
+                .values_list('id', 'product__shop_id', 'available', 'reorder_threshold')
+        )
+        low = [row for row in rows if row[2] <= row[3]]
+        restocked = [inventory_id for inventory_id, _, available, threshold in rows if available > threshold]
+        LowStockAlert.resolve(restocked)
+        if low:
+            # inventories with an open alert were already reported
+            LowStockAlert.objects.bulk_create(
+                [
+                    LowStockAlert(
+                        inventory_id=inventory_id, shop_id=shop_id, stock=available,
+                        threshold=threshold, open_key=inventory_id
+                    )
+                    for inventory_id, shop_id, available, threshold in low
+                ],
+                ignore_conflicts=True
+            )
+
+    @staticmethod
+    def resolve(inventory_ids):
+        """
+        Resolve the open alerts of the given inventories.
+        """
+        inventory_ids = list(inventory_ids)
+        if not inventory_ids:
+            return
+        (LowStockAlert.objects
+            .filter(inventory_id__in=inventory_ids, resolved_at__isnull=True)
+            .update(resolved_at=now(), open_key=None))
+
+
+class InventorySnapshot(models.Model):
+    """
+    Stock of an inventory after all its movements up to movement_id,
+    the last of which was made at taken_at.
+    """
+    inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name='snapshots')
+    stock = models.PositiveIntegerField()
+    movement_id = models.BigIntegerField()
+    taken_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['inventory', 'movement_id'], name='snapshot_inventory_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the InventorySnapshot object.
+        """
+        return f"<InventorySnapshot: {self.inventory_id}> {self.stock} at {self.taken_at}"
+
+
+@receiver(sender=Product, signal=pre_delete)
+def remove_from_category_facets(sender, instance, **kwargs):
+    """
+    Runs for cascaded deletes too (e.g. when a shop is deleted).
+    """
+    if instance.is_active:
+        CategoryFacetCount.apply(
+            list(instance.categories.values_list('id', flat=True)), instance.shop_id, -1)
+
+
+@receiver(sender=Product, signal=post_delete)
+def delete_product_image_dir(sender, instance, **kwargs):
+    """
+    Runs for cascaded deletes too (e.g. when a shop is deleted).
+    Queued after the files of the images, deleted before the product.
+    """
+    instance.delete_all_image_files()
+
+
+@receiver(sender=ProductImage, signal=post_delete)
+def release_product_image_files(sender, instance, **kwargs):
+    """
+    Runs for queryset and cascaded deletes too.
+    Shared files are deleted with their last image, others are
+    queued for deletion.
+    """
+    if instance.blob_id:
+        MediaBlob.release([instance.blob_id])
+    else:
+        # an upload not processed yet or an image stored before blobs
+        MediaTombstone.enqueue(file_names(instance.image.name, instance.renditions))
+
+
+class CategoryQuerySet(models.QuerySet):
+    """
+    QuerySet for the Category model.
+    """
+
+    def with_facet_counts(self, shop=None):
+        """
+        Return categories that have active products, in the whole
+        catalog or in a specific shop.
+        The counts are read from the precomputed facet counts.
+        """
+        if shop is None:
+            return self.filter(product_count__gt=0)
+        return self.filter(
+            facet_counts__shop=shop,
+            facet_counts__product_count__gt=0
+        ).annotate(shop_product_count=F('facet_counts__product_count'))
+
+
 class Category(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, null=False)
     name = models.CharField(max_length=120, null=False, blank=False)
     slug = models.SlugField(max_length=150, unique=True)
+    # number of active products in the category
+    product_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = CategoryQuerySet.as_manager()
 
     class Meta:
         ordering = ['name']
@@ -357,6 +1154,463 @@ class Category(models.Model):
         """
         Save the Category instance.
         """
+        old_name, old_slug = None, None
+        if not self._state.adding:
+            old_name, old_slug = (
+                Category.objects.filter(id=self.id).values_list('name', 'slug').first()
+                or (None, None)
+            )
         self.slug = slugify(self.name)
         super().save(*args, **kwargs)
-    
\ No newline at end of file
+        if old_slug and old_slug != self.slug:
+            for product in self.products.all():
+                product.update_search_index()
+        if old_name is not None and (old_name, old_slug) != (self.name, self.slug):
+            CatalogEntry.sync(self.products.values_list('id', flat=True))
+        invalidate_categories()
+
+    def delete(self, *args, **kwargs):
+        """
+        Delete the Category instance and drop its slug from the
+        search index of its products.
+        """
+        products = list(self.products.all())
+        super().delete(*args, **kwargs)
+        for product in products:
+            product.update_search_index()
+        CatalogEntry.sync([product.id for product in products])
+        invalidate_categories()
+
+
+class ProductSearchTerm(models.Model):
+    """
+    Inverted index entry. Maps a search term to a product it was
+    found in, weighted by the fields it was found in.
+    """
+    term = models.CharField(max_length=50)
+    weight = models.PositiveSmallIntegerField(default=1)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='search_terms')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'product'], name='unique_search_term_per_product')
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the ProductSearchTerm object.
+        """
+        return f"<ProductSearchTerm: {self.term}> {self.product_id} ({self.weight})"
+    
+
+
+class CategoryFacetCount(models.Model):
+    """
+    Number of active products of a shop in a category.
+    Kept up to date as products are added to or removed from categories,
+    deactivated or deleted.
+    """
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='facet_counts')
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='category_facet_counts')
+    product_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'shop'], name='unique_category_facet_per_shop')
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the CategoryFacetCount object.
+        """
+        return f"<CategoryFacetCount: {self.category_id}> {self.shop_id} - {self.product_count}"
+
+    @staticmethod
+    def apply(category_ids, shop_id, delta):
+        """
+        Add delta to the product count of the given categories,
+        both catalog wide and for the shop.
+        """
+        if not category_ids or not delta:
+            return
+        if delta > 0:
+            CategoryFacetCount.objects.bulk_create([
+                CategoryFacetCount(category_id=c_id, shop_id=shop_id)
+                for c_id in category_ids
+            ], ignore_conflicts=True)
+            new_count = F('product_count') + delta
+        else:
+            # counts are unsigned, never let them go below 0
+            new_count = Case(
+                When(product_count__gte=-delta, then=F('product_count') + delta),
+                default=Value(0)
+            )
+        (Category.objects
+            .filter(id__in=category_ids)
+            .update(product_count=new_count))
+        (CategoryFacetCount.objects
+            .filter(shop_id=shop_id, category_id__in=category_ids)
+            .update(product_count=new_count))
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild():
+        """
+        Recompute all facet counts from the product categories.
+        """
+        rows = (
+            Product.categories.through.objects
+                .filter(product__is_active=True)
+                .values('category_id', 'product__shop_id')
+                .annotate(n=Count('product_id'))
+                .order_by()
+        )
+        totals = {}
+        facets = []
+        for row in rows:
+            totals[row['category_id']] = totals.get(row['category_id'], 0) + row['n']
+            facets.append(CategoryFacetCount(
+                category_id=row['category_id'],
+                shop_id=row['product__shop_id'],
+                product_count=row['n']
+            ))
+        CategoryFacetCount.objects.all().delete()
+        CategoryFacetCount.objects.bulk_create(facets, batch_size=1000)
+        Category.objects.update(product_count=0)
+        Category.objects.bulk_update(
+            [Category(id=c_id, product_count=n) for c_id, n in totals.items()],
+            ['product_count'],
+            batch_size=500
+        )
+        invalidate_categories()
+
+
+class CategoryRanking(models.Model):
+    """
+    Best selling products of a category, best first.
+    Rebuilt periodically by RecommendationService.
+    """
+    category = models.OneToOneField(Category, on_delete=models.CASCADE, related_name='ranking')
+    # hex ids of the products
+    product_ids = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """
+        Returns a string representation of the CategoryRanking object.
+        """
+        return f"<CategoryRanking: {self.category_id}> {len(self.product_ids)} products"
+
+
+class ProductFeed(models.Model):
+    """
+    Products recommended to a customer, best first.
+    Rebuilt periodically by RecommendationService.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='product_feed')
+    # hex ids of the products
+    product_ids = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """
+        Returns a string representation of the ProductFeed object.
+        """
+        return f"<ProductFeed: {self.user_id}> {len(self.product_ids)} products"
+
+
+class CatalogEntryQuerySet(models.QuerySet):
+    """
+    QuerySet for the CatalogEntry model.
+    """
+
+    def in_category(self, category_id):
+        """
+        Return the entries of the products of a category.
+        """
+        return self.filter(product_id__in=Subquery(
+            Product.categories.through.objects
+                .filter(category_id=category_id)
+                .values('product_id')
+        ))
+
+    def search(self, query):
+        """
+        Return the entries of the products matching the search query,
+        best match first. See ProductQuerySet.search.
+        """
+        terms = parse_query(query)
+        if not terms:
+            return self.none()
+        match = Q()
+        for term in terms:
+            match |= Q(product__search_terms__term__startswith=term)
+        return (
+            self.filter(match)
+                .annotate(search_rank=Sum('product__search_terms__weight'))
+                .order_by('-search_rank', '-created_at')
+        )
+
+
+class CatalogEntry(models.Model):
+    """
+    Listing of an active product, denormalized so the catalog list
+    endpoints read one table instead of joining the shop, inventory,
+    images and categories of every product.
+    Entries are written along with the changes they reflect, see sync,
+    and regenerated in bulk by the rebuild_catalog command.
+    """
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE, primary_key=True, related_name='catalog_entry')
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='catalog_entries')
+    shop_name = models.CharField(max_length=40)
+    name = models.CharField(max_length=50)
+    description = models.TextField(default='')
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    stock = models.PositiveIntegerField(default=0)
+    # primary image of the product, a placeholder until it is processed
+    image_id = models.UUIDField(null=True, blank=True)
+    image_url = models.CharField(max_length=255, blank=True, default='')
+    # [{'id', 'name', 'slug'}] of the categories of the product
+    categories = models.JSONField(default=list)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    objects = CatalogEntryQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = 'Catalog entries'
+        # one index per catalog sort mode, catalog wide and per shop, so pages
+        # are read in index order (see CatalogEntryFilter)
+        indexes = [
+            models.Index(fields=['created_at', 'product'], name='catalog_created_idx'),
+            models.Index(fields=['price', 'product'], name='catalog_price_idx'),
+            models.Index(fields=['shop', 'created_at', 'product'], name='catalog_shop_created_idx'),
+            models.Index(fields=['shop', 'price', 'product'], name='catalog_shop_price_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the CatalogEntry object.
+        """
+        return f"<CatalogEntry: {self.product_id}> {self.name}"
+
+    @staticmethod
+    def build(product_ids):
+        """
+        Return the entries of the active products among product_ids,
+        in a fixed number of queries.
+        """
+        products = list(
+            Product.objects
+                .filter(id__in=product_ids, is_active=True)
+                .select_related('shop', 'inventory')
+                .order_by()
+        )
+        if not products:
+            return []
+        product_ids = [product.id for product in products]
+
+        # the first ready image, or the first image if none is ready
+        images = {}
+        for image in (ProductImage.objects
+                .filter(product_id__in=product_ids)
+                .only('id', 'product_id', 'image', 'status')
+                .order_by('id')):
+            current = images.get(image.product_id)
+            if current is None or (current.status != ImageStatus.READY
+                                   and image.status == ImageStatus.READY):
+                images[image.product_id] = image
+
+        categories = defaultdict(list)
+        rows = (
+            Product.categories.through.objects
+                .filter(product_id__in=product_ids)
+                .values_list('product_id', 'category_id', 'category__name', 'category__slug')
+                .order_by('category__name')
+        )
+        for product_id, category_id, name, slug in rows:
+            categories[product_id].append({'id': str(category_id), 'name': name, 'slug': slug})
+
+        entries = []
+        for product in products:
+            image = images.get(product.id)
+            entries.append(CatalogEntry(
+                product_id=product.id,
+                shop_id=product.shop_id,
+                shop_name=product.shop.name,
+                name=product.name,
+                description=product.description,
+                price=product.price,
+                stock=product.inventory.available,
+                image_id=image.id if image else None,
+                image_url=CatalogEntry.image_url_of(image) if image else '',
+                categories=categories[product.id],
+                created_at=product.created_at,
+                updated_at=product.updated_at
+            ))
+        return entries
+
+    @staticmethod
+    def image_url_of(image):
+        """
+        Return the URL listed for a product image.
+        """
+        if image.status == ImageStatus.READY:
+            return image.image.url
+        return static(settings.PRODUCT_IMAGE_PLACEHOLDER)
+
+    @staticmethod
+    def save_entries(entries, batch_size=500):
+        """
+        Insert the entries, replacing the existing ones.
+        """
+        CatalogEntry.objects.bulk_create(
+            entries,
+            batch_size=batch_size,
+            **upsert_options(CatalogEntry, ['product'], [
+                'shop', 'shop_name', 'name', 'description', 'price', 'stock',
+                'image_id', 'image_url', 'categories', 'created_at', 'updated_at'
+            ])
+        )
+
+    @staticmethod
+    def refresh(product_ids):
+        """
+        Rebuild the entries of the given products, removing the entries
+        of products that were deactivated or deleted.
+        """
+        product_ids = list(product_ids)
+        if not product_ids:
+            return
+        entries = CatalogEntry.build(product_ids)
+        if len(entries) < len(set(product_ids)):
+            (CatalogEntry.objects
+                .filter(product_id__in=product_ids)
+                .exclude(product_id__in=[entry.product_id for entry in entries])
+                .delete())
+        CatalogEntry.save_entries(entries)
+
+    @staticmethod
+    def refresh_stock(product_ids):
+        """
+        Copy the available stock of the given products to their entries.
+        """
+        product_ids = list(product_ids)
+        if not product_ids:
+            return
+        (CatalogEntry.objects
+            .filter(product_id__in=product_ids)
+            .update(stock=Subquery(
+                Inventory.objects
+                    .filter(product_id=OuterRef('product_id'))
+                    .annotate(available=Inventory.available_expression())
+                    .values('available')[:1]
+            )))
+
+    @staticmethod
+    def _now_and_on_commit(refresh, product_ids):
+        """
+        Run a refresh now, so the entries change with the data they
+        reflect, and once more when the current transaction commits,
+        so an entry built from rows read before a concurrent commit
+        is corrected.
+        """
+        product_ids = list(product_ids)
+        if not product_ids:
+            return
+        refresh(product_ids)
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(lambda: refresh(product_ids))
+
+    @staticmethod
+    def sync(product_ids):
+        """
+        Keep the entries of the given products in sync with a change
+        to the products, their images or their categories.
+        """
+        CatalogEntry._now_and_on_commit(CatalogEntry.refresh, product_ids)
+
+    @staticmethod
+    def sync_stock(product_ids):
+        """
+        Keep the entries of the given products in sync with a change
+        to their stock.
+        """
+        CatalogEntry._now_and_on_commit(CatalogEntry.refresh_stock, product_ids)
+
+    @staticmethod
+    def rebuild(batch_size=500):
+        """
+        Regenerate the entries of all active products, a batch of
+        products at a time. Returns the number of entries.
+        """
+        CatalogEntry.objects.filter(product__is_active=False).delete()
+        products = Product.objects.filter(is_active=True).order_by('id')
+        count = 0
+        last_id = None
+        while True:
+            batch = products if last_id is None else products.filter(id__gt=last_id)
+            product_ids = list(batch.values_list('id', flat=True)[:batch_size])
+            if not product_ids:
+                break
+            with transaction.atomic():
+                CatalogEntry.save_entries(CatalogEntry.build(product_ids), batch_size)
+            count += len(product_ids)
+            last_id = product_ids[-1]
+        return count
+
+
+@receiver(sender=Shop, signal=post_save)
+def rename_shop_catalog_entries(sender, instance, created, **kwargs):
+    if not created:
+        (CatalogEntry.objects
+            .filter(shop_id=instance.id)
+            .exclude(shop_name=instance.name)
+            .update(shop_name=instance.name))
+
+
+class ProductSales(models.Model):
+    """
+    Units of a product ordered on a day.
+    Rolled up incrementally from the order items by SalesRollupService.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales')
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='+')
+    day = models.DateField()
+    units = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'Product sales'
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'day'], name='unique_product_sales_per_day')
+        ]
+        # rankings read the days of a window, catalog wide or for a shop
+        indexes = [
+            models.Index(fields=['day'], name='product_sales_day_idx'),
+            models.Index(fields=['shop', 'day'], name='product_sales_shop_day_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the ProductSales object.
+        """
+        return f"<ProductSales: {self.product_id}> {self.day} - {self.units}"
+
+
+class RollupWatermark(models.Model):
+    """
+    Position of the last row read by an incremental rollup,
+    as the (created_at, id) of the row.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    position_at = models.DateTimeField(null=True, blank=True)
+    position_id = models.UUIDField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """
+        Returns a string representation of the RollupWatermark object.
+        """
+        return f"<RollupWatermark: {self.name}> {self.position_at}"
@@ -0,0 +1,20 @@
+from .inventory_batch import InventoryBatchService
+from .inventory_ledger import InventoryLedgerService
+from .low_stock import LowStockDigestService
+from .product_export import ProductExportService
+from .product_import import ImportFileError, ProductImportService
+from .recommendations import RecommendationService
+from .sales_rollup import SalesRollupService
+from .stock_reservation import StockReservationService
+
+__all__ = [
+    "InventoryBatchService",
+    "InventoryLedgerService",
+    "LowStockDigestService",
+    "ProductExportService",
+    "ImportFileError",
+    "ProductImportService",
+    "RecommendationService",
+    "SalesRollupService",
+    "StockReservationService"
+]
@@ -0,0 +1,138 @@
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Sum, When
+from django.utils.timezone import now
+
+from common.utils.cache import invalidate_products
+from product.models import (
+    CatalogEntry,
+    Inventory,
+    InventoryMovement,
+    InventoryShard,
+    LowStockAlert,
+    MovementReason
+)
+from product.utils.stock_cache import refresh_stocks
+
+
+class InventoryBatchService:
+    """
+    Service to apply stock adjustments to many products of a shop at once.
+
+    The inventories are locked and checked in one query, then every
+    adjustment is applied by a single UPDATE with a CASE on the inventory
+    id, so the locks are held for two statements whatever the batch size.
+    The adjustments of sharded inventories are applied to their shards.
+    In atomic mode nothing is applied unless every adjustment is valid,
+    otherwise the valid adjustments are applied and the others reported.
+    """
+
+    def __init__(self, shop, updated_by):
+        self.shop = shop
+        self.updated_by = updated_by
+
+    @staticmethod
+    def _result(item, status, stock=None):
+        return {
+            'product_id': str(item['product_id']),
+            'action': item['action'],
+            'quantity': item['quantity'],
+            'status': status,
+            'stock': stock
+        }
+
+    @transaction.atomic
+    def apply(self, items, atomic=True):
+        """
+        Apply the {product_id, action, quantity} adjustments.
+        Returns the report of the batch, with the result of each item
+        in the order given.
+        """
+        rows = list(
+            Inventory.objects
+                .select_for_update()
+                .filter(product_id__in=[item['product_id'] for item in items], product__shop=self.shop)
+                .values_list('id', 'product_id', '_stock', 'reserved', 'shard_count', 'reorder_threshold')
+        )
+        sharded = {inventory_id for inventory_id, _, _, _, shard_count, _ in rows if shard_count}
+        watched = {inventory_id for inventory_id, *_, threshold in rows if threshold is not None}
+        shard_totals = {}
+        if sharded:
+            # locked as well, so the checks below hold until applied
+            list(InventoryShard.objects.select_for_update().filter(inventory_id__in=sharded).values_list('id'))
+            shard_totals = {
+                row['inventory_id']: (row['stock'], row['reserved'])
+                for row in (
+                    InventoryShard.objects
+                        .filter(inventory_id__in=sharded)
+                        .values('inventory_id')
+                        .annotate(stock=Sum('stock'), reserved=Sum('reserved'))
+                        .order_by()
+                )
+            }
+        inventories = {
+            product_id: (inventory_id, *shard_totals.get(inventory_id, (stock, reserved)))
+            for inventory_id, product_id, stock, reserved, _, _ in rows
+        }
+
+        deltas = {}
+        results = []
+        for item in items:
+            found = inventories.get(item['product_id'])
+            if found is None:
+                results.append(self._result(item, 'not_found'))
+                continue
+            inventory_id, stock, reserved = found
+            delta = item['quantity'] if item['action'] == 'add' else -item['quantity']
+            # reserved stock cannot be taken out
+            if stock + delta < reserved:
+                results.append(self._result(item, 'insufficient_stock', stock))
+                continue
+            deltas[inventory_id] = delta
+            results.append(self._result(item, 'updated', stock + delta))
+
+        failed = len(items) - len(deltas)
+        if failed and atomic:
+            # nothing is applied, the valid items keep their current stock
+            for item, result in zip(items, results):
+                if result['status'] == 'updated':
+                    result.update(status='skipped', stock=inventories[item['product_id']][1])
+            deltas = {}
+
+        if deltas:
+            (Inventory.objects
+                .filter(id__in=list(deltas))
+                .update(
+                    _stock=Case(
+                        *[When(id=inventory_id, then=F('_stock') + delta)
+                          for inventory_id, delta in deltas.items()
+                          if inventory_id not in sharded],
+                        default=F('_stock'),
+                        output_field=PositiveIntegerField()
+                    ),
+                    last_updated_by=self.updated_by,
+                    updated_at=now()
+                ))
+            for inventory_id in sharded.intersection(deltas):
+                delta = deltas[inventory_id]
+                if delta > 0:
+                    InventoryShard.add(inventory_id, delta)
+                else:
+                    InventoryShard.allocate(inventory_id, -delta, take=True)
+            InventoryMovement.record(
+                (inventory_id, delta, MovementReason.ADJUSTMENT, None, self.updated_by)
+                for inventory_id, delta in deltas.items()
+            )
+            product_ids = [
+                product_id for product_id, (inventory_id, _, _) in inventories.items()
+                if inventory_id in deltas
+            ]
+            CatalogEntry.sync_stock(product_ids)
+            invalidate_products((product_id, self.shop.id) for product_id in product_ids)
+            refresh_stocks(product_ids)
+            LowStockAlert.detect(watched.intersection(deltas))
+
+        return {
+            'updated': len(deltas),
+            'failed': failed,
+            'items': results
+        }
@@ -0,0 +1,131 @@
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import F, IntegerField, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
+
+from product.models import Inventory, InventoryMovement, InventoryShard, InventorySnapshot
+
+# movements are kept this long before being folded into snapshots
+MOVEMENT_RETENTION = timedelta(days=90)
+
+
+class InventoryLedgerService:
+    """
+    Service to compact the inventory movement ledger and to read
+    stock history from it.
+
+    The stock of an inventory at any time is the stock of its latest
+    snapshot taken by then plus the movements made since the snapshot.
+    Compaction folds the movements older than the retention into one
+    new snapshot per inventory and deletes them, so history older than
+    the retention is only known at the times snapshots were taken.
+    """
+
+    def __init__(self, retention=MOVEMENT_RETENTION):
+        self.retention = retention
+
+    # -------------------------------------------------------------------------
+    # COMPACTION
+    # -------------------------------------------------------------------------
+
+    @transaction.atomic
+    def compact(self):
+        """
+        Fold the movements older than the retention into snapshots.
+        Returns the number of movements compacted.
+        """
+        boundary = (
+            InventoryMovement.objects
+                .filter(created_at__lt=now() - self.retention)
+                .aggregate(last=Max('id'))['last']
+        )
+        if boundary is None:
+            return 0
+        movements = InventoryMovement.objects.filter(id__lte=boundary)
+        totals = list(
+            movements
+                .values('inventory_id')
+                .annotate(total=Sum('quantity'), last_at=Max('created_at'))
+                .values_list('inventory_id', 'total', 'last_at')
+        )
+        # ordered by movement so the latest snapshot of each inventory wins
+        previous = dict(
+            InventorySnapshot.objects
+                .filter(inventory_id__in=[inventory_id for inventory_id, _, _ in totals])
+                .order_by('movement_id')
+                .values_list('inventory_id', 'stock')
+        )
+        InventorySnapshot.objects.bulk_create([
+            InventorySnapshot(
+                inventory_id=inventory_id,
+                stock=previous.get(inventory_id, 0) + total,
+                movement_id=boundary,
+                taken_at=last_at
+            )
+            for inventory_id, total, last_at in totals
+        ])
+        count, _ = movements.delete()
+        return count
+
+    # -------------------------------------------------------------------------
+    # HISTORY
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def stock_at(inventory, at):
+        """
+        Return the stock of the inventory at the given time.
+        """
+        snapshot = (
+            InventorySnapshot.objects
+                .filter(inventory=inventory, taken_at__lte=at)
+                .order_by('-movement_id')
+                .first()
+        )
+        movements = InventoryMovement.objects.filter(inventory=inventory, created_at__lte=at)
+        if snapshot:
+            movements = movements.filter(id__gt=snapshot.movement_id)
+        total = movements.aggregate(total=Sum('quantity'))['total'] or 0
+        return (snapshot.stock if snapshot else 0) + total
+
+    @staticmethod
+    def reconcile(inventories=None):
+        """
+        Return the inventories whose stock differs from their ledger,
+        annotated with the `ledger_stock` computed from it.
+        """
+        latest = (
+            InventorySnapshot.objects
+                .filter(inventory=OuterRef('pk'))
+                .order_by('-movement_id')
+        )
+        inventories = Inventory.objects.all() if inventories is None else inventories
+        inventories = inventories.annotate(
+            snapshot_stock=Coalesce(Subquery(latest.values('stock')[:1]), Value(0)),
+            snapshot_movement=Coalesce(Subquery(latest.values('movement_id')[:1]), Value(0))
+        )
+        moved = (
+            InventoryMovement.objects
+                .filter(inventory=OuterRef('pk'), id__gt=OuterRef('snapshot_movement'))
+                .values('inventory')
+                .annotate(total=Sum('quantity'))
+                .values('total')
+        )
+        sharded = (
+            InventoryShard.objects
+                .filter(inventory=OuterRef('pk'))
+                .values('inventory')
+                .annotate(total=Sum('stock'))
+                .values('total')
+        )
+        return (
+            inventories
+                .annotate(
+                    ledger_stock=F('snapshot_stock') + Coalesce(
+                        Subquery(moved, output_field=IntegerField()), Value(0)),
+                    current_stock=F('_stock') + Coalesce(
+                        Subquery(sharded, output_field=IntegerField()), Value(0))
+                )
+                .exclude(current_stock=F('ledger_stock'))
+        )
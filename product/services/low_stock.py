@@ -0,0 +1,48 @@
+from itertools import groupby
+from django.utils.timezone import now
+
+from e_core import logger
+from product.models import LowStockAlert
+from product.utils.send_email import send_low_stock_digest
+
+
+class LowStockDigestService:
+    """
+    Service to send each shop one digest of its new low stock alerts.
+
+    The alerts are raised by the stock changes themselves, only for the
+    inventories that changed, so the digest reads the pending alerts and
+    never the inventories. An alert is sent once, and not at all if its
+    stock rose above the threshold before the digest went out.
+    """
+
+    @staticmethod
+    def pending():
+        """
+        Return the open alerts not sent yet, grouped by shop.
+        """
+        return (
+            LowStockAlert.objects
+                .filter(notified_at__isnull=True, resolved_at__isnull=True)
+                .select_related('inventory__product', 'shop__owner')
+                .order_by('shop_id', 'created_at')
+        )
+
+    def send(self):
+        """
+        Send the digests. Returns the number of shops notified.
+        """
+        count = 0
+        for _, alerts in groupby(self.pending(), key=lambda alert: alert.shop_id):
+            alerts = list(alerts)
+            shop = alerts[0].shop
+            if shop.owner.email:
+                send_low_stock_digest(shop.owner.email, shop.name, alerts)
+                count += 1
+            else:
+                logger.error(f"No email to send the low stock digest of shop {shop.id} to.")
+            # marked per shop, so a failed email leaves the next shops pending
+            (LowStockAlert.objects
+                .filter(id__in=[alert.id for alert in alerts])
+                .update(notified_at=now()))
+        return count
@@ -0,0 +1,117 @@
+from django.db.models import Prefetch, Q
+
+import csv
+import json
+
+from product.models import ImageStatus, ProductImage
+
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+EXPORT_FIELDS = [
+    'id', 'name', 'description', 'price', 'stock', 'categories',
+    'images', 'is_active', 'created_at', 'updated_at'
+]
+
+
+class Echo:
+    """
+    File-like object that returns what is written to it,
+    so csv.writer can produce lines for a streaming response.
+    """
+    def write(self, value):
+        return value
+
+
+class ProductExportService:
+    """
+    Service to export the products of a shop as CSV or JSONL.
+    Products are read in batches of chunk_size, each starting after the
+    last (created_at, id) of the previous one, and written one line at
+    a time, so memory use does not grow with the catalog. A cursor would
+    not do: the MySQL driver loads the whole result set into memory.
+
+    The CSV columns can be imported back with ProductImportService,
+    categories and image URLs are separated by '|'.
+    """
+
+    def __init__(self, shop, fmt, request=None, chunk_size=500):
+        self.shop = shop
+        self.fmt = fmt
+        self.request = request
+        self.chunk_size = chunk_size
+
+    def get_queryset(self):
+        return (
+            self.shop.products
+                .select_related('inventory')
+                .prefetch_related(
+                    'categories',
+                    Prefetch(
+                        'images',
+                        queryset=ProductImage.objects.filter(status=ImageStatus.READY)
+                    )
+                )
+                .order_by('created_at', 'id')
+        )
+
+    def _image_url(self, image):
+        url = image.image.url
+        return self.request.build_absolute_uri(url) if self.request else url
+
+    def to_row(self, product):
+        """
+        Return the exported fields of a product.
+        """
+        return {
+            'id': str(product.id),
+            'name': product.name,
+            'description': product.description,
+            'price': str(product.price),
+            'stock': product.inventory.stock,
+            'categories': [c.name for c in product.categories.all()],
+            'images': [self._image_url(img) for img in product.images.all()],
+            'is_active': product.is_active,
+            'created_at': product.created_at.isoformat(),
+            'updated_at': product.updated_at.isoformat(),
+        }
+
+    def rows(self):
+        queryset = self.get_queryset()
+        after = Q()
+        while True:
+            # index range scan on (shop, created_at, id), prefetches per batch
+            batch = list(queryset.filter(after)[:self.chunk_size])
+            for product in batch:
+                yield self.to_row(product)
+            if len(batch) < self.chunk_size:
+                return
+            last = batch[-1]
+            after = Q(created_at__gt=last.created_at) | Q(created_at=last.created_at, id__gt=last.id)
+
+    def lines(self):
+        """
+        Yield the export file line by line.
+        """
+        if self.fmt == 'jsonl':
+            for row in self.rows():
+                yield json.dumps(row) + "\n"
+            return
+
+        writer = csv.writer(Echo())
+        yield writer.writerow(EXPORT_FIELDS)
+        for row in self.rows():
+            row['categories'] = '|'.join(row['categories'])
+            row['images'] = '|'.join(row['images'])
+            yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+    @property
+    def content_type(self):
+        return EXPORT_FORMATS[self.fmt]
+
+    @property
+    def filename(self):
+        return f"shop_{self.shop.id}_products.{self.fmt}"
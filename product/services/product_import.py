@@ -0,0 +1,370 @@
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from django.db import IntegrityError, transaction
+from django.utils.text import slugify
+
+import csv
+import io
+import json
+
+from common.utils.cache import invalidate_shop
+from product.models import (
+    MAX_PRODUCT_CATEGORIES,
+    CatalogEntry,
+    Category,
+    CategoryFacetCount,
+    Inventory,
+    InventoryMovement,
+    MovementReason,
+    Product,
+    ProductSearchTerm
+)
+from product.utils.categories import category_registry
+from product.utils.search import build_term_weights
+
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+MAX_REPORTED_ERRORS = 100
+DUPLICATE_NAME_ERROR = "A product with this name already exists in the shop."
+
+NAME_MAX_LENGTH = Product._meta.get_field('name').max_length
+PRICE_MAX_DIGITS = Product._meta.get_field('price').max_digits
+# largest stock a PositiveIntegerField holds on every database
+STOCK_MAX_VALUE = 2147483647
+
+
+class ImportFileError(ValueError):
+    """
+    Raised when the import file cannot be read any further.
+    The rows read before were imported.
+    """
+    pass
+
+
+class ProductImportService:
+    """
+    Service to import products into a shop from a CSV or JSONL file.
+    Rows are read as a stream and written in batches with bulk inserts,
+    so memory use does not grow with the size of the file.
+
+    Each row holds a product: name, description, price, stock and
+    categories (a list in JSONL, names separated by '|' in CSV).
+    A row that fails validation is skipped and reported, the others
+    are imported.
+    """
+
+    def __init__(self, shop, batch_size=500, updated_by='import'):
+        self.shop = shop
+        self.batch_size = batch_size
+        self.updated_by = updated_by
+
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self._names = None
+        self._category_ids = None
+
+    def _load(self):
+        """
+        Preload what rows are validated against: the category slugs.
+        Names are checked against the file as it is read, and against
+        the shop batch by batch.
+        """
+        self._names = set()
+        self._category_ids = category_registry.get_map()
+
+    # -------------------------------------------------------------------------
+    # READING
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def get_format(filename, fmt=None):
+        """
+        Return the import format, given or guessed from the file name.
+        """
+        if not fmt and filename and '.' in filename:
+            fmt = filename.rsplit('.', 1)[1]
+        fmt = (fmt or '').lower()
+        if fmt == 'json':
+            fmt = 'jsonl'
+        return fmt if fmt in IMPORT_FORMATS else None
+
+    @staticmethod
+    def read_rows(file, fmt):
+        """
+        Yield (row number, row or None) from a binary file.
+        A row that cannot be parsed is yielded as None. Raises
+        ImportFileError if the file is not UTF-8 or not valid CSV.
+        """
+        number = 0
+        try:
+            # uploaded files wrap the actual file object
+            file = getattr(file, 'file', file)
+            text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+            if fmt == 'csv':
+                for number, row in enumerate(csv.DictReader(text), start=1):
+                    if row.get('categories'):
+                        row['categories'] = row['categories'].split('|')
+                    yield number, row
+                return
+
+            for number, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield number, row if isinstance(row, dict) else None
+        except UnicodeDecodeError:
+            raise ImportFileError(f"The file is not UTF-8 encoded, after row {number}.")
+        except csv.Error as e:
+            raise ImportFileError(f"The file is not valid CSV, after row {number}: {e}.")
+
+    @staticmethod
+    def parse_stock(value):
+        """
+        Return the stock given in a row, or raise ValueError if it is not
+        a whole number.
+        """
+        if isinstance(value, bool):
+            raise ValueError(value)
+        try:
+            number = Decimal(str(value if value not in (None, '') else 0).strip())
+        except InvalidOperation:
+            raise ValueError(value)
+        if not number.is_finite() or number != number.to_integral_value():
+            raise ValueError(value)
+        return int(number)
+
+    # -------------------------------------------------------------------------
+    # VALIDATION
+    # -------------------------------------------------------------------------
+
+    def clean_row(self, row):
+        """
+        Validate a row.
+        Returns (data, errors) where errors maps fields to messages.
+        """
+        if row is None:
+            return None, {'row': ["Invalid row."]}
+
+        errors = {}
+        data = {}
+
+        name = str(row.get('name') or '').strip()
+        if not name:
+            errors['name'] = ["This field is required."]
+        elif len(name) > NAME_MAX_LENGTH:
+            errors['name'] = [f"Ensure this field has no more than {NAME_MAX_LENGTH} characters."]
+        elif Product.normalize_name(name) in self._names:
+            errors['name'] = [DUPLICATE_NAME_ERROR]
+        data['name'] = name
+        data['normalized_name'] = Product.normalize_name(name)
+
+        description = str(row.get('description') or '').strip()
+        if not description:
+            errors['description'] = ["This field is required."]
+        data['description'] = description
+
+        try:
+            price = Decimal(str(row.get('price') or 0)).quantize(Decimal('0.01'))
+            if price < 0:
+                errors['price'] = ["Ensure this value is greater than or equal to 0."]
+            elif len(price.as_tuple().digits) > PRICE_MAX_DIGITS:
+                errors['price'] = [f"Ensure that there are no more than {PRICE_MAX_DIGITS} digits in total."]
+            data['price'] = price
+        except (InvalidOperation, ValueError):
+            errors['price'] = ["A valid number is required."]
+
+        try:
+            stock = self.parse_stock(row.get('stock'))
+            if stock < 0:
+                errors['stock'] = ["Ensure this value is greater than or equal to 0."]
+            elif stock > STOCK_MAX_VALUE:
+                errors['stock'] = [f"Ensure this value is less than or equal to {STOCK_MAX_VALUE}."]
+            data['stock'] = stock
+        except ValueError:
+            errors['stock'] = ["A valid integer is required."]
+
+        categories = row.get('categories') or []
+        if isinstance(categories, str):
+            categories = [categories]
+        slugs = list(dict.fromkeys(slugify(c) for c in categories if str(c).strip()))
+        missing = [s for s in slugs if s not in self._category_ids]
+        if len(slugs) > MAX_PRODUCT_CATEGORIES:
+            errors['categories'] = [f"A product can belong to at most {MAX_PRODUCT_CATEGORIES} categories."]
+        elif missing:
+            errors['categories'] = [f"Category with slug(s): '{', '.join(missing)}' not found."]
+        data['categories'] = slugs
+
+        return data, errors
+
+    # -------------------------------------------------------------------------
+    # WRITING
+    # -------------------------------------------------------------------------
+
+    @transaction.atomic
+    def _write(self, batch):
+        """
+        Insert a batch of validated rows.
+        """
+        products = []
+        inventories = []
+        links = []
+        terms = []
+        category_counts = defaultdict(int)
+        for data in batch:
+            product = Product(
+                shop=self.shop,
+                name=data['name'],
+                normalized_name=data['normalized_name'],
+                description=data['description'],
+                price=data['price']
+            )
+            products.append(product)
+            # the create_inventory signal does not run for bulk inserts
+            inventories.append(Inventory(
+                product=product,
+                _stock=data['stock'],
+                last_updated_by=self.updated_by
+            ))
+            for slug in data['categories']:
+                category_id = self._category_ids[slug]
+                links.append(Product.categories.through(
+                    product_id=product.id, category_id=category_id))
+                category_counts[category_id] += 1
+            weights = build_term_weights(data['name'], data['description'], data['categories'])
+            terms.extend(
+                ProductSearchTerm(product=product, term=term, weight=weight)
+                for term, weight in weights.items()
+            )
+
+        Product.objects.bulk_create(products)
+        Inventory.objects.bulk_create(inventories)
+        InventoryMovement.record(
+            (inventory.id, inventory._stock, MovementReason.IMPORT, None, self.updated_by)
+            for inventory in inventories
+        )
+        Product.categories.through.objects.bulk_create(links)
+        ProductSearchTerm.objects.bulk_create(terms)
+        CatalogEntry.save_entries(self._catalog_entries(batch, products, category_counts))
+
+        by_delta = defaultdict(list)
+        for category_id, count in category_counts.items():
+            by_delta[count].append(category_id)
+        for delta, category_ids in by_delta.items():
+            CategoryFacetCount.apply(category_ids, self.shop.id, delta)
+
+    def _catalog_entries(self, batch, products, category_ids):
+        """
+        Return the catalog entries of the inserted products, built from
+        the batch instead of being read back, so they are written in a
+        single bulk insert. The products are new and have no images yet.
+        """
+        names = dict(Category.objects.filter(id__in=category_ids).values_list('id', 'name'))
+        entries = []
+        for data, product in zip(batch, products):
+            categories = [
+                {'id': str(self._category_ids[slug]), 'name': names[self._category_ids[slug]], 'slug': slug}
+                for slug in data['categories']
+            ]
+            entries.append(CatalogEntry(
+                product_id=product.id,
+                shop_id=self.shop.id,
+                shop_name=self.shop.name,
+                name=product.name,
+                description=product.description,
+                price=product.price,
+                stock=data['stock'],
+                categories=sorted(categories, key=lambda category: category['name']),
+                created_at=product.created_at,
+                updated_at=product.updated_at
+            ))
+        return entries
+
+    def _flush(self, batch, retry=True):
+        """
+        Write the (row number, data) pairs of a batch whose names are
+        not taken in the shop, and report the others.
+        """
+        # index probe on (shop, normalized_name)
+        taken = set(
+            self.shop.products
+                .filter(normalized_name__in=[data['normalized_name'] for _, data in batch])
+                .values_list('normalized_name', flat=True)
+        )
+        rows = [(number, data) for number, data in batch if data['normalized_name'] not in taken]
+        if rows:
+            try:
+                self._write([data for _, data in rows])
+                self.created += len(rows)
+            except IntegrityError as e:
+                if not Product.is_duplicate_name(e):
+                    raise
+                # a name was taken by a concurrent write since the probe
+                if retry:
+                    return self._flush(batch, retry=False)
+                # or names only differ in what the collation of the unique
+                # index ignores, e.g. case and accents on MySQL
+                self._write_each(rows)
+        for number, data in batch:
+            if data['normalized_name'] in taken:
+                self._report(number, {'name': [DUPLICATE_NAME_ERROR]})
+
+    def _write_each(self, rows):
+        """
+        Insert the (row number, data) pairs one at a time, each in its
+        own transaction, and report the names the database refuses.
+        """
+        for number, data in rows:
+            try:
+                self._write([data])
+            except IntegrityError as e:
+                if not Product.is_duplicate_name(e):
+                    raise
+                self._report(number, {'name': [DUPLICATE_NAME_ERROR]})
+            else:
+                self.created += 1
+
+    def _report(self, number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': number, 'errors': errors})
+
+    def run(self, rows):
+        """
+        Import the (row number, row) pairs and return the report.
+        """
+        self._load()
+        batch = []
+        for number, row in rows:
+            data, errors = self.clean_row(row)
+            if errors:
+                self._report(number, errors)
+                continue
+            # names must also be unique within the file
+            self._names.add(data['normalized_name'])
+            batch.append((number, data))
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        if batch:
+            self._flush(batch)
+
+        if self.created:
+            invalidate_shop(self.shop.id)
+        return self.get_report()
+
+    def import_file(self, file, fmt):
+        """
+        Import products from a binary file in the given format.
+        """
+        return self.run(self.read_rows(file, fmt))
+
+    def get_report(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': sorted(self.errors, key=lambda e: e['row'])
+        }
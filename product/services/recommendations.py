@@ -0,0 +1,203 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Sum
+from django.utils.timezone import now
+
+from common.utils.db import upsert_options
+from order.models import OrderItem, OrderStatus
+from product.models import CategoryRanking, ProductFeed
+from user.models import UserProfile
+
+User = get_user_model()
+
+# sales counted in the category rankings
+RANKING_WINDOW = timedelta(days=30)
+RANKING_SIZE = 50
+FEED_SIZE = 100
+
+
+def merge_rankings(rankings, exclude=(), size=FEED_SIZE):
+    """
+    Merge ranked product id lists, taking the best remaining product of
+    each list in turn, so every list is represented near the top.
+    """
+    exclude = set(exclude)
+    merged = {}
+    iterators = [iter(ranking) for ranking in rankings]
+    while iterators and len(merged) < size:
+        remaining = []
+        for it in iterators:
+            for product_id in it:
+                if product_id not in merged and product_id not in exclude:
+                    merged[product_id] = None
+                    remaining.append(it)
+                    break
+            if len(merged) >= size:
+                break
+        iterators = remaining
+    return list(merged)
+
+
+class RecommendationService:
+    """
+    Service to precompute product recommendations.
+
+    Each category is ranked by the units sold in the last RANKING_WINDOW
+    and keeps its RANKING_SIZE best selling products. The feed of a
+    customer merges the rankings of their preferred categories, then of
+    the categories they ordered from most, leaving out what they already
+    ordered. Rankings and feeds are stored as lists of product ids, so
+    serving them is a primary key lookup.
+    """
+
+    def __init__(self, window=RANKING_WINDOW, ranking_size=RANKING_SIZE,
+                 feed_size=FEED_SIZE, batch_size=500):
+        self.window = window
+        self.ranking_size = ranking_size
+        self.feed_size = feed_size
+        self.batch_size = batch_size
+
+    # -------------------------------------------------------------------------
+    # CATEGORY RANKINGS
+    # -------------------------------------------------------------------------
+
+    def rank_categories(self):
+        """
+        Return {category id: [product ids, best selling first]}.
+        """
+        rows = (
+            OrderItem.objects
+                .filter(
+                    created_at__gte=now() - self.window,
+                    product__is_active=True,
+                    product__categories__isnull=False
+                )
+                .exclude(order__status=OrderStatus.CANCELLED)
+                .values_list('product__categories', 'product_id')
+                .annotate(units=Sum('quantity'))
+                .order_by('product__categories', '-units', 'product_id')
+        )
+        rankings = defaultdict(list)
+        for category_id, product_id, _ in rows.iterator(chunk_size=self.batch_size):
+            if len(rankings[category_id]) < self.ranking_size:
+                rankings[category_id].append(product_id.hex)
+        return rankings
+
+    @transaction.atomic
+    def save_rankings(self, rankings):
+        CategoryRanking.objects.exclude(category_id__in=list(rankings)).delete()
+        CategoryRanking.objects.bulk_create(
+            [
+                CategoryRanking(category_id=category_id, product_ids=product_ids)
+                for category_id, product_ids in rankings.items()
+            ],
+            batch_size=self.batch_size,
+            **upsert_options(CategoryRanking, ['category'], ['product_ids', 'updated_at'])
+        )
+
+    # -------------------------------------------------------------------------
+    # CUSTOMER FEEDS
+    # -------------------------------------------------------------------------
+
+    def build_feeds(self, user_ids, rankings):
+        """
+        Return {user id: [product ids]} for the given customers.
+        Customers with neither preferred categories nor orders get no feed.
+        """
+        preferred = defaultdict(list)
+        rows = (
+            UserProfile.preferred_categories.through.objects
+                .filter(userprofile__user_id__in=user_ids)
+                .values_list('userprofile__user_id', 'category_id')
+                .order_by('id')
+        )
+        for user_id, category_id in rows:
+            preferred[user_id].append(category_id)
+
+        ordered = defaultdict(set)
+        ordered_categories = defaultdict(Counter)
+        rows = (
+            OrderItem.objects
+                .filter(order__group__user_id__in=user_ids, product__isnull=False)
+                .values_list('order__group__user_id', 'product_id', 'product__categories')
+        )
+        for user_id, product_id, category_id in rows:
+            ordered[user_id].add(product_id.hex)
+            if category_id is not None:
+                ordered_categories[user_id][category_id] += 1
+
+        feeds = {}
+        for user_id in user_ids:
+            category_ids = list(preferred[user_id])
+            category_ids += [
+                category_id
+                for category_id, _ in ordered_categories[user_id].most_common()
+                if category_id not in category_ids
+            ]
+            if not category_ids:
+                continue
+            feeds[user_id] = merge_rankings(
+                [rankings.get(category_id, []) for category_id in category_ids],
+                exclude=ordered[user_id],
+                size=self.feed_size
+            )
+        return feeds
+
+    @transaction.atomic
+    def save_feeds(self, user_ids, feeds):
+        ProductFeed.objects.filter(user_id__in=user_ids).exclude(user_id__in=list(feeds)).delete()
+        ProductFeed.objects.bulk_create(
+            [ProductFeed(user_id=user_id, product_ids=product_ids) for user_id, product_ids in feeds.items()],
+            **upsert_options(ProductFeed, ['user'], ['product_ids', 'updated_at'])
+        )
+
+    def refresh_feeds(self, rankings):
+        """
+        Rebuild the feeds of all customers, a batch of customers at a time.
+        Returns the number of feeds saved.
+        """
+        customers = User.objects.filter(is_customer=True).order_by('id')
+        saved = 0
+        last_id = None
+        while True:
+            batch = customers if last_id is None else customers.filter(id__gt=last_id)
+            user_ids = list(batch.values_list('id', flat=True)[:self.batch_size])
+            if not user_ids:
+                break
+            feeds = self.build_feeds(user_ids, rankings)
+            self.save_feeds(user_ids, feeds)
+            saved += len(feeds)
+            last_id = user_ids[-1]
+        return saved
+
+    def run(self):
+        """
+        Rebuild the category rankings, then the customer feeds.
+        """
+        rankings = self.rank_categories()
+        self.save_rankings(rankings)
+        feeds = self.refresh_feeds(rankings)
+        return {'categories': len(rankings), 'feeds': feeds}
+
+    # -------------------------------------------------------------------------
+    # READING
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def get_feed(cls, user, size=FEED_SIZE):
+        """
+        Return the recommended product ids of a user, best first.
+        Users without a feed get the best sellers of every category,
+        largest categories first.
+        """
+        feed = ProductFeed.objects.filter(user=user).values_list('product_ids', flat=True).first()
+        if feed is not None:
+            return feed
+        rankings = (
+            CategoryRanking.objects
+                .order_by('-category__product_count', 'category__name')
+                .values_list('product_ids', flat=True)
+        )
+        return merge_rankings(list(rankings), size=size)
@@ -0,0 +1,177 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import ExpressionWrapper, F, IntegerField, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils.timezone import localdate, localtime, now
+
+from common.utils.db import upsert_options
+from order.models import OrderItem
+from product.models import ProductSales, RollupWatermark
+
+# order items created this recently may still be committed with an
+# earlier created_at than items already rolled up, so they are left
+# to the next run
+SETTLE_DELAY = timedelta(minutes=5)
+RANKING_SIZE = 50
+# windows the rankings can be computed over, in days
+RANKING_WINDOWS = (7, 30)
+# trending compares the daily sales of the last TRENDING_DAYS
+# with the daily sales of the rest of the window
+TRENDING_DAYS = 2
+
+
+class SalesRollupService:
+    """
+    Service to roll up the units ordered per product and day, and to
+    rank products from the rollups.
+
+    Each run reads only the order items created since the watermark
+    left by the previous run, in (created_at, id) order, and adds their
+    quantities to the daily totals in the transaction that moves the
+    watermark, so every order item is counted exactly once. Units are
+    counted when ordered, later cancellations are not taken back.
+    """
+    WATERMARK = 'product-sales'
+
+    def __init__(self, batch_size=1000, settle_delay=SETTLE_DELAY):
+        self.batch_size = batch_size
+        self.settle_delay = settle_delay
+
+    # -------------------------------------------------------------------------
+    # ROLLUP
+    # -------------------------------------------------------------------------
+
+    def _lock_watermark(self):
+        RollupWatermark.objects.get_or_create(name=self.WATERMARK)
+        return RollupWatermark.objects.select_for_update().get(name=self.WATERMARK)
+
+    def _pending_items(self, watermark, until):
+        """
+        Return the next batch of order items to roll up, as
+        (id, created_at, product id, shop id, quantity) tuples.
+        """
+        items = OrderItem.objects.filter(created_at__lt=until)
+        if watermark.position_at is not None:
+            items = items.filter(
+                Q(created_at__gt=watermark.position_at)
+                | Q(created_at=watermark.position_at, id__gt=watermark.position_id)
+            )
+        return list(
+            items
+                .order_by('created_at', 'id')
+                .values_list('id', 'created_at', 'product_id', 'product__shop_id', 'quantity')
+                [:self.batch_size]
+        )
+
+    def _add(self, items):
+        """
+        Add the quantities of the order items to the daily totals.
+        """
+        totals = defaultdict(int)
+        shops = {}
+        for _, created_at, product_id, shop_id, quantity in items:
+            # items of deleted products are skipped
+            if product_id is None:
+                continue
+            totals[(product_id, localtime(created_at).date())] += quantity
+            shops[product_id] = shop_id
+        if not totals:
+            return
+        existing = (
+            ProductSales.objects
+                .filter(
+                    product_id__in={product_id for product_id, _ in totals},
+                    day__in={day for _, day in totals}
+                )
+                .values_list('product_id', 'day', 'units')
+        )
+        for product_id, day, units in existing:
+            if (product_id, day) in totals:
+                totals[(product_id, day)] += units
+        # runs are serialized by the watermark lock, so the totals
+        # read above cannot change before they are written
+        ProductSales.objects.bulk_create(
+            [
+                ProductSales(product_id=product_id, shop_id=shops[product_id], day=day, units=units)
+                for (product_id, day), units in totals.items()
+            ],
+            **upsert_options(ProductSales, ['product', 'day'], ['units'])
+        )
+
+    def run(self):
+        """
+        Roll up the order items created since the last run, a batch at
+        a time. Returns the number of order items rolled up.
+        """
+        until = now() - self.settle_delay
+        count = 0
+        while True:
+            with transaction.atomic():
+                watermark = self._lock_watermark()
+                items = self._pending_items(watermark, until)
+                if not items:
+                    return count
+                self._add(items)
+                watermark.position_id, watermark.position_at = items[-1][:2]
+                watermark.save()
+            count += len(items)
+
+    # -------------------------------------------------------------------------
+    # RANKINGS
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _window_sales(days, shop=None):
+        """
+        Daily totals of the active products over the last `days` days,
+        today included.
+        """
+        sales = ProductSales.objects.filter(
+            day__gte=localdate() - timedelta(days=days - 1),
+            product__is_active=True
+        )
+        if shop is not None:
+            sales = sales.filter(shop=shop)
+        return sales
+
+    @classmethod
+    def bestsellers(cls, days=RANKING_WINDOWS[0], shop=None, size=RANKING_SIZE):
+        """
+        Return the ids of the products with the most units ordered in
+        the last `days` days, best first.
+        """
+        return list(
+            cls._window_sales(days, shop)
+                .values('product_id')
+                .annotate(total=Sum('units'))
+                .order_by('-total', 'product_id')
+                .values_list('product_id', flat=True)[:size]
+        )
+
+    @classmethod
+    def trending(cls, days=RANKING_WINDOWS[0], shop=None, size=RANKING_SIZE,
+                 recent_days=TRENDING_DAYS):
+        """
+        Return the ids of the products whose daily sales of the last
+        `recent_days` days grew the most over their daily sales in the
+        rest of the last `days` days, fastest growing first.
+        """
+        recent_start = localdate() - timedelta(days=recent_days - 1)
+        earlier_days = days - recent_days
+        return list(
+            cls._window_sales(days, shop)
+                .values('product_id')
+                .annotate(
+                    recent=Coalesce(Sum('units', filter=Q(day__gte=recent_start)), 0),
+                    earlier=Coalesce(Sum('units', filter=Q(day__lt=recent_start)), 0)
+                )
+                # difference of the daily rates, scaled by both periods
+                .annotate(velocity=ExpressionWrapper(
+                    F('recent') * earlier_days - F('earlier') * recent_days,
+                    output_field=IntegerField()
+                ))
+                .filter(velocity__gt=0)
+                .order_by('-velocity', '-recent', 'product_id')
+                .values_list('product_id', flat=True)[:size]
+        )
@@ -0,0 +1,298 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils.timezone import now
+
+from common.utils.cache import invalidate_products
+from e_core import logger
+from product.models import (
+    CatalogEntry,
+    Inventory,
+    InventoryMovement,
+    InventoryShard,
+    LowStockAlert,
+    MovementReason,
+    ReservationStatus,
+    StockReservation
+)
+from product.utils.stock_cache import refresh_stocks
+
+# how long checkout holds stock for an order that is not paid yet
+RESERVATION_TTL = timedelta(minutes=15)
+
+
+class StockReservationService:
+    """
+    Service to hold stock for orders until they are paid.
+
+    A hold moves stock from available to reserved with one conditional
+    UPDATE, in a transaction of its own, so inventory rows are locked
+    for a single statement instead of for the whole order build.
+    Converting a hold takes the stock out of the inventory when the
+    order is paid; releasing it, when it expires or the order is
+    cancelled, makes the stock available again. Both are applied in
+    bulk, one UPDATE for all the inventories concerned.
+
+    The stock of sharded inventories is held on one of their shards,
+    picked at random, so concurrent checkouts of the same product
+    update different rows. The catalog, caches and alerts are refreshed
+    once the hold commits, so no hold waits on the catalog entry of
+    the product or reads the shards of other holds.
+    """
+
+    @staticmethod
+    def _totals(rows):
+        """
+        Sum the quantities of (inventory id, quantity) pairs per inventory.
+        """
+        totals = defaultdict(int)
+        for inventory_id, quantity in rows:
+            totals[inventory_id] += quantity
+        return totals
+
+    @staticmethod
+    def _by_id(totals):
+        return Case(
+            *[When(id=row_id, then=Value(quantity)) for row_id, quantity in totals.items()]
+        )
+
+    @classmethod
+    def _apply(cls, reservations, stock=0, reserved=0):
+        """
+        Add the quantities of the reservations, times the given signs,
+        to the stock and reserved stock of their inventories or shards,
+        with one UPDATE per table.
+        """
+        inventories = cls._totals((r.inventory_id, r.quantity) for r in reservations if r.shard_id is None)
+        shards = cls._totals((r.shard_id, r.quantity) for r in reservations if r.shard_id is not None)
+        for model, totals, stock_field in (
+            (Inventory, inventories, '_stock'),
+            (InventoryShard, shards, 'stock'),
+        ):
+            if not totals:
+                continue
+            quantities = cls._by_id(totals)
+            changes = {
+                field: F(field) + quantities * sign
+                for field, sign in ((stock_field, stock), ('reserved', reserved)) if sign
+            }
+            if model is Inventory:
+                changes['updated_at'] = now()
+            model.objects.filter(id__in=list(totals)).update(**changes)
+
+    @staticmethod
+    def _take(inventory_id, quantity, sharded):
+        """
+        Take available stock out of an inventory or its shards.
+        Returns whether there was enough.
+        """
+        if sharded:
+            return InventoryShard.allocate(inventory_id, quantity, take=True) is not None
+        return bool(
+            Inventory.objects
+                .filter(id=inventory_id, _stock__gte=F('reserved') + quantity)
+                .update(_stock=F('_stock') - quantity, updated_at=now())
+        )
+
+    @staticmethod
+    def _sync(inventory_ids):
+        """
+        Refresh the catalog entries, cached payloads, cached stock and low
+        stock alerts of the products whose available stock changed.
+        """
+        rows = list(
+            Inventory.objects
+                .filter(id__in=inventory_ids)
+                .values_list('id', 'product_id', 'product__shop_id', 'reorder_threshold')
+        )
+        CatalogEntry.sync_stock(product_id for _, product_id, _, _ in rows)
+        invalidate_products((product_id, shop_id) for _, product_id, shop_id, _ in rows)
+        refresh_stocks(product_id for _, product_id, _, _ in rows)
+        LowStockAlert.detect(
+            inventory_id for inventory_id, _, _, threshold in rows if threshold is not None)
+
+    # -------------------------------------------------------------------------
+    # HOLD
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def hold(cls, lines, ttl=RESERVATION_TTL):
+        """
+        Reserve stock for the (inventory id, order id, quantity) lines,
+        all or nothing. Returns the ids of the inventories without
+        enough available stock, empty if the stock was reserved.
+        """
+        lines = list(lines)
+        sharded = set(
+            Inventory.objects
+                .filter(id__in={inventory_id for inventory_id, _, _ in lines}, shard_count__gt=0)
+                .values_list('id', flat=True)
+        )
+        totals = cls._totals(
+            (inventory_id, quantity) for inventory_id, _, quantity in lines
+            if inventory_id not in sharded
+        )
+        enough = Q()
+        for inventory_id, quantity in totals.items():
+            enough |= Q(id=inventory_id, _stock__gte=F('reserved') + quantity)
+
+        short = False
+        failed = []
+        with transaction.atomic():
+            if totals:
+                held = (
+                    Inventory.objects
+                        .filter(enough)
+                        .update(reserved=F('reserved') + cls._by_id(totals), updated_at=now())
+                )
+                short = held < len(totals)
+
+            expires_at = now() + ttl
+            reservations = []
+            for inventory_id, order_id, quantity in ([] if short else lines):
+                parts = [(None, quantity)]
+                if inventory_id in sharded:
+                    parts = InventoryShard.allocate(inventory_id, quantity)
+                    if parts is None:
+                        failed.append(inventory_id)
+                        continue
+                reservations.extend(
+                    StockReservation(
+                        inventory_id=inventory_id,
+                        shard_id=shard_id,
+                        order_id=order_id,
+                        quantity=part,
+                        expires_at=expires_at
+                    )
+                    for shard_id, part in parts
+                )
+
+            if short or failed:
+                transaction.set_rollback(True)
+            else:
+                StockReservation.objects.bulk_create(reservations)
+                inventory_ids = {inventory_id for inventory_id, _, _ in lines}
+                transaction.on_commit(lambda: cls._sync(inventory_ids))
+                return []
+
+        if short:
+            failed.extend(
+                inventory_id
+                for inventory_id, stock, reserved in (
+                    Inventory.objects
+                        .filter(id__in=list(totals))
+                        .values_list('id', '_stock', 'reserved')
+                )
+                if stock - reserved < totals[inventory_id]
+            )
+        return failed
+
+    # -------------------------------------------------------------------------
+    # CONVERT
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    @transaction.atomic
+    def convert(cls, order_ids):
+        """
+        Take the reserved stock of the paid orders out of the inventories.
+        Orders whose hold expired before payment get the stock if it is
+        still available. Returns the number of reservations converted.
+        """
+        reservations = list(
+            StockReservation.objects
+                .select_for_update()
+                .filter(
+                    order_id__in=order_ids,
+                    status__in=[ReservationStatus.HELD, ReservationStatus.RELEASED]
+                )
+                .order_by('id')
+        )
+        held = [r for r in reservations if r.status == ReservationStatus.HELD]
+        converted = list(held)
+        cls._apply(held, stock=-1, reserved=-1)
+
+        expired = [r for r in reservations if r.status == ReservationStatus.RELEASED]
+        sharded = set()
+        if expired:
+            sharded = set(
+                Inventory.objects
+                    .filter(id__in={r.inventory_id for r in expired}, shard_count__gt=0)
+                    .values_list('id', flat=True)
+            )
+        for reservation in expired:
+            if cls._take(reservation.inventory_id, reservation.quantity, reservation.inventory_id in sharded):
+                converted.append(reservation)
+            else:
+                logger.error(
+                    f"Not enough stock left in inventory {reservation.inventory_id} "
+                    f"for order {reservation.order_id} paid after its reservation expired."
+                )
+
+        if not converted:
+            return 0
+        (StockReservation.objects
+            .filter(id__in=[r.id for r in converted])
+            .update(status=ReservationStatus.CONVERTED))
+        InventoryMovement.record(
+            (r.inventory_id, -r.quantity, MovementReason.CHECKOUT, r.order_id, None)
+            for r in converted
+        )
+        cls._sync({r.inventory_id for r in converted})
+        return len(converted)
+
+    # -------------------------------------------------------------------------
+    # RELEASE
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def _release(cls, reservations):
+        """
+        Make the stock of the given held reservations available again.
+        """
+        if not reservations:
+            return
+        cls._apply(reservations, reserved=-1)
+        (StockReservation.objects
+            .filter(id__in=[r.id for r in reservations])
+            .update(status=ReservationStatus.RELEASED))
+        cls._sync({r.inventory_id for r in reservations})
+
+    @classmethod
+    @transaction.atomic
+    def release_orders(cls, order_ids):
+        """
+        Release the holds of cancelled or failed orders. Returns the
+        (order id, inventory id) pairs whose stock was never taken out,
+        so it must not be restocked.
+        """
+        reservations = list(
+            StockReservation.objects
+                .select_for_update()
+                .filter(order_id__in=order_ids)
+                .exclude(status=ReservationStatus.CONVERTED)
+                .order_by('id')
+        )
+        cls._release([r for r in reservations if r.status == ReservationStatus.HELD])
+        return {(r.order_id, r.inventory_id) for r in reservations}
+
+    @classmethod
+    def release_expired(cls, batch_size=1000):
+        """
+        Release the expired holds, a batch at a time.
+        Returns the number of reservations released.
+        """
+        count = 0
+        while True:
+            with transaction.atomic():
+                expired = list(
+                    StockReservation.objects
+                        .select_for_update()
+                        .filter(status=ReservationStatus.HELD, expires_at__lte=now())
+                        .order_by('id')[:batch_size]
+                )
+                cls._release(expired)
+            count += len(expired)
+            if len(expired) < batch_size:
+                return count
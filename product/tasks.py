@@ -0,0 +1,94 @@
+from celery import shared_task
+from PIL import UnidentifiedImageError
+
+from e_core import logger
+from product.models import ImageStatus, ProductImage
+from product.services import (
+    InventoryLedgerService,
+    LowStockDigestService,
+    RecommendationService,
+    SalesRollupService,
+    StockReservationService
+)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def process_product_image(self, image_id):
+    """
+    Resize an uploaded product image and mark it ready.
+    """
+    image = (ProductImage.objects
+        .select_related('product__shop')
+        .filter(id=image_id)
+        .first())
+    if not image:
+        logger.info(f"Product image {image_id} was deleted before processing.")
+        return
+    if image.status == ImageStatus.READY:
+        return
+
+    image.mark(ImageStatus.PROCESSING)
+    try:
+        image.process()
+    except (FileNotFoundError, UnidentifiedImageError) as e:
+        logger.error(f"Could not process product image {image_id}: {str(e)}")
+        image.mark(ImageStatus.FAILED)
+    except OSError as e:
+        # Pillow raises OSError subclasses for unreadable images
+        if self.request.retries >= self.max_retries:
+            logger.error(f"Could not process product image {image_id}: {str(e)}")
+            image.mark(ImageStatus.FAILED)
+            return
+        raise self.retry(exc=e)
+    except Exception as e:
+        # anything else would leave the image processing, on the placeholder, for good
+        logger.error(f"Could not process product image {image_id}: {str(e)}")
+        image.mark(ImageStatus.FAILED)
+        raise
+    return f"Product image {image_id} processed."
+
+
+@shared_task
+def refresh_recommendations():
+    """
+    Rebuild the category rankings and the customer product feeds.
+    """
+    result = RecommendationService().run()
+    return f"Ranked {result['categories']} categories, refreshed {result['feeds']} feeds."
+
+
+@shared_task
+def rollup_product_sales():
+    """
+    Roll up the order items created since the last run into the
+    daily product sales.
+    """
+    count = SalesRollupService().run()
+    return f"Rolled up {count} order items."
+
+
+@shared_task
+def compact_inventory_movements():
+    """
+    Fold the inventory movements older than the retention into snapshots.
+    """
+    count = InventoryLedgerService().compact()
+    return f"Compacted {count} inventory movements."
+
+
+@shared_task
+def release_expired_stock_reservations():
+    """
+    Make the stock held by expired checkout reservations available again.
+    """
+    count = StockReservationService.release_expired()
+    return f"Released {count} expired stock reservations."
+
+
+@shared_task
+def send_low_stock_digests():
+    """
+    Send each shop the digest of its products that ran low since the last one.
+    """
+    count = LowStockDigestService().send()
+    return f"Sent {count} low stock digests."
@@ -4,6 +4,7 @@ from io import BytesIO
 from PIL import Image
 from uuid import uuid4
 
+import os
 import pytest
 import shutil
 
@@ -16,7 +17,8 @@ def create_fake_images(n):
     """
     images = []
     for _ in range(n):
-        img = Image.new("RGB", (10, 10), color="white")
+        # random pixels, identical uploads would share their files
+        img = Image.frombytes("RGB", (10, 10), os.urandom(300))
         buffer = BytesIO()
         img.save(buffer, format="jpeg")
         buffer.seek(0)
@@ -100,10 +102,13 @@ def product_image_factory(db, test_media_dir):
     """
     
     def create_product_image(product):
-        return ProductImage.objects.create(
+        image = ProductImage.objects.create(
             product=product,
             image=create_fake_images(1)[0]
         )
+        # as done by the background worker
+        image.process()
+        return image
     return create_product_image
 
 @pytest.fixture
@@ -0,0 +1,244 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.templatetags.static import static
+from django.urls import reverse
+from rest_framework import status
+
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+
+from common.utils.db import upsert_options
+from product.models import CatalogEntry, ImageStatus, Inventory, Product
+from .fixtures import create_fake_images
+
+
+PRODUCTS_LIST_URL = reverse('product-list')
+
+
+@pytest.fixture
+def listed_product(product, category_factory):
+    """
+    A product in two categories.
+    """
+    product.add_categories([category_factory(name="Shoes").slug, category_factory(name="Bags").slug])
+    return product
+
+
+# =============================================================================
+# TEST CATALOG ENTRY SYNC
+# =============================================================================
+
+def test_catalog_entry_follows_product(listed_product):
+    """
+    Test that the entry of a product lists its shop, stock and categories.
+    """
+    entry = CatalogEntry.objects.get(product=listed_product)
+
+    assert entry.name == listed_product.name
+    assert entry.shop_name == listed_product.shop.name
+    assert entry.stock == 0
+    assert [c['slug'] for c in entry.categories] == ["bags", "shoes"]
+    assert entry.image_url == ''
+
+    listed_product.price = Decimal('12.50')
+    listed_product.save(update_fields=['price'])
+    listed_product.remove_categories(["shoes"])
+
+    entry.refresh_from_db()
+    assert entry.price == Decimal('12.50')
+    assert [c['slug'] for c in entry.categories] == ["bags"]
+
+
+def test_catalog_entry_follows_stock(product):
+    """
+    Test that stock changes are copied to the entry.
+    """
+    product.inventory.add(10)
+    product.inventory.subtract(3)
+
+    assert CatalogEntry.objects.get(product=product).stock == 7
+
+
+def test_catalog_entry_follows_images(product, product_image_factory):
+    """
+    Test that the entry lists the first ready image of the product.
+    """
+    image = product_image_factory(product=product)
+    entry = CatalogEntry.objects.get(product=product)
+    assert entry.image_id == image.id
+    assert entry.image_url == image.image.url
+
+    image.mark(ImageStatus.FAILED)
+    assert CatalogEntry.objects.get(product=product).image_url == static(settings.PRODUCT_IMAGE_PLACEHOLDER)
+
+    product.delete_images()
+    entry = CatalogEntry.objects.get(product=product)
+    assert entry.image_id is None
+    assert entry.image_url == ''
+
+
+def test_catalog_entry_follows_category_and_shop_renames(listed_product):
+    """
+    Test that renaming a category or a shop updates the entries listing it.
+    """
+    category = listed_product.categories.get(slug="shoes")
+    category.name = "Sneakers"
+    category.save()
+    shop = listed_product.shop
+    shop.name = "Renamed shop"
+    shop.save()
+
+    entry = CatalogEntry.objects.get(product=listed_product)
+    assert [c['slug'] for c in entry.categories] == ["bags", "sneakers"]
+    assert entry.shop_name == "Renamed shop"
+
+    category.delete()
+    entry.refresh_from_db()
+    assert [c['slug'] for c in entry.categories] == ["bags"]
+
+
+def test_catalog_entry_removed_with_product(shopowner, product_factory):
+    """
+    Test that deactivated and deleted products are not listed.
+    """
+    products = [product_factory(shop=shopowner.owned_shop) for _ in range(3)]
+
+    products[0].deactivate()
+    Product.objects.filter(id=products[1].id).deactivate()
+    products[2].delete()
+
+    assert not CatalogEntry.objects.exists()
+
+
+def test_catalog_entry_refreshed_on_commit(product, django_capture_on_commit_callbacks):
+    """
+    Test that entries are refreshed again once the transaction commits.
+    """
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            product.inventory.add(4)
+            assert CatalogEntry.objects.get(product=product).stock == 4
+            # a write the entry was not built from
+            Inventory.objects.filter(product=product).update(_stock=9)
+
+    assert CatalogEntry.objects.get(product=product).stock == 9
+
+
+def test_save_entries_replaces_existing_entries(product, shopowner, product_factory):
+    """
+    Test that saving entries updates the entries already stored and
+    inserts the others, on the database the tests run on.
+    """
+    other = product_factory(shop=shopowner.owned_shop)
+    CatalogEntry.objects.filter(product=other).delete()
+    entries = CatalogEntry.build([product.id, other.id])
+    for entry in entries:
+        entry.name = "Upserted"
+
+    CatalogEntry.save_entries(entries)
+
+    assert CatalogEntry.objects.count() == 2
+    assert set(CatalogEntry.objects.values_list('name', flat=True)) == {"Upserted"}
+
+
+def test_upsert_options_name_the_target_only_when_supported():
+    """
+    Test that the conflict target is left out on backends like MySQL,
+    which update on any unique key.
+    """
+    features = connection.features
+    with patch.object(features, 'supports_update_conflicts_with_target', False):
+        options = upsert_options(CatalogEntry, ['product'], ['name'])
+    assert options == {'update_conflicts': True, 'update_fields': ['name']}
+
+    with patch.object(features, 'supports_update_conflicts_with_target', True):
+        options = upsert_options(CatalogEntry, ['product'], ['name'])
+    assert options['unique_fields'] == ['product']
+
+
+# =============================================================================
+# TEST CATALOG REBUILD
+# =============================================================================
+
+def test_rebuild_catalog_command(shopowner, product_factory, category):
+    """
+    Test that the rebuild command regenerates the entries of active products.
+    """
+    products = [product_factory(shop=shopowner.owned_shop) for _ in range(3)]
+    products[0].add_categories([category.slug])
+    products[1].inventory.add(5)
+    Product.objects.filter(id=products[2].id).update(is_active=False)
+    expected = {
+        entry.product_id: (entry.stock, entry.categories)
+        for entry in CatalogEntry.objects.filter(product__is_active=True)
+    }
+    CatalogEntry.objects.filter(product=products[0]).delete()
+    CatalogEntry.objects.filter(product=products[1]).update(stock=0)
+    out = StringIO()
+
+    call_command('rebuild_catalog', '--batch-size', '1', stdout=out)
+
+    assert "Catalog rebuilt with 2 entries." in out.getvalue()
+    assert {
+        entry.product_id: (entry.stock, entry.categories)
+        for entry in CatalogEntry.objects.all()
+    } == expected
+
+
+# =============================================================================
+# TEST CATALOG READS
+# =============================================================================
+
+def test_product_list_reads_catalog_entries(client, customer, listed_product, product_image_factory,
+                                            django_assert_max_num_queries):
+    """
+    Test that the product list is served from the catalog entries only.
+    """
+    image = product_image_factory(product=listed_product)
+    CatalogEntry.objects.filter(product=listed_product).update(name="Listed name")
+    client.force_authenticate(user=customer)
+
+    # count and page
+    with django_assert_max_num_queries(2):
+        res = client.get(PRODUCTS_LIST_URL)
+
+    assert res.status_code == status.HTTP_200_OK
+    result = res.data['data']['results'][0]
+    assert result['name'] == "Listed name"
+    assert result['id'] == str(listed_product.id)
+    assert result['shop'] == {'id': str(listed_product.shop_id), 'name': listed_product.shop.name}
+    assert result['images'] == [{'id': str(image.id), 'url': f"http://testserver{image.image.url}"}]
+    assert len(result['categories']) == 2
+
+
+def test_product_list_lists_uploads_already_stored(client, customer, shopowner, product_factory):
+    """
+    Test that an upload whose bytes are already stored is listed at once
+    for every product it is uploaded to.
+    """
+    first = product_factory(shop=shopowner.owned_shop)
+    second = product_factory(shop=shopowner.owned_shop)
+    upload = create_fake_images(1)[0]
+    client.force_authenticate(user=shopowner)
+    for product in (first, second):
+        upload.seek(0)
+        url = reverse('product-image-list-create', kwargs={'product_id': product.id})
+        res = client.post(url, {'images': [upload]}, format='multipart')
+        assert res.status_code == status.HTTP_201_CREATED
+        # as done by the background worker, the second upload is stored already
+        for image in product.images.filter(status=ImageStatus.PENDING):
+            image.process()
+
+    client.force_authenticate(user=customer)
+    res = client.get(PRODUCTS_LIST_URL)
+
+    assert res.status_code == status.HTTP_200_OK
+    images = {result['id']: result['images'] for result in res.data['data']['results']}
+    image = second.images.get()
+    assert image.image.name == first.images.get().image.name
+    assert images[str(second.id)] == [{'id': str(image.id), 'url': f"http://testserver{image.image.url}"}]
+    assert images[str(first.id)][0]['url'] == images[str(second.id)][0]['url']
@@ -0,0 +1,175 @@
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+import uuid
+
+from product.models import Category, CategoryFacetCount
+
+
+CATEGORIES_URL = reverse('category-list-create')
+PRODUCTS_LIST_URL = reverse('product-list')
+
+
+def facet_count(category, shop):
+    facet = CategoryFacetCount.objects.filter(category=category, shop=shop).first()
+    return facet.product_count if facet else 0
+
+
+def global_count(category):
+    return Category.objects.get(id=category.id).product_count
+
+
+# =============================================================================
+# TEST FACET COUNT UPDATES
+# =============================================================================
+
+def test_facet_counts_follow_category_changes(shopowner_factory, product_factory, category):
+    """
+    Test that adding and removing categories updates the facet counts.
+    """
+    shop1 = shopowner_factory().owned_shop
+    shop2 = shopowner_factory().owned_shop
+    p1 = product_factory(shop=shop1)
+    p2 = product_factory(shop=shop1)
+    p3 = product_factory(shop=shop2)
+
+    for p in (p1, p2, p3):
+        p.add_categories([category.name])
+
+    assert global_count(category) == 3
+    assert facet_count(category, shop1) == 2
+    assert facet_count(category, shop2) == 1
+
+    p1.remove_categories([category.name])
+    # removing a category the product is not in changes nothing
+    p1.remove_categories([category.name])
+
+    assert global_count(category) == 2
+    assert facet_count(category, shop1) == 1
+
+
+def test_facet_counts_follow_deactivate_and_delete(shopowner, product_factory, category):
+    """
+    Test that deactivated and deleted products are not counted.
+    """
+    shop = shopowner.owned_shop
+    p1 = product_factory(shop=shop)
+    p2 = product_factory(shop=shop)
+    p1.add_categories([category.name])
+    p2.add_categories([category.name])
+
+    p1.deactivate()
+    assert global_count(category) == 1
+    assert facet_count(category, shop) == 1
+
+    # an inactive product was already removed from the counts
+    p1.delete()
+    assert global_count(category) == 1
+
+    p2.delete()
+    assert global_count(category) == 0
+    assert facet_count(category, shop) == 0
+
+
+def test_facet_counts_follow_shop_delete(shopowner, product_factory, category):
+    """
+    Test that products deleted with their shop are not counted.
+    """
+    shop = shopowner.owned_shop
+    product_factory(shop=shop).add_categories([category.name])
+    assert global_count(category) == 1
+
+    shop.delete()
+    assert global_count(category) == 0
+
+
+def test_rebuild_category_facets_command(shopowner, product_factory, category):
+    """
+    Test that rebuild_category_facets recomputes drifted counts.
+    """
+    shop = shopowner.owned_shop
+    for _ in range(2):
+        product_factory(shop=shop).add_categories([category.name])
+    Category.objects.update(product_count=10)
+    CategoryFacetCount.objects.all().delete()
+
+    call_command('rebuild_category_facets')
+
+    assert global_count(category) == 2
+    assert facet_count(category, shop) == 2
+
+
+# =============================================================================
+# TEST FACET COUNTS IN LISTINGS
+# =============================================================================
+
+def test_get_categories_with_product_count(client, customer, shopowner, product_factory, category):
+    """
+    Test that categories are listed with their product counts.
+    """
+    product_factory(shop=shopowner.owned_shop).add_categories([category.name])
+    client.force_authenticate(user=customer)
+
+    res = client.get(CATEGORIES_URL)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res.data['data']['results'][0]['product_count'] == 1
+
+
+def test_get_shop_categories(client, customer, shopowner_factory, product_factory, category_factory):
+    """
+    Test listing the categories of a shop with the shop product counts.
+    """
+    shop1 = shopowner_factory().owned_shop
+    shop2 = shopowner_factory().owned_shop
+    c1 = category_factory()
+    c2 = category_factory()
+    for _ in range(2):
+        product_factory(shop=shop1).add_categories([c1.name])
+    product_factory(shop=shop2).add_categories([c1.name, c2.name])
+
+    client.force_authenticate(user=customer)
+    res = client.get(CATEGORIES_URL, {'shop': shop1.id})
+
+    assert res.status_code == status.HTTP_200_OK
+    results = res.data['data']['results']
+    assert [(c['slug'], c['product_count']) for c in results] == [(c1.slug, 2)]
+
+
+def test_get_shop_categories_with_invalid_shop(client, customer):
+    """
+    Test listing the categories of an invalid or non-existent shop.
+    """
+    client.force_authenticate(user=customer)
+
+    res = client.get(CATEGORIES_URL, {'shop': 'invalid'})
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    assert res.data['code'] == 'invalid_uuid'
+
+    res = client.get(CATEGORIES_URL, {'shop': uuid.uuid4()})
+    assert res.status_code == status.HTTP_404_NOT_FOUND
+    assert res.data['code'] == 'not_found'
+
+
+def test_get_products_with_facets(client, customer, shopowner, product_factory, category_factory):
+    """
+    Test that product listings include facet counts when requested.
+    """
+    shop = shopowner.owned_shop
+    category = category_factory()
+    category_factory()  # category with no products
+    product_factory(shop=shop).add_categories([category.name])
+    client.force_authenticate(user=customer)
+
+    res = client.get(PRODUCTS_LIST_URL)
+    assert 'facets' not in res.data['data']
+
+    res = client.get(PRODUCTS_LIST_URL, {'facets': 'true'})
+    assert res.status_code == status.HTTP_200_OK
+    assert [(c['slug'], c['product_count']) for c in res.data['data']['facets']] == [(category.slug, 1)]
+
+    url = reverse('shop-product-list-create', kwargs={'shop_id': shop.id})
+    res = client.get(url, {'facets': 'true'})
+    assert res.status_code == status.HTTP_200_OK
+    assert [(c['slug'], c['product_count']) for c in res.data['data']['facets']] == [(category.slug, 1)]
@@ -1,4 +1,6 @@
 from product.models import Category
+from product.utils import categories
+from product.utils.categories import CategoryRegistry, category_registry
 
 
 # =============================================================================
@@ -41,4 +43,96 @@ def test_category_save_slug(category):
     category.name = "Fashion & Apparel"
     category.save()
 
-    assert category.slug == "fashion-apparel", "Slug was not updated correctly after saving"
\ No newline at end of file
+    assert category.slug == "fashion-apparel", "Slug was not updated correctly after saving"
+
+# =============================================================================
+# TEST CATEGORY REGISTRY
+# =============================================================================
+
+def test_category_registry_resolves_without_queries(category, django_assert_num_queries):
+    """
+    Test that slugs are resolved from memory once the registry is loaded.
+    """
+    registry = CategoryRegistry()
+    assert registry.get_ids([category.name, "Unknown"]) == {category.slug: category.id}
+
+    with django_assert_num_queries(0):
+        assert registry.get_ids([category.slug]) == {category.slug: category.id}
+        assert registry.get_slugs([category.id]) == [category.slug]
+
+
+def test_category_registry_is_invalidated_on_change(category_factory):
+    """
+    Test that every registry reloads when categories are saved or deleted.
+    """
+    # two registries stand for two processes sharing the cache
+    registries = [CategoryRegistry(), CategoryRegistry()]
+    category = category_factory(name="Books")
+    for registry in registries:
+        assert registry.get_ids(["Books"]) == {'books': category.id}
+
+    category.name = "Novels"
+    category.save()
+    for registry in registries:
+        assert registry.get_ids(["Books", "Novels"]) == {'novels': category.id}
+
+    category.delete()
+    for registry in registries:
+        assert registry.get_ids(["Novels"]) == {}
+
+
+def test_local_category_registry_sees_other_workers(settings, monkeypatch, category_factory):
+    """
+    Test that without a shared cache, the registry finds categories
+    created by other workers and forgets deleted ones after a while.
+    """
+    settings.CACHE_SHARED = False
+    registry = CategoryRegistry()
+    books = category_factory(name="Books")
+    assert registry.get_ids(["Books"]) == {'books': books.id}
+
+    # changes made without bumping the version of this process
+    games = Category(name="Games", slug="games")
+    Category.objects.bulk_create([games])
+    Category.objects.filter(id=books.id).delete()
+
+    assert registry.get_ids(["Games"]) == {'games': games.id}
+    monkeypatch.setattr(categories, 'LOCAL_REGISTRY_TIMEOUT', 0)
+    assert registry.get_ids(["Books"]) == {}
+
+
+def test_local_category_registry_looks_up_unknown_slugs(settings, category_factory,
+                                                       django_assert_num_queries):
+    """
+    Test that without a shared cache, unknown slugs are looked up on
+    their own instead of reloading every category.
+    """
+    settings.CACHE_SHARED = False
+    registry = CategoryRegistry()
+    books = category_factory(name="Books")
+    registry.get_map()
+    games = Category(name="Games", slug="games")
+    Category.objects.bulk_create([games])
+
+    with django_assert_num_queries(1) as captured:
+        assert registry.get_ids(["Books", "Games", "Unknown"]) == {'books': books.id, 'games': games.id}
+    assert 'IN' in captured.captured_queries[0]['sql']
+
+    with django_assert_num_queries(0):
+        assert registry.get_slugs([games.id]) == ['games']
+
+
+def test_add_categories_in_fixed_number_of_queries(
+        product, category_factory, django_assert_num_queries):
+    """
+    Test that adding categories does not query the categories table.
+    """
+    categories = [category_factory() for _ in range(3)]
+    category_registry.get_map()
+
+    # existing links, insert, search index (4 with savepoints), catalog entry (4),
+    # facet counts (3)
+    with django_assert_num_queries(13):
+        product.add_categories([c.name for c in categories])
+
+    assert set(product.categories.values_list('id', flat=True)) == {c.id for c in categories}
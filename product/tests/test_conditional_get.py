@@ -0,0 +1,233 @@
+from django.urls import reverse
+from rest_framework import status
+
+import pytest
+
+from product.models import ProductImage
+from .fixtures import create_fake_images
+
+
+PRODUCTS_LIST_URL = reverse('product-list')
+CATEGORIES_URL = reverse('category-list-create')
+
+
+def product_url(product):
+    return reverse('product-detail', kwargs={'product_id': product.id})
+
+
+def revalidate(client, url, res, **params):
+    """
+    Repeat a request with the validators of a previous response.
+    """
+    return client.get(url, params, HTTP_IF_NONE_MATCH=res['ETag'])
+
+
+@pytest.fixture(autouse=True)
+def shared_cache(settings):
+    """
+    The catalog validators come from the cache versions, which need a
+    cache shared by every worker. The test process is the only worker.
+    """
+    settings.CACHE_SHARED = True
+
+
+# =============================================================================
+# TEST CONDITIONAL GET
+# =============================================================================
+
+def test_get_product_not_modified(client, customer, product, django_assert_max_num_queries):
+    """
+    Test that an unchanged product is answered with a 304 response.
+    """
+    client.force_authenticate(user=customer)
+    res = client.get(product_url(product))
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res['ETag']
+    assert res['Last-Modified']
+    assert 'no-cache' in res['Cache-Control']
+
+    with django_assert_max_num_queries(1):
+        cached = revalidate(client, product_url(product), res)
+
+    assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+    assert cached['ETag'] == res['ETag']
+    assert not cached.content
+
+
+def test_get_product_modified(client, customer, product, inventory):
+    """
+    Test that product and stock changes change the validators.
+    """
+    client.force_authenticate(user=customer)
+    res = client.get(product_url(product))
+
+    inventory.add(1)
+    res2 = revalidate(client, product_url(product), res)
+    assert res2.status_code == status.HTTP_200_OK
+    assert res2['ETag'] != res['ETag']
+
+    product.name = "Renamed Product"
+    product.save()
+    res3 = revalidate(client, product_url(product), res2)
+    assert res3.status_code == status.HTTP_200_OK
+    assert res3.data['data']['name'] == "Renamed Product"
+
+
+def test_get_product_if_modified_since(client, customer, product):
+    """
+    Test that Last-Modified can be used to revalidate a product.
+    """
+    client.force_authenticate(user=customer)
+    res = client.get(product_url(product))
+
+    res = client.get(product_url(product), HTTP_IF_MODIFIED_SINCE=res['Last-Modified'])
+    assert res.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+def test_get_products_not_modified(client, customer, shopowner, product_factory):
+    """
+    Test revalidating the product list, per query string.
+    """
+    product_factory(shop=shopowner.owned_shop)
+    client.force_authenticate(user=customer)
+    res = client.get(PRODUCTS_LIST_URL)
+
+    assert revalidate(client, PRODUCTS_LIST_URL, res).status_code == status.HTTP_304_NOT_MODIFIED
+    assert revalidate(client, PRODUCTS_LIST_URL, res, page=2).status_code != status.HTTP_304_NOT_MODIFIED
+
+    product_factory(shop=shopowner.owned_shop)
+    res2 = revalidate(client, PRODUCTS_LIST_URL, res)
+    assert res2.status_code == status.HTTP_200_OK
+    assert res2.data['data']['count'] == 2
+
+
+def test_get_products_modified_by_shop_rename(client, customer, product):
+    """
+    Test that renaming a shop changes the validators of the product list,
+    which lists the shop names.
+    """
+    client.force_authenticate(user=customer)
+    res = client.get(PRODUCTS_LIST_URL)
+
+    shop = product.shop
+    shop.name = "Renamed Shop"
+    shop.save()
+    res2 = revalidate(client, PRODUCTS_LIST_URL, res)
+    assert res2.status_code == status.HTTP_200_OK
+    assert res2.data['data']['results'][0]['shop']['name'] == "Renamed Shop"
+
+
+def test_get_products_modified_by_ready_image(client, customer, product):
+    """
+    Test that an image getting ready changes the validators of the
+    product list, which lists a placeholder until then.
+    """
+    image = ProductImage.objects.create(product=product, image=create_fake_images(1)[0])
+    client.force_authenticate(user=customer)
+    res = client.get(PRODUCTS_LIST_URL)
+    placeholder = res.data['data']['results'][0]['images'][0]['url']
+
+    image.process()
+    res2 = revalidate(client, PRODUCTS_LIST_URL, res)
+    assert res2.status_code == status.HTTP_200_OK
+    assert res2.data['data']['results'][0]['images'][0]['url'] != placeholder
+
+
+def test_get_products_modified_by_stock_moves(client, customer, shopowner, inventory, product_factory):
+    """
+    Test that stock moving between two products changes the validators
+    of the product list, though the total stock listed is the same.
+    """
+    other = product_factory(shop=shopowner.owned_shop)
+    client.force_authenticate(user=customer)
+    res = client.get(PRODUCTS_LIST_URL)
+
+    inventory.subtract(3, 'tester')
+    other.inventory.add(3, 'tester')
+    res2 = revalidate(client, PRODUCTS_LIST_URL, res)
+    assert res2.status_code == status.HTTP_200_OK
+    stocks = {item['id']: item['stock'] for item in res2.data['data']['results']}
+    assert stocks == {str(inventory.product_id): 17, str(other.id): 3}
+
+
+def test_get_categories_not_modified(client, customer, shopowner, product, category_factory):
+    """
+    Test revalidating the category list.
+    """
+    category = category_factory()
+    client.force_authenticate(user=customer)
+    res = client.get(CATEGORIES_URL)
+
+    assert revalidate(client, CATEGORIES_URL, res).status_code == status.HTTP_304_NOT_MODIFIED
+
+    # product counts are part of the list
+    product.add_categories([category.name])
+    res2 = revalidate(client, CATEGORIES_URL, res)
+    assert res2.status_code == status.HTTP_200_OK
+    assert res2.data['data']['results'][0]['product_count'] == 1
+
+    category_factory()
+    assert revalidate(client, CATEGORIES_URL, res2).status_code == status.HTTP_200_OK
+
+
+def test_get_shop_not_modified(client, customer, shopowner):
+    """
+    Test revalidating a shop, and that shop members get their own validators.
+    """
+    shop = shopowner.owned_shop
+    url = reverse('shop-detail', kwargs={'shop_id': shop.id})
+    client.force_authenticate(user=customer)
+    res = client.get(url)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert revalidate(client, url, res).status_code == status.HTTP_304_NOT_MODIFIED
+
+    client.force_authenticate(user=shopowner)
+    assert revalidate(client, url, res).status_code == status.HTTP_200_OK
+
+    shop.name = "Renamed Shop"
+    shop.save()
+    client.force_authenticate(user=customer)
+    assert revalidate(client, url, res).status_code == status.HTTP_200_OK
+
+
+def test_superuser_gets_no_validators(client, super_user, product):
+    """
+    Test that responses with super user only fields are not validated.
+    """
+    client.force_authenticate(user=super_user)
+    res = client.get(product_url(product))
+
+    assert res.status_code == status.HTTP_200_OK
+    assert not res.has_header('ETag')
+
+
+def test_local_cache_validates_from_the_database(client, customer, product, category, settings):
+    """
+    Test that without a shared cache the catalog responses get an ETag
+    built from the database, which every worker sees, and no Last-Modified.
+    The product list, which would be read in full, gets no validators.
+    """
+    settings.CACHE_SHARED = False
+    client.force_authenticate(user=customer)
+    responses = {url: client.get(url) for url in (product_url(product), CATEGORIES_URL)}
+
+    for url, res in responses.items():
+        assert res.has_header('ETag')
+        assert not res.has_header('Last-Modified')
+        assert revalidate(client, url, res).status_code == status.HTTP_304_NOT_MODIFIED
+
+    # written by another worker, whose cache versions this process never sees
+    product.add_categories([category.name])
+    for url, res in responses.items():
+        assert revalidate(client, url, res).status_code == status.HTTP_200_OK
+
+    res = client.get(product_url(product))
+    product.inventory.add(2, 'tester')
+    assert revalidate(client, product_url(product), res).status_code == status.HTTP_200_OK
+
+    res = client.get(PRODUCTS_LIST_URL)
+    assert res.status_code == status.HTTP_200_OK
+    assert not res.has_header('ETag')
+    assert not res.has_header('Last-Modified')
@@ -2,6 +2,10 @@ from django.urls import reverse
 from rest_framework import status
 
 import pytest
+import uuid
+
+from product.models import CatalogEntry, Inventory
+from product.services import InventoryBatchService
 
 
 @pytest.mark.parametrize(
@@ -210,4 +214,161 @@ def test_update_inventory_by_unauthenticated_user(client, product, inventory):
     assert res.data['code'] == "unauthorized"
     assert res.data['message'] == "Token is invalid or expired"
     inventory.refresh_from_db()
-    assert inventory.stock == 20
\ No newline at end of file
+    assert inventory.stock == 20
+
+# =============================================================================
+# TEST BATCH INVENTORY UPDATE
+# =============================================================================
+
+def batch_url(shop):
+    return reverse('shop-inventory-batch', kwargs={'shop_id': shop.id})
+
+
+@pytest.fixture
+def stocked_products(shopowner, product_factory):
+    """
+    Three products of the shop owner's shop with 10 items in stock each.
+    """
+    products = [product_factory(shop=shopowner.owned_shop) for _ in range(3)]
+    for product in products:
+        product.inventory.add(10, 'tester')
+    return products
+
+
+def stocks(products):
+    return [Inventory.objects.get(product=product).stock for product in products]
+
+
+def test_batch_update_inventory(client, shopowner, stocked_products, django_assert_max_num_queries):
+    """
+    Test adjusting the stock of many products with one request.
+    """
+    a, b, c = stocked_products
+    client.force_authenticate(user=shopowner)
+    data = {'items': [
+        {'product_id': str(a.id), 'action': 'add', 'quantity': 5},
+        {'product_id': str(b.id), 'action': 'subtract', 'quantity': 10},
+        {'product_id': str(c.id), 'action': 'subtract', 'quantity': 3},
+    ]}
+
+    res = client.post(batch_url(shopowner.owned_shop), data, format='json')
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res.data['message'] == "Inventory updated successfully."
+    assert res.data['data']['updated'] == 3
+    assert res.data['data']['failed'] == 0
+    assert [item['stock'] for item in res.data['data']['items']] == [15, 0, 7]
+    assert stocks(stocked_products) == [15, 0, 7]
+    assert CatalogEntry.objects.get(product=b).stock == 0
+    assert Inventory.objects.get(product=a).last_updated_by == shopowner.staff_handle
+
+    # the adjustments are applied by a single UPDATE whatever the batch size
+    items = [{'product_id': str(p.id), 'action': 'add', 'quantity': 1} for p in stocked_products]
+    with django_assert_max_num_queries(8) as ctx:
+        InventoryBatchService(shopowner.owned_shop, 'tester').apply([
+            {**item, 'product_id': uuid.UUID(item['product_id'])} for item in items
+        ])
+    assert len([q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "product_inventory"')]) == 1
+
+
+def test_batch_update_inventory_atomic(client, shopowner, stocked_products):
+    """
+    Test that an atomic batch is not applied when any item is invalid.
+    """
+    a, b, _ = stocked_products
+    client.force_authenticate(user=shopowner)
+    data = {'items': [
+        {'product_id': str(a.id), 'action': 'add', 'quantity': 5},
+        {'product_id': str(b.id), 'action': 'subtract', 'quantity': 11},
+        {'product_id': str(uuid.uuid4()), 'action': 'add', 'quantity': 1},
+    ]}
+
+    res = client.post(batch_url(shopowner.owned_shop), data, format='json')
+
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    assert res.data['code'] == 'unprocessed_items'
+    report = res.data['errors']
+    assert report['updated'] == 0
+    assert report['failed'] == 2
+    assert [item['status'] for item in report['items']] == ['skipped', 'insufficient_stock', 'not_found']
+    assert stocks(stocked_products) == [10, 10, 10]
+
+
+def test_batch_update_inventory_best_effort(client, shopowner, shopowner_factory, stocked_products, product_factory):
+    """
+    Test that a best effort batch applies the valid items only.
+    """
+    a, b, _ = stocked_products
+    other_product = product_factory(shop=shopowner_factory().owned_shop)
+    client.force_authenticate(user=shopowner)
+    data = {'mode': 'best_effort', 'items': [
+        {'product_id': str(a.id), 'action': 'add', 'quantity': 5},
+        {'product_id': str(b.id), 'action': 'subtract', 'quantity': 11},
+        {'product_id': str(other_product.id), 'action': 'add', 'quantity': 1},
+    ]}
+
+    res = client.post(batch_url(shopowner.owned_shop), data, format='json')
+
+    assert res.status_code == status.HTTP_207_MULTI_STATUS
+    report = res.data['errors']
+    assert report['updated'] == 1
+    assert [item['status'] for item in report['items']] == ['updated', 'insufficient_stock', 'not_found']
+    assert stocks(stocked_products) == [15, 10, 10]
+    assert other_product.inventory.stock == 0
+
+
+@pytest.mark.parametrize('data', [
+    {'items': []},
+    {'mode': 'all', 'items': [{'action': 'add', 'quantity': 1}]},
+    {'items': [{'action': 'remove', 'quantity': 0}]},
+], ids=['no_items', 'invalid_mode', 'invalid_item'])
+def test_batch_update_inventory_with_invalid_data(client, shopowner, data):
+    """
+    Test that invalid batches are rejected.
+    """
+    client.force_authenticate(user=shopowner)
+
+    res = client.post(batch_url(shopowner.owned_shop), data, format='json')
+
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    assert res.data['code'] == 'validation_error'
+
+
+def test_batch_update_inventory_with_duplicate_products(client, shopowner, stocked_products):
+    """
+    Test that a product cannot be adjusted twice in a batch.
+    """
+    a = stocked_products[0]
+    client.force_authenticate(user=shopowner)
+    data = {'items': [
+        {'product_id': str(a.id), 'action': 'add', 'quantity': 1},
+        {'product_id': str(a.id), 'action': 'subtract', 'quantity': 1},
+    ]}
+
+    res = client.post(batch_url(shopowner.owned_shop), data, format='json')
+
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    assert res.data['code'] == 'validation_error'
+    assert 'items' in res.data['errors']
+    assert stocks(stocked_products) == [10, 10, 10]
+
+
+def test_batch_update_inventory_permissions(client, customer, shopowner, shopowner_factory, stocked_products):
+    """
+    Test that only staff of the shop can update its inventory.
+    """
+    data = {'items': [{'product_id': str(stocked_products[0].id), 'action': 'add', 'quantity': 1}]}
+
+    client.force_authenticate(user=customer)
+    res = client.post(batch_url(shopowner.owned_shop), data, format='json')
+    assert res.status_code == status.HTTP_403_FORBIDDEN
+
+    client.force_authenticate(user=shopowner_factory())
+    res = client.post(batch_url(shopowner.owned_shop), data, format='json')
+    assert res.status_code == status.HTTP_403_FORBIDDEN
+
+    res = client.post(
+        reverse('shop-inventory-batch', kwargs={'shop_id': uuid.uuid4()}), data, format='json'
+    )
+    assert res.status_code == status.HTTP_404_NOT_FOUND
+    assert stocks(stocked_products) == [10, 10, 10]
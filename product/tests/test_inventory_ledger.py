@@ -0,0 +1,154 @@
+from datetime import timedelta
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils.timezone import now
+from io import StringIO
+from rest_framework import status
+
+from order.tasks import restock_inventory_with_cancelled_order
+from product.models import Inventory, InventoryMovement, InventorySnapshot, MovementReason
+from product.services import InventoryBatchService, InventoryLedgerService
+from product.tasks import compact_inventory_movements
+
+
+def age(days):
+    """
+    Move every movement `days` days into the past.
+    """
+    InventoryMovement.objects.update(created_at=now() - timedelta(days=days))
+
+
+def reasons(inventory):
+    return list(inventory.movements.order_by('id').values_list('reason', 'quantity'))
+
+
+# =============================================================================
+# TEST RECORDING MOVEMENTS
+# =============================================================================
+
+def test_stock_changes_are_recorded(client, shopowner, product):
+    """
+    Test that staff updates record a movement with the staff handle.
+    """
+    client.force_authenticate(user=shopowner)
+    url = reverse('inventory-update', args=[product.id])
+
+    client.post(url, {'action': 'add', 'quantity': 15}, format='json')
+    client.post(url, {'action': 'subtract', 'quantity': 4}, format='json')
+    # refused, so not recorded
+    res = client.post(url, {'action': 'subtract', 'quantity': 40}, format='json')
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+
+    inventory = Inventory.objects.get(product=product)
+    assert reasons(inventory) == [(MovementReason.ADJUSTMENT, 15), (MovementReason.ADJUSTMENT, -4)]
+    assert set(inventory.movements.values_list('handle', flat=True)) == {shopowner.staff_handle}
+
+
+def test_restock_of_cancelled_order_is_recorded(product, order_group_factory, order_factory, order_item_factory):
+    """
+    Test that restocking a cancelled order records the order.
+    """
+    order = order_factory(group=order_group_factory(), shop=product.shop)
+    order_item_factory(order=order, product=product, quantity=3)
+
+    restock_inventory_with_cancelled_order(order.id)
+
+    movement = InventoryMovement.objects.get(inventory__product=product)
+    assert movement.reason == MovementReason.ORDER_CANCELLED
+    assert movement.quantity == 3
+    assert movement.order_id == order.id
+
+
+def test_batch_changes_are_recorded_in_bulk(shopowner, product_factory, django_assert_num_queries):
+    """
+    Test that a batch records one movement per product with one insert.
+    """
+    products = [product_factory(shop=shopowner.owned_shop) for _ in range(3)]
+    items = [{'product_id': p.id, 'action': 'add', 'quantity': i + 1} for i, p in enumerate(products)]
+
+    with django_assert_num_queries(6) as ctx:
+        InventoryBatchService(shopowner.owned_shop, 'tester').apply(items)
+
+    inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "product_inventorymovement"')]
+    assert len(inserts) == 1
+    assert sorted(InventoryMovement.objects.values_list('quantity', flat=True)) == [1, 2, 3]
+    assert not InventoryLedgerService.reconcile().exists()
+
+
+# =============================================================================
+# TEST COMPACTION AND HISTORY
+# =============================================================================
+
+def test_compaction_folds_old_movements_into_snapshots(product):
+    """
+    Test that old movements are replaced by a snapshot of their total
+    while recent movements are kept.
+    """
+    inventory = product.inventory
+    inventory.add(10, 'tester')
+    inventory.subtract(3, 'tester')
+    age(100)
+    inventory.add(5, 'tester')
+
+    assert InventoryLedgerService().compact() == 2
+
+    snapshot = InventorySnapshot.objects.get(inventory=inventory)
+    assert snapshot.stock == 7
+    assert reasons(inventory) == [(MovementReason.ADJUSTMENT, 5)]
+    assert not InventoryLedgerService.reconcile().exists()
+
+    # the next compaction builds on the previous snapshot
+    age(100)
+    assert InventoryLedgerService().compact() == 1
+    latest = InventorySnapshot.objects.filter(inventory=inventory).order_by('-movement_id').first()
+    assert latest.stock == 12
+    assert not inventory.movements.exists()
+    assert InventoryLedgerService().compact() == 0
+
+
+def test_stock_at(product):
+    """
+    Test reading the stock of an inventory at a past time.
+    """
+    inventory = product.inventory
+    inventory.add(10, 'tester')
+    age(100)
+    inventory.subtract(4, 'tester')
+    InventoryMovement.objects.filter(quantity=-4).update(created_at=now() - timedelta(days=10))
+    inventory.add(1, 'tester')
+
+    stock_at = lambda days: InventoryLedgerService.stock_at(inventory, now() - timedelta(days=days))
+    assert [stock_at(200), stock_at(50), stock_at(5), stock_at(0)] == [0, 10, 6, 7]
+
+    InventoryLedgerService().compact()
+    assert [stock_at(200), stock_at(50), stock_at(5), stock_at(0)] == [0, 10, 6, 7]
+
+
+def test_reconcile_reports_untracked_changes(product, product_factory):
+    """
+    Test that stock changed without a movement is reported.
+    """
+    product.inventory.add(10, 'tester')
+    other = product_factory(shop=product.shop)
+    other.inventory.add(5, 'tester')
+    Inventory.objects.filter(product=other).update(_stock=8)
+
+    mismatches = list(InventoryLedgerService.reconcile())
+
+    assert [(i.product_id, i.stock, i.ledger_stock) for i in mismatches] == [(other.id, 8, 5)]
+
+    out = StringIO()
+    call_command('reconcile_inventory', stdout=out)
+    assert "stock 8, ledger 5" in out.getvalue()
+    assert "1 inventories differ from their ledger." in out.getvalue()
+
+
+def test_compact_inventory_movements_task(product):
+    """
+    Test the periodic compaction task.
+    """
+    product.inventory.add(10, 'tester')
+    age(100)
+
+    assert compact_inventory_movements() == "Compacted 1 inventory movements."
+    assert InventorySnapshot.objects.get(inventory=product.inventory).stock == 10
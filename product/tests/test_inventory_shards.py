@@ -0,0 +1,162 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from io import StringIO
+from rest_framework import status
+
+import pytest
+import uuid
+
+from order.models import OrderGroup
+from product.models import CatalogEntry, Inventory, InventoryShard, ReservationStatus, StockReservation
+from product.services import InventoryBatchService, InventoryLedgerService, StockReservationService
+
+
+User = get_user_model()
+
+
+@pytest.fixture
+def sharded(product_factory, shopowner):
+    """
+    Factory of products of the shop owner's shop with sharded stock.
+    """
+    def create(stock=20, shards=4):
+        product = product_factory(shop=shopowner.owned_shop)
+        product.inventory.add(stock, 'tester')
+        inventory = Inventory.objects.get(product=product)
+        return inventory.set_shards(shards)
+    return create
+
+
+def shards_of(inventory):
+    return list(inventory.shards.order_by('index').values_list('stock', 'reserved'))
+
+
+# =============================================================================
+# TEST SHARDING
+# =============================================================================
+
+def test_set_shards_spreads_and_gathers_stock(product):
+    """
+    Test that sharding splits the free stock evenly, keeps held
+    reservations with their stock and can be undone.
+    """
+    inventory = product.inventory
+    inventory.add(22, 'tester')
+    StockReservationService.hold([(inventory.id, uuid.uuid4(), 4)])
+
+    inventory.set_shards(4)
+
+    assert (inventory._stock, inventory.reserved) == (0, 0)
+    assert shards_of(inventory) == [(9, 4), (5, 0), (4, 0), (4, 0)]
+    assert (inventory.stock, inventory.available) == (22, 18)
+    assert StockReservation.objects.get().shard.index == 0
+    assert CatalogEntry.objects.get(product=product).stock == 18
+
+    inventory.set_shards(0)
+
+    assert not InventoryShard.objects.exists()
+    assert (inventory._stock, inventory.reserved) == (22, 4)
+    assert StockReservation.objects.get().shard is None
+    assert not InventoryLedgerService.reconcile().exists()
+
+
+def test_shard_inventory_command(product):
+    """
+    Test sharding the stock of a product from the command line.
+    """
+    product.inventory.add(10, 'tester')
+    out = StringIO()
+
+    call_command('shard_inventory', str(product.id), shards=2, stdout=out)
+
+    assert "spread over 2 shards" in out.getvalue()
+    assert shards_of(product.inventory) == [(5, 0), (5, 0)]
+
+
+# =============================================================================
+# TEST STOCK CHANGES ON SHARDS
+# =============================================================================
+
+def test_holds_are_taken_from_shards(sharded):
+    """
+    Test holding, converting and releasing stock of a sharded inventory.
+    """
+    inventory = sharded(20, 4)
+    paid, cancelled = uuid.uuid4(), uuid.uuid4()
+
+    assert StockReservationService.hold([(inventory.id, paid, 3), (inventory.id, cancelled, 2)]) == []
+    assert inventory.available == 15
+    assert sum(reserved for _, reserved in shards_of(inventory)) == 5
+
+    StockReservationService.convert([paid])
+    StockReservationService.release_orders([cancelled])
+
+    assert (inventory.stock, inventory.total_reserved) == (17, 0)
+    assert StockReservation.objects.get(order_id=paid).status == ReservationStatus.CONVERTED
+    assert not InventoryLedgerService.reconcile().exists()
+
+
+def test_hold_is_split_over_shards(sharded):
+    """
+    Test that a hold larger than any shard is split over several, and
+    that nothing is held when the shards together are short.
+    """
+    inventory = sharded(12, 3)
+
+    assert StockReservationService.hold([(inventory.id, uuid.uuid4(), 10)]) == []
+    assert StockReservation.objects.count() == 3
+    assert inventory.available == 2
+
+    assert StockReservationService.hold([(inventory.id, uuid.uuid4(), 3)]) == [inventory.id]
+    assert StockReservation.objects.count() == 3
+    assert inventory.available == 2
+
+
+def test_staff_updates_on_shards(client, shopowner, sharded):
+    """
+    Test staff and batch updates of a sharded inventory.
+    """
+    inventory = sharded(8, 2)
+    client.force_authenticate(user=shopowner)
+    url = reverse('inventory-update', args=[inventory.product_id])
+
+    res = client.post(url, {'action': 'add', 'quantity': 4}, format='json')
+    assert res.status_code == status.HTTP_200_OK
+    assert shards_of(inventory) == [(8, 0), (4, 0)]
+
+    res = client.post(url, {'action': 'subtract', 'quantity': 10}, format='json')
+    assert res.status_code == status.HTTP_200_OK
+    assert inventory.stock == 2
+
+    report = InventoryBatchService(shopowner.owned_shop, 'tester').apply(
+        [{'product_id': inventory.product_id, 'action': 'subtract', 'quantity': 3}]
+    )
+    assert report['items'][0]['status'] == 'insufficient_stock'
+    assert inventory.product.stock == 2
+    assert not InventoryLedgerService.reconcile().exists()
+
+
+def test_benchmark_command_restores_the_inventory(sharded):
+    """
+    Test that the benchmark checks out, then deletes its orders and
+    customers and restores the stock and the shards.
+    """
+    inventory = sharded(50, 2)
+    users = User.objects.count()
+    out = StringIO()
+
+    call_command(
+        'benchmark_stock_shards', str(inventory.product_id),
+        shards=[0, 4], threads=1, checkouts=5, stdout=out
+    )
+
+    assert "0 shards: 5/5 checked out" in out.getvalue()
+    assert "4 shards: 5/5 checked out" in out.getvalue()
+    inventory.refresh_from_db()
+    assert inventory.shard_count == 2
+    assert (inventory.stock, inventory.total_reserved) == (50, 0)
+    assert inventory.product.active_order_count == 0
+    assert not StockReservation.objects.exists()
+    assert not OrderGroup.objects.exists()
+    assert User.objects.count() == users
@@ -0,0 +1,148 @@
+from django.core import mail
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+from rest_framework import status
+
+import pytest
+import uuid
+
+from product.models import Inventory, LowStockAlert
+from product.services import InventoryBatchService, StockReservationService
+from product.tasks import send_low_stock_digests
+
+
+@pytest.fixture
+def watched(product_factory):
+    """
+    Factory of products with stock and a reorder threshold.
+    """
+    def create(shop, stock=10, threshold=3):
+        product = product_factory(shop=shop)
+        product.inventory.add(stock, 'tester')
+        return Inventory.objects.get(product=product).set_reorder_threshold(threshold)
+    return create
+
+
+def open_alerts(inventory):
+    return list(inventory.low_stock_alerts.filter(resolved_at__isnull=True).values_list('stock', 'threshold'))
+
+
+# =============================================================================
+# TEST THRESHOLDS
+# =============================================================================
+
+def test_set_reorder_threshold(client, shopowner, product):
+    """
+    Test that staff can set and clear the reorder threshold.
+    """
+    product.inventory.add(5, 'tester')
+    client.force_authenticate(user=shopowner)
+    url = reverse('inventory-update', args=[product.id])
+
+    res = client.patch(url, {'reorder_threshold': 5}, format='json')
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res.data['data']['reorder_threshold'] == 5
+    # already at the threshold
+    assert open_alerts(product.inventory) == [(5, 5)]
+
+    res = client.patch(url, {'reorder_threshold': None}, format='json')
+    assert res.status_code == status.HTTP_200_OK
+    assert open_alerts(product.inventory) == []
+
+    res = client.patch(url, {'reorder_threshold': -1}, format='json')
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    assert res.data['code'] == 'validation_error'
+
+
+# =============================================================================
+# TEST ALERTS
+# =============================================================================
+
+def test_alerts_are_raised_once_per_crossing(shopowner, watched):
+    """
+    Test that an alert is raised when the stock falls to the threshold,
+    not again while it stays below, and again after a restock.
+    """
+    inventory = watched(shopowner.owned_shop, stock=10, threshold=3)
+
+    inventory.subtract(6, 'tester')
+    assert open_alerts(inventory) == []
+
+    inventory.subtract(2, 'tester')
+    inventory.subtract(1, 'tester')
+    assert open_alerts(inventory) == [(2, 3)]
+
+    inventory.add(5, 'tester')
+    assert open_alerts(inventory) == []
+
+    inventory.subtract(4, 'tester')
+    assert open_alerts(inventory) == [(2, 3)]
+    assert inventory.low_stock_alerts.count() == 2
+
+
+def test_one_open_alert_per_inventory(shopowner, watched):
+    """
+    Test that the open alerts are keyed by inventory, so a second open
+    alert is refused by a plain unique index, and resolved ones are not.
+    """
+    inventory = watched(shopowner.owned_shop, stock=2, threshold=3)
+    alert = inventory.low_stock_alerts.get()
+    assert alert.open_key == inventory.id
+
+    LowStockAlert.detect([inventory.id])
+    assert inventory.low_stock_alerts.count() == 1
+    with pytest.raises(IntegrityError), transaction.atomic():
+        LowStockAlert.objects.create(
+            inventory=inventory, shop=shopowner.owned_shop, stock=2, threshold=3, open_key=inventory.id)
+
+    inventory.set_reorder_threshold(None)
+    alert.refresh_from_db()
+    assert (alert.resolved_at is not None, alert.open_key) == (True, None)
+
+
+def test_checkout_and_batch_raise_alerts(shopowner, watched, django_capture_on_commit_callbacks):
+    """
+    Test that checkout holds and batch updates raise alerts for the
+    inventories they change.
+    """
+    held, batched, untouched = [watched(shopowner.owned_shop, stock=10, threshold=3) for _ in range(3)]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        StockReservationService.hold([(held.id, uuid.uuid4(), 8)])
+    InventoryBatchService(shopowner.owned_shop, 'tester').apply([
+        {'product_id': batched.product_id, 'action': 'subtract', 'quantity': 9},
+        {'product_id': untouched.product_id, 'action': 'add', 'quantity': 1}
+    ])
+
+    assert open_alerts(held) == [(2, 3)]
+    assert open_alerts(batched) == [(1, 3)]
+    assert open_alerts(untouched) == []
+
+
+# =============================================================================
+# TEST DIGESTS
+# =============================================================================
+
+def test_digest_is_sent_once_per_shop(shopowner_factory, watched):
+    """
+    Test that each shop gets one digest of its pending alerts, and that
+    alerts resolved before the digest are left out.
+    """
+    mail.outbox = []
+    first, second = shopowner_factory(), shopowner_factory()
+    low = [watched(first.owned_shop, stock=2) for _ in range(2)]
+    watched(second.owned_shop, stock=1)
+    restocked = watched(second.owned_shop, stock=3)
+    restocked.add(10, 'tester')
+
+    assert send_low_stock_digests() == "Sent 2 low stock digests."
+
+    assert sorted(message.to[0] for message in mail.outbox) == [first.email, second.email]
+    digest = next(message for message in mail.outbox if message.to == [first.email])
+    assert all(inventory.product.name in digest.body for inventory in low)
+    assert restocked.product.name not in ''.join(message.body for message in mail.outbox)
+    assert not LowStockAlert.objects.filter(notified_at__isnull=True, resolved_at__isnull=True).exists()
+
+    assert send_low_stock_digests() == "Sent 0 low stock digests."
+    assert len(mail.outbox) == 2
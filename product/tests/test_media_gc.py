@@ -0,0 +1,152 @@
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.utils.timezone import now
+from datetime import timedelta
+
+import os
+import time
+
+from common.models import MAX_SWEEP_ATTEMPTS, MediaBlob, MediaTombstone
+from common.tasks import sweep_media_tombstones
+from product.models import ProductImage
+
+
+def make_old(path):
+    """
+    Set the modification time of a path to two hours ago.
+    """
+    old = time.time() - 2 * 3600
+    os.utime(path, (old, old))
+
+
+# =============================================================================
+# TEST TOMBSTONES
+# =============================================================================
+
+def test_queryset_delete_queues_image_files(product, product_image_factory):
+    """
+    Test that bulk deletes release the files of the images.
+    """
+    images = [product_image_factory(product) for _ in range(2)]
+    paths = [img.image.path for img in images]
+
+    ProductImage.objects.filter(product=product).delete()
+
+    # files are kept until the sweep
+    assert all(os.path.exists(p) for p in paths)
+    assert not MediaBlob.objects.exists()
+    assert MediaTombstone.objects.count() > 0
+
+    sweep_media_tombstones()
+
+    assert not any(os.path.exists(p) for p in paths)
+    assert not MediaTombstone.objects.exists()
+
+
+def test_shop_delete_queues_shop_files(shopowner, product, product_image_factory):
+    """
+    Test that deleting a shop releases the files of its products.
+    """
+    image = product_image_factory(product)
+    path = image.image.path
+    shop_dir = default_storage.path(f"shp_{shopowner.owned_shop.id}")
+    assert os.path.isdir(shop_dir)
+
+    shopowner.owned_shop.delete()
+    sweep_media_tombstones()
+
+    assert not os.path.exists(path)
+    assert not os.path.exists(shop_dir)
+    assert not MediaBlob.objects.exists()
+
+
+def test_sweep_in_batches(db, test_media_dir):
+    """
+    Test that every queued file is deleted, a batch at a time.
+    """
+    names = [default_storage.save(f"gc/file_{i}.txt", ContentFile(b"data")) for i in range(5)]
+    MediaTombstone.enqueue(names)
+
+    assert sweep_media_tombstones(batch_size=2) == 5
+
+    assert not any(default_storage.exists(n) for n in names)
+    assert not MediaTombstone.objects.exists()
+
+
+def test_sweep_retries_failed_deletes(db, test_media_dir):
+    """
+    Test that a directory still in use is retried, then left alone.
+    """
+    name = default_storage.save("gc/busy/file.txt", ContentFile(b"data"))
+    MediaTombstone.enqueue(["gc/busy"])
+
+    for attempt in range(1, MAX_SWEEP_ATTEMPTS + 1):
+        assert sweep_media_tombstones() == 0
+        assert MediaTombstone.objects.get().attempts == attempt
+
+    sweep_media_tombstones()
+    assert MediaTombstone.objects.get().attempts == MAX_SWEEP_ATTEMPTS
+    assert default_storage.exists(name)
+
+
+def test_sweep_skips_files_stored_again(db, test_media_dir):
+    """
+    Test that a queued file a blob uses again is not deleted.
+    """
+    name = default_storage.save("gc/blob.jpg", ContentFile(b"data"))
+    MediaTombstone.enqueue([name])
+    MediaBlob.objects.create(kind='test', digest='a' * 64, name=name, ref_count=1)
+
+    sweep_media_tombstones()
+
+    assert default_storage.exists(name)
+    assert not MediaTombstone.objects.exists()
+
+
+# =============================================================================
+# TEST RECONCILE COMMAND
+# =============================================================================
+
+def test_reconcile_media_removes_orphaned_files(product, product_image_factory):
+    """
+    Test that old files no row refers to are removed.
+    """
+    image = product_image_factory(product)
+    orphan = default_storage.save("gc/orphans/lost.jpg", ContentFile(b"data"))
+    recent = default_storage.save("gc/recent.jpg", ContentFile(b"data"))
+    for name in [orphan, image.image.name]:
+        make_old(default_storage.path(name))
+
+    call_command('reconcile_media', '--dry-run')
+    assert default_storage.exists(orphan)
+
+    call_command('reconcile_media')
+
+    assert not default_storage.exists(orphan)
+    assert not os.path.exists(default_storage.path("gc/orphans"))
+    assert default_storage.exists(recent)
+    assert default_storage.exists(image.image.name)
+    for sizes in image.renditions.values():
+        assert all(default_storage.exists(n) for n in sizes.values())
+
+
+def test_reconcile_media_fixes_reference_counts(product, product_image_factory):
+    """
+    Test that blob reference counts are recounted from the rows.
+    """
+    image = product_image_factory(product)
+    MediaBlob.objects.filter(id=image.blob_id).update(ref_count=7)
+    unused = MediaBlob.objects.create(kind='test', digest='b' * 64, name="gc/unused.jpg", ref_count=2)
+    # registered by an image still being processed
+    recent = MediaBlob.objects.create(kind='test', digest='c' * 64, name="gc/recent.jpg", ref_count=1)
+    MediaBlob.objects.exclude(id=recent.id).update(created_at=now() - timedelta(hours=2))
+
+    # one blob per batch
+    call_command('reconcile_media', '--batch-size', '1')
+
+    assert MediaBlob.objects.get(id=image.blob_id).ref_count == 1
+    assert not MediaBlob.objects.filter(id=unused.id).exists()
+    assert MediaTombstone.objects.filter(path="gc/unused.jpg").exists()
+    assert MediaBlob.objects.get(id=recent.id).ref_count == 1
+    assert not MediaTombstone.objects.filter(path="gc/recent.jpg").exists()
@@ -1,10 +1,16 @@
+from django.conf import settings
+from django.db import IntegrityError
 from django.urls import reverse
 from rest_framework import status 
 
+from unittest.mock import patch
+
 import os
 import pytest
 import uuid
 
+from common.tasks import sweep_media_tombstones
+from product.api.v1.serializers import ProductSerializer
 from product.models import Product
 
 
@@ -188,6 +194,97 @@ def test_get_shop_products_with_no_products(client, shopowner, customer):
     assert res.data['data']['results'] == []
 
 
+# =============================================================================
+# TEST PRODUCT LIST QUERY BUDGET
+# =============================================================================
+
+# maximum number of queries a full page of products may cost
+PRODUCT_LIST_QUERY_BUDGET = {
+    'product-list': 4,
+    'shop-product-list-create': 5,
+}
+
+@pytest.mark.parametrize('url_name', list(PRODUCT_LIST_QUERY_BUDGET))
+def test_product_list_query_budget(
+    client, url_name, shopowner, customer, product_factory,
+    product_image_factory, category_factory, django_assert_max_num_queries):
+    """
+    Test that product list endpoints serialize a full page of products
+    in a constant number of queries.
+    """
+    page_size = int(settings.REST_FRAMEWORK['PAGE_SIZE'])
+    shop = shopowner.owned_shop
+    categories = [category_factory().name for _ in range(2)]
+    for _ in range(page_size):
+        p = product_factory(shop=shop)
+        p.add_categories(categories)
+        product_image_factory(product=p)
+
+    client.force_authenticate(user=customer)
+    kwargs = {'shop_id': shop.id} if url_name == 'shop-product-list-create' else {}
+    url = reverse(url_name, kwargs=kwargs)
+
+    with django_assert_max_num_queries(PRODUCT_LIST_QUERY_BUDGET[url_name]):
+        res = client.get(url)
+
+    assert res.status_code == status.HTTP_200_OK
+    results = res.data['data']['results']
+    assert len(results) == page_size
+    assert all(len(p['images']) == 1 for p in results)
+    assert all(len(p['categories']) == 2 for p in results)
+
+
+# =============================================================================
+# TEST PRODUCT LIST CURSOR PAGINATION
+# =============================================================================
+
+def test_get_products_with_cursor_pagination(client, monkeypatch, shopowner, product_factory, customer):
+    """
+    Test walking the product list with cursor pagination.
+    """
+    monkeypatch.setitem(settings.REST_FRAMEWORK, 'PAGE_SIZE', 2)
+    products = [product_factory(shop=shopowner.owned_shop) for _ in range(5)]
+    client.force_authenticate(user=customer)
+
+    res = client.get(PRODUCTS_LIST_URL, {'pagination': 'cursor', 'include_total': 'true'})
+
+    assert res.status_code == status.HTTP_200_OK
+    data = res.data['data']
+    assert 'count' not in data
+    assert data['total'] == 5
+    assert data['total_is_exact'] is True
+    assert data['previous'] is None
+
+    seen = [p['id'] for p in data['results']]
+    while data['next']:
+        res = client.get(data['next'])
+        assert res.status_code == status.HTTP_200_OK
+        data = res.data['data']
+        assert data['total'] == 5
+        seen.extend(p['id'] for p in data['results'])
+
+    expected = sorted(products, key=lambda p: (p.created_at, p.id), reverse=True)
+    assert seen == [str(p.id) for p in expected]
+
+
+def test_get_products_with_cursor_pagination_approximate_total(client, monkeypatch, shopowner, product_factory, customer):
+    """
+    Test that the cursor pagination total stops counting at the limit.
+    """
+    from common.utils.pagination import CursorPagination
+
+    monkeypatch.setattr(CursorPagination, 'max_total_count', 3)
+    for _ in range(5):
+        product_factory(shop=shopowner.owned_shop)
+    client.force_authenticate(user=customer)
+
+    res = client.get(PRODUCTS_LIST_URL, {'pagination': 'cursor', 'include_total': 'true'})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res.data['data']['total'] == 3
+    assert res.data['data']['total_is_exact'] is False
+
+
 # =============================================================================
 # TEST GET PRODUCT WITH ID
 # =============================================================================
@@ -295,6 +392,7 @@ def test_delete_product_with_id(client, shopowner, product_factory, product_imag
 
     assert res.status_code == status.HTTP_204_NO_CONTENT
     assert Product.objects.count() == 0
+    sweep_media_tombstones()
     assert not os.path.exists(product_image.image.path)
     assert not os.path.exists(prod_img_dir)
     
@@ -521,6 +619,56 @@ def test_post_product_with_duplicate_name_in_a_shop(client, shopowner, product_f
     assert res.data['errors']['name'][0] == "A product with this name already exists in the shop."
     assert Product.objects.count() == 1
     
+def test_post_product_with_duplicate_name_in_other_case(client, shopowner, product_factory):
+    """
+    Test that product names are compared case-insensitively.
+    """
+    product_factory(shop=shopowner.owned_shop, name="Unique Product")
+    data = CREATE_PRODUCT_DATA.copy()
+    data['name'] = " UNIQUE product "
+
+    client.force_authenticate(user=shopowner)
+    url = reverse('shop-product-list-create', kwargs={'shop_id': shopowner.owned_shop.id})
+    res = client.post(url, data, format='json')
+
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    assert res.data['errors']['name'][0] == "A product with this name already exists in the shop."
+    assert Product.objects.count() == 1
+
+
+def test_post_product_with_name_taken_concurrently(client, shopowner, product_factory):
+    """
+    Test that a name taken after validation is rejected by the unique index.
+    """
+    product_factory(shop=shopowner.owned_shop, name="Unique Product")
+    data = CREATE_PRODUCT_DATA.copy()
+    data['name'] = "unique product"
+
+    client.force_authenticate(user=shopowner)
+    url = reverse('shop-product-list-create', kwargs={'shop_id': shopowner.owned_shop.id})
+    # the other request commits between validation and insert
+    with patch.object(ProductSerializer, 'validate_name', lambda self, value: value):
+        res = client.post(url, data, format='json')
+
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    assert res.data['errors']['name'][0] == "A product with this name already exists in the shop."
+    assert Product.objects.count() == 1
+
+
+def test_post_product_with_other_integrity_error(client, shopowner):
+    """
+    Test that integrity errors other than a taken name are not
+    reported as duplicate names.
+    """
+    client.force_authenticate(user=shopowner)
+    url = reverse('shop-product-list-create', kwargs={'shop_id': shopowner.owned_shop.id})
+    error = IntegrityError("Duplicate entry 'cafe' for key 'unique_search_term_per_product'")
+
+    with patch.object(Product, 'save', side_effect=error):
+        with pytest.raises(IntegrityError):
+            client.post(url, CREATE_PRODUCT_DATA.copy(), format='json')
+
+
 def test_post_product_with_duplicate_name_in_different_shops(client, shopowner_factory, product_factory):
     """
     Test create a new product with a name that already exists in a different shop.
@@ -902,3 +1050,18 @@ def test_patch_product_with_read_only_fields(client, product, shopowner):
     assert new_product_inst.created_at != '2023-01-01T00:00:00Z'
     assert new_product_inst.updated_at != '2023-01-01T00:00:00Z'
     assert new_product_inst.deactivated_at is None
+
+
+def test_patch_product_name_case(client, product, shopowner):
+    """
+    Test that a product can be renamed to its own name in another case.
+    """
+    url = reverse('product-detail', kwargs={'product_id': product.id})
+    client.force_authenticate(user=shopowner)
+
+    res = client.patch(url, {'name': product.name.upper()}, format='json')
+
+    assert res.status_code == status.HTTP_200_OK
+    product.refresh_from_db()
+    assert product.name == product.name.upper()
+    assert product.normalized_name == product.name.casefold()
@@ -0,0 +1,201 @@
+from datetime import timedelta
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework import status
+
+import pytest
+import uuid
+
+from order.models import OrderItem
+from product.models import ProductSales, RollupWatermark
+from product.services import SalesRollupService
+from product.tasks import rollup_product_sales
+
+
+BESTSELLERS_URL = reverse('product-bestsellers')
+
+
+def shop_bestsellers_url(shop):
+    return reverse('shop-product-bestsellers', kwargs={'shop_id': shop.id})
+
+
+@pytest.fixture
+def sell(order_group_factory, order_factory, order_item_factory, shopowner_factory):
+    """
+    Record a sale of the given quantity of a product, days ago.
+    """
+    buyer = shopowner_factory()
+
+    def create_sale(product, quantity=1, days_ago=0):
+        group = order_group_factory(user=buyer)
+        order = order_factory(group=group, shop=product.shop)
+        item = order_item_factory(order=order, product=product, quantity=quantity)
+        if days_ago:
+            OrderItem.objects.filter(id=item.id).update(created_at=now() - timedelta(days=days_ago))
+        return item
+    return create_sale
+
+
+@pytest.fixture
+def products(shopowner_factory, product_factory):
+    """
+    Three products of a shop and one of another shop.
+    """
+    shop, other_shop = [shopowner_factory().owned_shop for _ in range(2)]
+    return {
+        name: product_factory(shop=other_shop if name == "D" else shop, name=name)
+        for name in ["A", "B", "C", "D"]
+    }
+
+
+def rollup():
+    return SalesRollupService(settle_delay=timedelta(0)).run()
+
+
+def names(res):
+    return [p['name'] for p in res.data['data']['results']]
+
+
+# =============================================================================
+# TEST SALES ROLLUP
+# =============================================================================
+
+def test_rollup_sums_units_per_product_and_day(products, sell):
+    """
+    Test that order items are summed per product and day.
+    """
+    sell(products["A"], quantity=2)
+    sell(products["A"], quantity=3)
+    sell(products["A"], quantity=1, days_ago=3)
+    sell(products["B"], quantity=4)
+
+    assert rollup() == 4
+
+    totals = {
+        (s.product.name, s.day): s.units
+        for s in ProductSales.objects.select_related('product')
+    }
+    today = ProductSales.objects.order_by('-day').first().day
+    assert totals == {
+        ("A", today): 5,
+        ("A", today - timedelta(days=3)): 1,
+        ("B", today): 4,
+    }
+    assert ProductSales.objects.filter(product=products["A"]).first().shop_id == products["A"].shop_id
+
+
+def test_rollup_is_incremental(products, sell):
+    """
+    Test that each run only reads the order items added since the last one.
+    """
+    sell(products["A"], quantity=2)
+    assert rollup() == 1
+    watermark = RollupWatermark.objects.get(name=SalesRollupService.WATERMARK)
+
+    assert rollup() == 0
+    sell(products["A"], quantity=3)
+    sell(products["B"], quantity=1)
+
+    assert rollup() == 2
+    assert ProductSales.objects.get(product=products["A"]).units == 5
+    watermark_after = RollupWatermark.objects.get(name=SalesRollupService.WATERMARK)
+    assert watermark_after.position_at >= watermark.position_at
+
+
+def test_rollup_in_batches_and_settle_delay(products, sell):
+    """
+    Test that items are rolled up a batch at a time, leaving the
+    most recent ones to the next run.
+    """
+    for _ in range(5):
+        sell(products["C"], days_ago=1)
+
+    assert SalesRollupService(settle_delay=timedelta(days=2)).run() == 0
+    assert SalesRollupService(batch_size=2, settle_delay=timedelta(0)).run() == 5
+    assert ProductSales.objects.get(product=products["C"]).units == 5
+
+
+def test_rollup_product_sales_task(products, sell):
+    """
+    Test the periodic rollup task.
+    """
+    sell(products["A"])
+
+    assert rollup_product_sales() == "Rolled up 0 order items."
+    assert SalesRollupService(settle_delay=timedelta(0)).run() == 1
+
+
+# =============================================================================
+# TEST RANKINGS
+# =============================================================================
+
+def test_bestsellers_and_trending_rankings(products, sell):
+    """
+    Test ranking products by units in the window and by sales growth.
+    """
+    sell(products["A"], quantity=10, days_ago=5)
+    sell(products["A"], quantity=1)
+    sell(products["B"], quantity=4)
+    sell(products["C"], quantity=2)
+    sell(products["C"], quantity=50, days_ago=20)
+    rollup()
+
+    ids = lambda *names: [products[n].id for n in names]
+    assert SalesRollupService.bestsellers(days=7) == ids("A", "B", "C")
+    assert SalesRollupService.bestsellers(days=30) == ids("C", "A", "B")
+    # A sold less in the last two days than before
+    assert SalesRollupService.trending(days=7) == ids("B", "C")
+
+    products["B"].deactivate()
+    assert SalesRollupService.bestsellers(days=7) == ids("A", "C")
+
+
+def test_get_bestsellers(client, customer, products, sell):
+    """
+    Test the catalog and shop bestseller endpoints.
+    """
+    sell(products["A"], quantity=1)
+    sell(products["B"], quantity=3)
+    sell(products["D"], quantity=5)
+    sell(products["C"], quantity=8, days_ago=10)
+    rollup()
+    client.force_authenticate(user=customer)
+
+    res = client.get(BESTSELLERS_URL)
+    assert res.status_code == status.HTTP_200_OK
+    assert res.data['message'] == "Best selling products retrieved successfully."
+    assert names(res) == ["D", "B", "A"]
+
+    res = client.get(BESTSELLERS_URL, {'days': '30'})
+    assert names(res) == ["C", "D", "B", "A"]
+
+    res = client.get(shop_bestsellers_url(products["A"].shop), {'ranking': 'trending'})
+    assert res.status_code == status.HTTP_200_OK
+    assert names(res) == ["B", "A"]
+
+
+@pytest.mark.parametrize("params, code", [
+    ({'ranking': 'popular'}, 'invalid_ranking'),
+    ({'days': '3'}, 'invalid_days'),
+])
+def test_get_bestsellers_with_invalid_params(client, customer, params, code):
+    """
+    Test that unsupported rankings and windows are rejected.
+    """
+    client.force_authenticate(user=customer)
+
+    res = client.get(BESTSELLERS_URL, params)
+
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    assert res.data['code'] == code
+
+
+def test_get_shop_bestsellers_with_unknown_shop(client, customer):
+    """
+    Test the shop bestsellers of a shop that does not exist.
+    """
+    client.force_authenticate(user=customer)
+
+    res = client.get(reverse('shop-product-bestsellers', kwargs={'shop_id': uuid.uuid4()}))
+
+    assert res.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,160 @@
+from django.urls import reverse
+from rest_framework import status
+
+from common.utils.cache import get_stats
+from product.models import Product
+
+
+CACHE_STATS_URL = reverse('catalog-cache-stats')
+
+
+def product_url(product):
+    return reverse('product-detail', kwargs={'product_id': product.id})
+
+
+def shop_products_url(shop):
+    return reverse('shop-product-list-create', kwargs={'shop_id': shop.id})
+
+
+# =============================================================================
+# TEST CACHED PRODUCT PAYLOADS
+# =============================================================================
+
+def test_product_detail_is_cached(client, customer, product, django_assert_num_queries):
+    """
+    Test that a repeated product request is served from the cache.
+    """
+    client.force_authenticate(user=customer)
+    res = client.get(product_url(product))
+    assert res.status_code == status.HTTP_200_OK
+
+    # only the existence lookup remains, and the product state the
+    # validators are built from without a shared cache
+    with django_assert_num_queries(4):
+        cached = client.get(product_url(product))
+
+    assert cached.data == res.data
+    assert get_stats() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+
+
+def test_product_detail_follows_updates(client, customer, product):
+    """
+    Test that product updates are visible right away.
+    """
+    client.force_authenticate(user=customer)
+    client.get(product_url(product))
+
+    product.name = "Renamed Product"
+    product.save()
+
+    res = client.get(product_url(product))
+    assert res.data['data']['name'] == "Renamed Product"
+
+
+def test_product_detail_follows_inventory(client, customer, product, inventory):
+    """
+    Test that stock changes are visible right away.
+    """
+    client.force_authenticate(user=customer)
+    client.get(product_url(product))
+
+    inventory.add(5)
+    assert client.get(product_url(product)).data['data']['stock'] == 25
+
+    inventory.subtract(10)
+    assert client.get(product_url(product)).data['data']['stock'] == 15
+
+
+def test_product_detail_follows_images_and_categories(
+        client, customer, product, product_image_factory, category_factory):
+    """
+    Test that image and category changes are visible right away.
+    """
+    client.force_authenticate(user=customer)
+    client.get(product_url(product))
+
+    image = product_image_factory(product)
+    assert len(client.get(product_url(product)).data['data']['images']) == 1
+
+    image.delete()
+    assert client.get(product_url(product)).data['data']['images'] == []
+
+    category = category_factory(name="Footwear")
+    product.add_categories([category.name])
+    assert client.get(product_url(product)).data['data']['categories'][0]['name'] == "Footwear"
+
+    category.name = "Shoes"
+    category.save()
+    assert client.get(product_url(product)).data['data']['categories'][0]['name'] == "Shoes"
+
+
+def test_shop_products_are_cached_per_page(client, customer, shopowner, product_factory):
+    """
+    Test that shop product pages are cached per query string
+    and follow new products.
+    """
+    shop = shopowner.owned_shop
+    product_factory(shop=shop)
+    client.force_authenticate(user=customer)
+
+    client.get(shop_products_url(shop))
+    client.get(shop_products_url(shop))
+    client.get(shop_products_url(shop), {'pagination': 'cursor'})
+    assert get_stats()['hits'] == 1
+    assert get_stats()['misses'] == 2
+
+    product_factory(shop=shop)
+    res = client.get(shop_products_url(shop))
+    assert res.data['data']['count'] == 2
+
+
+def test_superuser_payloads_are_not_cached(client, super_user, product):
+    """
+    Test that super users, who see extra shop fields, bypass the cache.
+    """
+    client.force_authenticate(user=super_user)
+    client.get(product_url(product))
+    client.get(product_url(product))
+
+    assert get_stats() == {'hits': 0, 'misses': 0, 'hit_rate': 0.0}
+
+
+def test_local_payloads_expire(client, customer, product, settings, mocker):
+    """
+    Test that without a shared cache, payloads expire on their own since
+    writes handled by other workers cannot bump their versions.
+    """
+    client.force_authenticate(user=customer)
+    # a rename whose version bump only reached another worker
+    rename = lambda name: Product.objects.filter(id=product.id).update(name=name)
+
+    settings.CACHE_SHARED = False
+    mocker.patch('common.utils.cache.LOCAL_PAYLOAD_TIMEOUT', 0)
+    client.get(product_url(product))
+    rename("Renamed Elsewhere")
+    assert client.get(product_url(product)).data['data']['name'] == "Renamed Elsewhere"
+
+    settings.CACHE_SHARED = True
+    client.get(product_url(product))
+    rename("Renamed Again")
+    assert client.get(product_url(product)).data['data']['name'] == "Renamed Elsewhere"
+
+
+# =============================================================================
+# TEST CACHE STATS
+# =============================================================================
+
+def test_get_cache_stats(client, super_user, customer, product):
+    """
+    Test that super users can read the cache counters.
+    """
+    client.force_authenticate(user=customer)
+    client.get(product_url(product))
+    client.get(product_url(product))
+    assert client.get(CACHE_STATS_URL).status_code == status.HTTP_403_FORBIDDEN
+
+    client.force_authenticate(user=super_user)
+    res = client.get(CACHE_STATS_URL)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res.data['data'] == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
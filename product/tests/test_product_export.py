@@ -0,0 +1,129 @@
+from django.urls import reverse
+from rest_framework import status
+
+import csv
+import io
+import json
+
+from product.models import Product
+from product.services import ProductExportService
+
+
+def export_url(shop, fmt=None):
+    url = reverse('shop-product-export', kwargs={'shop_id': shop.id})
+    return f"{url}?type={fmt}" if fmt else url
+
+
+def read_content(res):
+    return b"".join(res.streaming_content).decode()
+
+
+# =============================================================================
+# TEST EXPORT PRODUCTS
+# =============================================================================
+
+def test_export_products_as_csv(
+        client, shopowner, product_factory, category_factory, product_image_factory):
+    """
+    Test exporting products with their stock, categories and images.
+    """
+    shop = shopowner.owned_shop
+    boots = product_factory(shop=shop, name="Leather Boots")
+    boots.add_categories([category_factory(name="Footwear").slug, category_factory(name="Winter Sale").slug])
+    boots.inventory.add(7)
+    image = product_image_factory(boots)
+    product_factory(shop=shop, name="Canvas Sneakers")
+    client.force_authenticate(user=shopowner)
+
+    res = client.get(export_url(shop))
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res.streaming
+    assert res['Content-Type'] == 'text/csv'
+    assert res['Content-Disposition'] == f'attachment; filename="shop_{shop.id}_products.csv"'
+
+    rows = list(csv.DictReader(io.StringIO(read_content(res))))
+    assert [r['name'] for r in rows] == ["Leather Boots", "Canvas Sneakers"]
+    assert rows[0]['id'] == str(boots.id)
+    assert rows[0]['stock'] == '7'
+    assert rows[0]['price'] == str(Product.objects.get(id=boots.id).price)
+    assert sorted(rows[0]['categories'].split('|')) == ["Footwear", "Winter Sale"]
+    assert rows[0]['images'] == f"http://testserver{image.image.url}"
+    assert rows[1]['categories'] == '' and rows[1]['images'] == ''
+
+
+def test_export_products_as_jsonl(client, shopowner, product_factory, product_image_factory):
+    """
+    Test exporting products one JSON object per line.
+    """
+    shop = shopowner.owned_shop
+    product = product_factory(shop=shop, name="Leather Boots")
+    product_image_factory(product)
+    client.force_authenticate(user=shopowner)
+
+    res = client.get(export_url(shop, 'jsonl'))
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res['Content-Type'] == 'application/x-ndjson'
+    rows = [json.loads(line) for line in read_content(res).splitlines()]
+    assert len(rows) == 1
+    assert rows[0]['name'] == "Leather Boots"
+    assert rows[0]['stock'] == 0
+    assert len(rows[0]['images']) == 1
+
+
+def test_export_products_in_fixed_number_of_queries(
+        shopowner, product_factory, category, django_assert_num_queries):
+    """
+    Test that the number of queries does not depend on the number of products.
+    """
+    shop = shopowner.owned_shop
+    for _ in range(5):
+        product_factory(shop=shop).add_categories([category.slug])
+    service = ProductExportService(shop, 'csv', chunk_size=2)
+
+    # products with inventory, categories and images per chunk
+    with django_assert_num_queries(3 * 3):
+        lines = list(service.lines())
+    assert len(lines) == 6
+
+
+def test_export_batches_do_not_skip_products(shopowner, product_factory):
+    """
+    Test that batches continue after the last product read, by id
+    among products created at the same time.
+    """
+    shop = shopowner.owned_shop
+    products = [product_factory(shop=shop) for _ in range(5)]
+    Product.objects.filter(shop=shop).update(created_at=products[0].created_at)
+
+    rows = list(ProductExportService(shop, 'jsonl', chunk_size=2).rows())
+
+    assert [row['id'] for row in rows] == sorted(str(p.id) for p in products)
+
+
+def test_export_products_with_invalid_type(client, shopowner):
+    """
+    Test that only CSV and JSONL exports are supported.
+    """
+    client.force_authenticate(user=shopowner)
+
+    res = client.get(export_url(shopowner.owned_shop, 'xml'))
+
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    assert res.data['code'] == 'invalid_type'
+
+
+def test_export_products_by_other_users(client, customer, shopowner, shopowner_factory):
+    """
+    Test that only staff of the shop can export products.
+    """
+    shop = shopowner.owned_shop
+
+    client.force_authenticate(user=customer)
+    res = client.get(export_url(shop))
+    assert res.status_code == status.HTTP_403_FORBIDDEN
+
+    client.force_authenticate(user=shopowner_factory())
+    res = client.get(export_url(shop))
+    assert res.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,220 @@
+from django.urls import reverse
+from rest_framework import status
+
+import pytest
+
+from product.models import CategoryRanking, ProductFeed
+from product.services import RecommendationService
+from product.services.recommendations import merge_rankings
+from product.tasks import refresh_recommendations
+
+
+FEED_URL = reverse('product-feed')
+
+
+@pytest.fixture
+def sell(order_group_factory, order_factory, order_item_factory, shopowner_factory):
+    """
+    Record a sale of the given quantity of a product.
+    Sales are made by a user who is not a customer unless one is given.
+    """
+    buyer = shopowner_factory()
+
+    def create_sale(product, quantity=1, user=None, status='PENDING'):
+        group = order_group_factory(user=user or buyer)
+        order = order_factory(group=group, shop=product.shop, status=status)
+        return order_item_factory(order=order, product=product, quantity=quantity)
+    return create_sale
+
+
+@pytest.fixture
+def catalog(shopowner, product_factory, category_factory):
+    """
+    Two categories of three products each.
+    """
+    shop = shopowner.owned_shop
+    shoes = category_factory(name="Shoes")
+    bags = category_factory(name="Bags")
+    products = {}
+    for category in (shoes, bags):
+        for i in range(3):
+            product = product_factory(shop=shop, name=f"{category.name} {i}")
+            product.add_categories([category.slug])
+            products[product.name] = product
+    return shoes, bags, products
+
+
+def ids(*products):
+    return [p.id.hex for p in products]
+
+
+# =============================================================================
+# TEST RANKINGS
+# =============================================================================
+
+def test_merge_rankings_interleaves_lists():
+    """
+    Test that rankings are merged in turn, without duplicates or excluded ids.
+    """
+    merged = merge_rankings([['a', 'b', 'c'], ['b', 'd'], ['e']], exclude=['c'], size=10)
+    assert merged == ['a', 'b', 'e', 'd']
+    assert merge_rankings([['a', 'b', 'c'], ['d', 'e']], size=3) == ['a', 'd', 'b']
+
+
+def test_categories_are_ranked_by_recent_sales(catalog, sell):
+    """
+    Test that categories rank their products by units sold, leaving out
+    cancelled orders and inactive products.
+    """
+    shoes, bags, p = catalog
+    sell(p["Shoes 0"], quantity=1)
+    sell(p["Shoes 1"], quantity=5)
+    sell(p["Shoes 2"], quantity=2)
+    sell(p["Shoes 2"], quantity=2)
+    sell(p["Bags 0"], quantity=9, status='CANCELLED')
+    sell(p["Bags 1"], quantity=3)
+    sell(p["Bags 2"], quantity=4)
+    p["Bags 2"].deactivate()
+
+    result = RecommendationService().run()
+
+    assert result['categories'] == 2
+    assert CategoryRanking.objects.get(category=shoes).product_ids == ids(
+        p["Shoes 1"], p["Shoes 2"], p["Shoes 0"])
+    assert CategoryRanking.objects.get(category=bags).product_ids == ids(p["Bags 1"])
+
+
+def test_rankings_are_replaced_on_refresh(catalog, sell):
+    """
+    Test that categories without recent sales lose their ranking.
+    """
+    shoes, bags, p = catalog
+    sell(p["Shoes 0"])
+    RecommendationService().run()
+    assert CategoryRanking.objects.filter(category=shoes).exists()
+
+    p["Shoes 0"].deactivate()
+    RecommendationService().run()
+
+    assert not CategoryRanking.objects.exists()
+
+
+def test_rankings_and_feeds_are_updated_in_place(catalog, sell, customer):
+    """
+    Test that a refresh updates the rankings and feeds already stored.
+    """
+    shoes, _, p = catalog
+    customer.profile.add_categories([shoes.slug])
+    sell(p["Shoes 0"])
+    RecommendationService().run()
+    ranking = CategoryRanking.objects.get(category=shoes)
+    feed = ProductFeed.objects.get(user=customer)
+
+    sell(p["Shoes 1"], quantity=3)
+    RecommendationService().run()
+
+    assert CategoryRanking.objects.get(id=ranking.id).product_ids == ids(p["Shoes 1"], p["Shoes 0"])
+    assert ProductFeed.objects.get(id=feed.id).product_ids == ids(p["Shoes 1"], p["Shoes 0"])
+
+
+# =============================================================================
+# TEST FEEDS
+# =============================================================================
+
+def test_feed_merges_preferred_and_ordered_categories(catalog, sell, customer, customer_factory):
+    """
+    Test that a customer feed starts with their preferred categories,
+    then the categories they ordered from, without what they ordered.
+    """
+    shoes, bags, p = catalog
+    for name, quantity in [("Shoes 0", 3), ("Shoes 1", 2), ("Bags 0", 3), ("Bags 1", 2), ("Bags 2", 1)]:
+        sell(p[name], quantity=quantity)
+    customer.profile.add_categories([bags.slug])
+    sell(p["Shoes 0"], user=customer)
+    customer_factory()
+
+    result = RecommendationService().run()
+
+    assert result['feeds'] == 1
+    feed = ProductFeed.objects.get(user=customer).product_ids
+    assert feed == ids(p["Bags 0"], p["Shoes 1"], p["Bags 1"], p["Bags 2"])
+
+
+def test_feed_is_removed_without_signals(catalog, sell, customer):
+    """
+    Test that a customer who no longer has preferred categories loses their feed.
+    """
+    shoes, _, p = catalog
+    sell(p["Shoes 0"])
+    customer.profile.add_categories([shoes.slug])
+    RecommendationService().run()
+    assert ProductFeed.objects.filter(user=customer).exists()
+
+    customer.profile.remove_categories([shoes.slug])
+    RecommendationService().run()
+
+    assert not ProductFeed.objects.filter(user=customer).exists()
+
+
+def test_refresh_recommendations_task(catalog, sell, customer):
+    """
+    Test that the periodic task rebuilds rankings and feeds.
+    """
+    shoes, _, p = catalog
+    sell(p["Shoes 0"])
+    customer.profile.add_categories([shoes.slug])
+
+    assert refresh_recommendations() == "Ranked 1 categories, refreshed 1 feeds."
+    assert ProductFeed.objects.get(user=customer).product_ids == ids(p["Shoes 0"])
+
+
+# =============================================================================
+# TEST FEED ENDPOINT
+# =============================================================================
+
+def test_get_product_feed(client, catalog, customer, django_assert_max_num_queries):
+    """
+    Test that the feed is served in order, without products deactivated since.
+    """
+    _, _, p = catalog
+    ProductFeed.objects.create(
+        user=customer,
+        product_ids=ids(p["Bags 2"], p["Shoes 0"], p["Bags 0"], p["Shoes 1"])
+    )
+    p["Bags 0"].deactivate()
+    client.force_authenticate(user=customer)
+
+    # feed, products, images and categories
+    with django_assert_max_num_queries(6):
+        res = client.get(FEED_URL)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res.data['message'] == "Recommended products retrieved successfully."
+    data = res.data['data']
+    assert data['count'] == 4
+    assert [r['name'] for r in data['results']] == ["Bags 2", "Shoes 0", "Shoes 1"]
+
+
+def test_get_product_feed_without_feed(client, catalog, customer):
+    """
+    Test that users without a feed get the best sellers of every category.
+    """
+    shoes, bags, p = catalog
+    p["Bags 1"].deactivate()
+    CategoryRanking.objects.create(category=shoes, product_ids=ids(p["Shoes 1"], p["Shoes 0"]))
+    CategoryRanking.objects.create(category=bags, product_ids=ids(p["Bags 0"]))
+    client.force_authenticate(user=customer)
+
+    res = client.get(FEED_URL)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert [r['name'] for r in res.data['data']['results']] == ["Shoes 1", "Bags 0", "Shoes 0"]
+
+
+def test_get_product_feed_unauthenticated(client):
+    """
+    Test that the feed requires authentication.
+    """
+    res = client.get(FEED_URL)
+
+    assert res.status_code == status.HTTP_401_UNAUTHORIZED
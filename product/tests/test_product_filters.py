@@ -0,0 +1,178 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+
+from product.management.commands.explain_catalog_queries import find_full_scans
+from product.models import Product
+
+
+PRODUCTS_LIST_URL = reverse('product-list')
+
+
+def shop_products_url(shop):
+    return reverse('shop-product-list-create', kwargs={'shop_id': shop.id})
+
+
+@pytest.fixture
+def priced_products(shopowner_factory, product_factory, category_factory):
+    """
+    Products of two shops, priced 10 to 50, the odd ones in a category
+    and the ones of the second shop out of stock.
+    """
+    shops = [shopowner_factory().owned_shop for _ in range(2)]
+    category = category_factory(name="Garden")
+    products = []
+    for i, price in enumerate([30, 10, 50, 20, 40]):
+        product = product_factory(shop=shops[i % 2])
+        product.price = Decimal(price)
+        product.save(update_fields=['price'])
+        if i % 2:
+            product.add_categories([category.slug])
+        else:
+            product.inventory.add(5)
+        products.append(product)
+    return shops, category, products
+
+
+def prices(res):
+    return [Decimal(p['price']) for p in res.data['data']['results']]
+
+
+# =============================================================================
+# TEST CATALOG FILTERS
+# =============================================================================
+
+def test_filter_products_by_price_range(client, customer, priced_products):
+    """
+    Test filtering products between a minimum and a maximum price.
+    """
+    client.force_authenticate(user=customer)
+
+    res = client.get(PRODUCTS_LIST_URL, {'min_price': '20', 'max_price': '40', 'ordering': 'price'})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert prices(res) == [20, 30, 40]
+
+
+def test_filter_products_by_shop_category_and_stock(client, customer, priced_products):
+    """
+    Test filtering products by shop, category and availability.
+    """
+    shops, category, _ = priced_products
+    client.force_authenticate(user=customer)
+
+    res = client.get(PRODUCTS_LIST_URL, {'shop': str(shops[0].id), 'ordering': '-price'})
+    assert prices(res) == [50, 40, 30]
+
+    res = client.get(PRODUCTS_LIST_URL, {'category': category.slug, 'ordering': 'price'})
+    assert prices(res) == [10, 20]
+
+    res = client.get(PRODUCTS_LIST_URL, {'in_stock': 'true', 'ordering': 'price'})
+    assert prices(res) == [30, 40, 50]
+
+    res = client.get(PRODUCTS_LIST_URL, {'in_stock': 'false', 'ordering': 'price'})
+    assert prices(res) == [10, 20]
+
+    res = client.get(PRODUCTS_LIST_URL, {'category': 'unknown'})
+    assert res.data['data']['count'] == 0
+
+
+def test_filter_shop_products(client, customer, priced_products):
+    """
+    Test filtering and sorting the products of a shop.
+    """
+    shops, _, _ = priced_products
+    client.force_authenticate(user=customer)
+
+    res = client.get(shop_products_url(shops[0]), {'max_price': '40', 'ordering': 'price'})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert prices(res) == [30, 40]
+
+
+def test_sort_products_by_recency(client, customer, priced_products):
+    """
+    Test that products are sorted newest first unless asked otherwise.
+    """
+    client.force_authenticate(user=customer)
+
+    res = client.get(PRODUCTS_LIST_URL)
+    assert prices(res) == [40, 20, 50, 10, 30]
+
+    res = client.get(PRODUCTS_LIST_URL, {'ordering': 'created_at'})
+    assert prices(res) == [30, 10, 50, 20, 40]
+
+
+def test_sort_products_by_price_with_cursor_pagination(client, monkeypatch, customer, priced_products):
+    """
+    Test walking the products by price with cursor pagination.
+    """
+    monkeypatch.setitem(settings.REST_FRAMEWORK, 'PAGE_SIZE', 2)
+    client.force_authenticate(user=customer)
+
+    res = client.get(PRODUCTS_LIST_URL, {'pagination': 'cursor', 'ordering': '-price'})
+    seen = prices(res)
+    while res.data['data']['next']:
+        res = client.get(res.data['data']['next'])
+        seen.extend(prices(res))
+
+    assert seen == [50, 40, 30, 20, 10]
+
+
+@pytest.mark.parametrize("params, code", [
+    ({'ordering': 'name'}, 'invalid_ordering'),
+    ({'min_price': 'cheap'}, 'invalid_filters'),
+    ({'shop': 'not-a-uuid'}, 'invalid_filters'),
+])
+def test_filter_products_with_invalid_params(client, customer, params, code):
+    """
+    Test that unsupported sort modes and invalid filters are rejected.
+    """
+    client.force_authenticate(user=customer)
+
+    res = client.get(PRODUCTS_LIST_URL, params)
+
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    assert res.data['code'] == code
+
+
+# =============================================================================
+# TEST CATALOG QUERY PLANS
+# =============================================================================
+
+def test_catalog_queries_use_indexes(shopowner, product_factory):
+    """
+    Test that no filter and sort combination scans the whole product table.
+    """
+    for _ in range(3):
+        product_factory(shop=shopowner.owned_shop)
+    out = StringIO()
+
+    call_command('explain_catalog_queries', stdout=out)
+
+    assert "catalog queries use indexes" in out.getvalue()
+    assert Product.objects.count() == 3
+
+
+@pytest.mark.parametrize('vendor, plan, scans', [
+    ('sqlite', "SCAN product_catalogentry", 1),
+    ('sqlite', "SCAN product_catalogentry USING INDEX catalog_created_idx", 0),
+    ('sqlite', "SCAN product_catalogentry USING INDEX catalog_shop_idx\nUSE TEMP B-TREE FOR ORDER BY", 1),
+    ('sqlite', "SEARCH product_catalogentry USING INDEX catalog_shop_idx (shop_id=?)", 0),
+    ('mysql', "1 SIMPLE product_catalogentry None ALL None None None None 3 100.0 Using where", 1),
+    ('mysql', "1 SIMPLE product_catalogentry None index None catalog_created_idx 8 None 20 100.0 None", 0),
+    ('mysql', "1 SIMPLE product_catalogentry None index None catalog_shop_idx 8 None 3 100.0 Using filesort", 1),
+    ('mysql', "1 SIMPLE product_catalogentry None ref catalog_shop_idx catalog_shop_idx 8 const 3 100.0 None", 0),
+])
+def test_full_scans_are_found(vendor, plan, scans):
+    """
+    Test that full reads of the catalog table are told apart from index
+    walks that give the requested order.
+    """
+    assert len(find_full_scans(plan, 'product_catalogentry', vendor)) == scans
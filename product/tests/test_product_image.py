@@ -7,6 +7,7 @@ import pytest
 import uuid
 
 from .fixtures import create_fake_images, create_large_fake_image, create_fake_files
+from common.tasks import sweep_media_tombstones
 from product.models import ProductImage
 
 
@@ -212,6 +213,7 @@ def test_delete_product_image(client, product, product_image, all_users, user_ty
     assert res.status_code == status.HTTP_204_NO_CONTENT
 
     assert ProductImage.objects.filter(product=product).count() == 0
+    sweep_media_tombstones()
     assert not os.path.exists(product_image.image.path)
 
 
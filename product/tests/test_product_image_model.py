@@ -1,5 +1,6 @@
 import os
 
+from common.tasks import sweep_media_tombstones
 from product.models import ProductImage
 
 
@@ -11,8 +12,9 @@ def test_product_image_creation(product, product_image):
     assert type(product_image.id).__name__ == "UUID"
     assert product_image.product == product
     assert ProductImage.objects.count() == 1
-    assert product_image.image.name.startswith(f"shp_{product.shop.id}/products/pdt_{product.id}/")
-    assert product_image.image.path.startswith(str(product.get_image_dir()))
+    # processed images are stored by content
+    digest = product_image.blob.digest
+    assert product_image.image.name == f"blobs/product-image/{digest[:2]}/{digest[2:4]}/{digest}.jpg"
 
 
 def test_product_image_relationship(product, product_image):
@@ -41,6 +43,7 @@ def test_product_image_deletion(product, product_image):
     assert product.images.first() == product_image
 
     product_image.delete()
+    sweep_media_tombstones()
 
     assert not os.path.exists(img_path)
     assert product.images.count() == 0
@@ -0,0 +1,298 @@
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+from unittest.mock import patch
+
+import os
+import pytest
+
+from .fixtures import create_fake_images
+from common.models import MediaBlob
+from common.tasks import sweep_media_tombstones
+from product.models import ImageStatus, ProductImage
+from product.tasks import process_product_image
+from product.utils.renditions import RENDITION_SIZES
+
+
+# =============================================================================
+# TEST UPLOAD
+# =============================================================================
+
+def test_upload_is_processed_in_background(
+        client, shopowner, product, django_capture_on_commit_callbacks):
+    """
+    Test that uploads are stored as is and queued for processing.
+    """
+    url = reverse('product-image-list-create', kwargs={'product_id': product.id})
+    client.force_authenticate(user=shopowner)
+
+    with patch('product.tasks.process_product_image.delay') as mock_delay:
+        with django_capture_on_commit_callbacks(execute=True):
+            res = client.post(url, {'images': create_fake_images(2)}, format='multipart')
+
+    assert res.status_code == status.HTTP_201_CREATED
+    images = list(product.images.all())
+    assert {img.status for img in images} == {ImageStatus.PENDING}
+    assert sorted(c.args[0] for c in mock_delay.call_args_list) == sorted(str(img.id) for img in images)
+
+    # raw uploads are not resized
+    with Image.open(images[0].image.path) as img:
+        assert img.size == (10, 10)
+
+
+def test_pending_image_has_placeholder_url(client, customer, product):
+    """
+    Test that an image is served as a placeholder until it is processed.
+    """
+    image = ProductImage.objects.create(product=product, image=create_fake_images(1)[0])
+    url = reverse('product-image-detail', kwargs={
+        'product_id': product.id,
+        'image_id': image.id
+    })
+    client.force_authenticate(user=customer)
+
+    res = client.get(url)
+    assert res.data['data']['status'] == ImageStatus.PENDING
+    assert res.data['data']['url'].endswith('product/images/placeholder.png')
+
+    process_product_image(str(image.id))
+
+    res = client.get(url)
+    assert res.data['data']['status'] == ImageStatus.READY
+    assert res.data['data']['url'].endswith(ProductImage.objects.get(id=image.id).image.url)
+
+
+# =============================================================================
+# TEST PROCESSING TASK
+# =============================================================================
+
+def test_process_product_image(product):
+    """
+    Test that processing resizes the image and replaces the upload.
+    """
+    image = ProductImage.objects.create(product=product, image=create_fake_images(1)[0])
+    original_path = image.image.path
+
+    process_product_image(str(image.id))
+
+    image.refresh_from_db()
+    assert image.status == ImageStatus.READY
+    assert image.image.name.endswith('.jpg')
+    assert not os.path.exists(original_path)
+    with Image.open(image.image.path) as img:
+        assert img.size == (800, 800)
+        assert img.format == 'JPEG'
+
+
+def test_process_invalid_product_image(product):
+    """
+    Test that an unreadable upload is marked as failed.
+    """
+    image = ProductImage.objects.create(
+        product=product,
+        image=ContentFile(b"not an image", name="broken.jpg")
+    )
+
+    process_product_image(str(image.id))
+
+    image.refresh_from_db()
+    assert image.status == ImageStatus.FAILED
+
+
+def test_process_product_image_unexpected_error(product):
+    """
+    Test that an unexpected processing error marks the image as failed
+    instead of leaving it processing.
+    """
+    image = ProductImage.objects.create(product=product, image=create_fake_images(1)[0])
+
+    with patch.object(ProductImage, 'process', side_effect=ValueError("bad mode")):
+        with pytest.raises(ValueError):
+            process_product_image(str(image.id))
+
+    image.refresh_from_db()
+    assert image.status == ImageStatus.FAILED
+
+
+def test_process_deleted_product_image(product):
+    """
+    Test that an image deleted before processing is skipped.
+    """
+    image = ProductImage.objects.create(product=product, image=create_fake_images(1)[0])
+    image_id = str(image.id)
+    image.delete()
+
+    assert process_product_image(image_id) is None
+
+
+# =============================================================================
+# TEST RENDITIONS
+# =============================================================================
+
+def test_processing_generates_renditions(product):
+    """
+    Test that every size and format is written next to the image.
+    """
+    image = ProductImage.objects.create(product=product, image=create_fake_images(1)[0])
+
+    process_product_image(str(image.id))
+
+    image.refresh_from_db()
+    assert set(image.renditions) == {'jpeg', 'webp'}
+    image_dir = os.path.dirname(image.image.path)
+    for fmt, sizes in image.renditions.items():
+        assert sorted(int(s) for s in sizes) == sorted(RENDITION_SIZES)
+        for size, name in sizes.items():
+            path = image.image.storage.path(name)
+            assert os.path.dirname(path) == image_dir
+            with Image.open(path) as img:
+                assert img.size == (int(size), int(size))
+                assert img.format == fmt.upper()
+
+
+def test_image_srcset(client, customer, product, product_image_factory):
+    """
+    Test that renditions are listed in the srcset of an image.
+    """
+    image = product_image_factory(product)
+    url = reverse('product-image-detail', kwargs={
+        'product_id': product.id,
+        'image_id': image.id
+    })
+    client.force_authenticate(user=customer)
+
+    res = client.get(url)
+
+    srcset = res.data['data']['srcset']
+    entries = srcset['webp'].split(', ')
+    assert [e.rsplit(' ', 1)[1] for e in entries] == [f"{s}w" for s in RENDITION_SIZES]
+    assert entries[0].startswith('http://testserver/')
+    assert entries[0].split(' ')[0].endswith('_160.webp')
+
+
+def test_delete_image_deletes_renditions(product, product_image_factory):
+    """
+    Test that rendition files are deleted with their image.
+    """
+    image = product_image_factory(product)
+    paths = [image.image.storage.path(n) for s in image.renditions.values() for n in s.values()]
+    assert all(os.path.exists(p) for p in paths)
+
+    image.delete()
+    sweep_media_tombstones()
+
+    assert not any(os.path.exists(p) for p in paths)
+
+
+def test_generate_image_renditions_command(product):
+    """
+    Test that renditions are backfilled for processed images without them.
+    """
+    image = ProductImage.objects.create(
+        product=product,
+        image=create_fake_images(1)[0],
+        status=ImageStatus.READY
+    )
+    pending = ProductImage.objects.create(product=product, image=create_fake_images(1)[0])
+
+    call_command('generate_image_renditions')
+
+    image.refresh_from_db()
+    pending.refresh_from_db()
+    assert len(image.renditions['jpeg']) == len(RENDITION_SIZES)
+    assert pending.renditions == {}
+
+
+# =============================================================================
+# TEST CONTENT-ADDRESSED STORAGE
+# =============================================================================
+
+def test_identical_uploads_share_files(product_factory, shopowner):
+    """
+    Test that the same bytes are processed and stored once.
+    """
+    upload = create_fake_images(1)[0]
+    content = upload.read()
+    first = ProductImage.objects.create(
+        product=product_factory(shop=shopowner.owned_shop),
+        image=ContentFile(content, name="a.jpg"))
+    second = ProductImage.objects.create(
+        product=product_factory(shop=shopowner.owned_shop),
+        image=ContentFile(content, name="b.jpg"))
+
+    process_product_image(str(first.id))
+    with patch.object(ProductImage, 'make_canvas') as mock_canvas:
+        process_product_image(str(second.id))
+    mock_canvas.assert_not_called()
+
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert second.status == ImageStatus.READY
+    assert second.image.name == first.image.name
+    assert second.renditions == first.renditions
+    assert first.blob.ref_count == 2
+
+    # files are deleted with the last image using them
+    path = first.image.path
+    first.delete()
+    sweep_media_tombstones()
+    assert os.path.exists(path)
+    assert MediaBlob.objects.get(id=second.blob_id).ref_count == 1
+    second.delete()
+    sweep_media_tombstones()
+    assert not os.path.exists(path)
+    assert not MediaBlob.objects.exists()
+
+
+def test_upload_of_stored_image_is_ready(
+        client, shopowner, product, product_factory, django_capture_on_commit_callbacks):
+    """
+    Test that an upload already stored is not processed again.
+    """
+    upload = create_fake_images(1)[0]
+    content = upload.read()
+    stored = ProductImage.objects.create(
+        product=product_factory(shop=shopowner.owned_shop),
+        image=ContentFile(content, name="a.jpg"))
+    stored.process()
+
+    url = reverse('product-image-list-create', kwargs={'product_id': product.id})
+    client.force_authenticate(user=shopowner)
+    upload.seek(0)
+    with patch('product.tasks.process_product_image.delay') as mock_delay:
+        with django_capture_on_commit_callbacks(execute=True):
+            res = client.post(url, {'images': [upload]}, format='multipart')
+
+    assert res.status_code == status.HTTP_201_CREATED
+    mock_delay.assert_not_called()
+    image = product.images.get()
+    assert image.status == ImageStatus.READY
+    assert image.image.name == stored.image.name
+    assert image.blob.ref_count == 2
+
+
+def test_update_images_keeps_unchanged_images(product, product_image_factory):
+    """
+    Test that images uploaded again are kept and not processed again.
+    """
+    content = create_fake_images(1)[0].read()
+    kept = ProductImage.objects.create(product=product, image=ContentFile(content, name="a.jpg"))
+    kept.process()
+    removed = product_image_factory(product)
+    removed_path = removed.image.path
+
+    with patch.object(ProductImage, 'schedule_processing') as mock_schedule:
+        product.update_images([
+            SimpleUploadedFile("a.jpg", content, content_type="image/jpeg"),
+            create_fake_images(1)[0]
+        ])
+    sweep_media_tombstones()
+
+    assert ProductImage.objects.filter(id=kept.id).exists()
+    assert not ProductImage.objects.filter(id=removed.id).exists()
+    assert not os.path.exists(removed_path)
+    assert product.images.count() == 2
+    assert mock_schedule.call_count == 1
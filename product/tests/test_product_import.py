@@ -0,0 +1,253 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.urls import reverse
+from rest_framework import status
+
+from collections import Counter
+
+import json
+import pytest
+import re
+
+from product.models import CatalogEntry, Category, CategoryFacetCount, Product
+from product.services import ProductImportService
+from product.services.product_import import DUPLICATE_NAME_ERROR
+
+
+def import_url(shop):
+    return reverse('shop-product-import', kwargs={'shop_id': shop.id})
+
+
+def csv_file(lines, name='products.csv'):
+    return SimpleUploadedFile(name, "\n".join(lines).encode(), content_type='text/csv')
+
+
+def jsonl_file(rows, name='products.jsonl'):
+    content = "\n".join(r if isinstance(r, str) else json.dumps(r) for r in rows)
+    return SimpleUploadedFile(name, content.encode(), content_type='application/jsonl')
+
+
+# =============================================================================
+# TEST IMPORT PRODUCTS
+# =============================================================================
+
+def test_import_products_from_csv(client, shopowner, category_factory):
+    """
+    Test importing products with their stock and categories.
+    """
+    shop = shopowner.owned_shop
+    category_factory(name="Footwear")
+    category_factory(name="Winter Sale")
+    file = csv_file([
+        "name,description,price,stock,categories",
+        "Leather Boots,Warm boots.,120.50,7,Footwear|Winter Sale",
+        "Canvas Sneakers,Light shoes.,40,0,",
+    ])
+    client.force_authenticate(user=shopowner)
+
+    res = client.post(import_url(shop), {'file': file}, format='multipart')
+
+    assert res.status_code == status.HTTP_201_CREATED
+    assert res.data['data'] == {'created': 2, 'failed': 0, 'errors': []}
+
+    boots = Product.objects.get(shop=shop, name="Leather Boots")
+    assert str(boots.price) == '120.50'
+    assert boots.inventory.stock == 7
+    assert sorted(boots.categories.values_list('slug', flat=True)) == ['footwear', 'winter-sale']
+    assert Product.objects.get(shop=shop, name="Canvas Sneakers").inventory.stock == 0
+
+    # imported products are searchable and counted in the facets
+    assert list(Product.objects.search('boots')) == [boots]
+    footwear = Category.objects.get(slug='footwear')
+    assert footwear.product_count == 1
+    assert CategoryFacetCount.objects.get(category=footwear, shop=shop).product_count == 1
+
+    # and listed with the same entries a rebuild would write
+    fields = ['shop_id', 'shop_name', 'name', 'price', 'stock', 'image_url', 'categories', 'created_at']
+    listed = CatalogEntry.objects.order_by('name').values(*fields)
+    rebuilt = sorted(CatalogEntry.build(shop.products.values_list('id', flat=True)), key=lambda e: e.name)
+    assert list(listed) == [{field: getattr(entry, field) for field in fields} for entry in rebuilt]
+
+
+def test_import_products_with_invalid_rows(client, shopowner, product_factory):
+    """
+    Test that invalid rows are reported and the others imported.
+    """
+    shop = shopowner.owned_shop
+    product_factory(shop=shop, name="Leather Boots")
+    file = jsonl_file([
+        {'name': "leather boots", 'description': "Taken.", 'price': 10},
+        {'name': "Sneakers", 'description': "Light shoes.", 'price': 40, 'stock': 3},
+        {'name': "SNEAKERS", 'description': "Same name.", 'price': 40},
+        {'name': "Sandals", 'description': "Open shoes.", 'price': "ten"},
+        {'name': "Slippers", 'description': "Soft.", 'categories': ["Unknown"]},
+        "{not json",
+        {'name': "Clogs", 'description': "Wooden.", 'price': 30, 'stock': "3.7"},
+        {'name': "Boots", 'description': "Many.", 'price': 30, 'stock': 2 ** 31},
+    ])
+    client.force_authenticate(user=shopowner)
+
+    res = client.post(import_url(shop), {'file': file}, format='multipart')
+
+    assert res.status_code == status.HTTP_207_MULTI_STATUS
+    assert res.data['code'] == 'unprocessed_rows'
+    report = res.data['errors']
+    assert report['created'] == 1
+    assert report['failed'] == 7
+    assert [(e['row'], list(e['errors'])) for e in report['errors']] == [
+        (1, ['name']),
+        (3, ['name']),
+        (4, ['price']),
+        (5, ['categories']),
+        (6, ['row']),
+        (7, ['stock']),
+        (8, ['stock']),
+    ]
+    assert shop.products.count() == 2
+
+
+def test_import_products_with_names_the_database_refuses(client, shopowner, product_factory, monkeypatch):
+    """
+    Test that names colliding only under the collation of the database
+    are reported, and the rest of the batch imported.
+    """
+    shop = shopowner.owned_shop
+    product_factory(shop=shop, name="Café")
+    write = ProductImportService._write
+
+    def accent_insensitive_write(service, batch):
+        # what MySQL's collation does for the unique name index
+        if any(data['normalized_name'] == 'cafe' for data in batch):
+            raise IntegrityError("Duplicate entry 'cafe' for key 'unique_product_name_per_shop'")
+        return write(service, batch)
+
+    monkeypatch.setattr(ProductImportService, '_write', accent_insensitive_write)
+    file = jsonl_file([
+        {'name': "Tea", 'description': "Green.", 'price': 5},
+        {'name': "Cafe", 'description': "Black.", 'price': 4},
+    ])
+    client.force_authenticate(user=shopowner)
+
+    res = client.post(import_url(shop), {'file': file}, format='multipart')
+
+    assert res.status_code == status.HTTP_207_MULTI_STATUS
+    assert res.data['errors']['created'] == 1
+    assert res.data['errors']['errors'] == [{'row': 2, 'errors': {'name': [DUPLICATE_NAME_ERROR]}}]
+    assert shop.products.filter(name="Tea").exists()
+
+
+def test_import_products_raises_other_integrity_errors(shopowner, monkeypatch):
+    """
+    Test that integrity errors other than a taken name are not
+    reported as duplicate names.
+    """
+    def failing_write(service, batch):
+        raise IntegrityError("Duplicate entry 'cafe' for key 'unique_search_term_per_product'")
+
+    monkeypatch.setattr(ProductImportService, '_write', failing_write)
+    service = ProductImportService(shopowner.owned_shop)
+
+    with pytest.raises(IntegrityError):
+        service.run([(1, {'name': "Cafe", 'description': "Black.", 'price': 4})])
+    assert service.get_report()['failed'] == 0
+
+
+def test_import_products_with_only_invalid_rows(client, shopowner):
+    """
+    Test importing a file where no row is valid.
+    """
+    shop = shopowner.owned_shop
+    file = csv_file(["name,description,price", ",No name.,10"])
+    client.force_authenticate(user=shopowner)
+
+    res = client.post(import_url(shop), {'file': file}, format='multipart')
+
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    assert res.data['errors']['errors'][0]['errors'] == {'name': ["This field is required."]}
+
+
+def test_import_products_in_fixed_number_of_queries(monkeypatch, client, shopowner, category, django_assert_max_num_queries):
+    """
+    Test that the number of queries does not grow with the number of rows.
+    """
+    shop = shopowner.owned_shop
+    rows = [
+        {'name': f"Product {i}", 'description': "Imported.", 'price': i, 'stock': i, 'categories': [category.name]}
+        for i in range(300)
+    ]
+    client.force_authenticate(user=shopowner)
+    if connection.vendor == 'sqlite':
+        # Django splits sqlite bulk inserts into chunks of 999 parameters, sqlite
+        # 3.32+ takes 32766, so batch them as on MySQL: one statement per table
+        monkeypatch.setattr(connection.features, 'max_query_params', 32766)
+
+    with django_assert_max_num_queries(20) as queries:
+        res = client.post(import_url(shop), {'file': jsonl_file(rows)}, format='multipart')
+
+    assert res.status_code == status.HTTP_201_CREATED
+    assert shop.products.count() == 300
+    inserts = Counter(
+        match.group(1) for match in
+        (re.match(r'INSERT\b.*?\bINTO [`"]?(\w+)', query['sql']) for query in queries.captured_queries)
+        if match
+    )
+    assert set(inserts.values()) == {1}
+
+
+def test_import_products_with_invalid_file(client, shopowner):
+    """
+    Test importing without a file or with an unsupported format.
+    """
+    shop = shopowner.owned_shop
+    client.force_authenticate(user=shopowner)
+
+    res = client.post(import_url(shop), {}, format='multipart')
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    assert res.data['code'] == 'missing_field'
+
+    file = SimpleUploadedFile('products.xlsx', b"data")
+    res = client.post(import_url(shop), {'file': file}, format='multipart')
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    assert res.data['code'] == 'invalid_format'
+
+    file = SimpleUploadedFile('products.csv', "name,description,price\nCafé,Hot.,4\n".encode('latin-1'))
+    res = client.post(import_url(shop), {'file': file}, format='multipart')
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    assert res.data['code'] == 'invalid_file'
+
+    file = csv_file(["name,description,price", 'Boots,"' + "x" * 200000 + '",10'])
+    res = client.post(import_url(shop), {'file': file}, format='multipart')
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    assert res.data['code'] == 'invalid_file'
+    assert shop.products.count() == 0
+
+
+def test_import_products_by_other_users(client, customer, shopowner, shopowner_factory):
+    """
+    Test that only staff of the shop can import products.
+    """
+    shop = shopowner.owned_shop
+    file = csv_file(["name,description,price", "Boots,Warm.,10"])
+
+    client.force_authenticate(user=customer)
+    res = client.post(import_url(shop), {'file': file}, format='multipart')
+    assert res.status_code == status.HTTP_403_FORBIDDEN
+
+    client.force_authenticate(user=shopowner_factory())
+    res = client.post(import_url(shop), {'file': file}, format='multipart')
+    assert res.status_code == status.HTTP_403_FORBIDDEN
+    assert shop.products.count() == 0
+
+
+def test_import_products_command(shopowner, tmp_path):
+    """
+    Test importing products with the import_products command.
+    """
+    shop = shopowner.owned_shop
+    path = tmp_path / 'products.jsonl'
+    path.write_text(json.dumps({'name': "Boots", 'description': "Warm.", 'price': 10}))
+
+    call_command('import_products', str(shop.id), str(path))
+
+    assert shop.products.get().name == "Boots"
@@ -1,10 +1,12 @@
+from django.core.management import call_command
 from django.core.files.uploadedfile import SimpleUploadedFile
-from io import BytesIO
+from io import BytesIO, StringIO
 from PIL import Image
 
 import os
 
 from .fixtures import create_fake_images
+from common.tasks import sweep_media_tombstones
 from product.models import Product, ProductImage
 
 
@@ -63,6 +65,7 @@ def test_delete_all_images(product):
     assert os.path.exists(img_2.image.path)
 
     product.delete_images()
+    sweep_media_tombstones()
 
     assert not product.images.count() == 2
     assert not os.path.exists(img.image.path)
@@ -79,6 +82,7 @@ def test_update_images(product, product_image):
 
     new_image = create_fake_images(1)
     product.update_images(new_image)
+    sweep_media_tombstones()
     
     assert not os.path.exists(product_image.image.path)
     assert not ProductImage.objects.filter(id=product_image.id).exists()
@@ -128,8 +132,82 @@ def test_product_deletion_cascades_to_images(product, product_image):
     assert os.path.exists(img_path) and os.path.isfile(img_path)
 
     product.safe_delete()
+    sweep_media_tombstones()
 
     assert ProductImage.objects.count() == 0
     assert not Product.objects.filter(id=product.id).exists()
     assert not os.path.exists(img_path)
     assert not os.path.exists(product_image_dir)
+
+
+def test_product_with_active_orders_is_deactivated_on_delete(product, order_group_factory,
+                                                             order_factory, order_item_factory):
+    """
+    Test that a product with active orders is deactivated instead of deleted.
+    """
+    order = order_factory(group=order_group_factory(), shop=product.shop)
+    order_item_factory(order=order, product=product)
+
+    product.safe_delete()
+
+    product.refresh_from_db()
+    assert product.active_order_count == 1
+    assert product.is_active is False
+    assert product.deactivated_at is not None
+
+
+def test_products_bulk_safe_delete(shopowner, product_factory, category, order_group_factory,
+                                   order_factory, order_item_factory):
+    """
+    Test deleting products in bulk deactivates those with active orders.
+    """
+    shop = shopowner.owned_shop
+    products = [product_factory(shop=shop) for _ in range(4)]
+    for product in products:
+        product.add_categories([category.slug])
+    order = order_factory(group=order_group_factory(), shop=shop)
+    for product in products[:2]:
+        order_item_factory(order=order, product=product)
+
+    deleted, deactivated = Product.objects.filter(shop=shop).safe_delete()
+
+    assert (deleted, deactivated) == (2, 2)
+    remaining = Product.objects.filter(shop=shop)
+    assert set(remaining.values_list('id', flat=True)) == {p.id for p in products[:2]}
+    assert not remaining.filter(is_active=True).exists()
+    category.refresh_from_db()
+    assert category.product_count == 0
+
+
+def test_products_bulk_deactivate_query_count(shopowner, product_factory, category,
+                                              django_assert_max_num_queries):
+    """
+    Test that deactivating products in bulk does not run queries per product.
+    """
+    shop = shopowner.owned_shop
+    for _ in range(10):
+        product_factory(shop=shop).add_categories([category.slug])
+
+    with django_assert_max_num_queries(9):
+        assert Product.objects.filter(shop=shop).deactivate() == 10
+
+    assert not Product.objects.filter(shop=shop, is_active=True).exists()
+    assert Product.objects.filter(shop=shop).deactivate() == 0
+    category.refresh_from_db()
+    assert category.product_count == 0
+
+
+def test_rebuild_active_order_counts(product, order_group_factory, order_factory, order_item_factory):
+    """
+    Test that active order counts are recomputed from the orders.
+    """
+    group = order_group_factory()
+    for order_status in ['PENDING', 'SHIPPED', 'COMPLETED']:
+        order = order_factory(group=group, shop=product.shop, status=order_status)
+        order_item_factory(order=order, product=product)
+    Product.objects.filter(id=product.id).update(active_order_count=7)
+
+    call_command('rebuild_active_order_counts', stdout=StringIO())
+
+    product.refresh_from_db()
+    assert product.active_order_count == 2
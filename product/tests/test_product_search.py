@@ -0,0 +1,198 @@
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+import pytest
+
+from product.models import Product, ProductSearchTerm
+from product.utils.search import tokenize
+
+
+PRODUCTS_LIST_URL = reverse('product-list')
+
+
+def index_terms(product):
+    return dict(
+        ProductSearchTerm.objects.filter(product=product)
+            .values_list('term', 'weight')
+    )
+
+
+# =============================================================================
+# TEST SEARCH INDEX
+# =============================================================================
+
+def test_tokenize():
+    """
+    Test that text is split into normalized terms.
+    """
+    assert tokenize("The Red-Running SHOES, for Kids!") == ['red', 'running', 'shoes', 'kids']
+    assert tokenize("a b c") == []
+    assert tokenize("") == []
+    assert tokenize(None) == []
+
+
+def test_accented_terms_are_indexed_once(shopowner, product_factory):
+    """
+    Test that terms differing only by accents, which the collation of
+    the index compares equal, are indexed as one term.
+    """
+    assert tokenize("Café CAFE naïve") == ['cafe', 'cafe', 'naive']
+    product = product_factory(shop=shopowner.owned_shop, name="Café Mug", description="A cafe mug.")
+
+    terms = index_terms(product)
+    assert terms['cafe'] == 4
+    assert 'café' not in terms
+
+
+def test_product_is_indexed_on_create(shopowner, product_factory):
+    """
+    Test that a new product is added to the search index.
+    """
+    product = product_factory(shop=shopowner.owned_shop, name="Leather Boots")
+
+    terms = index_terms(product)
+    assert terms['leather'] == 3
+    assert terms['boots'] == 3
+    assert terms['product'] == 1  # from the factory description
+
+
+def test_product_is_reindexed_on_update(shopowner, product_factory):
+    """
+    Test that the search index follows product name updates.
+    """
+    product = product_factory(shop=shopowner.owned_shop, name="Leather Boots")
+    product.name = "Canvas Sneakers"
+    product.save()
+
+    terms = index_terms(product)
+    assert 'leather' not in terms
+    assert terms['canvas'] == 3
+
+
+def test_product_is_not_reindexed_on_other_updates(shopowner, product_factory):
+    """
+    Test that saving a product without a new name or description
+    leaves its search index alone.
+    """
+    product = product_factory(shop=shopowner.owned_shop, name="Leather Boots")
+    terms = index_terms(product)
+    product.price += 1
+
+    with CaptureQueriesContext(connection) as queries:
+        product.save()
+
+    assert not [q for q in queries if 'productsearchterm' in q['sql'].lower()]
+    assert index_terms(product) == terms
+
+
+def test_product_is_reindexed_on_category_change(shopowner, product_factory, category_factory):
+    """
+    Test that category slugs are added to and removed from the index.
+    """
+    product = product_factory(shop=shopowner.owned_shop, name="Leather Boots")
+    category = category_factory(name="Winter Footwear")
+
+    product.add_categories([category.name])
+    terms = index_terms(product)
+    assert terms['winter'] == 2
+    assert terms['footwear'] == 2
+
+    product.remove_categories([category.name])
+    assert 'winter' not in index_terms(product)
+
+
+def test_product_is_reindexed_on_category_rename(shopowner, product_factory, category_factory):
+    """
+    Test that renaming a category updates the index of its products.
+    """
+    product = product_factory(shop=shopowner.owned_shop)
+    category = category_factory(name="Winter Footwear")
+    product.add_categories([category.name])
+
+    category.name = "Summer Footwear"
+    category.save()
+
+    terms = index_terms(product)
+    assert 'winter' not in terms
+    assert terms['summer'] == 2
+
+
+def test_rebuild_search_index_command(shopowner, product_factory):
+    """
+    Test that the rebuild_search_index command regenerates the index.
+    """
+    product = product_factory(shop=shopowner.owned_shop, name="Leather Boots")
+    expected = index_terms(product)
+    ProductSearchTerm.objects.all().delete()
+
+    call_command('rebuild_search_index')
+
+    assert index_terms(product) == expected
+
+
+# =============================================================================
+# TEST SEARCH PRODUCTS
+# =============================================================================
+
+def test_search_products(client, customer, shopowner, product_factory, category_factory):
+    """
+    Test that search results are ranked by relevance.
+    """
+    shop = shopowner.owned_shop
+    boots = product_factory(shop=shop, name="Leather Boots")
+    bag = product_factory(shop=shop, name="Leather Bag")
+    bag.add_categories([category_factory(name="Boots Accessories").name])
+    product_factory(shop=shop, name="Canvas Sneakers")
+
+    client.force_authenticate(user=customer)
+    res = client.get(PRODUCTS_LIST_URL, {'search': 'leather boots'})
+
+    assert res.status_code == status.HTTP_200_OK
+    data = res.data['data']
+    assert data['count'] == 2
+    assert [p['id'] for p in data['results']] == [str(boots.id), str(bag.id)]
+
+
+def test_search_products_matches_prefix(client, customer, shopowner, product_factory):
+    """
+    Test that a search term matches indexed terms it is a prefix of.
+    """
+    product = product_factory(shop=shopowner.owned_shop, name="Leather Boots")
+
+    client.force_authenticate(user=customer)
+    res = client.get(PRODUCTS_LIST_URL, {'search': 'leath'})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert [p['id'] for p in res.data['data']['results']] == [str(product.id)]
+
+
+def test_search_products_excludes_inactive_products(client, customer, shopowner, product_factory):
+    """
+    Test that deactivated products are not returned by search.
+    """
+    product = product_factory(shop=shopowner.owned_shop, name="Leather Boots")
+    product.deactivate()
+
+    client.force_authenticate(user=customer)
+    res = client.get(PRODUCTS_LIST_URL, {'search': 'boots'})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res.data['data']['count'] == 0
+
+
+@pytest.mark.parametrize('query', ['the', 'a of', '!!'])
+def test_search_products_without_searchable_terms(client, customer, shopowner, product_factory, query):
+    """
+    Test that a query made only of stop words returns no products.
+    """
+    product_factory(shop=shopowner.owned_shop, name="The Boots")
+
+    client.force_authenticate(user=customer)
+    res = client.get(PRODUCTS_LIST_URL, {'search': query})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res.data['data']['count'] == 0
+    assert Product.objects.count() == 1
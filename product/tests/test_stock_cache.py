@@ -0,0 +1,115 @@
+from django.urls import reverse
+from rest_framework import status
+
+import pytest
+import uuid
+
+from product.models import Inventory, Product
+from product.services import InventoryBatchService, StockReservationService
+from product.utils.stock_cache import LRUCache, get_stocks, local_cache
+
+
+@pytest.fixture
+def stocked(product_factory, shopowner):
+    """
+    Factory of products of the shop owner's shop with stock.
+    """
+    def create(stock=10):
+        product = product_factory(shop=shopowner.owned_shop)
+        product.inventory.add(stock, 'tester')
+        return Product.objects.get(id=product.id)
+    return create
+
+
+# =============================================================================
+# TEST LRU
+# =============================================================================
+
+def test_lru_evicts_least_recently_used():
+    """
+    Test that the LRU drops the least recently read entry when full.
+    """
+    lru = LRUCache(size=2, timeout=60)
+    lru.set_many({'a': 1, 'b': 2})
+    lru.get_many(['a'])
+    lru.set_many({'c': 3})
+
+    assert lru.get_many(['a', 'b', 'c']) == {'a': 1, 'c': 3}
+
+
+def test_lru_entries_expire():
+    """
+    Test that expired entries are not returned.
+    """
+    lru = LRUCache(size=2, timeout=0)
+    lru.set_many({'a': 1})
+
+    assert lru.get_many(['a']) == {}
+
+
+# =============================================================================
+# TEST READS AND WRITES
+# =============================================================================
+
+def test_stock_reads_are_cached(stocked, django_assert_num_queries):
+    """
+    Test that products read without their inventory take their stock
+    from the cache after the first read.
+    """
+    products = [stocked(5), stocked(7)]
+
+    with django_assert_num_queries(1):
+        assert get_stocks(p.id for p in products) == {products[0].id: 5, products[1].id: 7}
+    with django_assert_num_queries(0):
+        assert [p.stock for p in products] == [5, 7]
+
+
+def test_stock_updates_drop_the_cache(stocked, django_capture_on_commit_callbacks):
+    """
+    Test that every update path drops the cached stock at once and again
+    when the transaction commits, and that the next read loads it.
+    """
+    product, other = stocked(10), stocked(10)
+    get_stocks([product.id, other.id])
+
+    with django_capture_on_commit_callbacks(execute=True):
+        product.inventory.subtract(3, 'tester')
+        assert local_cache.get_many([product.id]) == {}
+        # a read before the commit caches a value the commit makes stale
+        local_cache.set_many({product.id: 10})
+    assert local_cache.get_many([product.id]) == {}
+    assert get_stocks([product.id]) == {product.id: 7}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        StockReservationService.hold([(product.inventory.id, uuid.uuid4(), 2)])
+        InventoryBatchService(product.shop, 'tester').apply(
+            [{'product_id': other.id, 'action': 'add', 'quantity': 5}]
+        )
+    assert local_cache.get_many([product.id, other.id]) == {}
+    assert get_stocks([product.id, other.id]) == {product.id: 5, other.id: 15}
+
+    inventory = Inventory.objects.get(product=other)
+    inventory.last_updated_by = 'admin'
+    inventory.save()
+    assert local_cache.get_many([other.id]) == {}
+
+
+def test_cart_precheck_reads_the_cache(client, customer, shopowner, create_cart_items):
+    """
+    Test that the cart pre-check reads the stock of all its items from
+    the cache, and that checkout still refuses stock that is gone.
+    """
+    _, products = create_cart_items(customer.cart, shops=[shopowner.owned_shop], num_items=2, quantity=4)
+    client.force_authenticate(user=customer)
+    url = reverse('cart-detail')
+
+    res = client.get(url)
+    assert res.status_code == status.HTTP_200_OK
+    assert [item['stock'] for item in res.data['data']['items']] == [20, 20]
+
+    # a change made without going through the cache is not seen by the pre-check
+    Inventory.objects.filter(product=products[0]).update(_stock=2)
+    res = client.get(url)
+    assert res.data['data']['is_valid'] is True
+    inventory_id = products[0].inventory.id
+    assert StockReservationService.hold([(inventory_id, uuid.uuid4(), 4)]) == [inventory_id]
@@ -0,0 +1,198 @@
+from datetime import timedelta
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework import status
+
+import pytest
+import uuid
+
+from order.models import OrderGroup
+from order.tasks import restock_inventory_with_cancelled_order
+from payment.tasks import verify_paystack_payment
+from product.models import (
+    CatalogEntry,
+    Inventory,
+    InventoryMovement,
+    MovementReason,
+    ReservationStatus,
+    StockReservation
+)
+from product.services import InventoryLedgerService, StockReservationService
+from product.tasks import release_expired_stock_reservations
+
+
+@pytest.fixture
+def stocked(product_factory, shopowner):
+    """
+    Factory of products of the shop owner's shop with stock.
+    """
+    def create(stock=10):
+        product = product_factory(shop=shopowner.owned_shop)
+        product.inventory.add(stock, 'tester')
+        return Inventory.objects.get(product=product)
+    return create
+
+
+def expire():
+    StockReservation.objects.update(expires_at=now() - timedelta(seconds=1))
+
+
+@pytest.fixture
+def digital_checkout(client, customer, shipping_address_factory, shopowner, create_cart_items):
+    """
+    Check out two products of the shop owner's shop, 4 items each,
+    to be paid online. Returns the order group and the products.
+    """
+    _, products = create_cart_items(customer.cart, shops=[shopowner.owned_shop], num_items=2, quantity=4)
+    client.force_authenticate(user=customer)
+    res = client.post(reverse('checkout'), {
+        'shipping_address': shipping_address_factory(user=customer).id,
+        'fulfillment_method': 'PICKUP',
+        'payment_method': 'DIGITAL'
+    }, format='json')
+    assert res.status_code == status.HTTP_201_CREATED
+    return OrderGroup.objects.get(id=res.data['data']['id']), products
+
+
+def stock_of(product):
+    inventory = Inventory.objects.get(product=product)
+    return inventory.stock, inventory.reserved
+
+
+# =============================================================================
+# TEST HOLDS
+# =============================================================================
+
+def test_hold_reserves_available_stock(stocked, django_capture_on_commit_callbacks):
+    """
+    Test that a hold reduces the available stock, not the stock, and
+    that the catalog follows once the hold commits.
+    """
+    a, b = stocked(10), stocked(5)
+    order_id = uuid.uuid4()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert StockReservationService.hold([(a.id, order_id, 4), (b.id, order_id, 5)]) == []
+        assert CatalogEntry.objects.get(product=a.product).stock == 10
+
+    a.refresh_from_db()
+    assert (a.stock, a.reserved, a.available) == (10, 4, 6)
+    assert a.product.stock == 6
+    assert CatalogEntry.objects.get(product=a.product).stock == 6
+    assert StockReservation.objects.filter(order_id=order_id, status=ReservationStatus.HELD).count() == 2
+
+
+def test_hold_is_all_or_nothing(stocked):
+    """
+    Test that no stock is reserved when any line cannot be held.
+    """
+    a, b = stocked(10), stocked(5)
+    StockReservationService.hold([(b.id, uuid.uuid4(), 3)])
+
+    failed = StockReservationService.hold([(a.id, uuid.uuid4(), 4), (b.id, uuid.uuid4(), 3)])
+
+    assert failed == [b.id]
+    assert stock_of(a.product) == (10, 0)
+    assert stock_of(b.product) == (5, 3)
+    assert StockReservation.objects.count() == 1
+
+
+def test_reserved_stock_cannot_be_subtracted(client, shopowner, stocked):
+    """
+    Test that staff cannot take out stock held for orders.
+    """
+    inventory = stocked(10)
+    StockReservationService.hold([(inventory.id, uuid.uuid4(), 8)])
+    client.force_authenticate(user=shopowner)
+
+    res = client.post(
+        reverse('inventory-update', args=[inventory.product_id]),
+        {'action': 'subtract', 'quantity': 3},
+        format='json'
+    )
+
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    assert res.data['message'] == "Insufficient stock to complete this operation. Only 2 left."
+    assert stock_of(inventory.product) == (10, 8)
+
+
+# =============================================================================
+# TEST CHECKOUT, PAYMENT AND EXPIRY
+# =============================================================================
+
+def test_digital_checkout_holds_stock_until_paid(mocker, customer, payment_factory, digital_checkout):
+    """
+    Test that an online payment converts the holds of its orders.
+    """
+    group, products = digital_checkout
+    assert [stock_of(p) for p in products] == [(20, 4), (20, 4)]
+    assert not InventoryMovement.objects.filter(reason=MovementReason.CHECKOUT).exists()
+
+    payment = payment_factory(user=customer, group=group, verified=False)
+    response = mocker.Mock(status_code=200)
+    response.json.return_value = {'data': {'status': 'success'}}
+    mocker.patch('payment.tasks.requests.get', return_value=response)
+    verify_paystack_payment({'reference': str(payment.reference)})
+
+    assert [stock_of(p) for p in products] == [(16, 0), (16, 0)]
+    assert set(StockReservation.objects.values_list('status', flat=True)) == {ReservationStatus.CONVERTED}
+    assert InventoryMovement.objects.filter(reason=MovementReason.CHECKOUT).count() == 2
+    assert not InventoryLedgerService.reconcile().exists()
+
+
+def test_expired_holds_are_released(digital_checkout):
+    """
+    Test that expired holds make their stock available again, and
+    that a payment after expiry takes the stock if it is still there.
+    """
+    group, products = digital_checkout
+    StockReservationService.release_expired()
+    assert [stock_of(p) for p in products] == [(20, 4), (20, 4)]
+
+    expire()
+    assert release_expired_stock_reservations() == "Released 2 expired stock reservations."
+    assert [stock_of(p) for p in products] == [(20, 0), (20, 0)]
+
+    # the second product sold out in the meantime
+    products[1].inventory.subtract(18, 'tester')
+    assert StockReservationService.convert(group.orders.values_list('id', flat=True)) == 1
+    assert [stock_of(p) for p in products] == [(16, 0), (2, 0)]
+
+
+def test_cancelled_orders_release_their_holds(digital_checkout):
+    """
+    Test that cancelling an unpaid order releases its stock instead of
+    restocking stock that was never taken out.
+    """
+    group, products = digital_checkout
+
+    restock_inventory_with_cancelled_order(group.id, order_group=True)
+
+    assert [stock_of(p) for p in products] == [(20, 0), (20, 0)]
+    assert set(StockReservation.objects.values_list('status', flat=True)) == {ReservationStatus.RELEASED}
+
+    # restocking again after the holds were released changes nothing
+    restock_inventory_with_cancelled_order(group.orders.first().id)
+    assert [stock_of(p) for p in products] == [(20, 0), (20, 0)]
+
+
+def test_cash_checkout_takes_stock_at_once(client, customer, shipping_address_factory, shopowner, create_cart_items):
+    """
+    Test that cash orders convert their holds during checkout, and are
+    restocked when cancelled.
+    """
+    _, products = create_cart_items(customer.cart, shops=[shopowner.owned_shop], num_items=1, quantity=4)
+    client.force_authenticate(user=customer)
+
+    res = client.post(reverse('checkout'), {
+        'shipping_address': shipping_address_factory(user=customer).id,
+        'fulfillment_method': 'PICKUP',
+        'payment_method': 'CASH'
+    }, format='json')
+
+    assert res.status_code == status.HTTP_201_CREATED
+    assert stock_of(products[0]) == (16, 0)
+    assert StockReservation.objects.get().status == ReservationStatus.CONVERTED
+
+    restock_inventory_with_cancelled_order(res.data['data']['id'], order_group=True)
+    assert stock_of(products[0]) == (20, 0)
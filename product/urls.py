@@ -1,13 +1,20 @@
 from django.urls import path
 
 from product.api.v1.routes import (
+    CatalogCacheStatsView,
     CategoryListCreateView,
     CategoryDetailView,
     InventoryUpdateView,
+    ProductBestsellersView,
     ProductDetailView,
+    ProductFeedView,
     ProductListView,
     ProductCategoryUpdateView,
+    ShopInventoryBatchView,
+    ShopProductBestsellersView,
     ShopProductListCreateView,
+    ShopProductImportView,
+    ShopProductExportView,
     ProductImageDetailView,
     ProductImageListCreateView
 )
@@ -16,8 +23,13 @@ from product.api.v1.routes import (
 urlpatterns = [
     # product urls
     path('products/', ProductListView.as_view(), name="product-list"),
+    path('products/for-you/', ProductFeedView.as_view(), name="product-feed"),
+    path('products/bestsellers/', ProductBestsellersView.as_view(), name="product-bestsellers"),
     path('products/<str:product_id>/', ProductDetailView.as_view(), name="product-detail"),
     path('shops/<str:shop_id>/products/', ShopProductListCreateView.as_view(), name="shop-product-list-create"),
+    path('shops/<str:shop_id>/products/import/', ShopProductImportView.as_view(), name="shop-product-import"),
+    path('shops/<str:shop_id>/products/export/', ShopProductExportView.as_view(), name="shop-product-export"),
+    path('shops/<str:shop_id>/products/bestsellers/', ShopProductBestsellersView.as_view(), name="shop-product-bestsellers"),
     
     # product image urls
     path('products/<str:product_id>/images/', ProductImageListCreateView.as_view(), name="product-image-list-create"),
@@ -32,5 +44,9 @@ urlpatterns = [
 
     # product inventory
     path('products/<str:product_id>/inventory/', InventoryUpdateView.as_view(), name='inventory-update'),
+    path('shops/<str:shop_id>/inventory/', ShopInventoryBatchView.as_view(), name='shop-inventory-batch'),
+
+    # catalog cache stats
+    path('catalog/cache-stats/', CatalogCacheStatsView.as_view(), name='catalog-cache-stats'),
 
 ]
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""
+Process-local registry of category slugs.
+
+Categories change rarely but are resolved from their slugs on every
+product create and update. Each process keeps the slug -> id map in
+memory and reloads it when the categories version in the shared cache
+changes, which Category.save and Category.delete bump.
+
+Without a shared cache (CACHE_SHARED) the version only changes with the
+writes of the same process, so the map is also reloaded after a few
+seconds, and slugs not found in it are looked up on their own.
+"""
+from django.apps import apps
+from django.conf import settings
+from django.utils.text import slugify
+
+import time
+
+from common.utils.cache import CATEGORIES_VERSION_KEY, get_versions
+
+
+# age of a map that writes in other workers cannot invalidate
+LOCAL_REGISTRY_TIMEOUT = 5  # seconds
+
+
+class CategoryRegistry:
+    """
+    Map of category slugs to ids, and back.
+    """
+
+    def __init__(self):
+        # (version, loaded at, {slug: id}, {id: slug}), replaced as a whole on reload
+        self._state = (None, None, {}, {})
+
+    def _load(self, reload=False):
+        version = get_versions([CATEGORIES_VERSION_KEY])[0]
+        _, loaded_at, _, _ = self._state
+        if not settings.CACHE_SHARED and loaded_at is not None:
+            reload = reload or time.monotonic() - loaded_at >= LOCAL_REGISTRY_TIMEOUT
+        if reload or version != self._state[0]:
+            # the version is read first, so a change made while loading
+            # leaves it outdated and the map is reloaded on next use
+            loaded_at = time.monotonic()
+            Category = apps.get_model('product', 'Category')
+            ids = dict(Category.objects.values_list('slug', 'id'))
+            self._state = (version, loaded_at, ids, {v: k for k, v in ids.items()})
+        return self._state
+
+    def get_ids(self, names):
+        """
+        Return the {slug: id} map of the categories matching the given
+        names or slugs. Unknown categories are left out.
+        """
+        _, _, ids, _ = self._load()
+        slugs = dict.fromkeys(slugify(n) for n in names)
+        missing = [slug for slug in slugs if slug not in ids]
+        if not settings.CACHE_SHARED and missing:
+            # the category may have been created by another worker
+            ids = self._add_missing(missing)
+        return {slug: ids[slug] for slug in slugs if slug in ids}
+
+    def _add_missing(self, slugs):
+        """
+        Look up slugs missing from the map with one query on the slug
+        index, instead of reloading every category, and add those found.
+        Slugs come from the query string, this runs for unknown ones.
+        """
+        Category = apps.get_model('product', 'Category')
+        found = dict(Category.objects.filter(slug__in=slugs).values_list('slug', 'id'))
+        version, loaded_at, ids, slugs_by_id = self._state
+        if found:
+            ids = {**ids, **found}
+            slugs_by_id = {**slugs_by_id, **{v: k for k, v in found.items()}}
+            self._state = (version, loaded_at, ids, slugs_by_id)
+        return ids
+
+    def get_slugs(self, category_ids):
+        """
+        Return the slugs of the given category ids.
+        """
+        _, _, _, slugs = self._load()
+        return [slugs[i] for i in category_ids if i in slugs]
+
+    def get_map(self):
+        """
+        Return a copy of the {slug: id} map of every category.
+        """
+        _, _, ids, _ = self._load()
+        return dict(ids)
+
+    def clear(self):
+        self._state = (None, None, {}, {})
+
+
+category_registry = CategoryRegistry()
@@ -0,0 +1,53 @@
+"""
+State of the catalog responses read from the database, which the
+conditional GETs are validated against without a shared cache: the
+cache versions of a process do not see the writes of the others.
+
+Some changes leave no updated_at behind (a category rename, a hold on
+a shard, an image getting ready), so the state is made of the values
+themselves and only gives an ETag, never a Last-Modified.
+
+The product list has no state: the values of a whole filtered range
+cannot be read for less than the page itself, so it is only validated
+with a shared cache.
+"""
+from django.db.models import IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from product.models import Category, Inventory, InventoryShard, ProductImage
+
+
+def categories_state(queryset, count_field='product_count'):
+    """
+    Return the state of a list of categories, with the product counts
+    listed for them.
+    """
+    return list(queryset.order_by('id').values_list('id', 'name', count_field))
+
+
+def product_state(product_id):
+    """
+    Return the state of a product and of everything its payload nests:
+    stock, shop, images and categories.
+    """
+    shard_stock = Subquery(
+        InventoryShard.objects
+            .filter(inventory=OuterRef('pk'))
+            .values('inventory')
+            .annotate(total=Sum('stock'))
+            .values('total'),
+        output_field=IntegerField()
+    )
+    inventory = (
+        Inventory.objects
+            .filter(product_id=product_id)
+            .annotate(available=Inventory.available_expression(), shard_stock=Coalesce(shard_stock, Value(0)))
+            .values_list('product__updated_at', 'product__shop__updated_at', '_stock', 'shard_stock', 'available')
+            .first()
+    )
+    return [
+        inventory,
+        list(ProductImage.objects.filter(product_id=product_id).order_by('id').values_list('id', 'status')),
+        categories_state(Category.objects.filter(products=product_id)),
+    ]
+
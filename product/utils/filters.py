@@ -0,0 +1,55 @@
+import django_filters
+
+from product.models import CatalogEntry
+from product.utils.categories import category_registry
+
+
+# sort modes of the catalog endpoints, each ending with a unique field
+# so it can be used for cursor pagination
+CATALOG_ORDERINGS = {
+    '-created_at': ('-created_at', '-pk'),
+    'created_at': ('created_at', 'pk'),
+    'price': ('price', 'pk'),
+    '-price': ('-price', '-pk'),
+}
+DEFAULT_CATALOG_ORDERING = '-created_at'
+
+
+class CatalogEntryFilter(django_filters.FilterSet):
+    """
+    Filters of the catalog endpoints.
+    Each filter and sort mode is served by one of the CatalogEntry
+    indexes, see the explain_catalog_queries command.
+    """
+    min_price = django_filters.NumberFilter(field_name='price', lookup_expr='gte')
+    max_price = django_filters.NumberFilter(field_name='price', lookup_expr='lte')
+    shop = django_filters.UUIDFilter(field_name='shop_id')
+    category = django_filters.CharFilter(method='filter_category')
+    in_stock = django_filters.BooleanFilter(method='filter_in_stock')
+
+    class Meta:
+        model = CatalogEntry
+        fields = ['min_price', 'max_price', 'shop', 'category', 'in_stock']
+
+    def filter_category(self, queryset, name, value):
+        """
+        Filter products by category slug or name.
+        """
+        category_id = next(iter(category_registry.get_ids([value]).values()), None)
+        if category_id is None:
+            return queryset.none()
+        return queryset.in_category(category_id)
+
+    def filter_in_stock(self, queryset, name, value):
+        if value is None:
+            return queryset
+        if value:
+            return queryset.filter(stock__gt=0)
+        return queryset.filter(stock=0)
+
+
+def get_catalog_ordering(value):
+    """
+    Return the order_by fields of a sort mode, or None if it is not supported.
+    """
+    return CATALOG_ORDERINGS.get((value or DEFAULT_CATALOG_ORDERING).strip().lower())
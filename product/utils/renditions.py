@@ -0,0 +1,58 @@
+from django.core.files.base import ContentFile
+from PIL import Image, features
+
+from io import BytesIO
+import os
+
+
+# square sizes, in pixels, of the renditions of a product image
+RENDITION_SIZES = (160, 400, 800)
+
+# rendition format: (Pillow format, save options)
+RENDITION_FORMATS = {
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+}
+
+EXTENSIONS = {'jpeg': 'jpg', 'webp': 'webp'}
+
+
+def available_formats():
+    """
+    Return the rendition formats supported by the installed Pillow.
+    """
+    return [fmt for fmt in RENDITION_FORMATS if fmt != 'webp' or features.check('webp')]
+
+
+def rendition_name(name, size, fmt):
+    """
+    Return the storage name of a rendition, next to the original.
+    e.g. shp_1/products/pdt_1/ab12cd34.jpg -> shp_1/products/pdt_1/ab12cd34_160.webp
+    """
+    stem, _ = os.path.splitext(name)
+    return f"{stem}_{size}.{EXTENSIONS[fmt]}"
+
+
+def generate_renditions(storage, name, source):
+    """
+    Write every rendition of source next to name.
+    Returns the {format: {size: name}} map of the written files.
+    Args:
+        storage - storage the files are written to.
+        name - storage name of the original image.
+        source - square RGB PIL image, at least as large as the largest size.
+    """
+    renditions = {}
+    for size in RENDITION_SIZES:
+        img = source if source.size == (size, size) else source.resize((size, size), Image.LANCZOS)
+        for fmt in available_formats():
+            pil_format, options = RENDITION_FORMATS[fmt]
+            buffer = BytesIO()
+            img.save(buffer, format=pil_format, **options)
+            path = rendition_name(name, size, fmt)
+            if storage.exists(path):
+                storage.delete(path)
+            saved = storage.save(path, ContentFile(buffer.getvalue()))
+            renditions.setdefault(fmt, {})[str(size)] = saved
+    return renditions
+
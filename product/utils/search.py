@@ -0,0 +1,68 @@
+import re
+import unicodedata
+
+
+# weight of a term depending on the product field it was found in
+NAME_WEIGHT = 3
+CATEGORY_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 50
+MAX_QUERY_TERMS = 10
+
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+STOP_WORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from',
+    'in', 'is', 'it', 'of', 'on', 'or', 'the', 'to', 'with',
+})
+
+
+def fold(text):
+    """
+    Casefold text and strip its accents, so terms are only distinct
+    when the collation of the index (utf8mb4_0900_ai_ci on MySQL)
+    tells them apart: 'Café' and 'cafe' are one term.
+    """
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    """
+    Split text into normalized search terms.
+    Terms are casefolded and stripped of accents, stop words and terms
+    shorter than MIN_TERM_LENGTH are dropped.
+    """
+    if not text:
+        return []
+    return [
+        t[:MAX_TERM_LENGTH]
+        for t in TOKEN_RE.findall(fold(text))
+        if len(t) >= MIN_TERM_LENGTH and t not in STOP_WORDS
+    ]
+
+
+def build_term_weights(name, description, category_slugs):
+    """
+    Build the {term: weight} map used to index a product.
+    A term found in several fields gets the sum of the field weights.
+    """
+    weights = {}
+    fields = [
+        (set(tokenize(name)), NAME_WEIGHT),
+        (set(tokenize(description)), DESCRIPTION_WEIGHT),
+        ({t for slug in category_slugs for t in tokenize(slug)}, CATEGORY_WEIGHT),
+    ]
+    for terms, weight in fields:
+        for term in terms:
+            weights[term] = weights.get(term, 0) + weight
+    return weights
+
+
+def parse_query(query):
+    """
+    Return the distinct terms of a search query, in order.
+    """
+    return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
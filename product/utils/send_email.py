@@ -0,0 +1,28 @@
+from django.core.mail import EmailMultiAlternatives
+from django.template.loader import render_to_string
+from django.conf import settings
+
+
+def send_low_stock_digest(email, shop_name, alerts):
+    """send the digest of the products of a shop running low on stock
+    Args:
+        email (str): recipient email address
+        shop_name (str): name of the shop
+        alerts (list): LowStockAlert objects with their product
+    """
+    subject = f'Products running low at {shop_name}'
+    to = [email]
+    _from = settings.DEFAULT_FROM_EMAIL
+    lines = [
+        f"{alert.inventory.product.name}: {alert.stock} left (threshold {alert.threshold})"
+        for alert in alerts
+    ]
+    text_content = "These products are running low:\n" + "\n".join(lines)
+    context = {
+        'shop_name': shop_name,
+        'alerts': alerts,
+    }
+    html_content = render_to_string('product/low_stock_digest.html', context)
+    email = EmailMultiAlternatives(subject, text_content, _from, to)
+    email.attach_alternative(html_content, "text/html")
+    email.send()
@@ -0,0 +1,162 @@
+"""
+Read cache of the available stock of products, for the pages that show
+stock without selling it: product payloads, the cart and the checkout
+pre-check. Checkout itself holds stock with conditional updates of the
+inventory rows, which stay the only truth.
+
+Stock is kept in a small LRU in each process and, when CACHE_SHARED
+is set, in the shared cache as well so that workers see each other's
+writes. Every stock update drops the cached values of its products at
+once, and again when its transaction commits; the next read loads the
+committed values. Updates are never written to the cache, since the
+commit hooks of several workers can run out of order and an older
+value would then replace a newer one. Entries of the process LRU live
+a few seconds only, since the updates made by other processes cannot
+drop them.
+"""
+from collections import OrderedDict
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+import threading
+import time
+
+
+def stock_key(product_id):
+    return f"stock:product:{product_id}"
+
+
+class LRUCache:
+    """
+    Thread-safe least recently used cache whose entries expire.
+    """
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        """
+        Return the unexpired values of the given keys.
+        """
+        found = {}
+        current = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                value, expires = entry
+                if expires <= current:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = value
+        return found
+
+    def set_many(self, values):
+        expires = time.monotonic() + self.timeout
+        with self._lock:
+            for key, value in values.items():
+                self._entries[key] = (value, expires)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LRUCache(settings.STOCK_CACHE_SIZE, settings.STOCK_CACHE_LOCAL_TIMEOUT)
+
+
+def _load(product_ids):
+    """
+    Read the available stock of the given products from their inventories.
+    """
+    Inventory = apps.get_model('product', 'Inventory')
+    return dict(
+        Inventory.objects
+            .filter(product_id__in=product_ids)
+            .annotate(available=Inventory.available_expression())
+            .values_list('product_id', 'available')
+    )
+
+
+def _store(stocks):
+    local_cache.set_many(stocks)
+    if settings.CACHE_SHARED and stocks:
+        cache.set_many(
+            {stock_key(product_id): stock for product_id, stock in stocks.items()},
+            settings.STOCK_CACHE_SHARED_TIMEOUT
+        )
+
+
+def get_stocks(product_ids):
+    """
+    Return the available stock of the given products, by product id,
+    reading the products missing from the caches in one query.
+    """
+    product_ids = set(product_ids)
+    stocks = local_cache.get_many(product_ids)
+    missing = product_ids.difference(stocks)
+
+    if missing and settings.CACHE_SHARED:
+        shared = cache.get_many([stock_key(product_id) for product_id in missing])
+        found = {
+            product_id: shared[stock_key(product_id)]
+            for product_id in missing if stock_key(product_id) in shared
+        }
+        local_cache.set_many(found)
+        stocks.update(found)
+        missing.difference_update(found)
+
+    if missing:
+        loaded = _load(missing)
+        _store(loaded)
+        stocks.update(loaded)
+    return stocks
+
+
+def get_stock(product_id):
+    """
+    Return the available stock of a product.
+    """
+    return get_stocks([product_id]).get(product_id, 0)
+
+
+def _drop(product_ids):
+    local_cache.delete_many(product_ids)
+    if settings.CACHE_SHARED:
+        cache.delete_many([stock_key(product_id) for product_id in product_ids])
+
+
+def refresh_stocks(product_ids):
+    """
+    Drop the cached stock of the given products after a change.
+    They are dropped now, so nothing older than the change is read from
+    them, and once more when the current transaction commits, since a
+    read made in between cached the stock from before the commit.
+    """
+    product_ids = list(product_ids)
+    if not product_ids:
+        return
+    _drop(product_ids)
+    transaction.on_commit(lambda: _drop(product_ids))
+
+
+def clear_stocks():
+    """
+    Empty the stock cache of this process.
+    """
+    local_cache.clear()
@@ -10,7 +10,9 @@ from common.cores.validators import validate_id
 from common.exceptions import ErrorException
 from common.permissions import IsShopOwner
 from common.utils.api_responses import SuccessAPIResponse
-from common.utils.pagination import Pagination
+from common.utils.cache import is_cacheable, payload_variant
+from common.utils.conditional import conditional_get, make_etag
+from common.utils.pagination import get_paginator
 from shop.models import Shop
 from shop.api.v1.serializers import ShopSerializer
 from shop.api.v1.swagger import (
@@ -31,7 +33,7 @@ class ShopListView(APIView):
         """
         queryset = Shop.objects.all()
         
-        paginator = Pagination()
+        paginator = get_paginator(request)
         paginated_queryset = paginator.paginate_queryset(queryset, request)
         serializers = ShopSerializer(
             paginated_queryset,
@@ -70,10 +72,21 @@ class ShopDetailView(APIView):
                 code='not_found',
                 status_code=status.HTTP_404_NOT_FOUND
             )
-        return Response(SuccessAPIResponse(
-            message="Shop retrieved successfully.",
-            data=ShopSerializer(shop, context={'request': request}).data
-        ).to_dict(), status=status.HTTP_200_OK)
+
+        def respond():
+            return Response(SuccessAPIResponse(
+                message="Shop retrieved successfully.",
+                data=ShopSerializer(shop, context={'request': request}).data
+            ).to_dict(), status=status.HTTP_200_OK)
+
+        if not is_cacheable(request):
+            return respond()
+        return conditional_get(
+            request,
+            respond,
+            etag=make_etag(shop.id, shop.updated_at, payload_variant(request)),
+            last_modified=shop.updated_at
+        )
         
     @extend_schema(**patch_shop_schema)
     def patch(self, request, shop_id):
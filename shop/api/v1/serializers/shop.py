@@ -20,7 +20,7 @@ class ShopSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Shop
-        fields = '__all__'
+        exclude = ['logo_blob']
         read_only_fields = ['id', 'code']
         
     def __init__(self, *args, **kwargs):
@@ -9,7 +9,8 @@ from common.swagger import (
     make_success_schema_response,
     make_unauthorized_error_schema_response,
     build_error_schema_examples,
-    build_error_schema_examples_with_errors_field
+    build_error_schema_examples_with_errors_field,
+    pagination_parameters
 )
 
 from shop.api.v1.serializers import ShopSerializer
@@ -20,6 +21,7 @@ shop_list_schema = {
     'description': 'Retrieve a paginated list of all shops.',
     'tags': ['Shop'],
     'operation_id': 'get_shops',
+    'parameters': pagination_parameters,
     'request': None,
     'responses': {
         200: make_success_schema_response(
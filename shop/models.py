@@ -1,12 +1,19 @@
+from django.core.files.storage import default_storage
 from django.db import models
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 
-import os
 import uuid
 
 from .utils.shop_code import generate_shop_code
+from common.models import MediaBlob, MediaTombstone
+from common.utils.cache import invalidate_shop
 from .utils.uploads import shop_logo_upload_path
 
 
+LOGO_BLOB_KIND = 'shop-logo'
+
+
 class Shop(models.Model):
     """
     Shop model.
@@ -16,6 +23,10 @@ class Shop(models.Model):
     code = models.CharField(max_length=7, unique=True, blank=True)
     description = models.TextField()
     logo = models.ImageField(upload_to=shop_logo_upload_path, null=True)
+    # stored content of the logo, shared by shops with the same logo
+    logo_blob = models.ForeignKey(
+        MediaBlob, on_delete=models.PROTECT, null=True, blank=True,
+        editable=False, related_name='+')
     owner = models.OneToOneField('user.User', on_delete=models.CASCADE, related_name='owned_shop')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -39,15 +50,35 @@ class Shop(models.Model):
                 if not Shop.objects.filter(code=code).exists():
                     self.code = code
                     break
+        previous = self.logo_blob_id
+        replaced = False
+        if self.logo and not self.logo._committed:
+            self.store_logo()
+            replaced = True
+        elif not self.logo and previous:
+            self.logo_blob = None
+            replaced = True
         super().save(*args, **kwargs)
-        
-    def delete(self, *args, **kwargs):
+        if previous and replaced:
+            MediaBlob.release([previous])
+        invalidate_shop(self.id)
+
+    def store_logo(self):
         """
-        Delete a shop instance and associated logo from file system.
+        Point the logo to the stored copy of the uploaded bytes,
+        storing them if no shop uses the same logo.
         """
-        if self.logo and os.path.isfile(self.logo.path):
-            os.remove(self.logo.path)
-        super().delete(*args, **kwargs)
+        digest = MediaBlob.content_digest(self.logo)
+        blob = MediaBlob.acquire(LOGO_BLOB_KIND, digest)
+        if blob is None:
+            name = default_storage.save(
+                MediaBlob.blob_name(LOGO_BLOB_KIND, digest, self.logo.name),
+                self.logo.file
+            )
+            blob = MediaBlob.register(LOGO_BLOB_KIND, digest, name, size=default_storage.size(name))
+        self.logo = blob.name
+        self.logo_blob = blob
+        
         
     def staff_handle_exists(self, staff_handle):
         """
@@ -81,4 +112,22 @@ class Shop(models.Model):
         This does not include the shop owner
         """
         return self.staff_members.all()
-        
\ No newline at end of file
+        
+
+
+@receiver(sender=Shop, signal=post_delete)
+def release_shop_files(sender, instance, **kwargs):
+    """
+    Runs for cascaded deletes too (e.g. when the owner is deleted).
+    Queues the shop directories after the files of its products.
+    """
+    if instance.logo_blob_id:
+        MediaBlob.release([instance.logo_blob_id])
+    elif instance.logo:
+        # a logo stored before blobs
+        MediaTombstone.enqueue([instance.logo.name])
+    MediaTombstone.enqueue([
+        f"shp_{instance.id}/logo",
+        f"shp_{instance.id}/products",
+        f"shp_{instance.id}"
+    ])
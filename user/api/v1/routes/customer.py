@@ -10,7 +10,7 @@ from common.cores.validators import validate_id
 from common.utils.api_responses import SuccessAPIResponse
 from common.exceptions import ErrorException
 from common.permissions import IsCustomer, IsSuperUser
-from common.utils.pagination import Pagination
+from common.utils.pagination import get_paginator
 from user.api.v1.serializers import UserSerializer
 from user.api.v1.swagger import (
     delete_customer_schema,
@@ -30,7 +30,7 @@ class CustomerListView(APIView):
         Gets all customers.
         Only accessible by super users.
         """
-        paginator = Pagination()
+        paginator = get_paginator(request, ordering=('-date_joined', '-id'))
         queryset = User.objects.get_customers()
         paginated_queryset = paginator.paginate_queryset(queryset, request)
         serializers = UserSerializer(paginated_queryset, many=True)
@@ -9,7 +9,7 @@ from common.cores.validators import validate_id
 from common.exceptions import ErrorException
 from common.permissions import IsSuperUser, IsShopOwner
 from common.utils.api_responses import SuccessAPIResponse
-from common.utils.pagination import Pagination
+from common.utils.pagination import get_paginator
 from user.api.v1.serializers import UserSerializer
 from user.api.v1.swagger import (
     get_shopowner_schema,
@@ -28,7 +28,7 @@ class ShopOwnerListView(APIView):
         Gets a paginated list of all shopowners.
         Only accessibly by super users.
         """
-        paginator = Pagination()
+        paginator = get_paginator(request, ordering=('-date_joined', '-id'))
         queryset = User.objects.get_shopowners()
         paginated_queryset = paginator.paginate_queryset(queryset, request)
         serializers = UserSerializer(paginated_queryset, many=True)
@@ -9,7 +9,7 @@ from common.cores.validators import validate_id
 from common.exceptions import ErrorException
 from common.permissions import IsStaff, IsShopOwner
 from common.utils.api_responses import SuccessAPIResponse
-from common.utils.pagination import Pagination
+from common.utils.pagination import get_paginator
 from shop.models import Shop
 from user.api.v1.serializers import (
     UserSerializer,
@@ -46,7 +46,7 @@ class ShopStaffListCreateView(APIView):
         if not (shop == getattr(request.user, 'owned_shop', None)
                 or request.user.is_superuser):
             raise PermissionDenied()
-        paginator = Pagination()
+        paginator = get_paginator(request, ordering=('-date_joined', '-id'))
         queryset = shop.get_all_staff_members()
         paginated_queryset = paginator.paginate_queryset(queryset, request)
         serializers = UserSerializer(paginated_queryset, many=True)
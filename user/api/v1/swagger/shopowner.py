@@ -4,7 +4,8 @@ from common.swagger import (
     make_error_schema_response,
     make_success_schema_response,
     make_not_found_error_schema_response,
-    make_unauthorized_error_schema_response
+    make_unauthorized_error_schema_response,
+    pagination_parameters
 )
 from user.api.v1.serializers import UserSerializer
 
@@ -16,6 +17,7 @@ get_shopowners_schema = {
         Only accessible to super users.',
     'tags': ['Shop-Owner'],
     'operation_id': 'get_shopowners',
+    'parameters': pagination_parameters,
     'request': None,
     'responses': {
         200: make_success_schema_response(
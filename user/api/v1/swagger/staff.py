@@ -11,7 +11,8 @@ from common.swagger import (
     make_error_schema_response,
     make_unauthorized_error_schema_response,
     make_not_found_error_schema_response,
-    polymorphic_response
+    polymorphic_response,
+    pagination_parameters
 )
 from user.api.v1.serializers import UserSerializer
 
@@ -30,6 +31,7 @@ get_shop_staff_members_schema = {
         shopowners can access this endpoint. Shop owners can only get the \
         staff members associated with their shops.',
     'operation_id': 'get_shop_staff',
+    'parameters': pagination_parameters,
     'tags': ['Shop-Staff'],
     'request': None,
     'responses': {
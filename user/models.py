@@ -11,7 +11,7 @@ import uuid
 
 from .managers import UserManager
 from common.exceptions import ErrorException
-from product.models import Category
+from product.utils.categories import category_registry
 
 # Create your models here. 
 
@@ -104,10 +104,9 @@ class UserProfile(models.Model):
         Args: categories (list)
         """
         slugs = [slugify(c) for c in categories]
-        found_categories = list(Category.objects.filter(slug__in=slugs))
+        found = category_registry.get_ids(slugs)
 
-        found_slugs = {c.slug for c in found_categories}
-        missing_slugs = set(slugs) - found_slugs
+        missing_slugs = set(slugs) - set(found)
 
         if missing_slugs:
             raise ErrorException(
@@ -117,17 +116,22 @@ class UserProfile(models.Model):
             )
 
         existing_ids = set(self.preferred_categories.values_list('id', flat=True))
-        new_categories = [c for c in found_categories if c.id not in existing_ids]
+        new_ids = [i for i in found.values() if i not in existing_ids]
 
         remaining_slot = MAX_PREFERRED_USER_CATEGORIES - len(existing_ids)
-        if remaining_slot > 0:
-            self.preferred_categories.add(*new_categories[:remaining_slot])
+        if remaining_slot > 0 and new_ids:
+            Through = UserProfile.preferred_categories.through
+            # a concurrent request may have added the same categories
+            Through.objects.bulk_create([
+                Through(userprofile_id=self.id, category_id=category_id)
+                for category_id in new_ids[:remaining_slot]
+            ], ignore_conflicts=True)
    
 
     def remove_categories(self, categories):
         """
         Removes categories from user's preferred categories.
         """
-        slugs = [slugify(c) for c in categories]
-        found_categories = Category.objects.filter(slug__in=slugs)
-        self.preferred_categories.remove(*found_categories)
+        found_ids = category_registry.get_ids(categories).values()
+        UserProfile.preferred_categories.through.objects.filter(
+            userprofile_id=self.id, category_id__in=found_ids).delete()
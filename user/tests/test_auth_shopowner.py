@@ -57,7 +57,7 @@ def test_shop_owner_registration(mock_verification_email_task, client, db_access
     assert 'passord' not in res.data['data']['owner']
     assert 'passord' not in res.data['data']['owner']['profile']
     assert res.data['data']['logo'] is not None
-    assert res.data['data']['logo'].startswith('/media/shp')
+    assert res.data['data']['logo'].startswith('/media/blobs/shop-logo/')
 
 
 def test_shop_owner_registration_does_not_have_cart(client, db_access):
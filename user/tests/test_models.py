@@ -3,9 +3,14 @@ Test models for the user app.
 These tests cover the User and UserProfile models.
 """
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
 
+import os
 import pytest
 
+from common.models import MediaBlob
+from common.tasks import sweep_media_tombstones
+from product.tests.fixtures import create_fake_images
 from user.models import UserProfile
 
 
@@ -128,3 +133,28 @@ def test_user_profile_deletes_when_user_is_deleted(request, factory_name):
     user.delete()
     assert User.objects.count() == (user_count - 1)
     assert UserProfile.objects.count() == (profile_count - 1)
+
+
+def test_shops_with_the_same_logo_share_the_file(shopowner_factory, test_media_dir):
+    """
+    Test that a logo uploaded by several shops is stored once.
+    """
+    content = create_fake_images(1)[0].read()
+    shops = [shopowner_factory().owned_shop for _ in range(2)]
+    for shop in shops:
+        shop.logo = SimpleUploadedFile("logo.jpg", content, content_type="image/jpeg")
+        shop.save()
+
+    assert shops[0].logo.name == shops[1].logo.name
+    assert shops[0].logo.name.startswith("blobs/shop-logo/")
+    assert MediaBlob.objects.get().ref_count == 2
+
+    path = shops[0].logo.path
+    shops[0].delete()
+    sweep_media_tombstones()
+    assert os.path.exists(path)
+    shops[1].logo = None
+    shops[1].save()
+    sweep_media_tombstones()
+    assert not os.path.exists(path)
+    assert not MediaBlob.objects.exists()